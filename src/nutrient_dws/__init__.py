@@ -3,23 +3,97 @@
 A Python client library for the Nutrient Document Web Services API.
 """
 
+from nutrient_dws.archive import ArchiveMember, ZipSink, ZipSource, iter_zip_stream
+from nutrient_dws.batch import BatchResult, BatchRunner
+from nutrient_dws.builder import Pipeline
+from nutrient_dws.circuit_breaker import CircuitBreaker, CircuitState
 from nutrient_dws.client import NutrientClient
+from nutrient_dws.coalescing import SingleFlight
+from nutrient_dws.deadline import Deadline, deadline_scope
 from nutrient_dws.exceptions import (
     APIError,
     AuthenticationError,
+    CircuitOpenError,
+    DeadlineExceededError,
     FileProcessingError,
     NutrientError,
     NutrientTimeoutError,
     ValidationError,
 )
+from nutrient_dws.file_handler import fsync_outputs
+from nutrient_dws.hedging import HedgingPolicy
+from nutrient_dws.http_client import ResponseInfo, capture_responses
+from nutrient_dws.journal import BatchJournal, ItemState
+from nutrient_dws.optimizer import OptimizationReport, optimize_actions
+from nutrient_dws.parallel import process_map
+from nutrient_dws.prefetch import Prefetcher
+from nutrient_dws.priority import Priority, PriorityScheduler, priority_scope
+from nutrient_dws.rendering import ImageOutput, RenderedPage, render_pages
+from nutrient_dws.result import Result
+from nutrient_dws.scheduling import BatchScheduler, CostModel, SchedulingPolicy
+from nutrient_dws.timeouts import TimeoutEstimator
+from nutrient_dws.transport import (
+    HTTP2Transport,
+    InMemoryResponse,
+    InMemoryTransport,
+    RequestsTransport,
+    Transport,
+)
+from nutrient_dws.watch import FolderWatcher
+from nutrient_dws.workflow import StageResult, Workflow
+from nutrient_dws.writer import BackgroundWriter
 
 __version__ = "1.0.1"
 __all__ = [
     "APIError",
+    "ArchiveMember",
     "AuthenticationError",
+    "BackgroundWriter",
+    "BatchJournal",
+    "BatchResult",
+    "BatchRunner",
+    "BatchScheduler",
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "CircuitState",
+    "CostModel",
+    "Deadline",
+    "DeadlineExceededError",
     "FileProcessingError",
+    "FolderWatcher",
+    "HTTP2Transport",
+    "HedgingPolicy",
+    "ImageOutput",
+    "InMemoryResponse",
+    "InMemoryTransport",
+    "ItemState",
     "NutrientClient",
     "NutrientError",
     "NutrientTimeoutError",
+    "OptimizationReport",
+    "Pipeline",
+    "Prefetcher",
+    "Priority",
+    "PriorityScheduler",
+    "RenderedPage",
+    "RequestsTransport",
+    "ResponseInfo",
+    "Result",
+    "SchedulingPolicy",
+    "SingleFlight",
+    "StageResult",
+    "TimeoutEstimator",
+    "Transport",
     "ValidationError",
+    "Workflow",
+    "ZipSink",
+    "ZipSource",
+    "capture_responses",
+    "deadline_scope",
+    "fsync_outputs",
+    "iter_zip_stream",
+    "optimize_actions",
+    "priority_scope",
+    "process_map",
+    "render_pages",
 ]
@@ -0,0 +1,29 @@
+"""Keep client objects usable in child processes created with ``os.fork``.
+
+A forked child inherits the parent's open sockets and the state of any lock
+that another thread held at the time of the fork. Objects that own sockets or
+locks register themselves here, and their ``_after_fork`` method runs in the
+child right after the fork so that they drop inherited connections and
+recreate their locks before first use.
+"""
+
+import os
+import weakref
+from typing import Any
+
+_registered: "weakref.WeakSet[Any]" = weakref.WeakSet()
+
+
+def register(obj: Any) -> None:
+    """Call ``obj._after_fork()`` in every child process forked from now on."""
+    _registered.add(obj)
+
+
+def _after_fork_in_child() -> None:
+    """Reset all registered objects in a freshly forked child process."""
+    for obj in list(_registered):
+        obj._after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
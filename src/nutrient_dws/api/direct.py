@@ -4,9 +4,9 @@ This file provides convenient methods that wrap the Nutrient Build API
 for supported document processing operations.
 """
 
-from typing import TYPE_CHECKING, Any, List, Optional, Protocol
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Protocol
 
-from nutrient_dws.file_handler import FileInput
+from nutrient_dws.file_handler import FileInput, FileOutput
 
 if TYPE_CHECKING:
     from nutrient_dws.builder import BuildAPIWrapper
@@ -40,7 +40,7 @@ class DirectAPIMixin:
         self,
         tool: str,
         input_file: FileInput,
-        output_path: Optional[str] = None,
+        output_path: Optional[FileOutput] = None,
         **options: Any,
     ) -> Optional[bytes]:
         """Process file method that will be provided by NutrientClient."""
@@ -49,7 +49,7 @@ class DirectAPIMixin:
     def convert_to_pdf(
         self,
         input_file: FileInput,
-        output_path: Optional[str] = None,
+        output_path: Optional[FileOutput] = None,
     ) -> Optional[bytes]:
         """Convert a document to PDF.
 
@@ -59,7 +59,8 @@ class DirectAPIMixin:
 
         Args:
             input_file: Input document (DOCX, XLSX, PPTX, etc).
-            output_path: Optional path to save the output PDF.
+            output_path: Optional path, or writable binary stream, to save the
+                output PDF to.
 
         Returns:
             Converted PDF as bytes, or None if output_path is provided.
@@ -76,7 +77,7 @@ class DirectAPIMixin:
         return self.build(input_file).execute(output_path)  # type: ignore[attr-defined,no-any-return]
 
     def flatten_annotations(
-        self, input_file: FileInput, output_path: Optional[str] = None
+        self, input_file: FileInput, output_path: Optional[FileOutput] = None
     ) -> Optional[bytes]:
         """Flatten annotations and form fields in a PDF.
 
@@ -85,7 +86,8 @@ class DirectAPIMixin:
 
         Args:
             input_file: Input file (PDF or Office document).
-            output_path: Optional path to save the output file.
+            output_path: Optional path, or writable binary stream, to save the
+                output file to.
 
         Returns:
             Processed file as bytes, or None if output_path is provided.
@@ -99,7 +101,7 @@ class DirectAPIMixin:
     def rotate_pages(
         self,
         input_file: FileInput,
-        output_path: Optional[str] = None,
+        output_path: Optional[FileOutput] = None,
         degrees: int = 0,
         page_indexes: Optional[List[int]] = None,
     ) -> Optional[bytes]:
@@ -110,7 +112,8 @@ class DirectAPIMixin:
 
         Args:
             input_file: Input file (PDF or Office document).
-            output_path: Optional path to save the output file.
+            output_path: Optional path, or writable binary stream, to save the
+                output file to.
             degrees: Rotation angle (90, 180, 270, or -90).
             page_indexes: Optional list of page indexes to rotate (0-based).
 
@@ -129,7 +132,7 @@ class DirectAPIMixin:
     def ocr_pdf(
         self,
         input_file: FileInput,
-        output_path: Optional[str] = None,
+        output_path: Optional[FileOutput] = None,
         language: str = "english",
     ) -> Optional[bytes]:
         """Apply OCR to a PDF to make it searchable.
@@ -140,7 +143,8 @@ class DirectAPIMixin:
 
         Args:
             input_file: Input file (PDF or Office document).
-            output_path: Optional path to save the output file.
+            output_path: Optional path, or writable binary stream, to save the
+                output file to.
             language: OCR language. Supported: "english", "eng", "deu", "german".
                      Default is "english".
 
@@ -156,7 +160,7 @@ class DirectAPIMixin:
     def watermark_pdf(
         self,
         input_file: FileInput,
-        output_path: Optional[str] = None,
+        output_path: Optional[FileOutput] = None,
         text: Optional[str] = None,
         image_url: Optional[str] = None,
         width: int = 200,
@@ -171,7 +175,8 @@ class DirectAPIMixin:
 
         Args:
             input_file: Input file (PDF or Office document).
-            output_path: Optional path to save the output file.
+            output_path: Optional path, or writable binary stream, to save the
+                output file to.
             text: Text to use as watermark. Either text or image_url required.
             image_url: URL of image to use as watermark.
             width: Width of the watermark in points (required).
@@ -209,7 +214,7 @@ class DirectAPIMixin:
     def apply_redactions(
         self,
         input_file: FileInput,
-        output_path: Optional[str] = None,
+        output_path: Optional[FileOutput] = None,
     ) -> Optional[bytes]:
         """Apply redaction annotations to permanently remove content.
 
@@ -219,7 +224,8 @@ class DirectAPIMixin:
 
         Args:
             input_file: Input file (PDF or Office document).
-            output_path: Optional path to save the output file.
+            output_path: Optional path, or writable binary stream, to save the
+                output file to.
 
         Returns:
             Processed file as bytes, or None if output_path is provided.
@@ -233,17 +239,19 @@ class DirectAPIMixin:
     def merge_pdfs(
         self,
         input_files: List[FileInput],
-        output_path: Optional[str] = None,
+        output_path: Optional[FileOutput] = None,
     ) -> Optional[bytes]:
         """Merge multiple PDF files into one.
 
         Combines multiple files into a single PDF in the order provided.
         Office documents (DOCX, XLSX, PPTX) will be automatically converted
-        to PDF before merging.
+        to PDF before merging. A file that appears several times, such as a
+        repeated cover page, is uploaded only once.
 
         Args:
             input_files: List of input files (PDFs or Office documents).
-            output_path: Optional path to save the output file.
+            output_path: Optional path, or writable binary stream, to save the
+                output file to.
 
         Returns:
             Merged PDF as bytes, or None if output_path is provided.
@@ -264,21 +272,39 @@ class DirectAPIMixin:
         if len(input_files) < 2:
             raise ValueError("At least 2 files required for merge")
 
-        from nutrient_dws.file_handler import prepare_file_for_upload, save_file_output
+        from nutrient_dws.file_handler import (
+            is_writable,
+            prepare_file_for_upload,
+            save_file_output,
+            upload_identity,
+        )
 
-        # Prepare files for upload
+        # Prepare files for upload, uploading repeated files only once
         files = {}
         parts = []
+        field_names: Dict[str, str] = {}
 
         for i, file in enumerate(input_files):
-            field_name = f"file{i}"
-            file_field, file_data = prepare_file_for_upload(file, field_name)
-            files[file_field] = file_data
+            identity = upload_identity(file)
+            field_name = field_names.get(identity) if identity is not None else None
+            if field_name is None:
+                field_name = f"file{i}"
+                file_field, file_data = prepare_file_for_upload(file, field_name)
+                files[file_field] = file_data
+                if identity is not None:
+                    field_names[identity] = field_name
             parts.append({"file": field_name})
 
         # Build instructions for merge (no actions needed)
         instructions = {"parts": parts, "actions": []}
 
+        # Stream the response into writable outputs as it arrives
+        if is_writable(output_path):
+            self._http_client.post(  # type: ignore[attr-defined]
+                "/build", files=files, json_data=instructions, output=output_path
+            )
+            return None
+
         # Make API request
         # Type checking: at runtime, self is NutrientClient which has _http_client
         result = self._http_client.post(  # type: ignore[attr-defined]
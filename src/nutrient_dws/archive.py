@@ -0,0 +1,518 @@
+"""Zip archives as batch input sources, output sinks and streamed responses."""
+
+import contextlib
+import fnmatch
+import io
+import json
+import os
+import posixpath
+import struct
+import threading
+import time
+import zipfile
+import zlib
+from pathlib import Path
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from nutrient_dws import _fork
+from nutrient_dws.file_handler import _temporary_path
+
+ArchiveInput = Union[str, Path, IO[bytes]]
+
+_LOCAL_HEADER_SIGNATURE = b"PK\x03\x04"
+_DESCRIPTOR_SIGNATURE = b"PK\x07\x08"
+# Records that can follow a member: the next member or the central directory
+_NEXT_RECORD_SIGNATURES = (_LOCAL_HEADER_SIGNATURE, b"PK\x01\x02")
+# Local file header after the signature, see APPNOTE.TXT 4.3.7
+_LOCAL_HEADER = struct.Struct("<HHHHHIIIHH")
+_ZIP64_EXTRA_ID = 0x0001
+_FLAG_ENCRYPTED = 0x1
+_FLAG_DATA_DESCRIPTOR = 0x8
+_FLAG_UTF8 = 0x800
+
+
+class ArchiveMember(io.RawIOBase):
+    """Readable file object over one member of a zip archive.
+
+    The member is decompressed as it is read, so it can be uploaded like an
+    open file without being extracted or loaded into memory. It is opened on
+    first read, so an archive with thousands of members does not hold
+    thousands of open streams. Seeking to the end to determine the size does
+    not decompress anything.
+
+    Members of an archive given by path can be sent to worker processes;
+    each process opens the archive once. Members of an archive read from a
+    stream can only be processed in the process that opened it.
+
+    Attributes:
+        name: Archive name joined with the member path, so the upload is
+            named after the member and journal keys differ between archives.
+        member: Path of the member inside the archive.
+        size: Uncompressed size in bytes.
+    """
+
+    def __init__(
+        self,
+        archive: zipfile.ZipFile,
+        info: zipfile.ZipInfo,
+        archive_name: str,
+        path: Optional[str],
+    ) -> None:
+        super().__init__()
+        self._archive = archive
+        self._info = info
+        self._archive_name = archive_name
+        self._path = path
+        self._stream: Optional[IO[bytes]] = None
+        self._position = 0
+        self.member = info.filename
+        self.name = os.path.join(archive_name, self.member)
+        self.size = info.file_size
+
+    @property
+    def relative_path(self) -> str:
+        """Member path with absolute and parent-directory components removed.
+
+        Use it to name outputs, so a crafted member name such as
+        ``../../etc/passwd`` cannot place an output outside its directory.
+        """
+        return _sanitize(self.member)
+
+    def readable(self) -> bool:
+        """Members are readable."""
+        return True
+
+    def seekable(self) -> bool:
+        """Members are seekable; seeking backwards restarts decompression."""
+        return True
+
+    def tell(self) -> int:
+        """Current position in the uncompressed member."""
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        """Move to a position; takes effect on the next read."""
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self.size
+        if offset < 0:
+            raise ValueError(f"Negative seek position {offset}")
+        self._position = offset
+        return offset
+
+    def readinto(self, buffer: Any) -> int:
+        """Decompress up to ``len(buffer)`` bytes into ``buffer``."""
+        if self._stream is None:
+            self._stream = self._archive.open(self._info)
+        if self._stream.tell() != self._position:
+            self._stream.seek(self._position)
+        count = self._stream.readinto(buffer)  # type: ignore[attr-defined]
+        self._position += count
+        return int(count)
+
+    def close(self) -> None:
+        """Close the decompression stream; the archive stays open."""
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+        super().close()
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        """Pickle as the archive path and member name."""
+        if self._path is None:
+            raise TypeError(
+                "Members of an archive read from a stream cannot be sent to other processes; "
+                "pass the archive by path or process it with threads"
+            )
+        return (_open_member, (self._path, self.member, self._archive_name))
+
+    def __repr__(self) -> str:
+        """Representation with the archive and member name."""
+        return f"ArchiveMember({self.name!r})"
+
+
+class ZipSource:
+    """Iterate over the files in a zip archive as inputs for batch processing.
+
+    Only the archive's central directory is read up front. Members are
+    yielded as :class:`ArchiveMember` file objects that decompress while
+    they are uploaded, so nothing is extracted to disk. Directories, macOS
+    metadata (``__MACOSX/``) and hidden files are skipped.
+
+    Args:
+        archive: Path of the archive, or a seekable binary stream.
+        pattern: Name pattern, for example ``"*.pdf"``. Patterns without a
+            ``/`` are matched against the file name, others against the
+            full member path.
+
+    Raises:
+        zipfile.BadZipFile: If ``archive`` is not a zip archive.
+
+    Example:
+        >>> runner = BatchRunner(client, Pipeline().add_step("ocr-pdf"), output="ocr/")
+        >>> with ZipSource("scans.zip", pattern="*.pdf") as source:
+        ...     results = list(runner.run(source))
+    """
+
+    def __init__(self, archive: ArchiveInput, pattern: str = "*") -> None:
+        self.pattern = pattern
+        if isinstance(archive, (str, Path)):
+            self._path: Optional[str] = os.path.abspath(archive)
+            self.name = str(archive)
+        else:
+            self._path = None
+            name = getattr(archive, "name", None)
+            self.name = name if isinstance(name, str) else "archive.zip"
+        self._archive = zipfile.ZipFile(archive)
+
+    def __iter__(self) -> Iterator[ArchiveMember]:
+        """Yield the matching members in archive order."""
+        for info in self._archive.infolist():
+            if not info.is_dir() and self._matches(info.filename):
+                yield ArchiveMember(self._archive, info, self.name, self._path)
+
+    def _matches(self, member: str) -> bool:
+        """Whether ``member`` is a regular file matching ``pattern``."""
+        parts = member.split("/")
+        if parts[0] == "__MACOSX" or parts[-1].startswith("."):
+            return False
+        target = member if "/" in self.pattern else parts[-1]
+        return fnmatch.fnmatch(target, self.pattern)
+
+    def close(self) -> None:
+        """Close the archive; members that are still being read fail afterwards."""
+        self._archive.close()
+
+    def __enter__(self) -> "ZipSource":
+        """Context manager entry."""
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        """Context manager exit; closes the archive."""
+        self.close()
+
+
+class ZipSink:
+    """Streaming zip archive that receives outputs as they are produced.
+
+    Each output is added as a member as soon as it is written, so no
+    intermediate files are created and memory holds at most the output
+    being added. A path target is written under a temporary name and
+    renamed into place on :meth:`close`, like other outputs. A writable
+    stream target, such as a pipe, socket or HTTP response body, does not
+    need to be seekable. On :meth:`close`, a JSON manifest with one entry
+    per input, including failed ones, is added as the last member.
+
+    Args:
+        target: Path of the archive, or a writable binary stream, which is
+            left open.
+        compression: ``zipfile`` compression method. Defaults to storing
+            members uncompressed, since PDFs and images are compressed
+            already.
+        manifest_name: Member name of the manifest, or None for no manifest.
+
+    Example:
+        >>> with ZipSink("results.zip") as sink:
+        ...     runner = BatchRunner(client, pipeline, archive=sink)
+        ...     results = list(runner.run(ZipSource("upload.zip")))
+    """
+
+    def __init__(
+        self,
+        target: ArchiveInput,
+        compression: int = zipfile.ZIP_STORED,
+        manifest_name: Optional[str] = "manifest.json",
+    ) -> None:
+        self.manifest_name = manifest_name
+        self._lock = threading.Lock()
+        self._names: Set[str] = set()
+        self._manifest: List[Dict[str, Any]] = []
+        if isinstance(target, (str, Path)):
+            self._path: Optional[Path] = Path(target)
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            self._temp_path: Optional[Path] = _temporary_path(self._path)
+            stream: Union[str, IO[bytes]] = str(self._temp_path)
+        else:
+            self._path = self._temp_path = None
+            stream = target
+        self._archive: Optional[zipfile.ZipFile] = zipfile.ZipFile(
+            stream, "w", compression=compression
+        )
+
+    @property
+    def manifest(self) -> List[Dict[str, Any]]:
+        """Manifest entries recorded so far."""
+        with self._lock:
+            return list(self._manifest)
+
+    def write(self, name: str, content: bytes) -> str:
+        """Add ``content`` as a member and return the member name used.
+
+        The name is made relative, stripped of ``..`` components and made
+        unique by appending a counter to the stem if it was used before.
+
+        Raises:
+            ValueError: If the archive is closed.
+        """
+        with self._lock:
+            archive = self._open_archive()
+            member = self._unique(_sanitize(name) or "output")
+            info = zipfile.ZipInfo(member, date_time=time.localtime()[:6])
+            info.compress_type = archive.compression
+            archive.writestr(info, content)
+            return member
+
+    def add_manifest_entry(self, entry: Dict[str, Any]) -> None:
+        """Record one entry of the manifest, such as ``BatchResult.to_dict()``."""
+        with self._lock:
+            self._manifest.append(entry)
+
+    def close(self) -> None:
+        """Add the manifest, finish the archive and move it into place."""
+        with self._lock:
+            archive, self._archive = self._archive, None
+            if archive is None:
+                return
+            try:
+                try:
+                    if self.manifest_name is not None:
+                        manifest = json.dumps(self._manifest, indent=2).encode()
+                        archive.writestr(self._unique(self.manifest_name), manifest)
+                finally:
+                    archive.close()
+                if self._temp_path is not None and self._path is not None:
+                    os.replace(self._temp_path, self._path)
+            except BaseException:
+                if self._temp_path is not None:
+                    with contextlib.suppress(OSError):
+                        self._temp_path.unlink()
+                raise
+
+    def _open_archive(self) -> zipfile.ZipFile:
+        """The archive being written; must be called with the lock held."""
+        if self._archive is None:
+            raise ValueError("The archive is closed")
+        return self._archive
+
+    def _unique(self, name: str) -> str:
+        """``name``, or a variant not used before; must be called with the lock held."""
+        stem, suffix = posixpath.splitext(name)
+        candidate = name
+        counter = 1
+        while candidate in self._names:
+            counter += 1
+            candidate = f"{stem}-{counter}{suffix}"
+        self._names.add(candidate)
+        return candidate
+
+    def __enter__(self) -> "ZipSink":
+        """Context manager entry."""
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        """Context manager exit; finishes the archive."""
+        self.close()
+
+
+def iter_zip_stream(chunks: Iterable[bytes]) -> Iterator[Tuple[str, bytes]]:
+    """Decode a zip archive while it is being received.
+
+    Members are read from their local headers in archive order, so each one
+    is yielded as soon as its data has arrived, without waiting for the
+    central directory at the end of the archive or seeking. Directories are
+    skipped. Members must be stored or deflated. A stored member whose size
+    follows its data, as written to unseekable streams by ``zipfile`` and
+    :class:`ZipSink`, ends at the first data descriptor that matches its
+    size and CRC-32 and is followed by the next record.
+
+    Args:
+        chunks: The archive in chunks, such as ``Result.stream()``.
+
+    Yields:
+        ``(name, content)`` for each file in the archive.
+
+    Raises:
+        zipfile.BadZipFile: If the archive is truncated, corrupt, encrypted
+            or uses a member layout that cannot be decoded as a stream.
+    """
+    reader = _StreamReader(chunks)
+    while reader.read(4, allow_end=True) == _LOCAL_HEADER_SIGNATURE:
+        (_, flags, method, _, _, crc, compressed_size, size, name_length, extra_length) = (
+            _LOCAL_HEADER.unpack(reader.read(_LOCAL_HEADER.size))
+        )
+        name = reader.read(name_length).decode("utf-8" if flags & _FLAG_UTF8 else "cp437")
+        zip64 = _zip64_sizes(reader.read(extra_length), size, compressed_size)
+        if zip64 is not None:
+            size, compressed_size = zip64
+        if flags & _FLAG_ENCRYPTED:
+            raise zipfile.BadZipFile(f"Member {name!r} is encrypted")
+
+        if method == zipfile.ZIP_DEFLATED:
+            content = reader.inflate()
+            if flags & _FLAG_DATA_DESCRIPTOR:
+                crc = _read_data_descriptor(reader, zip64 is not None)
+        elif method == zipfile.ZIP_STORED and flags & _FLAG_DATA_DESCRIPTOR:
+            content, crc = reader.read_stored(zip64 is not None)
+        elif method == zipfile.ZIP_STORED:
+            content = reader.read(compressed_size)
+        else:
+            raise zipfile.BadZipFile(
+                f"Member {name!r} cannot be decoded as a stream (compression method {method})"
+            )
+
+        if zlib.crc32(content) != crc:
+            raise zipfile.BadZipFile(f"Bad CRC-32 for member {name!r}")
+        if not name.endswith("/"):
+            yield name, content
+
+
+class _StreamReader:
+    """Buffered reads of exact sizes from an iterable of chunks."""
+
+    def __init__(self, chunks: Iterable[bytes]) -> None:
+        self._chunks = iter(chunks)
+        self._buffer = bytearray()
+
+    def read(self, size: int, allow_end: bool = False) -> bytes:
+        """Read exactly ``size`` bytes, or nothing at the end if ``allow_end``."""
+        while len(self._buffer) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                if allow_end and not self._buffer:
+                    return b""
+                raise zipfile.BadZipFile("The archive ends unexpectedly")
+            self._buffer += chunk
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    def inflate(self) -> bytes:
+        """Decompress one raw deflate stream and keep the data that follows it."""
+        decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+        parts = []
+        while not decompressor.eof:
+            if not self._buffer:
+                self._fill()
+            data = bytes(self._buffer)
+            self._buffer.clear()
+            try:
+                parts.append(decompressor.decompress(data))
+            except zlib.error as e:
+                raise zipfile.BadZipFile(f"Corrupt deflate data: {e}") from e
+        self._buffer[:0] = decompressor.unused_data
+        return b"".join(parts)
+
+    def read_stored(self, zip64: bool) -> Tuple[bytes, int]:
+        """Read stored data of unknown size and the data descriptor that follows it.
+
+        Stored data may contain the descriptor signature itself, so a
+        candidate descriptor only ends the data if its sizes and CRC-32 match
+        and the next member or the central directory follows it.
+
+        Returns:
+            The data and the CRC-32 recorded in the descriptor.
+        """
+        sizes = struct.Struct("<QQ" if zip64 else "<II")
+        descriptor_size = len(_DESCRIPTOR_SIGNATURE) + 4 + sizes.size
+        start = 0
+        while True:
+            index = self._buffer.find(_DESCRIPTOR_SIGNATURE, start)
+            if index < 0:
+                # Keep looking from the end, where a signature may be split across chunks
+                start = max(0, len(self._buffer) - len(_DESCRIPTOR_SIGNATURE) + 1)
+                self._fill()
+                continue
+            end = index + descriptor_size
+            if len(self._buffer) < end + 4:
+                start = index
+                self._fill()
+                continue
+            (crc,) = struct.unpack_from("<I", self._buffer, index + 4)
+            compressed_size, size = sizes.unpack_from(self._buffer, index + 8)
+            data = bytes(self._buffer[:index])
+            if (
+                compressed_size == size == index
+                and bytes(self._buffer[end : end + 4]) in _NEXT_RECORD_SIGNATURES
+                and zlib.crc32(data) == crc
+            ):
+                del self._buffer[:end]
+                return data, int(crc)
+            start = index + 1
+
+    def _fill(self) -> None:
+        """Append the next chunk to the buffer."""
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            raise zipfile.BadZipFile("The archive ends unexpectedly")
+        self._buffer += chunk
+
+
+def _zip64_sizes(extra: bytes, size: int, compressed_size: int) -> Optional[Tuple[int, int]]:
+    """Sizes from the zip64 extra field, if the local header defers to it."""
+    while len(extra) >= 4:
+        header_id, length = struct.unpack("<HH", extra[:4])
+        if header_id == _ZIP64_EXTRA_ID:
+            values = list(struct.unpack(f"<{length // 8}Q", extra[4 : 4 + length // 8 * 8]))
+            if size == 0xFFFFFFFF and values:
+                size = values.pop(0)
+            if compressed_size == 0xFFFFFFFF and values:
+                compressed_size = values.pop(0)
+            return size, compressed_size
+        extra = extra[4 + length :]
+    return None
+
+
+def _read_data_descriptor(reader: _StreamReader, zip64: bool) -> int:
+    """Skip the data descriptor after a member and return its CRC-32."""
+    crc = reader.read(4)
+    if crc == _DESCRIPTOR_SIGNATURE:
+        crc = reader.read(4)
+    reader.read(16 if zip64 else 8)
+    return int(struct.unpack("<I", crc)[0])
+
+
+def _sanitize(name: str) -> str:
+    """Relative member path without empty, ``.`` and ``..`` components."""
+    parts = name.replace("\\", "/").split("/")
+    return "/".join(part for part in parts if part not in ("", ".", ".."))
+
+
+def is_zip_archive(path: Union[str, Path]) -> bool:
+    """Whether ``path`` names a zip archive to be used as an input source.
+
+    Only the ``.zip`` suffix counts: DOCX, XLSX and PPTX files are zip files
+    too, but are documents in their own right.
+    """
+    return Path(path).suffix.lower() == ".zip" and zipfile.is_zipfile(path)
+
+
+class _ArchiveCache:
+    """Archives opened by path in this process, shared by unpickled members."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._archives: Dict[str, zipfile.ZipFile] = {}
+        _fork.register(self)
+
+    def get(self, path: str) -> zipfile.ZipFile:
+        """Return the open archive at ``path``, opening it on first use."""
+        with self._lock:
+            archive = self._archives.get(path)
+            if archive is None:
+                archive = self._archives[path] = zipfile.ZipFile(path)
+            return archive
+
+    def _after_fork(self) -> None:
+        """Drop archives whose file offsets are shared with the parent."""
+        self._lock = threading.Lock()
+        self._archives = {}
+
+
+_cache = _ArchiveCache()
+
+
+def _open_member(path: str, member: str, archive_name: str) -> ArchiveMember:
+    """Recreate a pickled member from the archive at ``path``."""
+    archive = _cache.get(path)
+    return ArchiveMember(archive, archive.getinfo(member), archive_name, path)
@@ -0,0 +1,763 @@
+"""Batch processing of many inputs across a pool of workers."""
+
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from multiprocessing.context import BaseContext
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from nutrient_dws.archive import ArchiveMember, ZipSink
+from nutrient_dws.builder import Pipeline
+from nutrient_dws.client import NutrientClient
+from nutrient_dws.coalescing import content_digest
+from nutrient_dws.deadline import Deadline, DeadlineLike, current_deadline, earliest
+from nutrient_dws.file_handler import (
+    FileInput,
+    copy_file_output,
+    fsync_outputs,
+    get_file_size,
+)
+from nutrient_dws.http_client import capture_responses
+from nutrient_dws.journal import BatchJournal, input_key
+from nutrient_dws.parallel import _init_worker, worker_client
+from nutrient_dws.prefetch import PrefetchedInput, Prefetcher
+from nutrient_dws.priority import current_priority
+from nutrient_dws.scheduling import BatchScheduler
+from nutrient_dws.writer import BackgroundWriter
+
+logger = logging.getLogger(__name__)
+
+OutputSpec = Union[None, str, Path, Callable[[FileInput], str]]
+ProgressCallback = Callable[[Dict[str, Any], "BatchResult"], None]
+
+
+class BatchResult:
+    """Outcome of processing one input of a batch.
+
+    Attributes:
+        input: The input as passed to the runner.
+        output_path: Where the output was written, if an output location was set.
+        content: Output bytes when no output location was set, otherwise None.
+        error: The exception raised while processing, or None on success.
+        duration: Processing time in seconds, measured in the worker.
+        worker: Process ID of the worker that handled the input.
+        input_size: Size of the input in bytes, if known.
+        request_id: Request ID of the API call, if reported.
+        credits: Credits charged for the input, if reported, including
+            abandoned hedge attempts that completed while it was processed.
+        duplicate_of: The earlier input with identical content whose result
+            was reused for this input, if any.
+        write_time: Seconds spent writing the output in the background, when
+            the runner has a :class:`~nutrient_dws.writer.BackgroundWriter`.
+        read_time: Seconds spent reading the input ahead of time, when the
+            runner has a :class:`~nutrient_dws.prefetch.Prefetcher` and the
+            input was read ahead.
+    """
+
+    def __init__(
+        self,
+        input: FileInput,
+        output_path: Optional[str] = None,
+        content: Optional[bytes] = None,
+        error: Optional[BaseException] = None,
+        duration: float = 0.0,
+        worker: int = 0,
+        input_size: Optional[int] = None,
+        request_id: Optional[str] = None,
+        credits: Optional[float] = None,
+        duplicate_of: Optional[FileInput] = None,
+        write_time: Optional[float] = None,
+        read_time: Optional[float] = None,
+    ) -> None:
+        self.input = input
+        self.output_path = output_path
+        self.content = content
+        self.error = error
+        self.duration = duration
+        self.worker = worker
+        self.input_size = input_size
+        self.request_id = request_id
+        self.credits = credits
+        self.duplicate_of = duplicate_of
+        self.write_time = write_time
+        self.read_time = read_time
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable summary of the outcome, as recorded in archive manifests."""
+        return {
+            "input": _describe(self.input),
+            "output": self.output_path if self.ok else None,
+            "ok": self.ok,
+            "error": None if self.error is None else str(self.error),
+            "request_id": self.request_id,
+            "credits": self.credits,
+            "input_size": self.input_size,
+            "duration": round(self.duration, 3),
+            "duplicate_of": None if self.duplicate_of is None else _describe(self.duplicate_of),
+        }
+
+    @property
+    def ok(self) -> bool:
+        """Whether the input was processed successfully."""
+        return self.error is None
+
+    def __repr__(self) -> str:
+        """Representation with the input and outcome."""
+        outcome = "ok" if self.ok else f"error={self.error!r}"
+        return f"BatchResult(input={_describe(self.input)!r}, {outcome})"
+
+
+def _process(
+    client: NutrientClient,
+    pipeline: Pipeline,
+    item: FileInput,
+    output_path: Optional[str],
+    fsync: bool = False,
+    defer_write: bool = False,
+    prefetched: Optional[PrefetchedInput] = None,
+    deadline: Optional[Deadline] = None,
+    priority: Optional[str] = None,
+) -> BatchResult:
+    """Run ``pipeline`` on one input and capture the outcome.
+
+    With ``defer_write``, the output is returned as ``content`` instead of
+    being saved, so the caller can write it to ``output_path`` later. With
+    ``prefetched``, its in-memory copy of the input is uploaded.
+    """
+    started = time.monotonic()
+    upload = prefetched.upload if prefetched is not None else item
+    result = BatchResult(
+        item,
+        output_path,
+        worker=os.getpid(),
+        input_size=get_file_size(upload),
+        read_time=prefetched.read_time if prefetched is not None else None,
+    )
+    with capture_responses() as responses, fsync_outputs(fsync):
+        try:
+            result.content = pipeline.build(client, upload).execute(
+                output_path=None if defer_write else output_path,
+                deadline=deadline,
+                priority=priority,
+            )
+        except Exception as e:
+            result.error = e
+    used = [info for info in responses if not info.discarded]
+    if used:
+        result.request_id = used[-1].request_id
+    elif result.error is not None:
+        result.request_id = getattr(result.error, "request_id", None)
+    # Abandoned hedge attempts are billed as well
+    billed = [info.credits_used for info in responses if info.credits_used is not None]
+    if billed:
+        result.credits = sum(billed)
+    result.duration = time.monotonic() - started
+    return result
+
+
+def _process_in_worker(
+    pipeline: Pipeline,
+    item: FileInput,
+    output_path: Optional[str],
+    fsync: bool = False,
+    defer_write: bool = False,
+    prefetched: Optional[PrefetchedInput] = None,
+    expires_at: Optional[float] = None,
+    priority: Optional[str] = None,
+) -> BatchResult:
+    """Run ``pipeline`` with the client of the current worker process.
+
+    ``expires_at`` is the deadline as wall-clock time, since monotonic clocks
+    are not comparable across processes on every platform.
+    """
+    deadline = Deadline(expires_at - time.time()) if expires_at is not None else None
+    return _process(
+        worker_client(),
+        pipeline,
+        item,
+        output_path,
+        fsync,
+        defer_write,
+        prefetched,
+        deadline,
+        priority,
+    )
+
+
+class BatchRunner:
+    """Apply a :class:`~nutrient_dws.builder.Pipeline` to many inputs in parallel.
+
+    By default inputs are distributed across long-lived worker processes.
+    Each worker receives a copy of the client's configuration once and keeps
+    its own warm connection pool for all inputs it handles, so client-side
+    work such as reading, hashing and writing files is spread over all cores
+    instead of being limited by the GIL. Results stream back as they
+    complete, and errors are captured per input instead of stopping the batch.
+
+    With ``use_processes=False`` a thread pool sharing the client is used,
+    which avoids process start-up costs for small batches.
+
+    Args:
+        client: Client whose configuration the workers use.
+        pipeline: Workflow to apply to every input. A Builder can be
+            converted with ``BuildAPIWrapper.to_pipeline()``.
+        output: Where to write outputs: a directory (outputs are named after
+            path inputs with a ``.pdf`` suffix, and members of a
+            :class:`~nutrient_dws.archive.ZipSource` keep their path inside
+            the archive), a callable mapping an input to an output path, or
+            None to return the output bytes. With an ``archive``, a callable
+            returns member names and None names members like a directory.
+        max_workers: Number of workers. Defaults to the CPU count.
+        use_processes: Use worker processes (default) or threads.
+        mp_context: Optional multiprocessing context for the process pool.
+        max_pending: Maximum number of inputs submitted but not finished,
+            which bounds memory use for very large batches. Defaults to four
+            times the number of workers.
+        on_progress: Optional callback invoked in the calling thread as
+            ``callback(metrics, result)`` after every completed input.
+        rate_limit: Optional maximum number of inputs started per second,
+            across all workers.
+        journal: Optional :class:`~nutrient_dws.journal.BatchJournal`. Inputs
+            it records as done are skipped, and every outcome is written to
+            it, so an interrupted job can be resumed by running it again.
+        scheduler: Optional :class:`~nutrient_dws.scheduling.BatchScheduler`
+            that orders inputs by estimated cost, for example shortest
+            first. The next input is chosen when a worker becomes free, so
+            ``max_pending`` defaults to the number of workers in this case.
+        deduplicate: Process inputs with identical content once. Later
+            duplicates wait for the first one and receive a copy of its
+            output instead of being sent to the API again. Without an
+            output location, the inputs are hashed in a first pass, so that
+            an output held for its duplicates is released after the last one.
+        fsync: Flush every output file to stable storage before the input
+            is reported as done, so a completed input survives a power
+            failure. Outputs are always written atomically; this only adds
+            durability, at the cost of slower writes.
+        writer: Optional :class:`~nutrient_dws.writer.BackgroundWriter`.
+            Workers hand their outputs to it instead of writing them
+            themselves and take the next input right away, so requests and
+            disk writes overlap. An input is reported as done once its
+            output is written, and a full writer queue holds back new inputs.
+        prefetcher: Optional :class:`~nutrient_dws.prefetch.Prefetcher` that
+            reads upcoming path inputs into memory on background threads
+            while earlier inputs are being processed. Inputs the journal
+            records as done are not read.
+        archive: Optional :class:`~nutrient_dws.archive.ZipSink`. Outputs
+            are added to it as they complete, instead of being written as
+            files, and every input gets a manifest entry, including failed
+            ones. Duplicate inputs refer to the member of the first one.
+
+    Example:
+        >>> pipeline = Pipeline().add_step("ocr-pdf")
+        >>> runner = BatchRunner(client, pipeline, output="ocr/", max_workers=8)
+        >>> for result in runner.run(Path("scans").glob("*.pdf")):
+        ...     if not result.ok:
+        ...         print(result.input, result.error)
+        >>> runner.metrics["succeeded"]
+    """
+
+    def __init__(
+        self,
+        client: NutrientClient,
+        pipeline: Pipeline,
+        output: OutputSpec = None,
+        max_workers: Optional[int] = None,
+        use_processes: bool = True,
+        mp_context: Optional[BaseContext] = None,
+        max_pending: Optional[int] = None,
+        on_progress: Optional[ProgressCallback] = None,
+        rate_limit: Optional[float] = None,
+        journal: Optional[BatchJournal] = None,
+        scheduler: Optional[BatchScheduler] = None,
+        deduplicate: bool = False,
+        fsync: bool = False,
+        writer: Optional[BackgroundWriter] = None,
+        prefetcher: Optional[Prefetcher] = None,
+        archive: Optional[ZipSink] = None,
+    ) -> None:
+        if rate_limit is not None and rate_limit <= 0:
+            raise ValueError("rate_limit must be positive")
+        if archive is not None and isinstance(output, (str, Path)):
+            raise ValueError("Pass either an output directory or an archive, not both")
+
+        self.client = client
+        self.pipeline = pipeline
+        self.output = output
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.use_processes = use_processes
+        self.mp_context = mp_context
+        self.max_pending = max_pending or self.max_workers * (1 if scheduler is not None else 4)
+        self.on_progress = on_progress
+        self.rate_limit = rate_limit
+        self.journal = journal
+        self.scheduler = scheduler
+        self.deduplicate = deduplicate
+        self.fsync = fsync
+        self.writer = writer
+        self.prefetcher = prefetcher
+        self.archive = archive
+
+        self._lock = threading.Lock()
+        self._started_at: Optional[float] = None
+        self._counters = {
+            "submitted": 0,
+            "completed": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "skipped": 0,
+            "deduplicated": 0,
+        }
+        self._credits = 0.0
+        self._bytes_in = 0
+        self._busy_seconds = 0.0
+        self._completion_seconds = 0.0
+        self._next_start = 0.0
+        # Deduplication: first input per content digest, or its result once finished
+        self._leaders: Dict[str, Union[Future[BatchResult], BatchResult]] = {}
+        self._followers: Dict[Future[BatchResult], List[Tuple[FileInput, Optional[str]]]] = {}
+        self._digests: Dict[Future[BatchResult], str] = {}
+        # Digests found by the first pass, and how many inputs with each digest are still to come
+        self._input_digests: Dict[int, Optional[str]] = {}
+        self._remaining: Optional[Counter[str]] = None
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        """Aggregate progress and throughput of the current or last run."""
+        with self._lock:
+            elapsed = time.monotonic() - self._started_at if self._started_at else 0.0
+            completed = self._counters["completed"]
+            return {
+                **self._counters,
+                "bytes_in": self._bytes_in,
+                "credits": self._credits,
+                "elapsed": elapsed,
+                "items_per_second": completed / elapsed if elapsed else 0.0,
+                "mean_duration": self._busy_seconds / completed if completed else 0.0,
+                "mean_completion": self._completion_seconds / completed if completed else 0.0,
+                **self._writer_metrics(),
+                **self._prefetch_metrics(),
+            }
+
+    def output_path_for(self, item: FileInput) -> Optional[str]:
+        """Return the output path for ``item`` according to ``output``.
+
+        Raises:
+            ValueError: If ``output`` is a directory and ``item`` has no file name.
+        """
+        if callable(self.output):
+            return str(self.output(item))
+        if self.output is None and self.archive is None:
+            return None
+        # Archive members are named like files in an output directory
+        directory = Path(self.output) if self.output is not None else Path()
+        if isinstance(item, ArchiveMember):
+            # Mirror the directory tree inside the archive
+            return str(directory / Path(item.relative_path).with_suffix(".pdf"))
+        if not isinstance(item, (str, Path)):
+            raise ValueError(
+                "An output directory requires path inputs; pass a callable as output instead"
+            )
+        return str(directory / Path(item).with_suffix(".pdf").name)
+
+    def run(
+        self, inputs: Iterable[FileInput], deadline: DeadlineLike = None
+    ) -> Iterator[BatchResult]:
+        """Process ``inputs`` and yield results in completion order.
+
+        Inputs are consumed lazily, so ``inputs`` may be a generator over a
+        very large directory. With a ``scheduler``, inputs are read ahead up
+        to its window and submitted in its order.
+
+        The deadline and priority lane active in the calling thread, set with
+        :func:`~nutrient_dws.deadline.deadline_scope` and
+        :func:`~nutrient_dws.priority.priority_scope`, apply to the requests
+        of all workers.
+
+        Args:
+            inputs: Inputs to process.
+            deadline: Optional time budget in seconds, or a ``Deadline``, for
+                the whole batch. Inputs not finished by then fail with
+                ``DeadlineExceededError``.
+
+        Yields:
+            One :class:`BatchResult` per processed input. Inputs skipped
+            because the journal records them as done yield no result.
+        """
+        self._start()
+        batch_deadline = earliest(Deadline.coerce(deadline), current_deadline())
+        with self._create_executor() as executor:
+            pending: Dict[Future[BatchResult], Tuple[FileInput, Optional[str]]] = {}
+            if self.scheduler is not None:
+                tools = [tool for tool, _ in self.pipeline.steps]
+                inputs = self.scheduler.order(inputs, tools)
+            unfinished: Iterable[FileInput] = self._unfinished(inputs)
+            if self.deduplicate and self.output is None and self.archive is None:
+                unfinished = self._count_digests(unfinished)
+            try:
+                for prefetched in self._prefetch(unfinished):
+                    item = prefetched.input
+                    key = self._journal_key(item)
+                    digest = self._digest_of(prefetched)
+                    leader = self._leaders.get(digest) if digest is not None else None
+                    if isinstance(leader, BatchResult):
+                        yield self._finish(self._duplicate(leader, item), key)
+                        self._release(digest)
+                        continue
+                    if leader is not None:
+                        self._followers[leader].append((item, key))
+                        continue
+                    future = self._submit(executor, item, key, prefetched, batch_deadline)
+                    pending[future] = (item, key)
+                    if digest is not None:
+                        self._leaders[digest] = future
+                        self._followers[future] = []
+                        self._digests[future] = digest
+                    # Wait for capacity before the next input is chosen
+                    while len(pending) >= self.max_pending:
+                        yield from self._collect(pending)
+                while pending:
+                    yield from self._collect(pending)
+            finally:
+                if self.journal is not None:
+                    self.journal.commit()
+
+    def _start(self) -> None:
+        """Reset the metrics and prepare the journal and output directory for a run."""
+        with self._lock:
+            self._started_at = time.monotonic()
+            self._counters = dict.fromkeys(self._counters, 0)
+            self._bytes_in = 0
+            self._credits = 0.0
+            self._busy_seconds = 0.0
+            self._completion_seconds = 0.0
+        self._leaders.clear()
+        self._followers.clear()
+        self._digests.clear()
+        self._input_digests.clear()
+        self._remaining = None
+
+        if self.journal is not None:
+            self.journal.bind_pipeline(json.dumps(self.pipeline.to_dict(), sort_keys=True))
+
+        if isinstance(self.output, (str, Path)):
+            Path(self.output).mkdir(parents=True, exist_ok=True)
+
+    def _unfinished(self, inputs: Iterable[FileInput]) -> Iterator[FileInput]:
+        """Inputs that the journal does not record as done."""
+        for item in inputs:
+            key = self._journal_key(item)
+            if key is not None and self.journal is not None and self.journal.is_done(key):
+                with self._lock:
+                    self._counters["skipped"] += 1
+                continue
+            yield item
+
+    def _prefetch(self, inputs: Iterable[FileInput]) -> Iterator[PrefetchedInput]:
+        """Inputs read ahead by the prefetcher, or passed through without one."""
+        if self.prefetcher is not None:
+            return self.prefetcher.prefetch(inputs)
+        return (PrefetchedInput(item) for item in inputs)
+
+    def _journal_key(self, item: FileInput) -> Optional[str]:
+        """Journal key of ``item``, or None without a journal or for unnamed inputs."""
+        if self.journal is None:
+            return None
+        try:
+            return input_key(item)
+        except ValueError:
+            return None
+
+    def _create_executor(self) -> Executor:
+        """Create the worker pool."""
+        if self.use_processes:
+            return ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=self.mp_context,
+                initializer=_init_worker,
+                initargs=(self.client,),
+            )
+        return ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="nutrient-batch")
+
+    def _throttle(self) -> None:
+        """Wait until the next input may be started under ``rate_limit``."""
+        if self.rate_limit is None:
+            return
+        now = time.monotonic()
+        if self._next_start > now:
+            time.sleep(self._next_start - now)
+            now = self._next_start
+        self._next_start = now + 1.0 / self.rate_limit
+
+    def _submit(
+        self,
+        executor: Executor,
+        item: FileInput,
+        key: Optional[str],
+        prefetched: Optional[PrefetchedInput] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> "Future[BatchResult]":
+        """Submit one input, turning setup errors into a failed result."""
+        self._throttle()
+        with self._lock:
+            self._counters["submitted"] += 1
+        if key is not None and self.journal is not None:
+            self.journal.mark_in_flight(key)
+        try:
+            output_path = self.output_path_for(item)
+        except ValueError as e:
+            future: Future[BatchResult] = Future()
+            future.set_result(BatchResult(item, error=e))
+            return future
+
+        defer_write = self.writer is not None or self.archive is not None
+        if self.use_processes:
+            return executor.submit(
+                _process_in_worker,
+                self.pipeline,
+                item,
+                output_path,
+                self.fsync,
+                defer_write,
+                prefetched,
+                time.time() + deadline.remaining() if deadline is not None else None,
+                current_priority(),
+            )
+        # Worker threads do not inherit the scopes active in this thread
+        context = contextvars.copy_context()
+        return executor.submit(
+            context.run,
+            _process,
+            self.client,
+            self.pipeline,
+            item,
+            output_path,
+            self.fsync,
+            defer_write,
+            prefetched,
+            deadline,
+        )
+
+    def _collect(
+        self,
+        pending: Dict["Future[BatchResult]", Tuple[FileInput, Optional[str]]],
+        timeout: Optional[float] = None,
+    ) -> Iterator[BatchResult]:
+        """Wait for at least one pending input and yield the finished results.
+
+        Finished futures are removed from ``pending`` and recorded in the
+        journal. With a ``timeout``, nothing is yielded if no input finishes
+        in time.
+        """
+        done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        for future in done:
+            item, key = pending.pop(future)
+            try:
+                result = future.result()
+            except Exception as e:
+                # The input or result could not be transferred to or from the worker
+                result = BatchResult(item, error=e)
+
+            if self.archive is not None:
+                self._add_to_archive(result)
+            elif self._needs_write(result):
+                # Report the input once the writer has saved its output
+                written = self._write(result)
+                pending[written] = (item, key)
+                digest = self._digests.pop(future, None)
+                if digest is not None:
+                    self._leaders[digest] = written
+                    self._followers[written] = self._followers.pop(future)
+                    self._digests[written] = digest
+                continue
+
+            yield self._finish(result, key)
+
+            digest = self._digests.pop(future, None)
+            if digest is not None:
+                self._leaders[digest] = self._leader_record(result)
+                for follower, follower_key in self._followers.pop(future):
+                    yield self._finish(self._duplicate(result, follower), follower_key)
+                self._release(digest)
+
+    def _add_to_archive(self, result: BatchResult) -> None:
+        """Add the output of ``result`` to the archive under its output name."""
+        assert self.archive is not None
+        if not result.ok or result.content is None or result.output_path is None:
+            return
+        try:
+            result.output_path = self.archive.write(result.output_path, result.content)
+        except (OSError, ValueError) as e:
+            result.error = e
+            result.output_path = None
+        result.content = None
+
+    def _needs_write(self, result: BatchResult) -> bool:
+        """Whether ``result`` carries an output that the writer still has to save."""
+        return (
+            self.writer is not None
+            and result.ok
+            and result.output_path is not None
+            and result.content is not None
+        )
+
+    def _write(self, result: BatchResult) -> "Future[BatchResult]":
+        """Hand the output of ``result`` to the writer; blocks while the writer is full."""
+        assert self.writer is not None
+        assert result.content is not None and result.output_path is not None
+        written: Future[BatchResult] = Future()
+
+        def done(write: "Future[float]") -> None:
+            try:
+                result.write_time = write.result()
+            except Exception as e:
+                result.error = e
+            written.set_result(result)
+
+        content, result.content = result.content, None
+        self.writer.submit(content, result.output_path, self.fsync).add_done_callback(done)
+        return written
+
+    def _writer_metrics(self) -> Dict[str, Any]:
+        """Queue depth and write latency of the writer, if there is one."""
+        if self.writer is None:
+            return {}
+        metrics = self.writer.metrics
+        return {
+            "write_queue_depth": metrics["queue_depth"],
+            "mean_write_seconds": metrics["mean_write_seconds"],
+            "max_write_seconds": metrics["max_write_seconds"],
+        }
+
+    def _prefetch_metrics(self) -> Dict[str, Any]:
+        """Read times and stalls of the prefetcher, if there is one."""
+        if self.prefetcher is None:
+            return {}
+        metrics = self.prefetcher.metrics
+        return {
+            "prefetched_bytes": metrics["buffered_bytes"],
+            "mean_read_seconds": metrics["mean_read_seconds"],
+            "max_read_seconds": metrics["max_read_seconds"],
+            "read_stall_seconds": metrics["stall_seconds"],
+        }
+
+    def _finish(self, result: BatchResult, key: Optional[str]) -> BatchResult:
+        """Record a finished input in the metrics and journal and report progress."""
+        with self._lock:
+            self._counters["completed"] += 1
+            self._counters["succeeded" if result.ok else "failed"] += 1
+            self._bytes_in += result.input_size or 0
+            self._credits += result.credits or 0.0
+            self._busy_seconds += result.duration
+            self._completion_seconds += time.monotonic() - (self._started_at or 0.0)
+        if self.archive is not None:
+            self.archive.add_manifest_entry(result.to_dict())
+        if key is not None and self.journal is not None:
+            if result.ok:
+                self.journal.mark_done(key, result.output_path, result.request_id, result.credits)
+            else:
+                self.journal.mark_failed(key, str(result.error), result.request_id, result.credits)
+        if not result.ok:
+            logger.debug(f"Batch item {_describe(result.input)} failed: {result.error}")
+        if self.on_progress is not None:
+            self.on_progress(self.metrics, result)
+        return result
+
+    def _content_digest(self, item: FileInput) -> Optional[str]:
+        """Content digest used to deduplicate ``item``, or None if not deduplicating."""
+        if not self.deduplicate:
+            return None
+        try:
+            return content_digest(item)
+        except OSError:
+            # Let the worker report the unreadable input
+            return None
+
+    def _count_digests(self, inputs: Iterable[FileInput]) -> List[FileInput]:
+        """Hash all ``inputs`` up front and count the inputs sharing each digest."""
+        items = list(inputs)
+        self._remaining = Counter()
+        for item in items:
+            digest = self._input_digests[id(item)] = self._content_digest(item)
+            if digest is not None:
+                self._remaining[digest] += 1
+        return items
+
+    def _digest_of(self, prefetched: PrefetchedInput) -> Optional[str]:
+        """Content digest of an input, counting it as seen if it was hashed up front."""
+        if id(prefetched.input) not in self._input_digests:
+            return self._content_digest(prefetched.upload)
+        digest = self._input_digests[id(prefetched.input)]
+        if digest is not None and self._remaining is not None:
+            self._remaining[digest] -= 1
+        return digest
+
+    def _release(self, digest: Optional[str]) -> None:
+        """Forget the finished leader of ``digest`` once no input with that digest is to come."""
+        if digest is not None and self._remaining is not None and self._remaining[digest] <= 0:
+            self._leaders.pop(digest, None)
+
+    def _leader_record(self, result: BatchResult) -> BatchResult:
+        """What later duplicates need of a leader's result.
+
+        Outputs written to files or an archive are referred to by their path,
+        so the output bytes are only kept when outputs are returned in memory.
+        """
+        return BatchResult(
+            result.input,
+            result.output_path,
+            content=result.content if result.output_path is None else None,
+            error=result.error,
+            input_size=result.input_size,
+            request_id=result.request_id,
+        )
+
+    def _duplicate(self, leader: BatchResult, item: FileInput) -> BatchResult:
+        """Result for ``item`` reusing the result of an input with identical content."""
+        with self._lock:
+            self._counters["deduplicated"] += 1
+        result = BatchResult(
+            item,
+            input_size=leader.input_size,
+            request_id=leader.request_id,
+            duplicate_of=leader.input,
+        )
+        if not leader.ok:
+            result.error = leader.error
+            return result
+        if self.archive is not None:
+            # The archive holds one copy that the manifest refers to
+            result.output_path = leader.output_path
+            return result
+        try:
+            result.output_path = self.output_path_for(item)
+            if result.output_path is None:
+                result.content = leader.content
+            elif leader.output_path is not None and result.output_path != leader.output_path:
+                copy_file_output(leader.output_path, result.output_path, self.fsync)
+        except (ValueError, OSError) as e:
+            result.error = e
+        return result
+
+
+def _describe(item: Any) -> str:
+    """Short description of an input for logs and representations."""
+    if isinstance(item, (str, Path)):
+        return str(item)
+    if isinstance(item, bytes):
+        return f"<{len(item)} bytes>"
+    if isinstance(item, ArchiveMember):
+        return item.name
+    return repr(item)
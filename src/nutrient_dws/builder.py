@@ -1,8 +1,32 @@
 """Builder API implementation for multi-step workflows."""
 
-from typing import Any, Dict, List, Optional
-
-from nutrient_dws.file_handler import FileInput, prepare_file_for_upload, save_file_output
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, List, Literal, Optional, Sequence, Tuple, Union, overload
+
+from nutrient_dws.deadline import DeadlineLike
+from nutrient_dws.file_handler import (
+    FileInput,
+    FileOutput,
+    get_file_size,
+    is_writable,
+    prepare_file_for_upload,
+    save_file_output,
+    upload_identity,
+)
+from nutrient_dws.optimizer import OptimizationReport, optimize_instructions
+from nutrient_dws.result import Result
+
+# Build API action type of each tool
+TOOL_ACTIONS = {
+    "rotate-pages": "rotate",
+    "ocr-pdf": "ocr",
+    "watermark-pdf": "watermark",
+    "flatten-annotations": "flatten",
+    "apply-instant-json": "applyInstantJson",
+    "apply-xfdf": "applyXfdf",
+    "create-redactions": "createRedactions",
+    "apply-redactions": "applyRedactions",
+}
 
 
 class BuildAPIWrapper:
@@ -17,31 +41,147 @@ class BuildAPIWrapper:
         ...     .add_step(tool="ocr-pdf", options={"language": "en"}) \\
         ...     .add_step(tool="watermark-pdf", options={"text": "CONFIDENTIAL"}) \\
         ...     .execute(output_path="processed.pdf")
+
+        A document can also be assembled from several parts, each with its
+        own page range and actions, in a single request:
+
+        >>> client.build() \\
+        ...     .add_part(html="cover.html", assets=["logo.png"]) \\
+        ...     .add_part("scan.pdf", pages=(0, 9), steps=[("ocr-pdf", {"language": "en"})]) \\
+        ...     .add_part("appendix.pdf", steps=[("flatten-annotations", {})]) \\
+        ...     .execute(output_path="report.pdf")
     """
 
-    def __init__(self, client: Any, input_file: FileInput) -> None:
+    def __init__(self, client: Any, input_file: Optional[FileInput] = None) -> None:
         """Initialize builder with client and input file.
 
         Args:
             client: NutrientClient instance.
-            input_file: Input file to process.
+            input_file: Input file to process. Without one, the document is
+                assembled from parts added with :meth:`add_part`.
         """
         self._client = client
         self._input_file = input_file
-        self._parts: List[Dict[str, Any]] = [{"file": "file"}]  # Main file
-        self._files: Dict[str, FileInput] = {"file": input_file}  # Track files
+        self._parts: List[Dict[str, Any]] = []
+        self._files: Dict[str, FileInput] = {}  # Track files
+        # Upload name of each distinct file, so repeated files are uploaded once
+        self._upload_names: Dict[str, str] = {}
+        if input_file is not None:
+            self._parts.append({"file": self._register_file(input_file, "file")})  # Main file
         self._actions: List[Dict[str, Any]] = []
+        self._tools: List[str] = []
+        self._steps: List[Tuple[str, Dict[str, Any]]] = []
         self._output_options: Dict[str, Any] = {}
 
     def _add_file_part(self, file: FileInput, name: str) -> None:
         """Add an additional file part for operations like merge.
 
+        A file that is already part of the request is not uploaded again;
+        the new part refers to the existing upload.
+
         Args:
             file: File to add.
             name: Name for the file part.
         """
-        self._parts.append({"file": name})
+        self._parts.append({"file": self._register_file(file, name)})
+
+    def _register_file(self, file: FileInput, name: str) -> str:
+        """Add ``file`` to the uploads unless it is already included, and return its name."""
+        identity = upload_identity(file)
+        existing = self._upload_names.get(identity) if identity is not None else None
+        if existing is not None:
+            return existing
         self._files[name] = file
+        if identity is not None:
+            self._upload_names[identity] = name
+        return name
+
+    def add_part(
+        self,
+        file: Optional[FileInput] = None,
+        *,
+        html: Optional[FileInput] = None,
+        assets: Optional[Sequence[Union[str, Path]]] = None,
+        new_pages: Optional[int] = None,
+        pages: Optional[Union[Tuple[int, int], Dict[str, int]]] = None,
+        password: Optional[str] = None,
+        content_type: Optional[str] = None,
+        layout: Optional[Dict[str, Any]] = None,
+        steps: Optional[Sequence[Tuple[str, Optional[Dict[str, Any]]]]] = None,
+    ) -> "BuildAPIWrapper":
+        """Append a part to the output document.
+
+        Each part is a file, an HTML page or a number of new blank pages.
+        Parts are combined in order, after their own ``steps`` are applied;
+        steps added with :meth:`add_step` apply to the combined document. A
+        file used by several parts is uploaded only once.
+
+        Args:
+            file: Document to include.
+            html: HTML document to render as a part.
+            assets: Files referenced by the HTML, such as images or
+                stylesheets, by path. They are uploaded under their file name.
+            new_pages: Number of blank pages to insert.
+            pages: Page range to include, as ``(start, end)`` with 0-based
+                inclusive indexes (negative indexes count from the end) or as
+                a ``{"start": ..., "end": ...}`` dictionary.
+            password: Password of an encrypted file.
+            content_type: MIME type of the file, if it cannot be detected.
+            layout: Page layout of HTML or new pages, such as
+                ``{"size": "A4", "orientation": "landscape"}``.
+            steps: ``(tool, options)`` pairs applied to this part only.
+
+        Returns:
+            Self for method chaining.
+
+        Raises:
+            ValueError: Unless exactly one of ``file``, ``html`` and
+                ``new_pages`` is given, or if two assets share a file name.
+        """
+        sources = [source for source in (file, html, new_pages) if source is not None]
+        if len(sources) != 1:
+            raise ValueError("A part needs exactly one of file, html or new_pages")
+        if assets and html is None:
+            raise ValueError("assets can only be used with an html part")
+
+        name = f"part{len(self._parts)}"
+        part: Dict[str, Any]
+        if file is not None:
+            part = {"file": self._register_file(file, name)}
+        elif html is not None:
+            part = {"html": self._register_file(html, name)}
+            if assets:
+                part["assets"] = [self._register_asset(asset) for asset in assets]
+        else:
+            part = {"page": "new", "pageCount": new_pages}
+
+        if pages is not None:
+            part["pages"] = (
+                dict(pages) if isinstance(pages, dict) else {"start": pages[0], "end": pages[1]}
+            )
+        if password is not None:
+            part["password"] = password
+        if content_type is not None:
+            part["content_type"] = content_type
+        if layout is not None:
+            part["layout"] = layout
+        if steps:
+            part["actions"] = [
+                self._map_tool_to_action(tool, options or {}) for tool, options in steps
+            ]
+            self._tools.extend(tool for tool, _ in steps)
+
+        self._parts.append(part)
+        return self
+
+    def _register_asset(self, asset: Union[str, Path]) -> str:
+        """Add an HTML asset, which must be uploaded under its own file name."""
+        name = Path(asset).name
+        existing = self._files.get(name)
+        if existing is not None and upload_identity(existing) != upload_identity(asset):
+            raise ValueError(f"Another file is already uploaded as {name!r}")
+        self._files[name] = str(asset)
+        return name
 
     def add_step(self, tool: str, options: Optional[Dict[str, Any]] = None) -> "BuildAPIWrapper":
         """Add a processing step to the workflow.
@@ -58,6 +198,8 @@ class BuildAPIWrapper:
         """
         action = self._map_tool_to_action(tool, options or {})
         self._actions.append(action)
+        self._tools.append(tool)
+        self._steps.append((tool, dict(options or {})))
         return self
 
     def set_output_options(self, **options: Any) -> "BuildAPIWrapper":
@@ -78,41 +220,189 @@ class BuildAPIWrapper:
         self._output_options.update(options)
         return self
 
-    def execute(self, output_path: Optional[str] = None) -> Optional[bytes]:
+    def optimize(self, dry_run: bool = False) -> OptimizationReport:
+        """Remove redundant actions from the workflow.
+
+        Consecutive rotations are folded, no-op rotations and empty
+        redactions are dropped, and repeated idempotent actions are removed,
+        both for the combined document and for each part. See
+        :func:`~nutrient_dws.optimizer.optimize_actions` for the rules.
+
+        Args:
+            dry_run: Only report the changes without applying them.
+
+        Returns:
+            Report of the changes. Call its ``estimate_savings(client)`` to
+            compare the cost of both versions with ``/analyze_build``.
+
+        Example:
+            >>> report = builder.optimize(dry_run=True)
+            >>> report.changes
+            ['Folded rotations by 90 and 90 degrees into 180']
+        """
+        report = optimize_instructions(self._build_instructions())
+        if not dry_run:
+            self._actions = report.optimized["actions"]
+            self._parts = report.optimized["parts"]
+            # Keep the steps of to_pipeline() and the tool names in line with the actions
+            self._steps = [self._map_action_to_tool(action) for action in self._actions]
+            part_actions = [action for part in self._parts for action in part.get("actions", [])]
+            self._tools = [
+                self._map_action_to_tool(action)[0] for action in part_actions + self._actions
+            ]
+        return report
+
+    def to_pipeline(self) -> "Pipeline":
+        """Return the steps and output options of this workflow as a Pipeline.
+
+        The pipeline can be applied to other inputs, for example by a
+        :class:`~nutrient_dws.batch.BatchRunner`. Additional parts and their
+        steps are not part of the pipeline.
+        """
+        return Pipeline(self._steps, self._output_options)
+
+    @overload
+    def execute(
+        self,
+        output_path: Optional[FileOutput] = None,
+        deadline: DeadlineLike = None,
+        timeout: Optional[float] = None,
+        priority: Optional[str] = None,
+        optimize: bool = False,
+        lazy: Literal[False] = False,
+    ) -> Optional[bytes]: ...
+
+    @overload
+    def execute(
+        self,
+        output_path: None = None,
+        deadline: DeadlineLike = None,
+        timeout: Optional[float] = None,
+        priority: Optional[str] = None,
+        optimize: bool = False,
+        *,
+        lazy: Literal[True],
+    ) -> Result: ...
+
+    @overload
+    def execute(
+        self,
+        output_path: Optional[FileOutput] = None,
+        deadline: DeadlineLike = None,
+        timeout: Optional[float] = None,
+        priority: Optional[str] = None,
+        optimize: bool = False,
+        lazy: bool = False,
+    ) -> Union[bytes, Result, None]: ...
+
+    def execute(
+        self,
+        output_path: Optional[FileOutput] = None,
+        deadline: DeadlineLike = None,
+        timeout: Optional[float] = None,
+        priority: Optional[str] = None,
+        optimize: bool = False,
+        lazy: bool = False,
+    ) -> Union[bytes, Result, None]:
         """Execute the workflow.
 
         Args:
-            output_path: Optional path to save the output file.
+            output_path: Optional path to save the output file, or a writable
+                binary stream such as an open file, a pipe or an object store
+                upload stream. A stream receives the output in chunks as it
+                arrives and is left open; if the request fails midway it may
+                have received part of the output.
+            deadline: Optional time budget in seconds, or a ``Deadline``, for
+                the whole request including retries. Late work fails with
+                ``DeadlineExceededError`` instead of being retried.
+            timeout: Optional read timeout in seconds for this request,
+                overriding the client's timeout and any derived timeout.
+            priority: Optional priority lane, for example ``"interactive"``,
+                used when the client has a ``PriorityScheduler``.
+            optimize: Remove redundant actions with :meth:`optimize` first.
+            lazy: Return a :class:`~nutrient_dws.result.Result` whose body is
+                only read when asked for, instead of bytes. Ignored when
+                ``output_path`` is given.
 
         Returns:
-            Processed file bytes, or None if output_path is provided.
+            Processed file bytes, a Result if ``lazy``, or None if
+            output_path is provided.
 
         Raises:
             AuthenticationError: If API key is missing or invalid.
             APIError: For other API errors.
         """
+        if optimize:
+            self.optimize()
+
+        if lazy and output_path is None:
+            return self._client._http_client.post_result(  # type: ignore[no-any-return]
+                "/build", **self._request(), deadline=deadline, timeout=timeout, priority=priority
+            )
+
+        if is_writable(output_path):
+            self._post(deadline, timeout, priority, output=output_path)  # type: ignore[arg-type]
+            return None
+
+        result = self._post(deadline, timeout, priority)
+
+        # Handle output
+        if output_path:
+            save_file_output(result, output_path)
+            return None
+        else:
+            return result
+
+    def _post(
+        self,
+        deadline: DeadlineLike = None,
+        timeout: Optional[float] = None,
+        priority: Optional[str] = None,
+        output: Optional[BinaryIO] = None,
+    ) -> bytes:
+        """Send the workflow to the Build API.
+
+        Args:
+            deadline: Optional time budget or ``Deadline`` for the request.
+            timeout: Optional read timeout override in seconds.
+            priority: Optional priority lane.
+            output: Optional writable binary stream receiving the response
+                body as it arrives.
+
+        Returns:
+            The response body, or empty bytes if ``output`` is given.
+        """
+        result = self._client._http_client.post(
+            "/build",
+            **self._request(),
+            deadline=deadline,
+            timeout=timeout,
+            priority=priority,
+            output=output,
+        )
+        return result  # type: ignore[no-any-return]
+
+    def _request(self) -> Dict[str, Any]:
+        """Files, instructions and timeout hints of the Build API request."""
         # Prepare the build instructions
         instructions = self._build_instructions()
 
+        # Measure inputs before upload preparation opens any file handles
+        input_size = self._input_size()
+
         # Prepare files for upload
         files = {}
         for name, file in self._files.items():
             file_field, file_data = prepare_file_for_upload(file, name)
             files[file_field] = file_data
 
-        # Make API request
-        result = self._client._http_client.post(
-            "/build",
-            files=files,
-            json_data=instructions,
-        )
-
-        # Handle output
-        if output_path:
-            save_file_output(result, output_path)
-            return None
-        else:
-            return result  # type: ignore[no-any-return]
+        return {
+            "files": files,
+            "json_data": instructions,
+            "tool": self._tool_name(),
+            "input_size": input_size,
+            "action_types": self._action_types(),
+        }
 
     def _build_instructions(self) -> Dict[str, Any]:
         """Build the instructions payload for the API.
@@ -131,6 +421,29 @@ class BuildAPIWrapper:
 
         return instructions
 
+    def _input_size(self) -> Optional[int]:
+        """Total size of all input files in bytes, or None if any is unknown."""
+        total = 0
+        for file in self._files.values():
+            size = get_file_size(file)
+            if size is None:
+                return None
+            total += size
+        return total
+
+    def _action_types(self) -> List[str]:
+        """Types of all actions in the request, including per-part actions."""
+        types = [action["type"] for part in self._parts for action in part.get("actions", ())]
+        return types + [action["type"] for action in self._actions]
+
+    def _tool_name(self) -> str:
+        """Name identifying this workflow for per-tool client policies.
+
+        A workflow without steps is a plain conversion (``convert-to-pdf``);
+        several steps are joined with ``+``.
+        """
+        return "+".join(self._tools) or "convert-to-pdf"
+
     def _map_tool_to_action(self, tool: str, options: Dict[str, Any]) -> Dict[str, Any]:
         """Map tool name and options to Build API action format.
 
@@ -141,19 +454,7 @@ class BuildAPIWrapper:
         Returns:
             Action dictionary for the Build API.
         """
-        # Map tool names to action types
-        tool_mapping = {
-            "rotate-pages": "rotate",
-            "ocr-pdf": "ocr",
-            "watermark-pdf": "watermark",
-            "flatten-annotations": "flatten",
-            "apply-instant-json": "applyInstantJson",
-            "apply-xfdf": "applyXfdf",
-            "create-redactions": "createRedactions",
-            "apply-redactions": "applyRedactions",
-        }
-
-        action_type = tool_mapping.get(tool, tool)
+        action_type = TOOL_ACTIONS.get(tool, tool)
 
         # Build action dictionary
         action = {"type": action_type}
@@ -201,6 +502,34 @@ class BuildAPIWrapper:
 
         return action
 
+    def _map_action_to_tool(self, action: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+        """Map a Build API action back to a tool name and options.
+
+        The inverse of :meth:`_map_tool_to_action`: mapping the result again
+        gives ``action``.
+
+        Args:
+            action: Action dictionary for the Build API.
+
+        Returns:
+            ``(tool, options)`` pair, as passed to :meth:`add_step`.
+        """
+        action_type = action["type"]
+        tool = next(
+            (tool for tool, mapped in TOOL_ACTIONS.items() if mapped == action_type), action_type
+        )
+        options = {key: value for key, value in action.items() if key != "type"}
+
+        if action_type == "rotate":
+            options = {"degrees": action.get("rotateBy", 0)}
+            if "pageIndexes" in action:
+                options["page_indexes"] = action["pageIndexes"]
+
+        elif action_type == "watermark" and "image" in options:
+            options["image_url"] = options.pop("image")["url"]
+
+        return tool, options
+
     def __str__(self) -> str:
         """String representation of the build workflow."""
         steps = [f"{action['type']}" for action in self._actions]
@@ -214,3 +543,96 @@ class BuildAPIWrapper:
             f"actions={self._actions!r}, "
             f"output_options={self._output_options!r})"
         )
+
+
+class Pipeline:
+    """Reusable description of a Builder workflow, independent of its input.
+
+    A pipeline holds the steps and output options of a workflow. It is
+    picklable and can be converted to and from plain dictionaries, so the same
+    description can be applied to many inputs, sent to worker processes or
+    stored in configuration files.
+
+    Args:
+        steps: ``(tool, options)`` pairs, as passed to ``add_step``.
+        output_options: Output options, as passed to ``set_output_options``.
+
+    Example:
+        >>> pipeline = Pipeline().add_step("ocr-pdf", {"language": "en"}).add_step(
+        ...     "watermark-pdf", {"text": "DRAFT"}
+        ... )
+        >>> pipeline.build(client, "scan.pdf").execute(output_path="out.pdf")
+    """
+
+    def __init__(
+        self,
+        steps: Optional[Sequence[Tuple[str, Optional[Dict[str, Any]]]]] = None,
+        output_options: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.steps: List[Tuple[str, Dict[str, Any]]] = [
+            (tool, dict(options or {})) for tool, options in steps or []
+        ]
+        self.output_options: Dict[str, Any] = dict(output_options or {})
+
+    def add_step(self, tool: str, options: Optional[Dict[str, Any]] = None) -> "Pipeline":
+        """Append a processing step.
+
+        Returns:
+            Self for method chaining.
+        """
+        self.steps.append((tool, dict(options or {})))
+        return self
+
+    def set_output_options(self, **options: Any) -> "Pipeline":
+        """Set output options for the final document.
+
+        Returns:
+            Self for method chaining.
+        """
+        self.output_options.update(options)
+        return self
+
+    def build(self, client: Any, input_file: FileInput) -> BuildAPIWrapper:
+        """Create a Builder for ``input_file`` with this pipeline's steps.
+
+        Args:
+            client: NutrientClient instance.
+            input_file: Input file to process.
+        """
+        builder = BuildAPIWrapper(client, input_file)
+        for tool, options in self.steps:
+            builder.add_step(tool, options)
+        if self.output_options:
+            builder.set_output_options(**self.output_options)
+        return builder
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the pipeline to JSON-compatible data."""
+        return {
+            "steps": [{"tool": tool, "options": options} for tool, options in self.steps],
+            "output": self.output_options,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Pipeline":
+        """Create a pipeline from the output of :meth:`to_dict`.
+
+        Raises:
+            ValueError: If a step has no tool.
+        """
+        steps = []
+        for step in data.get("steps", []):
+            if "tool" not in step:
+                raise ValueError(f"Pipeline step is missing 'tool': {step!r}")
+            steps.append((step["tool"], step.get("options")))
+        return cls(steps, data.get("output"))
+
+    def __eq__(self, other: object) -> bool:
+        """Pipelines are equal if their steps and output options match."""
+        if not isinstance(other, Pipeline):
+            return NotImplemented
+        return self.steps == other.steps and self.output_options == other.output_options
+
+    def __repr__(self) -> str:
+        """Representation listing the steps."""
+        return f"Pipeline(steps={[tool for tool, _ in self.steps]!r})"
@@ -0,0 +1,262 @@
+"""Circuit breaker for failing fast during API outages."""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from nutrient_dws import _fork
+from nutrient_dws.exceptions import (
+    APIError,
+    CircuitOpenError,
+    DeadlineExceededError,
+    NutrientTimeoutError,
+)
+
+StateChangeCallback = Callable[[str, str], None]
+
+
+class CircuitState:
+    """Possible states of a :class:`CircuitBreaker`."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Rolling-window circuit breaker for API requests.
+
+    While closed, the outcome of the last ``window_size`` requests is tracked.
+    Once at least ``minimum_calls`` outcomes are recorded and the share of
+    failures reaches ``failure_rate_threshold``, the circuit opens and every
+    request fails immediately with :class:`~nutrient_dws.exceptions.CircuitOpenError`.
+    After ``recovery_timeout`` seconds the circuit becomes half-open and lets
+    up to ``half_open_max_calls`` probe requests through: a successful probe
+    closes the circuit, a failed one opens it again.
+
+    Timeouts, connection errors, 429 and 5xx responses count as failures.
+    Client errors such as validation or authentication failures do not, as
+    they say nothing about the health of the service.
+
+    Args:
+        failure_rate_threshold: Failure ratio (0.0 to 1.0) that opens the circuit.
+        minimum_calls: Minimum outcomes in the window before the rate is evaluated.
+        window_size: Number of most recent outcomes considered.
+        recovery_timeout: Seconds to stay open before allowing probe requests.
+        half_open_max_calls: Number of concurrent probes while half-open.
+        on_state_change: Optional callback invoked as ``callback(old, new)``.
+
+    Example:
+        >>> breaker = CircuitBreaker(failure_rate_threshold=0.5, recovery_timeout=30)
+        >>> client = NutrientClient(api_key="...", circuit_breaker=breaker)
+        >>> breaker.metrics["state"]
+        'closed'
+    """
+
+    def __init__(
+        self,
+        failure_rate_threshold: float = 0.5,
+        minimum_calls: int = 10,
+        window_size: int = 20,
+        recovery_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+        on_state_change: Optional[StateChangeCallback] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if not 0.0 < failure_rate_threshold <= 1.0:
+            raise ValueError("failure_rate_threshold must be between 0 and 1")
+        if minimum_calls < 1 or window_size < minimum_calls:
+            raise ValueError("window_size must be at least minimum_calls, which must be >= 1")
+
+        self.failure_rate_threshold = failure_rate_threshold
+        self.minimum_calls = minimum_calls
+        self.window_size = window_size
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._callbacks: List[StateChangeCallback] = []
+        if on_state_change is not None:
+            self._callbacks.append(on_state_change)
+        self._clock = clock
+
+        self._lock = threading.Lock()
+        self._state = CircuitState.CLOSED
+        self._outcomes: Deque[bool] = deque(maxlen=window_size)
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._counters = {"calls": 0, "successes": 0, "failures": 0, "rejected": 0, "opened": 0}
+        _fork.register(self)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Pickle the configuration, state and counters without the lock."""
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """Restore the breaker with a new lock."""
+        self.__dict__.update(state)
+        self._after_fork()
+        _fork.register(self)
+
+    def _after_fork(self) -> None:
+        """Replace the lock, which may have been held by another thread at fork time."""
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """Current state, one of the :class:`CircuitState` values."""
+        with self._lock:
+            transition = self._maybe_half_open()
+            state = self._state
+        self._notify(transition)
+        return state
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        """Snapshot of the breaker state and counters."""
+        state = self.state
+        with self._lock:
+            failures = self._outcomes.count(False)
+            total = len(self._outcomes)
+            return {
+                "state": state,
+                "failure_rate": failures / total if total else 0.0,
+                "window_calls": total,
+                **self._counters,
+            }
+
+    def add_listener(self, callback: StateChangeCallback) -> None:
+        """Register a callback invoked as ``callback(old, new)`` on state changes."""
+        self._callbacks.append(callback)
+
+    def before_call(self) -> None:
+        """Admit a request or fail fast.
+
+        Raises:
+            CircuitOpenError: If the circuit is open or all half-open probe
+                slots are taken.
+        """
+        with self._lock:
+            transition = self._maybe_half_open()
+            rejected = False
+            if self._state == CircuitState.OPEN:
+                rejected = True
+            elif self._state == CircuitState.HALF_OPEN:
+                if self._probes_in_flight >= self.half_open_max_calls:
+                    rejected = True
+                else:
+                    self._probes_in_flight += 1
+
+            if rejected:
+                self._counters["rejected"] += 1
+                retry_after = max(0.0, self._opened_at + self.recovery_timeout - self._clock())
+            else:
+                self._counters["calls"] += 1
+        self._notify(transition)
+
+        if rejected:
+            raise CircuitOpenError(
+                "Circuit breaker is open; the API is failing and requests are rejected",
+                retry_after=retry_after,
+            )
+
+    def record_success(self) -> None:
+        """Record a successful request."""
+        with self._lock:
+            self._counters["successes"] += 1
+            transition = None
+            if self._state == CircuitState.HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                transition = self._transition(CircuitState.CLOSED)
+            elif self._state == CircuitState.CLOSED:
+                self._outcomes.append(True)
+        self._notify(transition)
+
+    def record_failure(self) -> None:
+        """Record a failed request, opening the circuit if needed."""
+        with self._lock:
+            self._counters["failures"] += 1
+            transition = None
+            if self._state == CircuitState.HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                transition = self._transition(CircuitState.OPEN)
+            elif self._state == CircuitState.CLOSED:
+                self._outcomes.append(False)
+                total = len(self._outcomes)
+                failures = self._outcomes.count(False)
+                if total >= self.minimum_calls and failures / total >= self.failure_rate_threshold:
+                    transition = self._transition(CircuitState.OPEN)
+        self._notify(transition)
+
+    def record(self, error: Optional[BaseException]) -> None:
+        """Record the outcome of a request based on the raised error, if any.
+
+        A ``DeadlineExceededError`` is the caller running out of time, which
+        says nothing about the service, so no outcome is recorded for it.
+        """
+        if isinstance(error, DeadlineExceededError):
+            self.release_call()
+        elif error is not None and self.is_failure(error):
+            self.record_failure()
+        else:
+            self.record_success()
+
+    def release_call(self) -> None:
+        """Give back the probe slot of a call that ended without an outcome.
+
+        Call it when a request admitted by :meth:`before_call` is abandoned,
+        for example by ``KeyboardInterrupt``, so that a half-open circuit
+        does not run out of probes.
+        """
+        with self._lock:
+            if self._state == CircuitState.HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+
+    def reset(self) -> None:
+        """Force the circuit closed and clear the rolling window."""
+        with self._lock:
+            transition = self._transition(CircuitState.CLOSED)
+            self._outcomes.clear()
+        self._notify(transition)
+
+    @staticmethod
+    def is_failure(error: BaseException) -> bool:
+        """Return whether an error indicates an unhealthy service."""
+        if isinstance(error, DeadlineExceededError):
+            return False
+        if isinstance(error, NutrientTimeoutError):
+            return True
+        if isinstance(error, APIError):
+            return error.status_code is None or error.status_code == 429 or error.status_code >= 500
+        return False
+
+    def _maybe_half_open(self) -> Optional[Tuple[str, str]]:
+        """Move from open to half-open once the recovery timeout elapsed."""
+        if (
+            self._state == CircuitState.OPEN
+            and self._clock() - self._opened_at >= self.recovery_timeout
+        ):
+            return self._transition(CircuitState.HALF_OPEN)
+        return None
+
+    def _transition(self, new_state: str) -> Optional[Tuple[str, str]]:
+        """Switch state; must be called with the lock held."""
+        old_state = self._state
+        if old_state == new_state:
+            return None
+        self._state = new_state
+        self._probes_in_flight = 0
+        if new_state == CircuitState.OPEN:
+            self._opened_at = self._clock()
+            self._counters["opened"] += 1
+        elif new_state == CircuitState.CLOSED:
+            self._outcomes.clear()
+        return old_state, new_state
+
+    def _notify(self, transition: Optional[Tuple[str, str]]) -> None:
+        """Invoke state change callbacks outside the lock."""
+        if transition is None:
+            return
+        for callback in self._callbacks:
+            callback(*transition)
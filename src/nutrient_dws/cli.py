@@ -0,0 +1,601 @@
+r"""Command-line interface for bulk document processing.
+
+Every Direct API operation is available as a subcommand, and ``run`` applies a
+pipeline defined in a JSON or YAML file. Inputs may be files, directories or
+glob patterns, and zip archives whose members are streamed without
+extracting them. They are processed in parallel by a
+:class:`~nutrient_dws.batch.BatchRunner`::
+
+    nutrient-dws ocr scans/ --output ocr/ --workers 8 --rate-limit 5
+    nutrient-dws run --pipeline invoice.yaml "inbox/**/*.docx" --output out/ \
+        --name-template "{parent}/{stem}-processed.pdf" --journal jobs.sqlite
+    nutrient-dws convert customer.zip --pattern "*.docx" --output converted/
+    nutrient-dws ocr scans/ --output results.zip
+    nutrient-dws merge a.pdf b.docx --output merged.pdf
+    nutrient-dws watch inbox/ --pipeline ocr.json --output processed/ --workers 4
+
+An output ending in ``.zip``, or ``-`` for standard output, receives the
+outputs as members of a streamed zip archive with a manifest instead of a
+directory of files.
+
+A JSON summary with counts, throughput and latency percentiles is printed to
+standard output (standard error with ``--output -``) when the job finishes.
+``watch`` runs until interrupted.
+"""
+
+import argparse
+import contextlib
+import glob
+import importlib
+import json
+import os
+import sys
+import time
+from array import array
+from pathlib import Path, PurePath
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Sequence, cast
+
+from nutrient_dws.archive import ArchiveMember, ZipSink, ZipSource, is_zip_archive
+from nutrient_dws.batch import BatchResult, BatchRunner
+from nutrient_dws.builder import Pipeline
+from nutrient_dws.client import NutrientClient
+from nutrient_dws.exceptions import NutrientError
+from nutrient_dws.file_handler import FileInput
+from nutrient_dws.journal import BatchJournal
+from nutrient_dws.prefetch import Prefetcher
+from nutrient_dws.scheduling import POLICIES, BatchScheduler, SchedulingPolicy
+from nutrient_dws.watch import FolderWatcher
+from nutrient_dws.writer import BackgroundWriter
+
+DEFAULT_NAME_TEMPLATE = "{parent}/{stem}.pdf"
+
+# Journal created in the output directory of `watch` unless --journal is given
+WATCH_JOURNAL_NAME = ".nutrient-dws-watch.sqlite"
+
+# Number of failed inputs listed individually in the summary
+MAX_REPORTED_FAILURES = 20
+
+
+def _add_common_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add input, output and execution options shared by all batch commands."""
+    parser.add_argument(
+        "inputs", nargs="+", help="Input files, directories, glob patterns or zip archives"
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        required=True,
+        help="Output directory, .zip archive, or - to write a zip archive to stdout",
+    )
+    parser.add_argument(
+        "--name-template",
+        default=DEFAULT_NAME_TEMPLATE,
+        help=(
+            "Output file name relative to --output. Placeholders: {stem}, {name}, "
+            "{suffix}, {parent} (directory relative to the input directory) and "
+            "{tool}. Default: %(default)s"
+        ),
+    )
+    parser.add_argument(
+        "--pattern",
+        default="*",
+        help="File name pattern used when an input is a directory or zip archive. "
+        "Default: %(default)s",
+    )
+    parser.add_argument(
+        "-j", "--workers", type=int, default=None, help="Number of parallel workers"
+    )
+    parser.add_argument(
+        "--threads",
+        action="store_true",
+        help="Use threads instead of worker processes",
+    )
+    parser.add_argument(
+        "--rate-limit", type=float, default=None, help="Maximum requests started per second"
+    )
+    parser.add_argument(
+        "--order",
+        choices=POLICIES,
+        default=SchedulingPolicy.FIFO,
+        help=(
+            "Processing order. shortest-first lowers the mean completion time, largest-first "
+            "the total time, fair-share alternates between input directories. "
+            "Default: %(default)s"
+        ),
+    )
+    parser.add_argument(
+        "--dedupe",
+        action="store_true",
+        help="Process inputs with identical content once and copy the output to each name",
+    )
+    parser.add_argument(
+        "--prefetch",
+        type=int,
+        default=0,
+        metavar="THREADS",
+        help="Threads reading upcoming inputs ahead from slow storage. Default: off",
+    )
+    parser.add_argument(
+        "--write-workers",
+        type=int,
+        default=0,
+        help="Threads writing outputs in the background while requests continue. Default: off",
+    )
+    parser.add_argument(
+        "--fsync",
+        action="store_true",
+        help="Flush every output to disk before reporting it as done",
+    )
+    parser.add_argument("--journal", help="SQLite journal file that makes the job resumable")
+    parser.add_argument(
+        "--job-id", default="default", help="Job identifier in the journal. Default: %(default)s"
+    )
+    parser.add_argument(
+        "--progress",
+        action="store_true",
+        help="Write one JSON line per completed input to standard error",
+    )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Create the argument parser for the ``nutrient-dws`` command."""
+    parser = argparse.ArgumentParser(
+        prog="nutrient-dws",
+        description="Process documents in bulk with the Nutrient DWS API.",
+    )
+    parser.add_argument(
+        "--api-key", help="API key. Defaults to the NUTRIENT_API_KEY environment variable"
+    )
+    parser.add_argument(
+        "--timeout", type=int, default=300, help="Read timeout in seconds. Default: %(default)s"
+    )
+    commands = parser.add_subparsers(dest="command", metavar="COMMAND")
+    commands.required = True
+
+    command = commands.add_parser("convert", help="Convert documents to PDF")
+    _add_common_arguments(command)
+
+    command = commands.add_parser("flatten", help="Flatten annotations and form fields")
+    _add_common_arguments(command)
+
+    command = commands.add_parser("rotate", help="Rotate pages")
+    command.add_argument("--degrees", type=int, required=True, help="90, 180, 270 or -90")
+    command.add_argument("--pages", help="Comma-separated 0-based page indexes. Default: all pages")
+    _add_common_arguments(command)
+
+    command = commands.add_parser("ocr", help="Make documents searchable with OCR")
+    command.add_argument("--language", default="english", help="OCR language")
+    _add_common_arguments(command)
+
+    command = commands.add_parser("watermark", help="Add a text or image watermark")
+    source = command.add_mutually_exclusive_group(required=True)
+    source.add_argument("--text", help="Watermark text")
+    source.add_argument("--image-url", help="URL of a watermark image")
+    command.add_argument("--width", type=int, default=200, help="Width in points")
+    command.add_argument("--height", type=int, default=100, help="Height in points")
+    command.add_argument("--opacity", type=float, default=1.0, help="Opacity from 0 to 1")
+    command.add_argument("--position", default="center", help="Watermark position")
+    _add_common_arguments(command)
+
+    command = commands.add_parser("redact", help="Apply redaction annotations")
+    _add_common_arguments(command)
+
+    command = commands.add_parser("run", help="Apply a pipeline from a JSON or YAML file")
+    command.add_argument("--pipeline", required=True, help="Pipeline file (.json, .yaml, .yml)")
+    _add_common_arguments(command)
+
+    command = commands.add_parser("watch", help="Process files arriving in a directory")
+    command.add_argument("directory", help="Directory to watch")
+    command.add_argument("--pipeline", required=True, help="Pipeline file (.json, .yaml, .yml)")
+    command.add_argument("-o", "--output", required=True, help="Output directory")
+    command.add_argument(
+        "--name-template", default=DEFAULT_NAME_TEMPLATE, help="Output file name template"
+    )
+    command.add_argument("--pattern", default="*", help="File name pattern. Default: %(default)s")
+    command.add_argument("-j", "--workers", type=int, default=4, help="Number of parallel workers")
+    command.add_argument(
+        "--settle",
+        type=float,
+        default=2.0,
+        help="Seconds a file must be unchanged before processing. Default: %(default)s",
+    )
+    command.add_argument(
+        "--interval", type=float, default=1.0, help="Seconds between scans. Default: %(default)s"
+    )
+    command.add_argument(
+        "--journal",
+        help=f"Journal of processed files. Default: {WATCH_JOURNAL_NAME} in the output directory",
+    )
+    command.add_argument(
+        "--job-id", default="watch", help="Job identifier in the journal. Default: %(default)s"
+    )
+
+    command = commands.add_parser("merge", help="Merge inputs into a single PDF")
+    command.add_argument("inputs", nargs="+", help="Input files, in order")
+    command.add_argument(
+        "-o", "--output", required=True, help="Output PDF path, or - to write to stdout"
+    )
+
+    return parser
+
+
+def load_pipeline(path: str) -> Pipeline:
+    """Load a pipeline from a JSON or YAML file.
+
+    The file contains the output of :meth:`Pipeline.to_dict`, for example::
+
+        steps:
+          - tool: ocr-pdf
+            options: {language: english}
+          - tool: watermark-pdf
+            options: {text: DRAFT}
+        output:
+          metadata: {title: Processed}
+
+    Raises:
+        ImportError: If a YAML file is given and PyYAML is not installed.
+        ValueError: If the file does not describe a valid pipeline.
+    """
+    text = Path(path).read_text(encoding="utf-8")
+    if path.endswith((".yaml", ".yml")):
+        try:
+            yaml = importlib.import_module("yaml")
+        except ImportError as e:
+            raise ImportError(
+                "YAML pipelines require PyYAML. Install it with: pip install nutrient-dws[yaml]"
+            ) from e
+        data = yaml.safe_load(text)
+    else:
+        data = json.loads(text)
+    if not isinstance(data, dict):
+        raise ValueError(f"Pipeline file {path} must contain a mapping")
+    return Pipeline.from_dict(data)
+
+
+def pipeline_from_args(args: argparse.Namespace) -> Pipeline:
+    """Translate a Direct API subcommand into the equivalent pipeline."""
+    command = args.command
+    if command == "run":
+        return load_pipeline(args.pipeline)
+    if command == "convert":
+        return Pipeline()
+    if command == "flatten":
+        return Pipeline().add_step("flatten-annotations")
+    if command == "redact":
+        return Pipeline().add_step("apply-redactions")
+    if command == "ocr":
+        return Pipeline().add_step("ocr-pdf", {"language": args.language})
+    if command == "rotate":
+        options: Dict[str, Any] = {"degrees": args.degrees}
+        if args.pages:
+            options["page_indexes"] = [int(index) for index in args.pages.split(",")]
+        return Pipeline().add_step("rotate-pages", options)
+    if command == "watermark":
+        options = {
+            "width": args.width,
+            "height": args.height,
+            "opacity": args.opacity,
+            "position": args.position,
+        }
+        if args.text:
+            options["text"] = args.text
+        else:
+            options["image_url"] = args.image_url
+        return Pipeline().add_step("watermark-pdf", options)
+    raise ValueError(f"Unknown command: {command}")
+
+
+def expand_inputs(patterns: Sequence[str], pattern: str = "*") -> Iterator[FileInput]:
+    """Yield input files for paths, directories, glob patterns and zip archives.
+
+    Directories are searched recursively for files matching ``pattern``, and
+    zip archives yield their members matching ``pattern`` as
+    :class:`~nutrient_dws.archive.ArchiveMember` objects. Directories are
+    walked in sorted order and each one is listed only when it is reached,
+    so huge trees start processing immediately.
+    """
+    for entry in patterns:
+        path = Path(entry)
+        if path.is_dir():
+            yield from _walk(path, path, pattern)
+        elif path.is_file() and is_zip_archive(path):
+            yield from _archive_members(entry, pattern)
+        elif path.is_file():
+            yield str(path)
+        else:
+            for match in sorted(glob.glob(entry, recursive=True)):
+                if is_zip_archive(match):
+                    yield from _archive_members(match, pattern)
+                elif os.path.isfile(match):
+                    yield match
+
+
+def _walk(root: Path, directory: Path, pattern: str) -> Iterator[str]:
+    """Files below ``directory`` matching ``pattern`` relative to ``root``, in sorted order."""
+    try:
+        with os.scandir(directory) as scan:
+            entries = sorted(scan, key=lambda entry: entry.name)
+    except OSError:
+        # Unreadable directories are skipped, as with Path.rglob
+        return
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            yield from _walk(root, Path(entry.path), pattern)
+        elif entry.is_file() and PurePath(entry.path).relative_to(root).match(pattern):
+            yield entry.path
+
+
+def _archive_members(path: str, pattern: str) -> Iterator[FileInput]:
+    """Members of the zip archive at ``path`` matching ``pattern``."""
+    return cast("Iterator[BinaryIO]", iter(ZipSource(path, pattern)))
+
+
+class OutputNamer:
+    """Map input paths to output paths using a name template.
+
+    Args:
+        output_dir: Directory receiving the outputs.
+        template: ``str.format`` template; see :data:`DEFAULT_NAME_TEMPLATE`.
+        roots: Input directories; ``{parent}`` is relative to the one
+            containing the input, so directory trees are mirrored. For
+            archive members, ``{parent}`` is the directory inside the archive.
+        tool: Value of the ``{tool}`` placeholder.
+    """
+
+    def __init__(
+        self,
+        output_dir: str,
+        template: str = DEFAULT_NAME_TEMPLATE,
+        roots: Sequence[str] = (),
+        tool: str = "",
+    ) -> None:
+        self.output_dir = output_dir
+        self.template = template
+        self.roots = [Path(root).resolve() for root in roots if Path(root).is_dir()]
+        self.tool = tool
+
+    def __call__(self, item: Any) -> str:
+        """Return the output path for ``item``."""
+        parent = ""
+        if isinstance(item, ArchiveMember):
+            path = Path(item.relative_path)
+            parent = str(path.parent)
+        else:
+            path = Path(item)
+            resolved = path.resolve()
+            for root in self.roots:
+                if root in resolved.parents:
+                    parent = str(resolved.parent.relative_to(root))
+                    break
+        name = self.template.format(
+            stem=path.stem,
+            name=path.name,
+            suffix=path.suffix,
+            parent="" if parent == "." else parent,
+            tool=self.tool,
+        )
+        return os.path.normpath(os.path.join(self.output_dir, name.lstrip("/")))
+
+
+def percentile(values: Sequence[float], percent: float) -> float:
+    """Nearest-rank percentile of ``values`` (0 for an empty sequence)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(len(ordered) * percent / 100) - 1))
+    return ordered[index]
+
+
+def summarize(
+    runner: BatchRunner, durations: Sequence[float], failures: Sequence[BatchResult]
+) -> Dict[str, Any]:
+    """Build the JSON summary of a finished batch.
+
+    Args:
+        runner: The runner of the batch.
+        durations: Duration of every processed input.
+        failures: Failed results to report; only the first
+            ``MAX_REPORTED_FAILURES`` are listed.
+    """
+    metrics = runner.metrics
+    summary: Dict[str, Any] = {
+        "processed": metrics["completed"],
+        "succeeded": metrics["succeeded"],
+        "failed": metrics["failed"],
+        "skipped": metrics["skipped"],
+        "deduplicated": metrics["deduplicated"],
+        "elapsed_seconds": round(metrics["elapsed"], 3),
+        "items_per_second": round(metrics["items_per_second"], 3),
+        "mean_completion_seconds": round(metrics["mean_completion"], 3),
+        "bytes_in": metrics["bytes_in"],
+        "credits": metrics["credits"],
+        "latency_seconds": {
+            "p50": round(percentile(durations, 50), 3),
+            "p90": round(percentile(durations, 90), 3),
+            "p99": round(percentile(durations, 99), 3),
+            "max": round(max(durations, default=0.0), 3),
+        },
+        "failures": [
+            {"input": _display(result.input), "error": str(result.error)}
+            for result in failures[:MAX_REPORTED_FAILURES]
+        ],
+    }
+    if "mean_read_seconds" in metrics:
+        summary["read_seconds"] = {
+            "mean": round(metrics["mean_read_seconds"], 3),
+            "max": round(metrics["max_read_seconds"], 3),
+            "stalled": round(metrics["read_stall_seconds"], 3),
+        }
+    if "mean_write_seconds" in metrics:
+        summary["write_seconds"] = {
+            "mean": round(metrics["mean_write_seconds"], 3),
+            "max": round(metrics["max_write_seconds"], 3),
+        }
+    return summary
+
+
+def _run_merge(client: NutrientClient, args: argparse.Namespace) -> int:
+    """Merge all inputs into one output in a single request."""
+    inputs: List[Any] = list(expand_inputs(args.inputs))
+    started = time.monotonic()
+    # "-" streams the merged PDF to stdout; the summary then goes to stderr
+    to_stdout = args.output == "-"
+    client.merge_pdfs(inputs, output_path=sys.stdout.buffer if to_stdout else args.output)
+    summary = {
+        "processed": len(inputs),
+        "output": args.output,
+        "elapsed_seconds": round(time.monotonic() - started, 3),
+    }
+    print(json.dumps(summary, indent=2), file=sys.stderr if to_stdout else sys.stdout)
+    return 0
+
+
+def scheduler_from_args(args: argparse.Namespace) -> Optional[BatchScheduler]:
+    """Create the batch scheduler selected with ``--order``, if any."""
+    if args.order == SchedulingPolicy.FIFO:
+        return None
+    tenant = _parent_directory if args.order == SchedulingPolicy.FAIR_SHARE else None
+    return BatchScheduler(args.order, tenant=tenant)
+
+
+def _parent_directory(item: FileInput) -> str:
+    """Tenant of an input for fair sharing: its directory."""
+    return os.path.dirname(os.path.abspath(_display(item)))
+
+
+def _display(item: FileInput) -> str:
+    """Path of an input file, or archive path and member name of an archive member."""
+    return item.name if isinstance(item, ArchiveMember) else str(item)
+
+
+def _run_batch(client: NutrientClient, args: argparse.Namespace) -> int:
+    """Run a batch command and print its summary."""
+    pipeline = pipeline_from_args(args)
+    tool = "+".join(tool for tool, _ in pipeline.steps) or "convert-to-pdf"
+    # "-" streams a zip archive to stdout; the summary then goes to stderr
+    to_stdout = args.output == "-"
+    to_archive = to_stdout or args.output.lower().endswith(".zip")
+    namer = OutputNamer("" if to_archive else args.output, args.name_template, args.inputs, tool)
+
+    def report(metrics: Dict[str, Any], result: BatchResult) -> None:
+        line = {
+            "input": _display(result.input),
+            "ok": result.ok,
+            "output": result.output_path,
+            "seconds": round(result.duration, 3),
+            "completed": metrics["completed"],
+        }
+        if result.read_time is not None:
+            line["read_seconds"] = round(result.read_time, 3)
+        if not result.ok:
+            line["error"] = str(result.error)
+        print(json.dumps(line), file=sys.stderr, flush=True)
+
+    archive: Optional[ZipSink] = None
+    journal: Optional[BatchJournal] = None
+    writer: Optional[BackgroundWriter] = None
+    # Everything opened so far is closed if a later step fails
+    try:
+        if to_archive:
+            archive = ZipSink(sys.stdout.buffer if to_stdout else args.output)
+        if args.journal:
+            journal = BatchJournal(args.journal, job_id=args.job_id)
+        if args.write_workers > 0:
+            writer = BackgroundWriter(args.write_workers)
+        runner = BatchRunner(
+            client,
+            pipeline,
+            output=namer,
+            max_workers=args.workers,
+            use_processes=not args.threads,
+            rate_limit=args.rate_limit,
+            journal=journal,
+            on_progress=report if args.progress else None,
+            scheduler=scheduler_from_args(args),
+            deduplicate=args.dedupe,
+            fsync=args.fsync,
+            writer=writer,
+            prefetcher=Prefetcher(args.prefetch) if args.prefetch > 0 else None,
+            archive=archive,
+        )
+        # Keep only what the summary needs instead of every result
+        durations = array("d")
+        failures: List[BatchResult] = []
+        for result in runner.run(expand_inputs(args.inputs, args.pattern)):
+            durations.append(result.duration)
+            if not result.ok and len(failures) < MAX_REPORTED_FAILURES:
+                failures.append(result)
+    finally:
+        if archive is not None:
+            archive.close()
+        if writer is not None:
+            writer.close()
+        if journal is not None:
+            journal.close()
+
+    summary = summarize(runner, durations, failures)
+    print(json.dumps(summary, indent=2), file=sys.stderr if to_stdout else sys.stdout)
+    return 1 if summary["failed"] else 0
+
+
+def _run_watch(client: NutrientClient, args: argparse.Namespace) -> int:
+    """Process files arriving in a directory until interrupted."""
+    pipeline = load_pipeline(args.pipeline)
+    tool = "+".join(tool for tool, _ in pipeline.steps) or "convert-to-pdf"
+    os.makedirs(args.output, exist_ok=True)
+    journal_path = args.journal or os.path.join(args.output, WATCH_JOURNAL_NAME)
+
+    def report(metrics: Dict[str, Any], result: BatchResult) -> None:
+        line = {"input": _display(result.input), "ok": result.ok, "output": result.output_path}
+        if not result.ok:
+            line["error"] = str(result.error)
+        print(json.dumps(line), file=sys.stderr, flush=True)
+
+    with BatchJournal(journal_path, job_id=args.job_id) as journal:
+        watcher = FolderWatcher(
+            client,
+            pipeline,
+            args.directory,
+            output=OutputNamer(args.output, args.name_template, [args.directory], tool),
+            pattern=args.pattern,
+            ignore=[args.output],
+            settle_time=args.settle,
+            poll_interval=args.interval,
+            max_workers=args.workers,
+            journal=journal,
+            on_result=report,
+        )
+        with contextlib.suppress(KeyboardInterrupt):
+            watcher.run()
+        print(json.dumps(watcher.metrics, indent=2))
+    return 0
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Entry point of the ``nutrient-dws`` command.
+
+    Returns:
+        Exit status: 0 on success, 1 if any input failed, 2 for invalid
+        arguments or unreadable pipeline files.
+    """
+    args = build_parser().parse_args(argv)
+
+    client = NutrientClient(api_key=args.api_key, timeout=args.timeout)
+    try:
+        if args.command == "merge":
+            return _run_merge(client, args)
+        if args.command == "watch":
+            return _run_watch(client, args)
+        return _run_batch(client, args)
+    except NutrientError as e:
+        print(f"nutrient-dws: error: {e}", file=sys.stderr)
+        return 1
+    except (ValueError, ImportError, OSError) as e:
+        print(f"nutrient-dws: error: {e}", file=sys.stderr)
+        return 2
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,22 @@
 """Main client module for Nutrient DWS API."""
 
+import contextlib
+import json
 import os
-from typing import Any, Optional
+from typing import Any, Dict, Generator, Iterator, Optional
 
 from nutrient_dws.api.direct import DirectAPIMixin
 from nutrient_dws.builder import BuildAPIWrapper
-from nutrient_dws.file_handler import FileInput
+from nutrient_dws.circuit_breaker import CircuitBreaker
+from nutrient_dws.coalescing import SingleFlight
+from nutrient_dws.deadline import Deadline, DeadlineLike, deadline_scope
+from nutrient_dws.file_handler import FileInput, FileOutput
+from nutrient_dws.hedging import HedgingPolicy
 from nutrient_dws.http_client import HTTPClient
+from nutrient_dws.priority import PriorityScheduler, priority_scope
+from nutrient_dws.rendering import ImageOutput, RenderedPage, render_pages
+from nutrient_dws.timeouts import TimeoutEstimator
+from nutrient_dws.transport import Transport
 
 
 class NutrientClient(DirectAPIMixin):
@@ -23,7 +33,23 @@ class NutrientClient(DirectAPIMixin):
     Args:
         api_key: API key for authentication. If not provided, will look for
             NUTRIENT_API_KEY environment variable.
-        timeout: Request timeout in seconds. Defaults to 300.
+        timeout: Read timeout in seconds. Defaults to 300.
+        connect_timeout: Connection timeout in seconds. Defaults to 10.
+        total_timeout: Optional limit in seconds for each call including
+            retries and backoff.
+        timeout_estimator: Optional ``TimeoutEstimator`` that derives each
+            request's read timeout from input size, actions and observed
+            per-tool throughput instead of using ``timeout``.
+        transport: Transport backend for HTTP requests. Defaults to a pooled
+            ``requests`` session; use ``HTTP2Transport`` for HTTP/2 multiplexing.
+        circuit_breaker: Optional ``CircuitBreaker`` that fails requests fast
+            with ``CircuitOpenError`` while the API is failing.
+        hedging: Optional ``HedgingPolicy`` that sends a duplicate request when
+            an opted-in tool is slower than its recent latency percentile.
+        scheduler: Optional ``PriorityScheduler`` that limits concurrent
+            requests and admits higher priority lanes first.
+        single_flight: Optional ``SingleFlight`` that lets concurrent calls
+            with identical inputs and instructions share one request.
 
     Raises:
         AuthenticationError: When making API calls without a valid API key.
@@ -40,22 +66,46 @@ class NutrientClient(DirectAPIMixin):
         ...       .execute(output_path="output.pdf")
     """
 
-    def __init__(self, api_key: Optional[str] = None, timeout: int = 300) -> None:
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        timeout: int = 300,
+        transport: Optional[Transport] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        hedging: Optional[HedgingPolicy] = None,
+        connect_timeout: Optional[float] = None,
+        total_timeout: Optional[float] = None,
+        timeout_estimator: Optional[TimeoutEstimator] = None,
+        scheduler: Optional[PriorityScheduler] = None,
+        single_flight: Optional[SingleFlight] = None,
+    ) -> None:
         """Initialize the Nutrient client."""
         # Get API key from parameter or environment
         self._api_key = api_key or os.environ.get("NUTRIENT_API_KEY")
         self._timeout = timeout
 
         # Initialize HTTP client
-        self._http_client = HTTPClient(api_key=self._api_key, timeout=timeout)
+        self._http_client = HTTPClient(
+            api_key=self._api_key,
+            timeout=timeout,
+            transport=transport,
+            circuit_breaker=circuit_breaker,
+            hedging=hedging,
+            connect_timeout=connect_timeout,
+            total_timeout=total_timeout,
+            timeout_estimator=timeout_estimator,
+            scheduler=scheduler,
+            single_flight=single_flight,
+        )
 
         # Direct API methods will be added dynamically
 
-    def build(self, input_file: FileInput) -> BuildAPIWrapper:
+    def build(self, input_file: Optional[FileInput] = None) -> BuildAPIWrapper:
         """Start a Builder API workflow.
 
         Args:
-            input_file: Input file (path, bytes, or file-like object).
+            input_file: Input file (path, bytes, or file-like object). Omit it
+                to assemble a document from parts with ``add_part()``.
 
         Returns:
             BuildAPIWrapper instance for chaining operations.
@@ -67,11 +117,96 @@ class NutrientClient(DirectAPIMixin):
         """
         return BuildAPIWrapper(client=self, input_file=input_file)
 
+    def analyze_build(self, instructions: Dict[str, Any]) -> Dict[str, Any]:
+        """Ask the API what a Build API request would cost, without running it.
+
+        Args:
+            instructions: Build API instructions, for example from
+                ``BuildAPIWrapper._build_instructions()``.
+
+        Returns:
+            The analysis, including the ``cost`` in credits and the
+            ``required_features``.
+
+        Raises:
+            AuthenticationError: If API key is missing or invalid.
+            APIError: For other API errors.
+        """
+        result = self._http_client.post(
+            "/analyze_build", json_data=instructions, tool="analyze-build"
+        )
+        return json.loads(result)  # type: ignore[no-any-return]
+
+    def render_pages(
+        self,
+        input_file: FileInput,
+        image: Optional[ImageOutput] = None,
+        page_count: Optional[int] = None,
+        pages_per_request: int = 8,
+        max_workers: int = 4,
+        deadline: DeadlineLike = None,
+        priority: Optional[str] = None,
+    ) -> Iterator[RenderedPage]:
+        """Render pages of a document as images, yielding each page as it arrives.
+
+        Shards of ``pages_per_request`` pages are rendered in parallel and
+        decoded while they are received; see
+        :func:`~nutrient_dws.rendering.render_pages` for details.
+
+        Example:
+            >>> for page in client.render_pages("report.pdf", ImageOutput(width=200), 300):
+            ...     thumbnails[page.index] = page.content
+        """
+        return render_pages(
+            self, input_file, image, page_count, pages_per_request, max_workers, deadline, priority
+        )
+
+    @contextlib.contextmanager
+    def deadline(self, seconds: DeadlineLike) -> Generator[Optional[Deadline], None, None]:
+        """Apply a deadline to all API calls made inside the block.
+
+        Covers Direct API methods, Builder workflows and batch processing
+        alike, including retries and backoff. Nested deadlines can only
+        shorten the time budget.
+
+        Args:
+            seconds: Time budget in seconds, or a ``Deadline``.
+
+        Yields:
+            The effective deadline.
+
+        Example:
+            >>> with client.deadline(60):
+            ...     client.ocr_pdf("scan.pdf", output_path="scan-ocr.pdf")
+        """
+        with deadline_scope(seconds) as deadline:
+            yield deadline
+
+    @contextlib.contextmanager
+    def priority(self, lane: str) -> Generator[str, None, None]:
+        """Send all API calls made inside the block in a priority lane.
+
+        Only has an effect when the client has a ``scheduler``. Covers
+        Direct API methods and Builder workflows alike.
+
+        Args:
+            lane: Lane name, for example ``"interactive"`` or ``"bulk"``.
+
+        Yields:
+            The lane.
+
+        Example:
+            >>> with client.priority("interactive"):
+            ...     client.convert_to_pdf("upload.docx", output_path="preview.pdf")
+        """
+        with priority_scope(lane):
+            yield lane
+
     def _process_file(
         self,
         tool: str,
         input_file: FileInput,
-        output_path: Optional[str] = None,
+        output_path: Optional[FileOutput] = None,
         **options: Any,
     ) -> Optional[bytes]:
         """Process a file using the Direct API.
@@ -82,7 +217,8 @@ class NutrientClient(DirectAPIMixin):
         Args:
             tool: The tool identifier from the API.
             input_file: Input file to process.
-            output_path: Optional path to save the output.
+            output_path: Optional path, or writable binary stream, to save the
+                output to.
             **options: Tool-specific options.
 
         Returns:
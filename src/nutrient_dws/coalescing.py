@@ -0,0 +1,176 @@
+"""Coalescing of identical requests."""
+
+import hashlib
+import io
+import json
+import threading
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from pathlib import Path
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple, TypeVar
+
+from nutrient_dws import _fork
+from nutrient_dws.deadline import Deadline
+from nutrient_dws.exceptions import DeadlineExceededError
+from nutrient_dws.file_handler import DEFAULT_CHUNK_SIZE
+
+T = TypeVar("T")
+
+
+def content_digest(item: Any) -> Optional[str]:
+    """Return the SHA-256 hex digest of an input's content.
+
+    Paths are read in chunks. File objects are read from their current
+    position, which is restored afterwards.
+
+    Returns:
+        The digest, or None if the content cannot be read without consuming
+        it, for example from a pipe.
+    """
+    digest = hashlib.sha256()
+    if isinstance(item, (bytes, bytearray, memoryview)):
+        digest.update(item)
+        return digest.hexdigest()
+    if isinstance(item, (str, Path)):
+        with open(item, "rb") as f:
+            _update_from(digest, f)
+        return digest.hexdigest()
+    if hasattr(item, "read") and hasattr(item, "seek") and hasattr(item, "tell"):
+        try:
+            position = item.tell()
+            _update_from(digest, item)
+            item.seek(position)
+        except (OSError, io.UnsupportedOperation):
+            return None
+        return digest.hexdigest()
+    return None
+
+
+def _update_from(digest: Any, stream: Any) -> None:
+    """Feed the rest of ``stream`` into ``digest``."""
+    while chunk := stream.read(DEFAULT_CHUNK_SIZE):
+        digest.update(chunk.encode() if isinstance(chunk, str) else chunk)
+
+
+def request_key(
+    endpoint: str,
+    files: Optional[Mapping[str, Any]],
+    data: Optional[Mapping[str, Any]],
+) -> Optional[str]:
+    """Return a key identifying a request by its endpoint, form data and file contents.
+
+    Args:
+        endpoint: API endpoint path.
+        files: Upload fields mapping to ``(filename, content, content_type)``.
+        data: Form fields, including the serialized instructions.
+
+    Returns:
+        The key, or None if a file cannot be hashed without consuming it.
+    """
+    uploads = []
+    for field, value in sorted((files or {}).items()):
+        filename, content = (value[0], value[1]) if isinstance(value, tuple) else (None, value)
+        digest = content_digest(content)
+        if digest is None:
+            return None
+        uploads.append([field, filename, digest])
+    fields = sorted((str(name), str(value)) for name, value in (data or {}).items())
+    payload = json.dumps([endpoint, fields, uploads])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class SingleFlight:
+    """Share one execution among concurrent calls with the same key.
+
+    The first call for a key runs the function; calls with the same key
+    that arrive while it is running wait for it and receive its result or
+    exception instead of sending a duplicate request. Nothing is cached:
+    once the call finishes, the next call with that key runs again.
+
+    Example:
+        >>> flight = SingleFlight()
+        >>> client = NutrientClient(api_key="...", single_flight=flight)
+        >>> # Concurrent identical conversions send a single request
+        >>> with ThreadPoolExecutor(8) as pool:
+        ...     results = list(pool.map(client.convert_to_pdf, ["same.docx"] * 8))
+        >>> flight.metrics["shared"]
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future[Any]] = {}
+        self._executed = 0
+        self._shared = 0
+        _fork.register(self)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Pickle without in-flight calls, which belong to this process."""
+        return {"_executed": self._executed, "_shared": self._shared}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """Restore the counters with a new lock and no calls in flight."""
+        self.__dict__.update(state)
+        self._calls = {}
+        self._after_fork()
+        _fork.register(self)
+
+    def _after_fork(self) -> None:
+        """Replace the lock; calls in flight at fork time never finish in the child."""
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    @property
+    def metrics(self) -> Dict[str, int]:
+        """Number of executed calls, calls that shared a result and calls in flight."""
+        with self._lock:
+            return {
+                "executed": self._executed,
+                "shared": self._shared,
+                "in_flight": len(self._calls),
+            }
+
+    def do(
+        self, key: str, func: Callable[[], T], deadline: Optional[Deadline] = None
+    ) -> Tuple[T, bool]:
+        """Run ``func`` unless a call with ``key`` is in flight, and return its result.
+
+        Args:
+            key: Identity of the call.
+            func: Function producing the result.
+            deadline: Optional deadline for waiting on a call in flight.
+
+        Returns:
+            The result and whether it was shared from another call.
+
+        Raises:
+            DeadlineExceededError: If the deadline passes while waiting.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if future is None:
+                future = self._calls[key] = Future()
+                self._executed += 1
+            else:
+                self._shared += 1
+
+        if not leader:
+            timeout = deadline.remaining() if deadline is not None else None
+            try:
+                return future.result(timeout=max(timeout, 0) if timeout is not None else None), True
+            except FutureTimeoutError:
+                raise DeadlineExceededError(
+                    "Deadline exceeded while waiting for an identical request"
+                ) from None
+
+        try:
+            result = func()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                del self._calls[key]
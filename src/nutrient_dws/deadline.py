@@ -0,0 +1,96 @@
+"""Deadlines that bound the total time spent on a call, including retries."""
+
+import contextlib
+import time
+from contextvars import ContextVar
+from typing import Callable, Generator, Optional, Union
+
+from nutrient_dws.exceptions import DeadlineExceededError
+
+
+class Deadline:
+    """A point in time after which work should be abandoned.
+
+    Deadlines are based on a monotonic clock, so they are unaffected by
+    changes to the system time.
+
+    Args:
+        seconds: Time budget from now, in seconds.
+
+    Example:
+        >>> deadline = Deadline(60)
+        >>> client.build("scan.pdf").add_step("ocr-pdf").execute(deadline=deadline)
+    """
+
+    def __init__(self, seconds: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self._clock = clock
+        self.expires_at = clock() + seconds
+
+    @classmethod
+    def coerce(cls, value: "DeadlineLike") -> Optional["Deadline"]:
+        """Convert seconds or a Deadline into a Deadline (None stays None)."""
+        if value is None or isinstance(value, Deadline):
+            return value
+        return cls(float(value))
+
+    def remaining(self) -> float:
+        """Seconds left before the deadline, never negative."""
+        return max(0.0, self.expires_at - self._clock())
+
+    @property
+    def expired(self) -> bool:
+        """Whether the deadline has passed."""
+        return self._clock() >= self.expires_at
+
+    def check(self, action: str = "request") -> None:
+        """Raise if the deadline has passed.
+
+        Raises:
+            DeadlineExceededError: If no time is left.
+        """
+        if self.expired:
+            raise DeadlineExceededError(f"Deadline exceeded before {action} could complete")
+
+    def __repr__(self) -> str:
+        """Representation with the remaining time."""
+        return f"Deadline(remaining={self.remaining():.3f}s)"
+
+
+DeadlineLike = Union[None, float, Deadline]
+
+_current_deadline: "ContextVar[Optional[Deadline]]" = ContextVar(
+    "nutrient_dws_deadline", default=None
+)
+
+
+def earliest(*deadlines: Optional[Deadline]) -> Optional[Deadline]:
+    """Return the deadline that expires first, ignoring None values."""
+    active = [deadline for deadline in deadlines if deadline is not None]
+    if not active:
+        return None
+    return min(active, key=lambda deadline: deadline.expires_at)
+
+
+def current_deadline() -> Optional[Deadline]:
+    """Return the deadline set by the innermost :func:`deadline_scope`, if any."""
+    return _current_deadline.get()
+
+
+@contextlib.contextmanager
+def deadline_scope(value: DeadlineLike) -> Generator[Optional[Deadline], None, None]:
+    """Apply a deadline to every API call made inside the block.
+
+    Nested scopes can only shorten the deadline, never extend it.
+
+    Args:
+        value: Seconds from now, a Deadline, or None for no change.
+
+    Yields:
+        The effective deadline.
+    """
+    deadline = earliest(_current_deadline.get(), Deadline.coerce(value))
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
@@ -77,6 +77,29 @@ class NutrientTimeoutError(NutrientError):
     pass
 
 
+class DeadlineExceededError(NutrientTimeoutError):
+    """Raised when a call's deadline passes before it could complete.
+
+    Unlike a plain timeout, no further retries are attempted once the
+    deadline is exceeded.
+    """
+
+    pass
+
+
+class CircuitOpenError(NutrientError):
+    """Raised when a request is rejected because the circuit breaker is open.
+
+    Attributes:
+        retry_after: Seconds until the circuit allows probe requests again.
+    """
+
+    def __init__(self, message: str, retry_after: float = 0.0) -> None:
+        """Initialize CircuitOpenError with the remaining open time."""
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
 class FileProcessingError(NutrientError):
     """Raised when file processing fails."""
 
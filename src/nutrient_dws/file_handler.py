@@ -1,12 +1,18 @@
 """File handling utilities for input/output operations."""
 
 import contextlib
+import errno
+import hashlib
 import io
+import itertools
 import os
+import threading
+from contextvars import ContextVar
 from pathlib import Path
-from typing import BinaryIO, Generator, Optional, Tuple, Union
+from typing import Any, BinaryIO, Generator, Iterable, Optional, Tuple, Union
 
 FileInput = Union[str, Path, bytes, BinaryIO]
+FileOutput = Union[str, Path, BinaryIO]
 
 # Default chunk size for streaming operations (1MB)
 DEFAULT_CHUNK_SIZE = 1024 * 1024
@@ -124,20 +130,227 @@ def prepare_file_for_upload(
         raise ValueError(f"Unsupported file input type: {type(file_input)}")
 
 
-def save_file_output(content: bytes, output_path: str) -> None:
-    """Save file content to disk.
+def upload_identity(file_input: FileInput) -> Optional[str]:
+    """Return a key that is equal for inputs which upload the same content.
+
+    Paths are identified by their resolved location and in-memory content by
+    its SHA-256 digest, so neither requires reading a file. File objects are
+    identified by the object itself, since reading them may consume them.
+
+    Args:
+        file_input: File path, bytes, or file-like object.
+
+    Returns:
+        The identity, or None if the input type is not recognized.
+    """
+    if isinstance(file_input, (str, Path)):
+        return "path:" + os.path.realpath(file_input)
+    if isinstance(file_input, bytes):
+        return "sha256:" + hashlib.sha256(file_input).hexdigest()
+    if hasattr(file_input, "read"):
+        return f"object:{id(file_input)}"
+    return None
+
+
+def is_writable(output: Any) -> bool:
+    """Return whether ``output`` is a writable object rather than a path."""
+    return not isinstance(output, (str, Path)) and callable(getattr(output, "write", None))
+
+
+def save_file_output(content: bytes, output_path: FileOutput, fsync: Optional[bool] = None) -> None:
+    """Save file content to disk or a writable binary object.
+
+    A path is written under a temporary name and renamed into place, so an
+    existing file is replaced atomically and a partial output never appears
+    under ``output_path``. A writable object, such as an open file, a pipe or
+    an object store upload stream, receives the content through ``write``
+    and is left open.
 
     Args:
         content: File bytes to save.
-        output_path: Path where to save the file.
+        output_path: Path where to save the file, or a writable binary object.
+        fsync: Flush the file and its directory entry to stable storage
+            before returning. Defaults to the setting of
+            :func:`fsync_outputs`.
 
     Raises:
         OSError: If file cannot be written.
     """
-    path = Path(output_path)
+    if is_writable(output_path):
+        output_path.write(content)  # type: ignore[union-attr]
+        return
+
+    path = Path(output_path)  # type: ignore[arg-type]
     # Create parent directories if they don't exist
     path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_bytes(content)
+
+    # Write to a temporary sibling and rename it into place, so readers never see a partial file
+    temp_path = _temporary_path(path)
+    try:
+        temp_path.write_bytes(content)
+        if _should_fsync(fsync):
+            with open(temp_path, "rb+") as f:
+                os.fsync(f.fileno())
+        _replace(temp_path, path, fsync)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            temp_path.unlink()
+        raise
+
+
+def copy_file_output(source_path: str, output_path: str, fsync: Optional[bool] = None) -> None:
+    """Copy an output file to another location, atomically like ``save_file_output``.
+
+    Args:
+        source_path: Existing output file.
+        output_path: Path where to save the copy.
+        fsync: Flush the copy to stable storage, as for ``save_file_output``.
+
+    Raises:
+        OSError: If the file cannot be copied.
+    """
+    with open(source_path, "rb") as source:
+        save_stream_output(source, output_path, os.fstat(source.fileno()).st_size, fsync)
+
+
+def save_stream_output(
+    stream: BinaryIO,
+    output_path: str,
+    size: Optional[int] = None,
+    fsync: Optional[bool] = None,
+) -> int:
+    """Save the rest of a readable stream to disk, atomically like ``save_file_output``.
+
+    The stream is copied in chunks, so it is never held in memory as a whole.
+
+    Args:
+        stream: Readable binary stream.
+        output_path: Path where to save the file.
+        size: Expected size in bytes, used to preallocate the file.
+        fsync: Flush the file to stable storage, as for ``save_file_output``.
+
+    Returns:
+        Number of bytes written.
+
+    Raises:
+        OSError: If the file cannot be written.
+    """
+    chunks = iter(lambda: stream.read(DEFAULT_CHUNK_SIZE), b"")
+    return save_chunked_output(chunks, output_path, size, fsync)
+
+
+def save_chunked_output(
+    chunks: Iterable[bytes],
+    output_path: str,
+    size: Optional[int] = None,
+    fsync: Optional[bool] = None,
+) -> int:
+    """Save chunks to disk as they are produced, atomically like ``save_file_output``.
+
+    When the size is known, for example from a ``Content-Length`` header, the
+    file is preallocated first, so the file system can place it contiguously
+    and a full disk is reported before any data is downloaded.
+
+    Args:
+        chunks: Iterable of byte chunks, for example a response body.
+        output_path: Path where to save the file.
+        size: Expected size in bytes, used to preallocate the file.
+        fsync: Flush the file to stable storage, as for ``save_file_output``.
+
+    Returns:
+        Number of bytes written.
+
+    Raises:
+        OSError: If the file cannot be written.
+    """
+    path = Path(output_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    temp_path = _temporary_path(path)
+    written = 0
+    try:
+        with open(temp_path, "wb") as f:
+            if size:
+                _preallocate(f, size)
+            for chunk in chunks:
+                f.write(chunk)
+                written += len(chunk)
+            if size and written < size:
+                # Drop the preallocated space that was not used
+                f.truncate(written)
+            if _should_fsync(fsync):
+                f.flush()
+                os.fsync(f.fileno())
+        _replace(temp_path, path, fsync)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            temp_path.unlink()
+        raise
+    return written
+
+
+_fsync_outputs: "ContextVar[bool]" = ContextVar("nutrient_dws_fsync_outputs", default=False)
+
+
+@contextlib.contextmanager
+def fsync_outputs(enabled: bool = True) -> Generator[None, None, None]:
+    """Flush every output file saved inside the block to stable storage.
+
+    Without fsync, an atomically renamed output can still be lost or appear
+    empty after a power failure, because the operating system may write the
+    rename to disk before the data. With fsync, the data and the directory
+    entry are on disk when the save returns, at the cost of slower writes.
+
+    Args:
+        enabled: Whether outputs are flushed inside the block.
+
+    Example:
+        >>> with fsync_outputs():
+        ...     client.ocr_pdf("scan.pdf", output_path="archive/scan.pdf")
+    """
+    token = _fsync_outputs.set(enabled)
+    try:
+        yield
+    finally:
+        _fsync_outputs.reset(token)
+
+
+def _should_fsync(fsync: Optional[bool]) -> bool:
+    """Resolve an fsync argument against the :func:`fsync_outputs` setting."""
+    return _fsync_outputs.get() if fsync is None else fsync
+
+
+def _preallocate(f: BinaryIO, size: int) -> None:
+    """Reserve ``size`` bytes for a new file, where the platform supports it."""
+    fallocate = getattr(os, "posix_fallocate", None)
+    if fallocate is None:
+        return
+    try:
+        fallocate(f.fileno(), 0, size)
+    except OSError as e:
+        # Not all file systems support preallocation; a full disk is a real error
+        if e.errno == errno.ENOSPC:
+            raise
+
+
+def _replace(temp_path: Path, path: Path, fsync: Optional[bool]) -> None:
+    """Rename a temporary file into place, syncing the directory if requested."""
+    os.replace(temp_path, path)
+    if _should_fsync(fsync) and hasattr(os, "O_DIRECTORY"):
+        fd = os.open(path.parent, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+_temporary_names = itertools.count()
+
+
+def _temporary_path(path: Path) -> Path:
+    """Hidden sibling of ``path`` that is unique to this write."""
+    unique = f"{os.getpid()}.{threading.get_ident()}.{next(_temporary_names)}"
+    return path.with_name(f".{path.name}.{unique}.tmp")
 
 
 def stream_file_content(
@@ -0,0 +1,131 @@
+"""Hedged requests for cutting tail latency on small, idempotent jobs."""
+
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, Optional
+
+from nutrient_dws import _fork
+
+
+class HedgingPolicy:
+    """Opt-in policy for sending duplicate ("hedged") requests.
+
+    For every tool listed in ``tools``, the latency of recent successful
+    requests is tracked. When a new request takes longer than the
+    ``percentile`` of that history, a second identical request is sent and
+    whichever finishes first wins. The number of hedges is capped at
+    ``budget`` times the number of eligible requests, so hedging can never
+    more than ``1 + budget`` the load (and credit usage) for those tools.
+
+    A tool is the Direct API tool name (for example ``"convert-to-pdf"`` or
+    ``"rotate-pages"``). A Builder workflow with several steps uses the step
+    names joined with ``+``, such as ``"rotate-pages+watermark-pdf"``.
+
+    Only requests whose uploads are held in memory are hedged, since a
+    streamed file cannot be sent twice.
+
+    Args:
+        tools: Tool names that may be hedged.
+        percentile: Latency percentile (0-100) after which a hedge is sent.
+        budget: Maximum ratio of hedges to eligible requests.
+        min_samples: Number of latency samples needed before hedging starts.
+        history_size: Number of latency samples kept per tool.
+        max_workers: Maximum number of threads used for hedged requests.
+
+    Example:
+        >>> policy = HedgingPolicy(tools=["convert-to-pdf"], percentile=95, budget=0.05)
+        >>> client = NutrientClient(api_key="...", hedging=policy)
+    """
+
+    def __init__(
+        self,
+        tools: Iterable[str],
+        percentile: float = 95.0,
+        budget: float = 0.1,
+        min_samples: int = 20,
+        history_size: int = 200,
+        max_workers: int = 16,
+    ) -> None:
+        if not 0 < percentile < 100:
+            raise ValueError("percentile must be between 0 and 100")
+        if budget < 0:
+            raise ValueError("budget must not be negative")
+
+        self.tools = frozenset(tools)
+        self.percentile = percentile
+        self.budget = budget
+        self.min_samples = min_samples
+        self.history_size = history_size
+        self.max_workers = max_workers
+
+        self._lock = threading.Lock()
+        self._history: Dict[str, Deque[float]] = {}
+        self._counters = {"requests": 0, "hedges": 0, "hedge_wins": 0}
+        _fork.register(self)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Pickle the configuration and latency history without the lock."""
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """Restore the policy with a new lock."""
+        self.__dict__.update(state)
+        self._after_fork()
+        _fork.register(self)
+
+    def _after_fork(self) -> None:
+        """Replace the lock, which may have been held by another thread at fork time."""
+        self._lock = threading.Lock()
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        """Snapshot of hedging counters and current hedge delays per tool."""
+        with self._lock:
+            delays = {tool: self._delay(tool) for tool in self._history}
+            return {**self._counters, "delays": delays}
+
+    def applies_to(self, tool: Optional[str]) -> bool:
+        """Return whether requests for ``tool`` may be hedged."""
+        return tool is not None and tool in self.tools
+
+    def hedge_delay(self, tool: str) -> Optional[float]:
+        """Seconds to wait before hedging, or None while history is insufficient."""
+        with self._lock:
+            return self._delay(tool)
+
+    def record_latency(self, tool: str, seconds: float) -> None:
+        """Add the latency of a successful request to the tool's history."""
+        with self._lock:
+            history = self._history.get(tool)
+            if history is None:
+                history = self._history[tool] = deque(maxlen=self.history_size)
+            history.append(seconds)
+
+    def record_request(self) -> None:
+        """Count an eligible request towards the hedge budget."""
+        with self._lock:
+            self._counters["requests"] += 1
+
+    def try_acquire_hedge(self) -> bool:
+        """Reserve a hedge if the budget allows it."""
+        with self._lock:
+            if self._counters["hedges"] + 1 > self.budget * self._counters["requests"]:
+                return False
+            self._counters["hedges"] += 1
+            return True
+
+    def record_hedge_win(self) -> None:
+        """Count a request where the hedge finished before the original."""
+        with self._lock:
+            self._counters["hedge_wins"] += 1
+
+    def _delay(self, tool: str) -> Optional[float]:
+        """Compute the percentile latency; must be called with the lock held."""
+        history = self._history.get(tool)
+        if history is None or len(history) < self.min_samples:
+            return None
+        ordered = sorted(history)
+        index = min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))
+        return ordered[index]
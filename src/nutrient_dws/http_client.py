@@ -1,70 +1,228 @@
 """HTTP client abstraction for API communication."""
 
+import contextlib
+import functools
 import json
 import logging
-from typing import Any, Dict, Optional
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextvars import ContextVar
+from typing import (
+    Any,
+    BinaryIO,
+    Callable,
+    ContextManager,
+    Dict,
+    Generator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
 
 import requests
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
 
+from nutrient_dws import _fork
+from nutrient_dws.circuit_breaker import CircuitBreaker
+from nutrient_dws.coalescing import SingleFlight, request_key
+from nutrient_dws.deadline import Deadline, DeadlineLike, current_deadline, earliest
 from nutrient_dws.exceptions import (
     APIError,
     AuthenticationError,
+    DeadlineExceededError,
     NutrientTimeoutError,
     ValidationError,
 )
+from nutrient_dws.hedging import HedgingPolicy
+from nutrient_dws.priority import PriorityScheduler, current_priority
+from nutrient_dws.result import Result
+from nutrient_dws.timeouts import TimeoutEstimator
+from nutrient_dws.transport import RequestsTransport, Transport, TransportResponse
 
 logger = logging.getLogger(__name__)
 
+# Upper bound for establishing a connection; a dead host should not take the full read timeout
+DEFAULT_CONNECT_TIMEOUT = 10.0
+
+# Response headers reporting the credits charged for a request and the credits left
+REQUEST_COST_HEADER = "x-pspdfkit-request-cost"
+REMAINING_CREDITS_HEADER = "x-pspdfkit-remaining-credits"
+
+
+class ResponseInfo:
+    """Metadata of a successful API response.
+
+    Attributes:
+        status_code: HTTP status code.
+        request_id: Request ID assigned by the API, if reported.
+        credits_used: Credits charged for the request, if reported.
+        credits_remaining: Credits left on the account, if reported.
+        discarded: Whether the response was billed but not used, such as
+            the slower attempt of a hedged request.
+    """
+
+    def __init__(
+        self,
+        status_code: int,
+        request_id: Optional[str] = None,
+        credits_used: Optional[float] = None,
+        credits_remaining: Optional[float] = None,
+        discarded: bool = False,
+    ) -> None:
+        self.status_code = status_code
+        self.request_id = request_id
+        self.credits_used = credits_used
+        self.credits_remaining = credits_remaining
+        self.discarded = discarded
+
+    @classmethod
+    def from_headers(
+        cls, status_code: int, headers: Mapping[str, str], discarded: bool = False
+    ) -> "ResponseInfo":
+        """Extract the metadata from response headers."""
+        return cls(
+            status_code,
+            request_id=headers.get("X-Request-Id"),
+            credits_used=_parse_float(headers.get(REQUEST_COST_HEADER)),
+            credits_remaining=_parse_float(headers.get(REMAINING_CREDITS_HEADER)),
+            discarded=discarded,
+        )
+
+    def __repr__(self) -> str:
+        """Representation with the request ID and credits."""
+        return (
+            f"ResponseInfo(status_code={self.status_code}, request_id={self.request_id!r}, "
+            f"credits_used={self.credits_used!r})"
+        )
+
+
+_response_recorder: "ContextVar[Optional[List[ResponseInfo]]]" = ContextVar(
+    "nutrient_dws_response_recorder", default=None
+)
+
+
+@contextlib.contextmanager
+def capture_responses() -> Generator[List[ResponseInfo], None, None]:
+    """Collect :class:`ResponseInfo` for every successful API call in the block.
+
+    The slower attempt of a hedged request is billed too; it is recorded
+    with ``discarded`` set when it completes, which may be after the call
+    that started it has returned.
+
+    Yields:
+        A list that receives one entry per successful response, in order.
+
+    Example:
+        >>> with capture_responses() as responses:
+        ...     client.ocr_pdf("scan.pdf")
+        >>> responses[0].request_id
+    """
+    responses: List[ResponseInfo] = []
+    token = _response_recorder.set(responses)
+    try:
+        yield responses
+    finally:
+        _response_recorder.reset(token)
+
 
 class HTTPClient:
-    """HTTP client with connection pooling and retry logic."""
+    """HTTP client with connection pooling and retry logic.
+
+    Requests are sent through a pluggable :class:`~nutrient_dws.transport.Transport`.
+    By default a pooled ``requests`` session is used; pass ``transport`` to use
+    HTTP/2 multiplexing or an in-memory transport in tests.
 
-    def __init__(self, api_key: Optional[str], timeout: int = 300) -> None:
+    The client pickles as configuration only, so it can be passed to worker
+    processes. Connections are opened lazily and are never shared with a
+    forked child process.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str],
+        timeout: int = 300,
+        transport: Optional[Transport] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        hedging: Optional[HedgingPolicy] = None,
+        connect_timeout: Optional[float] = None,
+        total_timeout: Optional[float] = None,
+        timeout_estimator: Optional[TimeoutEstimator] = None,
+        scheduler: Optional[PriorityScheduler] = None,
+        single_flight: Optional[SingleFlight] = None,
+    ) -> None:
         """Initialize HTTP client with authentication.
 
         Args:
             api_key: API key for authentication.
-            timeout: Request timeout in seconds.
+            timeout: Read timeout in seconds, i.e. the longest wait for the
+                server between bytes of a response.
+            transport: Transport backend. Defaults to a ``RequestsTransport``.
+            circuit_breaker: Optional circuit breaker that rejects requests
+                while the API is failing.
+            hedging: Optional policy for hedging slow requests of selected tools.
+            connect_timeout: Timeout for establishing a connection. Defaults
+                to 10 seconds (or ``timeout`` if that is shorter).
+            total_timeout: Optional limit for a whole call including retries
+                and backoff, applied as a deadline to every request.
+            timeout_estimator: Optional estimator that derives the read
+                timeout of each request from its size, actions and the
+                observed speed of recent requests, instead of ``timeout``.
+            scheduler: Optional priority scheduler that limits concurrent
+                requests and admits higher priority lanes first.
+            single_flight: Optional coalescer that lets concurrent identical
+                requests share one response.
         """
         self._api_key = api_key
         self._timeout = timeout
-        self._session = self._create_session()
+        self._connect_timeout = (
+            connect_timeout if connect_timeout is not None else DEFAULT_CONNECT_TIMEOUT
+        )
+        self._total_timeout = total_timeout
+        self._timeout_estimator = timeout_estimator
+        self._circuit_breaker = circuit_breaker
+        self._hedging = hedging
+        self._scheduler = scheduler
+        self._single_flight = single_flight
+        self._hedge_executor: Optional[ThreadPoolExecutor] = None
+        self._headers = self._default_headers()
+        self._transport = transport or RequestsTransport(headers=self._headers)
         self._base_url = "https://api.pspdfkit.com"
+        _fork.register(self)
 
-    def _create_session(self) -> requests.Session:
-        """Create requests session with retry logic."""
-        session = requests.Session()
-
-        # Configure retries with exponential backoff
-        retry_strategy = Retry(
-            total=3,
-            backoff_factor=1,
-            status_forcelist=[429, 500, 502, 503, 504],
-            allowed_methods=["GET", "POST"],
-            raise_on_status=False,  # We'll handle status codes ourselves
-        )
-        adapter = HTTPAdapter(
-            max_retries=retry_strategy,
-            pool_connections=10,
-            pool_maxsize=10,
-        )
-        session.mount("http://", adapter)
-        session.mount("https://", adapter)
+    def __getstate__(self) -> Dict[str, Any]:
+        """Pickle the configuration without the hedging thread pool."""
+        state = self.__dict__.copy()
+        state["_hedge_executor"] = None
+        return state
 
-        # Set default headers
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """Restore the configuration and register for fork handling."""
+        self.__dict__.update(state)
+        _fork.register(self)
+
+    def _after_fork(self) -> None:
+        """Forget the hedging thread pool; its threads do not exist in the child."""
+        self._hedge_executor = None
+
+    def _default_headers(self) -> Dict[str, str]:
+        """Build the headers sent with every request."""
         headers = {
             "User-Agent": "nutrient-dws-python-client/0.1.0",
         }
         if self._api_key:
             headers["Authorization"] = f"Bearer {self._api_key}"
+        return headers
 
-        session.headers.update(headers)
-
-        return session
+    @property
+    def _session(self) -> requests.Session:
+        """Session of the default requests transport."""
+        if not isinstance(self._transport, RequestsTransport):
+            raise AttributeError("Session is only available with RequestsTransport")
+        return self._transport.session
 
-    def _handle_response(self, response: requests.Response) -> bytes:
+    def _handle_response(self, response: TransportResponse) -> bytes:
         """Handle API response and raise appropriate exceptions.
 
         Args:
@@ -81,9 +239,7 @@ class HTTPClient:
         # Extract request ID if available
         request_id = response.headers.get("X-Request-Id")
 
-        try:
-            response.raise_for_status()
-        except requests.exceptions.HTTPError:
+        if response.status_code >= 400:
             # Try to parse error message from response
             error_message = f"HTTP {response.status_code}"
             error_details = None
@@ -92,7 +248,7 @@ class HTTPClient:
                 error_data = response.json()
                 error_message = error_data.get("message", error_message)
                 error_details = error_data.get("errors", error_data.get("details"))
-            except (json.JSONDecodeError, requests.exceptions.JSONDecodeError):
+            except ValueError:
                 # If response is not JSON, use text content
                 if response.text:
                     error_message = f"{error_message}: {response.text[:200]}"
@@ -123,6 +279,13 @@ class HTTPClient:
         files: Optional[Dict[str, Any]] = None,
         data: Optional[Dict[str, Any]] = None,
         json_data: Optional[Dict[str, Any]] = None,
+        tool: Optional[str] = None,
+        deadline: DeadlineLike = None,
+        timeout: Optional[float] = None,
+        input_size: Optional[int] = None,
+        action_types: Sequence[str] = (),
+        priority: Optional[str] = None,
+        output: Optional[BinaryIO] = None,
     ) -> bytes:
         """Make POST request to API.
 
@@ -131,15 +294,157 @@ class HTTPClient:
             files: Files to upload.
             data: Form data.
             json_data: JSON data (for multipart requests).
+            tool: Name of the operation being performed, used to apply
+                per-tool policies such as hedging.
+            deadline: Seconds from now, or a ``Deadline``, by which the call
+                including retries must finish. Combined with any deadline set
+                by :func:`~nutrient_dws.deadline.deadline_scope` and the
+                client's ``total_timeout``; the earliest one applies.
+            timeout: Read timeout override for this call, in seconds.
+            input_size: Total size of the uploaded files in bytes, used by
+                the timeout estimator.
+            action_types: Build API action types in the request, used by the
+                timeout estimator.
+            priority: Lane of the request when a scheduler is configured.
+                Defaults to the lane set by
+                :func:`~nutrient_dws.priority.priority_scope`, or the
+                scheduler's default lane.
+            output: Optional writable binary stream. The response body is
+                written to it in chunks as it arrives instead of being
+                returned. Such requests are never hedged or coalesced,
+                since the body can only be consumed once.
 
         Returns:
-            Response content as bytes.
+            Response content as bytes, or empty bytes if ``output`` is given.
 
         Raises:
             AuthenticationError: If API key is missing or invalid.
             TimeoutError: If request times out.
+            DeadlineExceededError: If the deadline passes before completion.
+            CircuitOpenError: If the circuit breaker is open.
             APIError: For other API errors.
         """
+        if output is not None:
+            with self.post_result(
+                endpoint,
+                files=files,
+                data=data,
+                json_data=json_data,
+                tool=tool,
+                deadline=deadline,
+                timeout=timeout,
+                input_size=input_size,
+                action_types=action_types,
+                priority=priority,
+            ) as result:
+                result.save_to(output)
+            return b""
+
+        url, prepared_data, call_deadline, read_timeout, estimator = self._prepare(
+            endpoint, data, json_data, tool, deadline, timeout, input_size, action_types
+        )
+        flight = self._single_flight
+        flight_key = request_key(endpoint, files, prepared_data) if flight is not None else None
+
+        def send() -> TransportResponse:
+            return self._dispatch(
+                url,
+                files,
+                prepared_data,
+                tool,
+                call_deadline,
+                read_timeout,
+                estimator,
+                input_size,
+                action_types,
+                priority,
+            )
+
+        shared = False
+        if flight is not None and flight_key is not None:
+            response, shared = flight.do(flight_key, send, call_deadline)
+        else:
+            response = send()
+
+        recorder = _response_recorder.get()
+        # A shared response was charged to the call that sent it
+        if recorder is not None and not shared:
+            recorder.append(ResponseInfo.from_headers(response.status_code, response.headers))
+        return response.content
+
+    def post_result(
+        self,
+        endpoint: str,
+        files: Optional[Dict[str, Any]] = None,
+        data: Optional[Dict[str, Any]] = None,
+        json_data: Optional[Dict[str, Any]] = None,
+        tool: Optional[str] = None,
+        deadline: DeadlineLike = None,
+        timeout: Optional[float] = None,
+        input_size: Optional[int] = None,
+        action_types: Sequence[str] = (),
+        priority: Optional[str] = None,
+    ) -> Result:
+        """Make POST request to API and return the response without reading its body.
+
+        Takes the same arguments as :meth:`post`. The request is never hedged
+        or coalesced, since the body can only be consumed once.
+
+        Returns:
+            A :class:`~nutrient_dws.result.Result` over the live response.
+
+        Raises:
+            AuthenticationError: If API key is missing or invalid.
+            TimeoutError: If request times out.
+            DeadlineExceededError: If the deadline passes before completion.
+            CircuitOpenError: If the circuit breaker is open.
+            APIError: For other API errors.
+        """
+        url, prepared_data, call_deadline, read_timeout, estimator = self._prepare(
+            endpoint, data, json_data, tool, deadline, timeout, input_size, action_types
+        )
+        started = time.monotonic()
+        # The body is still to be received, so the result returns the scheduler slot
+        release: Optional[Callable[[], None]] = None
+        if self._scheduler is not None:
+            lane = self._scheduler.acquire(priority or current_priority(), call_deadline)
+            release = functools.partial(self._scheduler.release, lane)
+        try:
+            response = self._dispatch(
+                url,
+                files,
+                prepared_data,
+                tool,
+                call_deadline,
+                read_timeout,
+                estimator,
+                input_size,
+                action_types,
+                priority,
+                stream=True,
+            )
+        except BaseException:
+            if release is not None:
+                release()
+            raise
+        info = ResponseInfo.from_headers(response.status_code, response.headers)
+        recorder = _response_recorder.get()
+        if recorder is not None:
+            recorder.append(info)
+        return Result(response, info, time.monotonic() - started, release)
+
+    def _prepare(
+        self,
+        endpoint: str,
+        data: Optional[Dict[str, Any]],
+        json_data: Optional[Dict[str, Any]],
+        tool: Optional[str],
+        deadline: DeadlineLike,
+        timeout: Optional[float],
+        input_size: Optional[int],
+        action_types: Sequence[str],
+    ) -> Tuple[str, Dict[str, Any], Optional[Deadline], float, Optional[TimeoutEstimator]]:
+        """Resolve the URL, form data, deadline and read timeout of a request."""
         if not self._api_key:
             raise AuthenticationError("API key is required but not provided")
 
@@ -151,26 +456,207 @@ class HTTPClient:
         if json_data is not None:
             prepared_data["instructions"] = json.dumps(json_data)
 
-        try:
-            response = self._session.post(
-                url,
-                files=files,
-                data=prepared_data,
-                timeout=self._timeout,
-            )
-        except requests.exceptions.Timeout as e:
-            raise NutrientTimeoutError(f"Request timed out after {self._timeout} seconds") from e
-        except requests.exceptions.ConnectionError as e:
-            raise APIError(f"Connection error: {e!s}") from e
-        except requests.exceptions.RequestException as e:
-            raise APIError(f"Request failed: {e!s}") from e
+        call_deadline = earliest(
+            Deadline.coerce(deadline),
+            current_deadline(),
+            Deadline(self._total_timeout) if self._total_timeout is not None else None,
+        )
+        if call_deadline is not None:
+            call_deadline.check()
+
+        estimator = self._timeout_estimator if timeout is None and tool is not None else None
+        if timeout is not None:
+            read_timeout = float(timeout)
+        elif estimator is not None and tool is not None:
+            read_timeout = estimator.estimate(tool, input_size, action_types, self._timeout)
+        else:
+            read_timeout = float(self._timeout)
+        return url, prepared_data, call_deadline, read_timeout, estimator
+
+    def _dispatch(
+        self,
+        url: str,
+        files: Optional[Dict[str, Any]],
+        data: Dict[str, Any],
+        tool: Optional[str],
+        deadline: Optional[Deadline],
+        read_timeout: float,
+        estimator: Optional[TimeoutEstimator],
+        input_size: Optional[int],
+        action_types: Sequence[str],
+        priority: Optional[str],
+        stream: bool = False,
+    ) -> TransportResponse:
+        """Send a request through the scheduler, circuit breaker and hedging policy.
+
+        Streamed requests are not scheduled here; the caller holds the slot
+        until the body has been read.
+        """
+        slot: ContextManager[Any] = contextlib.nullcontext()
+        if self._scheduler is not None and not stream:
+            slot = self._scheduler.slot(priority or current_priority(), deadline)
 
+        with slot:
+            breaker = self._circuit_breaker
+            if breaker is not None:
+                breaker.before_call()
+
+            started = time.monotonic()
+            recorded = False
+            try:
+                if (
+                    self._hedging is not None
+                    and not stream
+                    and tool is not None
+                    and self._hedging.applies_to(tool)
+                    and _is_replayable(files)
+                ):
+                    response = self._send_hedged(
+                        self._hedging, tool, url, files, data, deadline, read_timeout
+                    )
+                else:
+                    response = self._send(url, files, data, deadline, read_timeout, stream)
+            except Exception as e:
+                if breaker is not None:
+                    breaker.record(e)
+                    recorded = True
+                if (
+                    estimator is not None
+                    and tool is not None
+                    and isinstance(e, NutrientTimeoutError)
+                    and not isinstance(e, DeadlineExceededError)
+                ):
+                    # The estimate was too short; make the next one longer
+                    estimator.record(tool, input_size, action_types, read_timeout)
+                raise
+            else:
+                if breaker is not None:
+                    breaker.record_success()
+                    recorded = True
+            finally:
+                # Interrupted calls have no outcome, but must not keep a probe slot
+                if breaker is not None and not recorded:
+                    breaker.release_call()
+
+            if estimator is not None and tool is not None:
+                estimator.record(tool, input_size, action_types, time.monotonic() - started)
+        return response
+
+    def _request_timeout(
+        self,
+        deadline: Optional[Deadline],
+        read_timeout: Optional[float] = None,
+    ) -> Tuple[float, float]:
+        """Connect and read timeouts, capped by the time left before the deadline."""
+        read = float(self._timeout if read_timeout is None else read_timeout)
+        connect = min(float(self._connect_timeout), read)
+        if deadline is not None:
+            remaining = max(deadline.remaining(), 0.001)
+            connect, read = min(connect, remaining), min(read, remaining)
+        return connect, read
+
+    def _send(
+        self,
+        url: str,
+        files: Optional[Dict[str, Any]],
+        data: Dict[str, Any],
+        deadline: Optional[Deadline] = None,
+        read_timeout: Optional[float] = None,
+        stream: bool = False,
+    ) -> TransportResponse:
+        """Send a single POST request and return the successful response."""
+        kwargs: Dict[str, Any] = {"stream": True} if stream else {}
+        response = self._transport.send(
+            "POST",
+            url,
+            headers=self._headers,
+            files=files,
+            data=data,
+            timeout=self._request_timeout(deadline, read_timeout),
+            deadline=deadline,
+            **kwargs,
+        )
         logger.debug(f"Response: {response.status_code}")
-        return self._handle_response(response)
+        self._handle_response(response)
+        return response
+
+    def _timed_send(
+        self,
+        url: str,
+        files: Optional[Dict[str, Any]],
+        data: Dict[str, Any],
+        deadline: Optional[Deadline] = None,
+        read_timeout: Optional[float] = None,
+    ) -> Tuple[TransportResponse, float]:
+        """Send a request and measure its latency."""
+        started = time.monotonic()
+        response = self._send(url, files, data, deadline, read_timeout)
+        return response, time.monotonic() - started
+
+    def _send_hedged(
+        self,
+        policy: HedgingPolicy,
+        tool: str,
+        url: str,
+        files: Optional[Dict[str, Any]],
+        data: Dict[str, Any],
+        deadline: Optional[Deadline] = None,
+        read_timeout: Optional[float] = None,
+    ) -> TransportResponse:
+        """Send a request, duplicating it if it is slower than usual for ``tool``.
+
+        The first successful response wins. The slower attempt is cancelled
+        if it has not started yet; otherwise its response is recorded as
+        discarded once it completes, since it is billed as well.
+        """
+        recorder = _response_recorder.get()
+        policy.record_request()
+        delay = policy.hedge_delay(tool)
+        if delay is None:
+            response, elapsed = self._timed_send(url, files, data, deadline, read_timeout)
+            policy.record_latency(tool, elapsed)
+            return response
+
+        if self._hedge_executor is None:
+            self._hedge_executor = ThreadPoolExecutor(
+                max_workers=policy.max_workers, thread_name_prefix="nutrient-hedge"
+            )
+        executor = self._hedge_executor
+
+        primary = executor.submit(self._timed_send, url, files, data, deadline, read_timeout)
+        done, _ = wait([primary], timeout=delay)
+        if done or not policy.try_acquire_hedge():
+            response, elapsed = primary.result()
+            policy.record_latency(tool, elapsed)
+            return response
+
+        logger.debug(f"Hedging {tool} request after {delay:.2f}s")
+        hedge = executor.submit(self._timed_send, url, files, data, deadline, read_timeout)
+        pending: Set[Future[Tuple[TransportResponse, float]]] = {primary, hedge}
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                error = future.exception()
+                if error is None:
+                    for loser in pending:
+                        if not loser.cancel():
+                            loser.add_done_callback(functools.partial(_record_discarded, recorder))
+                    if future is hedge:
+                        policy.record_hedge_win()
+                    response, elapsed = future.result()
+                    policy.record_latency(tool, elapsed)
+                    return response
+
+        assert error is not None
+        raise error
 
     def close(self) -> None:
-        """Close the session."""
-        self._session.close()
+        """Close the transport and its connections."""
+        if self._hedge_executor is not None:
+            self._hedge_executor.shutdown(wait=False)
+            self._hedge_executor = None
+        self._transport.close()
 
     def __enter__(self) -> "HTTPClient":
         """Context manager entry."""
@@ -179,3 +665,37 @@ class HTTPClient:
     def __exit__(self, *args: Any) -> None:
         """Context manager exit."""
         self.close()
+
+
+def _record_discarded(
+    recorder: Optional[List[ResponseInfo]], future: "Future[Tuple[TransportResponse, float]]"
+) -> None:
+    """Record the response of an abandoned hedge attempt and release its connection."""
+    if future.cancelled() or future.exception() is not None:
+        return
+    response, _ = future.result()
+    if recorder is not None:
+        recorder.append(
+            ResponseInfo.from_headers(response.status_code, response.headers, discarded=True)
+        )
+    response.close()
+
+
+def _is_replayable(files: Optional[Dict[str, Any]]) -> bool:
+    """Return whether multipart files can be sent more than once."""
+    if not files:
+        return True
+    return all(
+        isinstance(value, bytes) or (isinstance(value, tuple) and isinstance(value[1], bytes))
+        for value in files.values()
+    )
+
+
+def _parse_float(value: Optional[str]) -> Optional[float]:
+    """Parse a numeric header value, returning None if absent or malformed."""
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
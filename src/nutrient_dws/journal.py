@@ -0,0 +1,262 @@
+"""Durable checkpoint journal for resumable batch jobs."""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple, Union
+
+from nutrient_dws.file_handler import FileInput
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    pipeline TEXT,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS items (
+    job_id TEXT NOT NULL,
+    key TEXT NOT NULL,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    output_path TEXT,
+    request_id TEXT,
+    credits REAL,
+    error TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (job_id, key)
+) WITHOUT ROWID;
+"""
+
+# Rows fetched per query when iterating over the journal
+_PAGE_SIZE = 1000
+
+
+class ItemState:
+    """Possible states of a journaled batch item."""
+
+    IN_FLIGHT = "in_flight"
+    DONE = "done"
+    FAILED = "failed"
+
+
+def input_key(item: FileInput) -> str:
+    """Return a stable journal key for an input.
+
+    Paths are keyed by their absolute path, in-memory content by its SHA-256
+    digest and file objects by their ``name``.
+
+    Raises:
+        ValueError: If a file object has no name.
+    """
+    if isinstance(item, (str, Path)):
+        return os.path.abspath(item)
+    if isinstance(item, bytes):
+        return "sha256:" + hashlib.sha256(item).hexdigest()
+    name = getattr(item, "name", None)
+    if not isinstance(name, str):
+        raise ValueError("File objects without a name cannot be journaled")
+    return os.path.abspath(name)
+
+
+class BatchJournal:
+    """SQLite journal recording the progress of a batch job.
+
+    Every input of a job is stored as a row with its state, output location,
+    request ID, credits charged and last error. When a job is run again with
+    the same ``job_id``, completed inputs are skipped, so a crash at item
+    31,000 of 50,000 does not cost the first 31,000 items again; failed and
+    in-flight items are retried.
+
+    Rows are keyed by ``(job_id, key)`` in a ``WITHOUT ROWID`` table and the
+    database uses write-ahead logging. Updates are committed in groups at
+    most ``commit_interval`` seconds apart, which keeps the journal fast for
+    millions of entries; after a crash, at most the last interval of results
+    is processed again.
+
+    Args:
+        path: Database file; created if missing. Several jobs may share it.
+        job_id: Identifier of the job; reuse it to resume the job.
+        commit_interval: Maximum seconds between commits.
+
+    Example:
+        >>> with BatchJournal("jobs.sqlite", job_id="ocr-2024-06") as journal:
+        ...     runner = BatchRunner(client, pipeline, output="ocr/", journal=journal)
+        ...     for result in runner.run(paths):
+        ...         pass
+        >>> journal.summary()
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        job_id: str,
+        commit_interval: float = 1.0,
+    ) -> None:
+        self.path = str(path)
+        self.job_id = job_id
+        self.commit_interval = commit_interval
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.execute(
+            "INSERT OR IGNORE INTO jobs (job_id, created_at) VALUES (?, ?)",
+            (job_id, time.time()),
+        )
+        self._conn.commit()
+        self._last_commit = time.monotonic()
+
+    def bind_pipeline(self, pipeline: str) -> None:
+        """Associate the job with a serialized pipeline.
+
+        Raises:
+            ValueError: If the job was started with a different pipeline, in
+                which case its completed items would not be valid.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT pipeline FROM jobs WHERE job_id = ?", (self.job_id,)
+            ).fetchone()
+            if row[0] is None:
+                self._conn.execute(
+                    "UPDATE jobs SET pipeline = ? WHERE job_id = ?", (pipeline, self.job_id)
+                )
+                self._conn.commit()
+            elif row[0] != pipeline:
+                raise ValueError(f"Job {self.job_id!r} was started with a different pipeline")
+
+    def state(self, key: str) -> Optional[str]:
+        """Return the :class:`ItemState` of ``key``, or None if it is unknown."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT state FROM items WHERE job_id = ? AND key = ?", (self.job_id, key)
+            ).fetchone()
+        return row[0] if row else None
+
+    def is_done(self, key: str) -> bool:
+        """Whether ``key`` was completed in this or an earlier run."""
+        return self.state(key) == ItemState.DONE
+
+    def mark_in_flight(self, key: str) -> None:
+        """Record that ``key`` has been submitted."""
+        self._write(
+            "INSERT INTO items (job_id, key, state, attempts, updated_at) VALUES (?, ?, ?, 1, ?) "
+            "ON CONFLICT (job_id, key) DO UPDATE SET state = excluded.state, "
+            "attempts = attempts + 1, error = NULL, updated_at = excluded.updated_at",
+            (self.job_id, key, ItemState.IN_FLIGHT, time.time()),
+        )
+
+    def mark_done(
+        self,
+        key: str,
+        output_path: Optional[str] = None,
+        request_id: Optional[str] = None,
+        credits: Optional[float] = None,
+    ) -> None:
+        """Record that ``key`` completed successfully."""
+        self._finish(key, ItemState.DONE, output_path, request_id, credits, None)
+
+    def mark_failed(
+        self,
+        key: str,
+        error: str,
+        request_id: Optional[str] = None,
+        credits: Optional[float] = None,
+    ) -> None:
+        """Record that ``key`` failed; it is retried when the job is resumed."""
+        self._finish(key, ItemState.FAILED, None, request_id, credits, error)
+
+    def items(self, state: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Iterate over the journaled items of the job, optionally filtered by state.
+
+        Items are read in pages, so iterating over millions of entries does
+        not load them into memory at once.
+        """
+        self.commit()
+        columns = ("key", "state", "attempts", "output_path", "request_id", "credits", "error")
+        query = f"SELECT {', '.join(columns)} FROM items WHERE job_id = ? AND key > ?"
+        if state is not None:
+            query += " AND state = ?"
+        query += " ORDER BY key LIMIT ?"
+
+        last_key = ""
+        while True:
+            params: Tuple[Any, ...] = (self.job_id, last_key)
+            if state is not None:
+                params += (state,)
+            with self._lock:
+                rows = self._conn.execute(query, (*params, _PAGE_SIZE)).fetchall()
+            for row in rows:
+                yield dict(zip(columns, row))
+            if len(rows) < _PAGE_SIZE:
+                return
+            last_key = rows[-1][0]
+
+    def summary(self) -> Dict[str, Any]:
+        """Number of items per state and total credits charged for the job."""
+        self.commit()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT state, COUNT(*), TOTAL(credits) FROM items WHERE job_id = ? GROUP BY state",
+                (self.job_id,),
+            ).fetchall()
+        summary: Dict[str, Any] = {ItemState.IN_FLIGHT: 0, ItemState.DONE: 0, ItemState.FAILED: 0}
+        credits = 0.0
+        for state, count, state_credits in rows:
+            summary[state] = count
+            credits += state_credits
+        summary["credits"] = credits
+        return summary
+
+    def commit(self) -> None:
+        """Write all pending updates to disk."""
+        with self._lock:
+            self._conn.commit()
+            self._last_commit = time.monotonic()
+
+    def close(self) -> None:
+        """Commit pending updates and close the database."""
+        self.commit()
+        self._conn.close()
+
+    def __enter__(self) -> "BatchJournal":
+        """Context manager entry."""
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        """Context manager exit."""
+        self.close()
+
+    def _finish(
+        self,
+        key: str,
+        state: str,
+        output_path: Optional[str],
+        request_id: Optional[str],
+        credits: Optional[float],
+        error: Optional[str],
+    ) -> None:
+        """Record the final state of an attempt, adding its credits to earlier attempts."""
+        self._write(
+            "INSERT INTO items (job_id, key, state, attempts, output_path, request_id, credits, "
+            "error, updated_at) VALUES (?, ?, ?, 1, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (job_id, key) DO UPDATE SET state = excluded.state, "
+            "output_path = excluded.output_path, request_id = excluded.request_id, "
+            "credits = COALESCE(credits + excluded.credits, credits, excluded.credits), "
+            "error = excluded.error, "
+            "updated_at = excluded.updated_at",
+            (self.job_id, key, state, output_path, request_id, credits, error, time.time()),
+        )
+
+    def _write(self, statement: str, params: Tuple[Any, ...]) -> None:
+        """Execute an update and commit if the commit interval has elapsed."""
+        with self._lock:
+            self._conn.execute(statement, params)
+            if time.monotonic() - self._last_commit >= self.commit_interval:
+                self._conn.commit()
+                self._last_commit = time.monotonic()
@@ -0,0 +1,191 @@
+"""Removal of redundant Build API actions before a request is sent."""
+
+import copy
+from typing import Any, Dict, List, Optional, Tuple
+
+# Actions whose second application in a row has no further effect
+IDEMPOTENT_ACTIONS = frozenset({"flatten", "ocr", "applyRedactions"})
+
+# Strategy option holding the search terms of each redaction strategy
+_REDACTION_TERMS = {"text": "text", "regex": "regex", "preset": "preset"}
+
+
+def optimize_actions(actions: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """Return an equivalent, shorter list of actions and a description of each change.
+
+    The following rewrites are applied until none applies any more:
+
+    - Consecutive rotations of the same pages are folded into one, modulo 360.
+    - Rotations by a multiple of 360 degrees are removed.
+    - Redactions without search terms are removed.
+    - An idempotent action (``flatten``, ``ocr``, ``applyRedactions``)
+      directly repeated with the same options is removed.
+
+    A ``flatten`` before an annotation import (``applyXfdf``,
+    ``applyInstantJson``) is always kept, even if another ``flatten``
+    follows: the import may update or delete the annotations that are
+    present, which it can no longer do once they are flattened.
+
+    Args:
+        actions: Build API actions. They are not modified.
+
+    Returns:
+        The optimized actions and human-readable descriptions of the changes.
+    """
+    optimized = copy.deepcopy(actions)
+    changes: List[str] = []
+    changed = True
+    while changed:
+        changed = False
+        for rewrite in (_drop_noops, _fold_rotations, _drop_repeats):
+            optimized, rewrite_changes = rewrite(optimized)
+            if rewrite_changes:
+                changes.extend(rewrite_changes)
+                changed = True
+    return optimized, changes
+
+
+def _drop_noops(actions: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """Remove rotations by full turns and redactions without search terms."""
+    kept = []
+    changes = []
+    for index, action in enumerate(actions):
+        if action.get("type") == "rotate" and action.get("rotateBy", 0) % 360 == 0:
+            changes.append(
+                f"Removed rotation by {action.get('rotateBy', 0)} degrees (action {index})"
+            )
+        elif action.get("type") == "createRedactions" and _has_no_terms(action):
+            changes.append(f"Removed redaction without search terms (action {index})")
+        else:
+            kept.append(action)
+    return kept, changes
+
+
+def _has_no_terms(action: Dict[str, Any]) -> bool:
+    """Whether a createRedactions action has an empty set of search terms."""
+    option = _REDACTION_TERMS.get(action.get("strategy", ""))
+    if option is None:
+        return False
+    return not (action.get("strategyOptions") or {}).get(option)
+
+
+def _fold_rotations(actions: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """Fold consecutive rotations of the same pages."""
+    kept: List[Dict[str, Any]] = []
+    changes = []
+    for action in actions:
+        previous = kept[-1] if kept else None
+        if (
+            previous is not None
+            and previous.get("type") == "rotate"
+            and action.get("type") == "rotate"
+            and previous.get("pageIndexes") == action.get("pageIndexes")
+        ):
+            total = (previous.get("rotateBy", 0) + action.get("rotateBy", 0)) % 360
+            changes.append(
+                f"Folded rotations by {previous.get('rotateBy', 0)} and "
+                f"{action.get('rotateBy', 0)} degrees into {total}"
+            )
+            previous["rotateBy"] = total
+        else:
+            kept.append(action)
+    return kept, changes
+
+
+def _drop_repeats(actions: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """Remove idempotent actions that directly repeat the previous action."""
+    kept: List[Dict[str, Any]] = []
+    changes = []
+    for action in actions:
+        if kept and action.get("type") in IDEMPOTENT_ACTIONS and action == kept[-1]:
+            changes.append(f"Removed repeated {action['type']} action")
+        else:
+            kept.append(action)
+    return kept, changes
+
+
+class OptimizationReport:
+    """Changes made by the optimizer to a Build API request.
+
+    Attributes:
+        original: Instructions before optimization.
+        optimized: Instructions after optimization.
+        changes: Human-readable description of every change.
+        cost_before: Cost of ``original`` reported by the API, once
+            :meth:`estimate_savings` was called.
+        cost_after: Cost of ``optimized`` reported by the API, once
+            :meth:`estimate_savings` was called.
+    """
+
+    def __init__(
+        self, original: Dict[str, Any], optimized: Dict[str, Any], changes: List[str]
+    ) -> None:
+        self.original = original
+        self.optimized = optimized
+        self.changes = changes
+        self.cost_before: Optional[float] = None
+        self.cost_after: Optional[float] = None
+
+    @property
+    def removed_actions(self) -> int:
+        """Number of actions removed from the request."""
+        return _count_actions(self.original) - _count_actions(self.optimized)
+
+    def estimate_savings(self, client: Any) -> Optional[float]:
+        """Return the credits saved per request, according to ``/analyze_build``.
+
+        Args:
+            client: ``NutrientClient`` used to analyze both versions.
+
+        Returns:
+            The difference in cost, or None if the API did not report costs.
+        """
+        if not self.changes:
+            self.cost_before = self.cost_after = _cost(client.analyze_build(self.original))
+        else:
+            self.cost_before = _cost(client.analyze_build(self.original))
+            self.cost_after = _cost(client.analyze_build(self.optimized))
+        if self.cost_before is None or self.cost_after is None:
+            return None
+        return self.cost_before - self.cost_after
+
+    def __repr__(self) -> str:
+        """Representation with the number of changes."""
+        return (
+            f"OptimizationReport(changes={len(self.changes)}, "
+            f"removed_actions={self.removed_actions})"
+        )
+
+
+def optimize_instructions(instructions: Dict[str, Any]) -> OptimizationReport:
+    """Optimize the top-level and per-part actions of Build API instructions.
+
+    Args:
+        instructions: Build API instructions. They are not modified.
+
+    Returns:
+        A report holding the original and optimized instructions.
+    """
+    optimized = copy.deepcopy(instructions)
+    changes: List[str] = []
+    for index, part in enumerate(optimized.get("parts", [])):
+        if part.get("actions"):
+            part["actions"], part_changes = optimize_actions(part["actions"])
+            changes.extend(f"Part {index}: {change}" for change in part_changes)
+            if not part["actions"]:
+                del part["actions"]
+    optimized["actions"], top_changes = optimize_actions(optimized.get("actions", []))
+    changes.extend(top_changes)
+    return OptimizationReport(copy.deepcopy(instructions), optimized, changes)
+
+
+def _count_actions(instructions: Dict[str, Any]) -> int:
+    """Number of top-level and per-part actions."""
+    parts = instructions.get("parts", [])
+    return len(instructions.get("actions", [])) + sum(len(p.get("actions", [])) for p in parts)
+
+
+def _cost(analysis: Dict[str, Any]) -> Optional[float]:
+    """Cost from an ``/analyze_build`` response."""
+    cost = analysis.get("cost")
+    return float(cost) if isinstance(cost, (int, float)) else None
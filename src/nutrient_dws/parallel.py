@@ -0,0 +1,78 @@
+"""Run client-backed functions across a pool of worker processes."""
+
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from multiprocessing.context import BaseContext
+from typing import Callable, Iterable, Iterator, Optional, TypeVar
+
+from nutrient_dws.client import NutrientClient
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Client unpickled once per worker process by the pool initializer
+_worker_client: Optional[NutrientClient] = None
+
+
+def _init_worker(client: NutrientClient) -> None:
+    """Install the client for the current worker process."""
+    global _worker_client
+    _worker_client = client
+
+
+def worker_client() -> NutrientClient:
+    """Return the client of the current worker process.
+
+    Raises:
+        RuntimeError: If called outside a worker started by :func:`process_map`.
+    """
+    if _worker_client is None:
+        raise RuntimeError("worker_client() can only be used inside a process_map worker")
+    return _worker_client
+
+
+def _call_with_client(func: Callable[[NutrientClient, T], R], item: T) -> R:
+    """Call ``func`` with the worker's client."""
+    return func(worker_client(), item)
+
+
+def process_map(
+    client: NutrientClient,
+    func: Callable[[NutrientClient, T], R],
+    items: Iterable[T],
+    max_workers: Optional[int] = None,
+    chunksize: int = 1,
+    mp_context: Optional[BaseContext] = None,
+) -> Iterator[R]:
+    """Apply ``func(client, item)`` to every item in a pool of processes.
+
+    The client is pickled as configuration once per worker, and each worker
+    opens its own connections on first use, so CPU-heavy pre- and
+    post-processing scales across cores without sharing sockets between
+    processes. ``func`` must be picklable, i.e. defined at module level.
+
+    Args:
+        client: Client whose configuration is copied to every worker.
+        func: Function called as ``func(client, item)`` in a worker.
+        items: Inputs to process.
+        max_workers: Number of worker processes. Defaults to the CPU count.
+        chunksize: Number of items sent to a worker at a time.
+        mp_context: Optional multiprocessing context, such as
+            ``multiprocessing.get_context("spawn")``.
+
+    Yields:
+        Results in the order of ``items``. An exception raised by ``func``
+        is re-raised when its result is reached.
+
+    Example:
+        >>> def ocr(client, path):
+        ...     return client.ocr_pdf(path, output_path=path.replace(".pdf", "-ocr.pdf"))
+        >>> list(process_map(client, ocr, ["a.pdf", "b.pdf"], max_workers=4))
+    """
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=mp_context,
+        initializer=_init_worker,
+        initargs=(client,),
+    ) as pool:
+        yield from pool.map(_call_with_client, repeat(func), items, chunksize=chunksize)
@@ -0,0 +1,229 @@
+"""Read-ahead of upcoming inputs from slow storage."""
+
+import collections
+import io
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterable, Iterator, Optional, Tuple
+
+from nutrient_dws.file_handler import FileInput
+
+DEFAULT_PREFETCH_BYTES = 64 * 1024 * 1024
+
+
+class PrefetchedFile(io.BytesIO):
+    """In-memory copy of a file that keeps its name for the upload."""
+
+    def __init__(self, content: bytes, name: str) -> None:
+        super().__init__(content)
+        self.name = name
+
+
+class PrefetchedInput:
+    """An input handed out by :class:`Prefetcher`.
+
+    Attributes:
+        input: The input as it was passed in.
+        content: In-memory copy of the file, or None if the input was not
+            read ahead, for example because it is not a path, is larger than
+            the byte budget or could not be read.
+        read_time: Seconds spent reading the file, if it was read ahead.
+    """
+
+    def __init__(
+        self,
+        input: FileInput,
+        content: Optional[PrefetchedFile] = None,
+        read_time: Optional[float] = None,
+    ) -> None:
+        self.input = input
+        self.content = content
+        self.read_time = read_time
+
+    @property
+    def upload(self) -> FileInput:
+        """What to upload: the in-memory copy if there is one, otherwise the input."""
+        return self.content if self.content is not None else self.input
+
+
+class Prefetcher:
+    """Read the next path inputs on a background I/O pool while earlier ones are processed.
+
+    Reading a file from a network file system or a mounted bucket can take
+    as long as the API call itself. The prefetcher keeps up to ``lookahead``
+    upcoming inputs in flight and hands them out in order, so each request
+    starts with its file already in memory. At most ``max_bytes`` bytes are
+    read ahead and not yet handed out; larger files, inputs that are not
+    paths and files that cannot be read are passed through unchanged and
+    read when they are uploaded, which also reports their errors as usual.
+
+    Args:
+        max_workers: Number of reader threads.
+        max_bytes: Byte budget for files read ahead and not yet handed out.
+        lookahead: Maximum number of inputs read ahead. Defaults to twice
+            the number of threads.
+        history_size: Number of read time samples kept.
+
+    Example:
+        >>> prefetcher = Prefetcher(max_workers=8, max_bytes=256 * 1024 * 1024)
+        >>> runner = BatchRunner(client, pipeline, output="out/", prefetcher=prefetcher)
+        >>> results = list(runner.run(Path("/mnt/nfs/scans").glob("*.pdf")))
+        >>> prefetcher.metrics["stall_seconds"]
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        max_bytes: int = DEFAULT_PREFETCH_BYTES,
+        lookahead: Optional[int] = None,
+        history_size: int = 1000,
+    ) -> None:
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        self.max_workers = max_workers
+        self.max_bytes = max_bytes
+        self.lookahead = lookahead or max_workers * 2
+        self._lock = threading.Lock()
+        self._buffered = 0
+        self._max_buffered = 0
+        self._reads = 0
+        self._bytes_read = 0
+        self._passed_through = 0
+        self._stalls = 0
+        self._stall_seconds = 0.0
+        self._total_read_seconds = 0.0
+        self._read_times: Deque[float] = collections.deque(maxlen=history_size)
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        """Read counts, buffered bytes, read times and time spent waiting for reads.
+
+        ``stall_seconds`` is the time the consumer waited for a file that was
+        still being read; a large value means storage, not the API, limits
+        throughput.
+        """
+        with self._lock:
+            return {
+                "reads": self._reads,
+                "bytes_read": self._bytes_read,
+                "passed_through": self._passed_through,
+                "buffered_bytes": self._buffered,
+                "max_buffered_bytes": self._max_buffered,
+                "mean_read_seconds": self._total_read_seconds / self._reads if self._reads else 0.0,
+                "max_read_seconds": max(self._read_times, default=0.0),
+                "stalls": self._stalls,
+                "stall_seconds": self._stall_seconds,
+            }
+
+    def prefetch(self, inputs: Iterable[FileInput]) -> Iterator[PrefetchedInput]:
+        """Yield ``inputs`` in order, reading upcoming path inputs ahead.
+
+        Inputs are consumed lazily, at most ``lookahead`` ahead of the one
+        last handed out.
+        """
+        iterator = iter(inputs)
+        queue: Deque[Tuple[FileInput, Optional[Future[Tuple[PrefetchedFile, float]]], int]] = (
+            collections.deque()
+        )
+        upcoming: Optional[Tuple[FileInput, Optional[int]]] = None
+        exhausted = False
+        executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="nutrient-prefetch"
+        )
+        try:
+            while True:
+                while not exhausted and len(queue) < self.lookahead:
+                    if upcoming is None:
+                        try:
+                            item = next(iterator)
+                        except StopIteration:
+                            exhausted = True
+                            break
+                        upcoming = (item, self._prefetch_size(item))
+                    item, size = upcoming
+                    if size is None:
+                        queue.append((item, None, 0))
+                    elif not self._reserve(size):
+                        # Wait until earlier files are handed out
+                        break
+                    else:
+                        queue.append((item, executor.submit(self._read, item), size))
+                    upcoming = None
+
+                if not queue:
+                    return
+                item, future, size = queue.popleft()
+                yield self._hand_out(item, future, size)
+        finally:
+            # The consumer stopped early: drop what was read ahead for it
+            for _, future, _ in queue:
+                if future is not None:
+                    future.cancel()
+            executor.shutdown(wait=True)
+            for _, _, size in queue:
+                self._release(size)
+
+    def _prefetch_size(self, item: FileInput) -> Optional[int]:
+        """Size of ``item`` if it should be read ahead, otherwise None."""
+        if not isinstance(item, (str, Path)):
+            return None
+        try:
+            size = os.path.getsize(item)
+        except OSError:
+            return None
+        return size if size <= self.max_bytes else None
+
+    def _reserve(self, size: int) -> bool:
+        """Reserve ``size`` bytes of the budget, if available."""
+        with self._lock:
+            if self._buffered and self._buffered + size > self.max_bytes:
+                return False
+            self._buffered += size
+            self._max_buffered = max(self._max_buffered, self._buffered)
+            return True
+
+    def _release(self, size: int) -> None:
+        """Return ``size`` bytes to the budget."""
+        with self._lock:
+            self._buffered -= size
+
+    def _read(self, item: FileInput) -> Tuple[PrefetchedFile, float]:
+        """Read one file into memory and return it with the read time."""
+        started = time.monotonic()
+        with open(item, "rb") as f:  # type: ignore[arg-type]
+            data = f.read()
+        elapsed = time.monotonic() - started
+        with self._lock:
+            self._reads += 1
+            self._bytes_read += len(data)
+            self._total_read_seconds += elapsed
+            self._read_times.append(elapsed)
+        return PrefetchedFile(data, os.path.basename(str(item))), elapsed
+
+    def _hand_out(
+        self, item: FileInput, future: Optional["Future[Tuple[PrefetchedFile, float]]"], size: int
+    ) -> PrefetchedInput:
+        """Wait for the read of ``item`` to finish and wrap the outcome."""
+        if future is None:
+            with self._lock:
+                self._passed_through += 1
+            return PrefetchedInput(item)
+
+        if not future.done():
+            started = time.monotonic()
+            wait([future])
+            with self._lock:
+                self._stalls += 1
+                self._stall_seconds += time.monotonic() - started
+        self._release(size)
+        try:
+            content, read_time = future.result()
+        except OSError:
+            # Let the upload read the file again and report the error
+            with self._lock:
+                self._passed_through += 1
+            return PrefetchedInput(item)
+        return PrefetchedInput(item, content, read_time)
@@ -0,0 +1,241 @@
+"""Priority lanes that let interactive requests overtake bulk work."""
+
+import contextlib
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, Generator, List, Mapping, Optional, Sequence
+
+from nutrient_dws import _fork
+from nutrient_dws.deadline import Deadline
+from nutrient_dws.exceptions import DeadlineExceededError
+
+
+class Priority:
+    """Built-in priority lanes, from highest to lowest."""
+
+    INTERACTIVE = "interactive"
+    NORMAL = "normal"
+    BULK = "bulk"
+
+
+DEFAULT_LANES = (Priority.INTERACTIVE, Priority.NORMAL, Priority.BULK)
+
+_current_priority: "ContextVar[Optional[str]]" = ContextVar("nutrient_dws_priority", default=None)
+
+
+def current_priority() -> Optional[str]:
+    """Return the lane set by the innermost :func:`priority_scope`, if any."""
+    return _current_priority.get()
+
+
+@contextlib.contextmanager
+def priority_scope(lane: str) -> Generator[str, None, None]:
+    """Send every API call made inside the block in ``lane``.
+
+    Yields:
+        The lane.
+    """
+    token = _current_priority.set(lane)
+    try:
+        yield lane
+    finally:
+        _current_priority.reset(token)
+
+
+class _Lane:
+    """Bookkeeping for one priority lane; guarded by the scheduler lock."""
+
+    def __init__(self, name: str, reserved: int, history_size: int) -> None:
+        self.name = name
+        self.reserved = reserved
+        self.in_flight = 0
+        self.waiters: Deque[object] = deque()
+        self.admitted = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.waits: Deque[float] = deque(maxlen=history_size)
+
+
+class PriorityScheduler:
+    """Admission control for concurrent requests with priority lanes.
+
+    At most ``max_concurrency`` requests are in flight. Each lane may have
+    ``reserved`` slots that only it can use; the remaining slots are shared.
+    When a shared slot frees up, waiting requests of higher lanes are
+    admitted before lower ones, while reserved slots guarantee that lower
+    lanes still make progress. Within a lane, requests are admitted in
+    arrival order.
+
+    Keep ``max_concurrency`` at or below the connection pool size of the
+    transport (10 for the default transport), so admitted requests never
+    wait for a connection.
+
+    Args:
+        max_concurrency: Maximum number of requests in flight.
+        reserved: Slots reserved per lane. Defaults to two for
+            ``interactive`` and one for ``bulk``.
+        lanes: Lane names from highest to lowest priority.
+        default_lane: Lane of requests without a priority.
+        history_size: Number of queue-wait samples kept per lane.
+
+    Example:
+        >>> scheduler = PriorityScheduler(max_concurrency=8, reserved={"interactive": 2})
+        >>> client = NutrientClient(api_key="...", scheduler=scheduler)
+        >>> client.build("form.docx").execute(priority="interactive")
+        >>> with client.priority("bulk"):
+        ...     client.ocr_pdf("archive.pdf")
+        >>> scheduler.metrics["interactive"]["mean_wait"]
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 10,
+        reserved: Optional[Mapping[str, int]] = None,
+        lanes: Sequence[str] = DEFAULT_LANES,
+        default_lane: str = Priority.NORMAL,
+        history_size: int = 1000,
+    ) -> None:
+        if reserved is None:
+            reserved = {Priority.INTERACTIVE: 2, Priority.BULK: 1}
+        unknown = set(reserved) - set(lanes)
+        if unknown:
+            raise ValueError(f"Reserved slots for unknown lanes: {sorted(unknown)}")
+        if default_lane not in lanes:
+            raise ValueError(f"Default lane {default_lane!r} is not one of {list(lanes)}")
+        if sum(reserved.values()) > max_concurrency:
+            raise ValueError("Reserved slots exceed max_concurrency")
+
+        self.max_concurrency = max_concurrency
+        self.default_lane = default_lane
+        self._lanes: List[_Lane] = [
+            _Lane(name, reserved.get(name, 0), history_size) for name in lanes
+        ]
+        self._by_name = {lane.name: lane for lane in self._lanes}
+        self._shared = max_concurrency - sum(reserved.values())
+        self._condition = threading.Condition()
+        _fork.register(self)
+
+    @property
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Per-lane in-flight and waiting counts and queue-wait statistics."""
+        with self._condition:
+            return {lane.name: self._lane_metrics(lane) for lane in self._lanes}
+
+    @contextlib.contextmanager
+    def slot(
+        self, lane: Optional[str] = None, deadline: Optional[Deadline] = None
+    ) -> Generator[None, None, None]:
+        """Hold a slot in ``lane`` for the duration of the block.
+
+        Raises:
+            DeadlineExceededError: If the deadline passes while queued.
+            ValueError: If the lane does not exist.
+        """
+        name = self.acquire(lane, deadline)
+        try:
+            yield
+        finally:
+            self.release(name)
+
+    def acquire(self, lane: Optional[str] = None, deadline: Optional[Deadline] = None) -> str:
+        """Wait for a slot in ``lane`` and return the lane name.
+
+        Raises:
+            DeadlineExceededError: If the deadline passes while queued.
+            ValueError: If the lane does not exist.
+        """
+        name = lane or self.default_lane
+        state = self._by_name.get(name)
+        if state is None:
+            raise ValueError(f"Unknown priority {name!r}; expected one of {list(self._by_name)}")
+
+        ticket = object()
+        queued_at = time.monotonic()
+        with self._condition:
+            state.waiters.append(ticket)
+            try:
+                while not self._may_start(state, ticket):
+                    timeout = deadline.remaining() if deadline is not None else None
+                    if timeout is not None and timeout <= 0:
+                        state.rejected += 1
+                        raise DeadlineExceededError(
+                            f"Deadline exceeded while queued in the {name!r} lane"
+                        )
+                    self._condition.wait(timeout)
+            finally:
+                state.waiters.remove(ticket)
+                # The head of this lane changed; let the next waiter re-check
+                self._condition.notify_all()
+
+            waited = time.monotonic() - queued_at
+            state.in_flight += 1
+            state.admitted += 1
+            state.total_wait += waited
+            state.max_wait = max(state.max_wait, waited)
+            state.waits.append(waited)
+        return name
+
+    def release(self, lane: str) -> None:
+        """Return a slot acquired with :meth:`acquire`."""
+        with self._condition:
+            self._by_name[lane].in_flight -= 1
+            self._condition.notify_all()
+
+    def _shared_in_use(self) -> int:
+        """Number of shared slots in use; must be called with the lock held."""
+        return sum(max(0, lane.in_flight - lane.reserved) for lane in self._lanes)
+
+    def _may_start(self, state: _Lane, ticket: object) -> bool:
+        """Whether ``ticket`` may be admitted now; must be called with the lock held."""
+        if state.waiters[0] is not ticket:
+            return False
+        if state.in_flight < state.reserved:
+            return True
+        if self._shared_in_use() >= self._shared:
+            return False
+        # A free shared slot goes to the highest lane with a waiting request
+        for lane in self._lanes:
+            if lane is state:
+                return True
+            if lane.waiters and lane.in_flight >= lane.reserved:
+                return False
+        return True
+
+    def _lane_metrics(self, lane: _Lane) -> Dict[str, Any]:
+        """Metrics of one lane; must be called with the lock held."""
+        waits = sorted(lane.waits)
+        p95 = waits[min(len(waits) - 1, int(len(waits) * 0.95))] if waits else 0.0
+        return {
+            "in_flight": lane.in_flight,
+            "waiting": len(lane.waiters),
+            "reserved": lane.reserved,
+            "admitted": lane.admitted,
+            "rejected": lane.rejected,
+            "mean_wait": lane.total_wait / lane.admitted if lane.admitted else 0.0,
+            "p95_wait": p95,
+            "max_wait": lane.max_wait,
+        }
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Pickle the configuration only; queues and counters start empty."""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "reserved": {lane.name: lane.reserved for lane in self._lanes},
+            "lanes": [lane.name for lane in self._lanes],
+            "default_lane": self.default_lane,
+            "history_size": self._lanes[0].waits.maxlen if self._lanes else 1000,
+        }
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """Recreate the scheduler from its configuration."""
+        self.__init__(**state)  # type: ignore[misc]
+
+    def _after_fork(self) -> None:
+        """Start the child with empty lanes; the parent's requests are not its own."""
+        self._condition = threading.Condition()
+        for lane in self._lanes:
+            lane.in_flight = 0
+            lane.waiters.clear()
@@ -0,0 +1,265 @@
+"""Rendering document pages as images."""
+
+import collections
+import contextvars
+import itertools
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+from nutrient_dws.archive import iter_zip_stream
+from nutrient_dws.deadline import Deadline, DeadlineLike
+from nutrient_dws.file_handler import FileInput, prepare_file_input, save_file_output
+from nutrient_dws.result import Result
+
+IMAGE_FORMATS = ("png", "jpeg", "jpg", "webp")
+DEFAULT_DPI = 150
+
+_ZIP_SIGNATURE = b"PK\x03\x04"
+
+
+class ImageOutput:
+    """Output options that render pages of a document as images.
+
+    Pass :meth:`to_dict` to ``set_output_options`` of a Builder workflow or
+    a :class:`~nutrient_dws.builder.Pipeline`, or pass the object to
+    :func:`render_pages`. The API returns a single image when one page is
+    rendered and a zip archive of images otherwise.
+
+    Args:
+        format: Image format, one of ``png``, ``jpeg``, ``jpg`` and ``webp``.
+        dpi: Resolution in dots per inch. Defaults to 150 when neither
+            ``width`` nor ``height`` is given.
+        width: Width of the images in pixels.
+        height: Height of the images in pixels.
+        pages: Pages to render as ``(start, end)``, with 0-based inclusive
+            indexes; negative indexes count from the end. Defaults to all
+            pages.
+
+    Raises:
+        ValueError: If the format is not supported or a size is not positive.
+
+    Example:
+        >>> thumbnails = ImageOutput("webp", width=200, pages=(0, 9))
+        >>> client.build("report.pdf").set_output_options(**thumbnails.to_dict()).execute(
+        ...     output_path="thumbnails.zip"
+        ... )
+    """
+
+    def __init__(
+        self,
+        format: str = "png",
+        dpi: Optional[float] = None,
+        width: Optional[float] = None,
+        height: Optional[float] = None,
+        pages: Optional[Tuple[int, int]] = None,
+    ) -> None:
+        if format not in IMAGE_FORMATS:
+            raise ValueError(f"Unsupported image format {format!r}; use one of {IMAGE_FORMATS}")
+        for option, value in (("dpi", dpi), ("width", width), ("height", height)):
+            if value is not None and value <= 0:
+                raise ValueError(f"{option} must be positive")
+        if dpi is None and width is None and height is None:
+            dpi = DEFAULT_DPI
+        self.format = format
+        self.dpi = dpi
+        self.width = width
+        self.height = height
+        self.pages = pages
+
+    @property
+    def content_type(self) -> str:
+        """Media type of the rendered images."""
+        return "image/jpeg" if self.format == "jpg" else f"image/{self.format}"
+
+    def with_pages(self, start: int, end: int) -> "ImageOutput":
+        """Return a copy that renders pages ``start`` to ``end`` inclusive."""
+        return ImageOutput(self.format, self.dpi, self.width, self.height, (start, end))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Output options in the format of the Build API."""
+        output: Dict[str, Any] = {"type": "image", "format": self.format}
+        for option in ("dpi", "width", "height"):
+            value = getattr(self, option)
+            if value is not None:
+                output[option] = value
+        if self.pages is not None:
+            output["pages"] = {"start": self.pages[0], "end": self.pages[1]}
+        return output
+
+    def __eq__(self, other: object) -> bool:
+        """Image outputs are equal if all their options match."""
+        if not isinstance(other, ImageOutput):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        """Representation with the options."""
+        options = {key: value for key, value in self.to_dict().items() if key != "type"}
+        return f"ImageOutput({options!r})"
+
+
+class RenderedPage:
+    """One page rendered by :func:`render_pages`.
+
+    Attributes:
+        index: Page index in the document, 0-based. It is negative, counting
+            from the end, if the pages were given from the end and the page
+            count was not known.
+        content: The image.
+        content_type: Media type of the image.
+        name: Name of the image inside the archive returned by the API, or
+            None if the API returned the image alone.
+        request_id: ID of the request that rendered the page, if reported.
+    """
+
+    def __init__(
+        self,
+        index: int,
+        content: bytes,
+        content_type: str,
+        name: Optional[str] = None,
+        request_id: Optional[str] = None,
+    ) -> None:
+        self.index = index
+        self.content = content
+        self.content_type = content_type
+        self.name = name
+        self.request_id = request_id
+
+    def save(self, output_path: str, fsync: Optional[bool] = None) -> None:
+        """Save the image to ``output_path``, which is replaced atomically."""
+        save_file_output(self.content, output_path, fsync)
+
+    def __repr__(self) -> str:
+        """Representation with the page index and size."""
+        return f"RenderedPage(index={self.index}, {self.content_type}, {len(self.content)} bytes)"
+
+
+def render_pages(
+    client: Any,
+    input_file: FileInput,
+    image: Optional[ImageOutput] = None,
+    page_count: Optional[int] = None,
+    pages_per_request: int = 8,
+    max_workers: int = 4,
+    deadline: DeadlineLike = None,
+    priority: Optional[str] = None,
+) -> Iterator[RenderedPage]:
+    """Render pages of a document as images, yielding each page as it arrives.
+
+    The page range is split into shards of ``pages_per_request`` pages that
+    are requested in parallel, at most ``max_workers`` at a time. Pages are
+    yielded in order; the archive of each shard is decoded while it is
+    received, so the first page is available after the first shard has been
+    rendered, however long the document is. Stopping the iteration early
+    cancels the shards that have not been sent and releases the others.
+
+    Each shard holds a slot of the client's ``PriorityScheduler``, if it has
+    one, until its pages have been yielded, so keep ``max_workers`` at or
+    below the scheduler's ``max_concurrency``.
+
+    Splitting an open-ended range, such as the default of all pages,
+    requires ``page_count``. Without it, the range is rendered in a single
+    request, whose pages are still yielded as they are received.
+
+    Args:
+        client: NutrientClient instance.
+        input_file: Document to render. A file object is read into memory
+            once, since every shard uploads it.
+        image: Image options. Defaults to PNG at 150 dpi for all pages.
+        page_count: Number of pages of the document, if known.
+        pages_per_request: Number of pages rendered per request.
+        max_workers: Maximum number of requests in flight.
+        deadline: Optional time budget in seconds, or a ``Deadline``, shared
+            by all requests, in addition to any active
+            :func:`~nutrient_dws.deadline.deadline_scope`.
+        priority: Optional priority lane of the requests. Defaults to the
+            lane of the active :func:`~nutrient_dws.priority.priority_scope`.
+
+    Yields:
+        A :class:`RenderedPage` for each page, in page order.
+
+    Raises:
+        ValueError: If ``pages_per_request`` or ``max_workers`` is less than 1.
+        zipfile.BadZipFile: If an archive returned by the API is corrupt.
+        APIError: If rendering a shard fails; earlier pages have been
+            yielded by then.
+
+    Example:
+        >>> thumbnails = ImageOutput("webp", width=200)
+        >>> for page in client.render_pages("report.pdf", thumbnails, page_count=300):
+        ...     page.save(f"thumbnails/{page.index}.webp")
+    """
+    if pages_per_request < 1 or max_workers < 1:
+        raise ValueError("pages_per_request and max_workers must be at least 1")
+    image = image or ImageOutput()
+    shards = _shards(image.pages or (0, -1), page_count, pages_per_request)
+    if isinstance(input_file, (str, bytes)) or hasattr(input_file, "__fspath__"):
+        upload = input_file
+    else:
+        upload, _ = prepare_file_input(input_file)
+    shared_deadline = Deadline.coerce(deadline)
+
+    def render(start: int, end: int) -> Result:
+        builder = client.build(upload).set_output_options(**image.with_pages(start, end).to_dict())
+        return builder.execute(  # type: ignore[no-any-return]
+            deadline=shared_deadline, priority=priority, lazy=True
+        )
+
+    pending: Deque[Tuple[int, Future[Result]]] = collections.deque()
+    remaining = iter(shards)
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="nutrient-render")
+    try:
+        while True:
+            for start, end in itertools.islice(remaining, max_workers - len(pending)):
+                # Worker threads do not inherit the scopes active in this thread
+                context = contextvars.copy_context()
+                pending.append((start, executor.submit(context.run, render, start, end)))
+            if not pending:
+                return
+            start, future = pending.popleft()
+            with future.result() as result:
+                yield from _pages(result, start, image)
+    finally:
+        for _, future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
+        for _, future in pending:
+            if not future.cancelled() and future.exception() is None:
+                future.result().close()
+
+
+def _shards(
+    pages: Tuple[int, int], page_count: Optional[int], pages_per_request: int
+) -> List[Tuple[int, int]]:
+    """Split the inclusive page range ``pages`` into ranges of at most ``pages_per_request``."""
+    start, end = pages
+    if page_count is not None:
+        start = max(start + page_count if start < 0 else start, 0)
+        end = min(end + page_count if end < 0 else end, page_count - 1)
+    elif start < 0 or end < 0:
+        # The range cannot be split without knowing where it ends
+        return [(start, end)]
+    return [
+        (shard, min(shard + pages_per_request - 1, end))
+        for shard in range(start, end + 1, pages_per_request)
+    ]
+
+
+def _pages(result: Result, start: int, image: ImageOutput) -> Iterator[RenderedPage]:
+    """Decode the pages of one shard, starting at page ``start``, as they arrive."""
+    chunks = result.stream()
+    first = b""
+    for chunk in chunks:
+        first += chunk
+        if len(first) >= len(_ZIP_SIGNATURE):
+            break
+    if not first.startswith(_ZIP_SIGNATURE):
+        # A single page is returned as the image itself
+        content = first + b"".join(chunks)
+        yield RenderedPage(start, content, image.content_type, request_id=result.request_id)
+        return
+
+    members = iter_zip_stream(itertools.chain([first], chunks))
+    for index, (name, content) in enumerate(members, start):
+        yield RenderedPage(index, content, image.content_type, name, result.request_id)
@@ -0,0 +1,191 @@
+"""Lazy access to the body and metadata of API responses."""
+
+import json
+import threading
+import time
+from typing import TYPE_CHECKING, Any, BinaryIO, Callable, Iterator, Optional
+
+from nutrient_dws.file_handler import DEFAULT_CHUNK_SIZE, save_chunked_output
+
+if TYPE_CHECKING:
+    from nutrient_dws.http_client import ResponseInfo
+    from nutrient_dws.transport import TransportResponse
+
+
+class Result:
+    """Response of an API call whose body is read only when asked for.
+
+    The body can be consumed once, by :meth:`stream`, :meth:`save` or
+    :meth:`save_to`, without holding the whole document in memory.
+    :meth:`read` and :meth:`json` load it into memory and can be called any
+    number of times. The connection, and the slot of the client's
+    ``PriorityScheduler`` if it has one, are released once the body is
+    consumed or the result is closed; use the result as a context manager to
+    release them when the body is not needed.
+
+    Attributes:
+        info: Status, request ID and credits reported by the API.
+        elapsed: Seconds from sending the request until the response
+            headers arrived, including retries.
+        download_time: Seconds spent reading the body, once it was consumed.
+
+    Example:
+        >>> with client.build("scan.pdf").add_step("ocr-pdf").execute(lazy=True) as result:
+        ...     print(result.request_id, result.credits_used, result.content_type)
+        ...     result.save_to(upload_stream)
+    """
+
+    def __init__(
+        self,
+        response: "TransportResponse",
+        info: "ResponseInfo",
+        elapsed: float = 0.0,
+        on_close: Optional[Callable[[], None]] = None,
+    ) -> None:
+        self._response = response
+        self._on_close = on_close
+        self._lock = threading.Lock()
+        self._content: Optional[bytes] = None
+        self._consumed = False
+        self.info = info
+        self.elapsed = elapsed
+        self.download_time: Optional[float] = None
+
+    @property
+    def status_code(self) -> int:
+        """HTTP status code."""
+        return self.info.status_code
+
+    @property
+    def request_id(self) -> Optional[str]:
+        """Request ID assigned by the API, if reported."""
+        return self.info.request_id
+
+    @property
+    def credits_used(self) -> Optional[float]:
+        """Credits charged for the request, if reported."""
+        return self.info.credits_used
+
+    @property
+    def credits_remaining(self) -> Optional[float]:
+        """Credits left on the account, if reported."""
+        return self.info.credits_remaining
+
+    @property
+    def headers(self) -> Any:
+        """Response headers (case-insensitive mapping)."""
+        return self._response.headers
+
+    @property
+    def content_type(self) -> Optional[str]:
+        """Media type of the body, without parameters."""
+        value = self._response.headers.get("Content-Type")
+        return value.split(";")[0].strip() if value else None
+
+    @property
+    def content_length(self) -> Optional[int]:
+        """Size of the body in bytes, if the API reported it."""
+        value = self._response.headers.get("Content-Length")
+        try:
+            return int(value) if value is not None else None
+        except ValueError:
+            return None
+
+    def stream(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        """Iterate over the body in chunks as it arrives.
+
+        Raises:
+            RuntimeError: If the body was already consumed by another call.
+        """
+        if self._content is not None:
+            for start in range(0, len(self._content), chunk_size):
+                yield self._content[start : start + chunk_size]
+            return
+
+        with self._lock:
+            if self._consumed:
+                raise RuntimeError("The response body has already been consumed")
+            self._consumed = True
+
+        started = time.monotonic()
+        try:
+            yield from self._response.iter_bytes(chunk_size)
+        finally:
+            self.download_time = time.monotonic() - started
+            self._response.close()
+            self._release()
+
+    def read(self) -> bytes:
+        """Return the whole body, reading it into memory on first use."""
+        if self._content is None:
+            self._content = b"".join(self.stream())
+        return self._content
+
+    def json(self) -> Any:
+        """Return the body parsed as JSON.
+
+        Raises:
+            ValueError: If the body is not valid JSON.
+        """
+        return json.loads(self.read())
+
+    def save(self, output_path: str, fsync: Optional[bool] = None) -> int:
+        """Stream the body into a file, which is replaced atomically.
+
+        The file is preallocated when the API reported the size of the body.
+
+        Args:
+            output_path: Path where to save the file.
+            fsync: Flush the file to stable storage before returning. Defaults
+                to the setting of :func:`~nutrient_dws.file_handler.fsync_outputs`.
+
+        Returns:
+            Number of bytes written.
+        """
+        return save_chunked_output(self.stream(), output_path, self.content_length, fsync)
+
+    def save_to(self, output: BinaryIO) -> int:
+        """Stream the body into a writable binary object.
+
+        Returns:
+            Number of bytes written.
+        """
+        written = 0
+        for chunk in self.stream():
+            output.write(chunk)
+            written += len(chunk)
+        return written
+
+    def close(self) -> None:
+        """Release the connection without reading the rest of the body."""
+        with self._lock:
+            self._consumed = True
+        self._response.close()
+        self._release()
+
+    def _release(self) -> None:
+        """Call ``on_close`` once the response is done with."""
+        with self._lock:
+            on_close, self._on_close = self._on_close, None
+        if on_close is not None:
+            on_close()
+
+    def __del__(self) -> None:
+        """Release a result that was neither consumed nor closed."""
+        if getattr(self, "_on_close", None) is not None:
+            self._release()
+
+    def __enter__(self) -> "Result":
+        """Context manager entry."""
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        """Context manager exit; releases the connection."""
+        self.close()
+
+    def __repr__(self) -> str:
+        """Representation with the status, content type and request ID."""
+        return (
+            f"Result(status_code={self.status_code}, content_type={self.content_type!r}, "
+            f"request_id={self.request_id!r})"
+        )
@@ -0,0 +1,173 @@
+"""Size-aware, self-tuning request timeouts."""
+
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Sequence
+
+from nutrient_dws import _fork
+
+# Rough processing cost of each Build API action, in seconds per megabyte of input
+DEFAULT_ACTION_COSTS: Dict[str, float] = {
+    "ocr": 15.0,
+    "createRedactions": 3.0,
+    "applyRedactions": 2.0,
+    "applyInstantJson": 0.5,
+    "applyXfdf": 0.5,
+    "flatten": 0.5,
+    "watermark": 0.3,
+    "rotate": 0.2,
+}
+
+
+class TimeoutEstimator:
+    """Derive per-request read timeouts from input size, actions and history.
+
+    The expected duration of a request is modelled as::
+
+        base_latency + size_mb * (seconds_per_mb + sum of action costs)
+
+    For each tool, the ratio between observed and modelled durations of
+    recent requests is tracked, and the model is scaled by a high percentile
+    of that ratio once ``min_samples`` requests completed. The timeout is the
+    expected duration times ``safety_factor``, clamped to
+    ``[min_timeout, max_timeout]``. Small jobs therefore fail fast, while
+    large jobs get enough time to finish instead of being killed and retried.
+    Requests of unknown size are not cut short: until the tool has history,
+    they get the caller's default timeout, or ``max_timeout`` without one.
+
+    Args:
+        base_latency: Fixed per-request overhead in seconds.
+        seconds_per_mb: Upload and baseline processing time per megabyte.
+        action_costs: Extra seconds per megabyte for each action type;
+            merged over :data:`DEFAULT_ACTION_COSTS`.
+        safety_factor: Multiplier applied to the expected duration.
+        min_timeout: Lower bound for derived timeouts.
+        max_timeout: Upper bound for derived timeouts.
+        percentile: Percentile (0-100) of the observed slowdown used for scaling.
+        min_samples: Samples needed per tool before history is used.
+        history_size: Samples kept per tool.
+
+    Example:
+        >>> client = NutrientClient(api_key="...", timeout_estimator=TimeoutEstimator())
+    """
+
+    def __init__(
+        self,
+        base_latency: float = 5.0,
+        seconds_per_mb: float = 1.0,
+        action_costs: Optional[Dict[str, float]] = None,
+        safety_factor: float = 3.0,
+        min_timeout: float = 15.0,
+        max_timeout: float = 3600.0,
+        percentile: float = 90.0,
+        min_samples: int = 5,
+        history_size: int = 100,
+    ) -> None:
+        if min_timeout > max_timeout:
+            raise ValueError("min_timeout must not exceed max_timeout")
+
+        self.base_latency = base_latency
+        self.seconds_per_mb = seconds_per_mb
+        self.action_costs = {**DEFAULT_ACTION_COSTS, **(action_costs or {})}
+        self.safety_factor = safety_factor
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.history_size = history_size
+
+        self._lock = threading.Lock()
+        self._slowdowns: Dict[str, Deque[float]] = {}
+        _fork.register(self)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Pickle the configuration and learned history without the lock."""
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """Restore the estimator with a new lock."""
+        self.__dict__.update(state)
+        self._after_fork()
+        _fork.register(self)
+
+    def _after_fork(self) -> None:
+        """Replace the lock, which may have been held by another thread at fork time."""
+        self._lock = threading.Lock()
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        """Learned slowdown factor and sample count per tool."""
+        with self._lock:
+            return {
+                tool: {"samples": len(history), "slowdown": self._slowdown(tool)}
+                for tool, history in self._slowdowns.items()
+            }
+
+    def expected_duration(
+        self,
+        input_size: Optional[int],
+        action_types: Sequence[str] = (),
+    ) -> float:
+        """Modelled duration in seconds, before learning and safety margin."""
+        size_mb = (input_size or 0) / (1024 * 1024)
+        per_mb = self.seconds_per_mb + sum(
+            self.action_costs.get(action, 1.0) for action in action_types
+        )
+        return self.base_latency + size_mb * per_mb
+
+    def estimate(
+        self,
+        tool: str,
+        input_size: Optional[int],
+        action_types: Sequence[str] = (),
+        default: Optional[float] = None,
+    ) -> float:
+        """Return the read timeout in seconds for a request.
+
+        Args:
+            tool: Tool name the request belongs to.
+            input_size: Total size of the uploaded files in bytes, if known.
+            action_types: Build API action types in the request.
+            default: Timeout for a request of unknown size while the tool has
+                no history, such as the client's configured timeout. Defaults
+                to ``max_timeout``.
+        """
+        expected = self.expected_duration(input_size, action_types)
+        with self._lock:
+            slowdown = self._slowdown(tool)
+        if input_size is None and slowdown is None:
+            # The model knows nothing about this request; a short timeout could kill a large job
+            return self.max_timeout if default is None else default
+        if slowdown is not None:
+            expected *= max(slowdown, 0.1)
+        return min(self.max_timeout, max(self.min_timeout, expected * self.safety_factor))
+
+    def record(
+        self,
+        tool: str,
+        input_size: Optional[int],
+        action_types: Sequence[str],
+        seconds: float,
+    ) -> None:
+        """Learn from the duration of a completed request.
+
+        Timed-out requests may be recorded with the timeout as their duration,
+        which raises future estimates for the tool.
+        """
+        modelled = self.expected_duration(input_size, action_types)
+        with self._lock:
+            history = self._slowdowns.get(tool)
+            if history is None:
+                history = self._slowdowns[tool] = deque(maxlen=self.history_size)
+            history.append(seconds / modelled)
+
+    def _slowdown(self, tool: str) -> Optional[float]:
+        """Percentile of observed/modelled ratios; must be called with the lock held."""
+        history = self._slowdowns.get(tool)
+        if history is None or len(history) < self.min_samples:
+            return None
+        ordered = sorted(history)
+        index = min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))
+        return ordered[index]
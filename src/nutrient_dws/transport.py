@@ -0,0 +1,672 @@
+"""Pluggable transport backends for the HTTP client.
+
+A transport is responsible for putting bytes on the wire. ``HTTPClient`` owns
+authentication, error mapping and everything above that, and delegates the
+actual request to a :class:`Transport`. Three backends are provided:
+
+* :class:`RequestsTransport` - the default, an HTTP/1.1 ``requests.Session``
+  with connection pooling and urllib3 retries.
+* :class:`HTTP2Transport` - an ``httpx`` client that multiplexes concurrent
+  requests as HTTP/2 streams over a small number of connections. Requires the
+  ``http2`` extra (``pip install nutrient-dws[http2]``).
+* :class:`InMemoryTransport` - routes requests to a Python callable, for tests.
+
+Transports pickle as configuration only and open their connections lazily, so
+a client can be sent to a worker process; after ``os.fork`` the child drops
+the connections inherited from the parent and opens its own.
+"""
+
+import contextlib
+import importlib
+import io
+import json
+import threading
+from contextvars import ContextVar
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generator,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    Union,
+)
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.exceptions import MaxRetryError
+from urllib3.util.retry import Retry
+
+from nutrient_dws import _fork
+from nutrient_dws.deadline import Deadline
+from nutrient_dws.exceptions import APIError, DeadlineExceededError, NutrientTimeoutError
+
+TimeoutValue = Union[float, Tuple[float, float]]
+
+# Status codes that the transports retry on before handing the response back
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# Deadline of the request currently being sent by this thread, read by the retry policy
+_request_deadline: "ContextVar[Optional[Deadline]]" = ContextVar(
+    "nutrient_dws_request_deadline", default=None
+)
+
+
+class _DeadlineRetry(Retry):
+    """urllib3 retry policy that stops retrying once the request deadline is near.
+
+    Before each retry, the pending backoff (or ``Retry-After`` delay) is
+    compared with the time left; if the retry could not start in time,
+    ``DeadlineExceededError`` is raised instead of sleeping. While a deadline
+    is set, retryable statuses are left to the transport, which caps the
+    timeout of every attempt by the time left; urllib3 would reuse the
+    timeout computed for the first attempt.
+    """
+
+    def is_retry(self, method: str, status_code: int, has_retry_after: bool = False) -> bool:
+        """Whether urllib3 should retry a response with ``status_code``."""
+        if _request_deadline.get() is not None:
+            return False
+        return super().is_retry(method, status_code, has_retry_after)
+
+    def sleep(self, response: Any = None) -> None:
+        """Sleep before the next attempt, unless the deadline would pass."""
+        deadline = _request_deadline.get()
+        if deadline is not None:
+            delay = self.get_backoff_time()
+            if response is not None and self.respect_retry_after_header:
+                delay = max(delay, self.get_retry_after(response) or 0.0)
+            if deadline.remaining() <= delay:
+                raise DeadlineExceededError("Deadline exceeded while waiting to retry the request")
+        super().sleep(response)
+
+
+def _status_retry_policy(max_retries: int) -> _DeadlineRetry:
+    """Retry policy with the backoff shared by all transports."""
+    return _DeadlineRetry(
+        total=max_retries,
+        backoff_factor=1,
+        status_forcelist=list(RETRY_STATUS_CODES),
+        allowed_methods=["GET", "POST"],
+        raise_on_status=False,  # We'll handle status codes ourselves
+    )
+
+
+def _cap_timeout(
+    timeout: Optional[TimeoutValue], deadline: Optional[Deadline]
+) -> Optional[TimeoutValue]:
+    """``timeout`` capped by the time left before ``deadline``."""
+    if deadline is None:
+        return timeout
+    remaining = max(deadline.remaining(), 0.001)
+    if timeout is None:
+        return remaining
+    if isinstance(timeout, tuple):
+        return min(timeout[0], remaining), min(timeout[1], remaining)
+    return min(timeout, remaining)
+
+
+def _send_with_retries(
+    send_once: Callable[[Optional[TimeoutValue]], "TransportResponse"],
+    method: str,
+    url: str,
+    timeout: Optional[TimeoutValue],
+    deadline: Optional[Deadline],
+    retry: Retry,
+) -> "TransportResponse":
+    """Send a request, retrying retryable statuses with the backoff of ``retry``.
+
+    Each attempt's timeout is capped by the time left before ``deadline``, so
+    a retry cannot run past it; ``retry.sleep`` raises
+    ``DeadlineExceededError`` for a backoff that would not end in time. Must
+    be called with ``_request_deadline`` set to ``deadline``.
+    """
+    while True:
+        try:
+            response = send_once(_cap_timeout(timeout, deadline))
+        except DeadlineExceededError:
+            raise
+        except NutrientTimeoutError as e:
+            if deadline is not None and deadline.expired:
+                raise DeadlineExceededError(
+                    "Deadline exceeded while waiting for the response"
+                ) from e
+            raise
+        if response.status_code not in RETRY_STATUS_CODES:
+            return response
+        try:
+            retry = retry.increment(method, url)
+        except MaxRetryError:
+            return response
+        response.close()
+        # Retry reads only the Retry-After header, which TransportResponse provides
+        retry.sleep(response)  # type: ignore[arg-type]
+
+
+class TransportResponse:
+    """Backend-neutral view of an HTTP response.
+
+    Attributes:
+        status_code: HTTP status code.
+        headers: Response headers (case-insensitive mapping).
+    """
+
+    def __init__(self, raw: Any) -> None:
+        """Wrap a backend response object."""
+        self._raw = raw
+        self.status_code: int = raw.status_code
+        self.headers: Mapping[str, str] = raw.headers
+
+    @property
+    def content(self) -> bytes:
+        """Full response body as bytes."""
+        return self._raw.content  # type: ignore[no-any-return]
+
+    @property
+    def text(self) -> str:
+        """Response body decoded as text."""
+        return self._raw.text  # type: ignore[no-any-return]
+
+    def json(self) -> Any:
+        """Response body parsed as JSON.
+
+        Raises:
+            ValueError: If the body is not valid JSON.
+        """
+        return self._raw.json()
+
+    def iter_bytes(self, chunk_size: int) -> Iterator[bytes]:
+        """Iterate over the response body in chunks."""
+        yield self.content
+
+    def getheader(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        """Header value; urllib3 1.x retry policies read ``Retry-After`` through it."""
+        return self.headers.get(name, default)
+
+    def close(self) -> None:
+        """Release the underlying connection."""
+        close = getattr(self._raw, "close", None)
+        if close is not None:
+            close()
+
+
+class _RequestsResponse(TransportResponse):
+    """Response adapter for ``requests.Response``."""
+
+    def iter_bytes(self, chunk_size: int) -> Iterator[bytes]:
+        """Iterate over the response body in chunks."""
+        try:
+            yield from self._raw.iter_content(chunk_size=chunk_size)
+        except requests.exceptions.RequestException as e:
+            raise APIError(f"Connection error while reading the response: {e!s}") from e
+
+
+class _HTTPXResponse(TransportResponse):
+    """Response adapter for ``httpx.Response``."""
+
+    @property
+    def content(self) -> bytes:
+        """Full response body as bytes."""
+        return self._raw.read()  # type: ignore[no-any-return]
+
+    @property
+    def text(self) -> str:
+        """Response body decoded as text."""
+        self._raw.read()
+        return self._raw.text  # type: ignore[no-any-return]
+
+    def json(self) -> Any:
+        """Response body parsed as JSON."""
+        self._raw.read()
+        return self._raw.json()
+
+    def iter_bytes(self, chunk_size: int) -> Iterator[bytes]:
+        """Iterate over the response body in chunks."""
+        httpx = importlib.import_module("httpx")
+        try:
+            yield from self._raw.iter_bytes(chunk_size=chunk_size)
+        except httpx.HTTPError as e:
+            raise APIError(f"Connection error while reading the response: {e!s}") from e
+
+
+class Transport:
+    """Base class for transport backends.
+
+    Implementations must translate backend-specific failures into
+    ``NutrientTimeoutError`` (timeouts) and ``APIError`` without a status code
+    (connection and protocol failures), and raise ``DeadlineExceededError``
+    rather than retry past a deadline. HTTP error statuses are returned as
+    normal responses; ``HTTPClient`` maps them to exceptions.
+    """
+
+    def send(
+        self,
+        method: str,
+        url: str,
+        *,
+        headers: Optional[Dict[str, str]] = None,
+        files: Optional[Dict[str, Any]] = None,
+        data: Optional[Dict[str, Any]] = None,
+        timeout: Optional[TimeoutValue] = None,
+        stream: bool = False,
+        deadline: Optional[Deadline] = None,
+    ) -> TransportResponse:
+        """Send a request and return the response.
+
+        Args:
+            method: HTTP method.
+            url: Absolute URL.
+            headers: Extra headers for this request.
+            files: Multipart files in ``requests`` format.
+            data: Multipart form fields.
+            timeout: Timeout in seconds, or a ``(connect, read)`` tuple.
+            stream: If True, the body is not read until requested.
+            deadline: Optional deadline; transports must not start retries
+                that cannot complete before it.
+
+        Returns:
+            The response.
+
+        Raises:
+            NutrientTimeoutError: If the request times out.
+            APIError: If the request could not be completed.
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Release all connections held by the transport."""
+
+    def _after_fork(self) -> None:
+        """Forget connections inherited from the parent process without closing them."""
+
+
+class RequestsTransport(Transport):
+    """HTTP/1.1 transport backed by a pooled ``requests.Session``.
+
+    Args:
+        headers: Default headers applied to every request.
+        pool_maxsize: Maximum number of pooled connections per host.
+        max_retries: Number of urllib3 retries for connection errors and
+            retryable status codes.
+    """
+
+    def __init__(
+        self,
+        headers: Optional[Dict[str, str]] = None,
+        pool_maxsize: int = 10,
+        max_retries: int = 3,
+    ) -> None:
+        self._headers = dict(headers or {})
+        self._pool_maxsize = pool_maxsize
+        self._max_retries = max_retries
+        self._session: Optional[requests.Session] = None
+        _fork.register(self)
+
+    @property
+    def session(self) -> requests.Session:
+        """Pooled session, created on first use."""
+        if self._session is None:
+            self._session = self._create_session()
+        return self._session
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Pickle the configuration only; the session is rebuilt on first use."""
+        state = self.__dict__.copy()
+        state["_session"] = None
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """Restore the configuration and register for fork handling."""
+        self.__dict__.update(state)
+        _fork.register(self)
+
+    def _after_fork(self) -> None:
+        """Drop the inherited session; its sockets belong to the parent."""
+        self._session = None
+
+    def _create_session(self) -> requests.Session:
+        """Create requests session with retry logic."""
+        session = requests.Session()
+
+        # Configure retries with exponential backoff
+        adapter = HTTPAdapter(
+            max_retries=_status_retry_policy(self._max_retries),
+            pool_connections=10,
+            pool_maxsize=self._pool_maxsize,
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers.update(self._headers)
+
+        return session
+
+    def send(
+        self,
+        method: str,
+        url: str,
+        *,
+        headers: Optional[Dict[str, str]] = None,
+        files: Optional[Dict[str, Any]] = None,
+        data: Optional[Dict[str, Any]] = None,
+        timeout: Optional[TimeoutValue] = None,
+        stream: bool = False,
+        deadline: Optional[Deadline] = None,
+    ) -> TransportResponse:
+        """Send a request through the pooled session.
+
+        With a deadline, retryable statuses are retried here rather than by
+        urllib3, so that each attempt's timeout is capped by the time left.
+        """
+        token = _request_deadline.set(deadline)
+        try:
+            if deadline is None:
+                kwargs: Dict[str, Any] = {"files": files, "data": data, "timeout": timeout}
+                if headers:
+                    kwargs["headers"] = headers
+                if stream:
+                    kwargs["stream"] = True
+                with _requests_errors(timeout):
+                    if method == "POST":
+                        response = self.session.post(url, **kwargs)
+                    else:
+                        response = self.session.request(method, url, **kwargs)
+                return _RequestsResponse(response)
+
+            # Encode the body once, so that every attempt sends the same bytes
+            with _requests_errors(timeout):
+                prepared = self.session.prepare_request(
+                    requests.Request(method, url, headers=headers, files=files, data=data)
+                )
+                settings = self.session.merge_environment_settings(
+                    prepared.url, {}, stream, None, None
+                )
+
+            def send_once(attempt_timeout: Optional[TimeoutValue]) -> TransportResponse:
+                with _requests_errors(attempt_timeout):
+                    response = self.session.send(prepared, timeout=attempt_timeout, **settings)
+                return _RequestsResponse(response)
+
+            return _send_with_retries(
+                send_once, method, url, timeout, deadline, _status_retry_policy(self._max_retries)
+            )
+        finally:
+            _request_deadline.reset(token)
+
+    def close(self) -> None:
+        """Close the session."""
+        if self._session is not None:
+            self._session.close()
+
+
+class HTTP2Transport(Transport):
+    """HTTP/2 transport backed by ``httpx``.
+
+    Concurrent requests from multiple threads are multiplexed as independent
+    streams over at most ``max_connections`` connections, so a queue of slow
+    ``/build`` jobs does not need one socket per job.
+
+    Args:
+        headers: Default headers applied to every request.
+        max_connections: Maximum number of connections to the API host.
+        max_retries: Number of retries for failed connection attempts, and
+            separately for retryable status codes.
+
+    Raises:
+        ImportError: If ``httpx`` with HTTP/2 support is not installed.
+    """
+
+    def __init__(
+        self,
+        headers: Optional[Dict[str, str]] = None,
+        max_connections: int = 4,
+        max_retries: int = 3,
+    ) -> None:
+        try:
+            httpx = importlib.import_module("httpx")
+            importlib.import_module("h2")
+        except ImportError as e:
+            raise ImportError(
+                "HTTP2Transport requires httpx with HTTP/2 support. "
+                "Install it with: pip install nutrient-dws[http2]"
+            ) from e
+
+        self._httpx = httpx
+        self._headers = dict(headers or {})
+        self._max_connections = max_connections
+        self._max_retries = max_retries
+        self._client: Any = self._create_client()
+        _fork.register(self)
+
+    def _create_client(self) -> Any:
+        """Create the multiplexing ``httpx.Client``."""
+        httpx = self._httpx
+        # httpx ignores the client's limits when a transport is given
+        limits = httpx.Limits(
+            max_connections=self._max_connections,
+            max_keepalive_connections=self._max_connections,
+        )
+        return httpx.Client(
+            http2=True,
+            headers=self._headers,
+            transport=httpx.HTTPTransport(http2=True, limits=limits, retries=self._max_retries),
+        )
+
+    @property
+    def client(self) -> Any:
+        """The ``httpx.Client``, recreated on first use after a fork."""
+        if self._client is None:
+            self._client = self._create_client()
+        return self._client
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Pickle the configuration only; the client is rebuilt on first use."""
+        return {
+            "headers": self._headers,
+            "max_connections": self._max_connections,
+            "max_retries": self._max_retries,
+        }
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """Recreate the transport from its configuration."""
+        self.__init__(**state)  # type: ignore[misc]
+
+    def _after_fork(self) -> None:
+        """Drop the inherited client; its connections belong to the parent."""
+        self._client = None
+
+    def _timeout(self, timeout: Optional[TimeoutValue]) -> Any:
+        """Convert a requests-style timeout into an ``httpx.Timeout``."""
+        if isinstance(timeout, tuple):
+            connect, read = timeout
+            return self._httpx.Timeout(read, connect=connect)
+        return self._httpx.Timeout(timeout)
+
+    def send(
+        self,
+        method: str,
+        url: str,
+        *,
+        headers: Optional[Dict[str, str]] = None,
+        files: Optional[Dict[str, Any]] = None,
+        data: Optional[Dict[str, Any]] = None,
+        timeout: Optional[TimeoutValue] = None,
+        stream: bool = False,
+        deadline: Optional[Deadline] = None,
+    ) -> TransportResponse:
+        """Send a request as an HTTP/2 stream.
+
+        ``httpx`` only retries failed connection attempts, so retryable
+        statuses are retried here, with the same backoff and deadline checks
+        as :class:`RequestsTransport`.
+        """
+        httpx = self._httpx
+        # Encode the body once, so that every attempt sends the same bytes
+        request = self.client.build_request(method, url, headers=headers, files=files, data=data)
+        request.read()
+
+        def send_once(attempt_timeout: Optional[TimeoutValue]) -> TransportResponse:
+            request.extensions["timeout"] = self._timeout(attempt_timeout).as_dict()
+            try:
+                response = self.client.send(request, stream=stream)
+            except httpx.TimeoutException as e:
+                raise NutrientTimeoutError(
+                    f"Request timed out after {_describe_timeout(attempt_timeout)} seconds"
+                ) from e
+            except httpx.TransportError as e:
+                raise APIError(f"Connection error: {e!s}") from e
+            except httpx.HTTPError as e:
+                raise APIError(f"Request failed: {e!s}") from e
+            return _HTTPXResponse(response)
+
+        token = _request_deadline.set(deadline)
+        try:
+            return _send_with_retries(
+                send_once, method, url, timeout, deadline, _status_retry_policy(self._max_retries)
+            )
+        finally:
+            _request_deadline.reset(token)
+
+    def close(self) -> None:
+        """Close all HTTP/2 connections."""
+        if self._client is not None:
+            self._client.close()
+
+
+class InMemoryResponse:
+    """Minimal response object produced by :class:`InMemoryTransport`.
+
+    Args:
+        status_code: HTTP status code.
+        content: Response body.
+        headers: Response headers.
+    """
+
+    def __init__(
+        self,
+        status_code: int = 200,
+        content: bytes = b"",
+        headers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        self.status_code = status_code
+        self.content = content
+        self.headers = CaseInsensitiveDict(headers or {})
+
+    @property
+    def text(self) -> str:
+        """Response body decoded as UTF-8."""
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self) -> Any:
+        """Response body parsed as JSON."""
+        return json.loads(self.content)
+
+    def iter_content(self, chunk_size: int) -> Iterator[bytes]:
+        """Iterate over the body in chunks."""
+        buffer = io.BytesIO(self.content)
+        while chunk := buffer.read(chunk_size):
+            yield chunk
+
+
+class InMemoryTransport(Transport):
+    """Transport that dispatches requests to a Python callable.
+
+    Intended for tests: no sockets are opened and every request is recorded
+    in :attr:`requests`.
+
+    Args:
+        handler: Called with the recorded request dictionary (keys
+            ``method``, ``url``, ``headers``, ``files``, ``data``, ``timeout``)
+            and returns an :class:`InMemoryResponse`. Exceptions raised by the
+            handler propagate to the caller. Defaults to an empty 200 response.
+
+    Example:
+        >>> transport = InMemoryTransport(lambda request: InMemoryResponse(200, b"%PDF"))
+        >>> client = NutrientClient(api_key="key", transport=transport)
+    """
+
+    def __init__(
+        self,
+        handler: Optional[Callable[[Dict[str, Any]], InMemoryResponse]] = None,
+    ) -> None:
+        self._handler = handler or _empty_response
+        self._lock = threading.Lock()
+        self.requests: List[Dict[str, Any]] = []
+        self.closed = False
+        _fork.register(self)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Pickle the handler and recorded requests, without the lock."""
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """Restore the transport with a new lock."""
+        self.__dict__.update(state)
+        self._after_fork()
+        _fork.register(self)
+
+    def _after_fork(self) -> None:
+        """Replace the lock, which may have been held by another thread at fork time."""
+        self._lock = threading.Lock()
+
+    def send(
+        self,
+        method: str,
+        url: str,
+        *,
+        headers: Optional[Dict[str, str]] = None,
+        files: Optional[Dict[str, Any]] = None,
+        data: Optional[Dict[str, Any]] = None,
+        timeout: Optional[TimeoutValue] = None,
+        stream: bool = False,
+        deadline: Optional[Deadline] = None,
+    ) -> TransportResponse:
+        """Record the request and return the handler's response."""
+        request = {
+            "method": method,
+            "url": url,
+            "headers": dict(headers or {}),
+            "files": files,
+            "data": data,
+            "timeout": timeout,
+            "deadline": deadline,
+        }
+        with self._lock:
+            self.requests.append(request)
+        return _RequestsResponse(self._handler(request))
+
+    def close(self) -> None:
+        """Mark the transport as closed."""
+        self.closed = True
+
+
+def _empty_response(request: Dict[str, Any]) -> InMemoryResponse:
+    """Default :class:`InMemoryTransport` handler returning an empty 200 response."""
+    return InMemoryResponse()
+
+
+@contextlib.contextmanager
+def _requests_errors(timeout: Optional[TimeoutValue]) -> Generator[None, None, None]:
+    """Translate ``requests`` failures into client exceptions."""
+    try:
+        yield
+    except requests.exceptions.Timeout as e:
+        raise NutrientTimeoutError(
+            f"Request timed out after {_describe_timeout(timeout)} seconds"
+        ) from e
+    except requests.exceptions.ConnectionError as e:
+        raise APIError(f"Connection error: {e!s}") from e
+    except requests.exceptions.RequestException as e:
+        raise APIError(f"Request failed: {e!s}") from e
+
+
+def _describe_timeout(timeout: Optional[TimeoutValue]) -> str:
+    """Format a timeout value for error messages."""
+    if isinstance(timeout, tuple):
+        return str(timeout[1])
+    return str(timeout)
@@ -0,0 +1,243 @@
+"""Watch a drop directory and process documents as they arrive."""
+
+import collections
+import fnmatch
+import logging
+import os
+import threading
+import time
+from multiprocessing.context import BaseContext
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from nutrient_dws.batch import BatchResult, BatchRunner, OutputSpec, ProgressCallback
+from nutrient_dws.builder import Pipeline
+from nutrient_dws.client import NutrientClient
+from nutrient_dws.journal import BatchJournal, input_key
+from nutrient_dws.writer import BackgroundWriter
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+    from nutrient_dws.file_handler import FileInput
+
+logger = logging.getLogger(__name__)
+
+# Size and modification time (ns) identifying one version of a file
+Signature = Tuple[int, int]
+
+
+class FolderWatcher:
+    """Process new and changed files in a directory with bounded concurrency.
+
+    The directory is polled every ``poll_interval`` seconds with
+    ``os.scandir``, which needs a single ``stat`` per file. A file is
+    processed once its size and modification time have not changed for
+    ``settle_time`` seconds, so files that are still being copied or scanned
+    are not picked up half-written. Hidden files (names starting with ``.``)
+    are ignored, which includes the temporary files of atomic writes.
+
+    Files are processed by a :class:`~nutrient_dws.batch.BatchRunner`. At most
+    ``max_pending`` files are in flight; while that limit is reached the
+    directory is not scanned, so a burst of arrivals is absorbed by the
+    directory itself instead of growing an in-memory queue. Outputs are
+    written atomically.
+
+    With a ``journal``, each processed version of a file (path, size and
+    modification time) is recorded, so a restarted watcher neither
+    reprocesses finished files nor misses files that changed while it was
+    down.
+
+    Args:
+        client: Client used for processing.
+        pipeline: Workflow applied to every file.
+        directory: Directory to watch.
+        output: Output directory or callable, as for ``BatchRunner``. An
+            output directory inside ``directory`` is not watched.
+        pattern: File name pattern, for example ``"*.pdf"``.
+        recursive: Whether subdirectories are watched.
+        ignore: Additional directories that are not watched.
+        settle_time: Seconds a file must stay unchanged before processing.
+        poll_interval: Seconds between directory scans.
+        max_workers: Number of workers.
+        use_processes: Use worker processes instead of threads.
+        mp_context: Optional multiprocessing context for worker processes.
+        max_pending: Maximum number of files in flight.
+        journal: Optional journal recording processed files across restarts.
+        on_result: Optional callback invoked as ``callback(metrics, result)``
+            after every processed file.
+        writer: Optional background writer for outputs, as for ``BatchRunner``.
+        clock: Monotonic clock, replaceable in tests.
+
+    Example:
+        >>> watcher = FolderWatcher(client, Pipeline().add_step("ocr-pdf"), "inbox", "ocr")
+        >>> watcher.run()  # blocks until watcher.stop() is called
+    """
+
+    def __init__(
+        self,
+        client: NutrientClient,
+        pipeline: Pipeline,
+        directory: Union[str, Path],
+        output: OutputSpec,
+        pattern: str = "*",
+        recursive: bool = True,
+        ignore: Sequence[Union[str, Path]] = (),
+        settle_time: float = 2.0,
+        poll_interval: float = 1.0,
+        max_workers: int = 4,
+        use_processes: bool = False,
+        mp_context: Optional[BaseContext] = None,
+        max_pending: Optional[int] = None,
+        journal: Optional[BatchJournal] = None,
+        on_result: Optional[ProgressCallback] = None,
+        writer: Optional[BackgroundWriter] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.directory = os.path.abspath(directory)
+        self.pattern = pattern
+        self.recursive = recursive
+        self.settle_time = settle_time
+        self.poll_interval = poll_interval
+        self.journal = journal
+        self.runner = BatchRunner(
+            client,
+            pipeline,
+            output=output,
+            max_workers=max_workers,
+            use_processes=use_processes,
+            mp_context=mp_context,
+            max_pending=max_pending or max_workers * 2,
+            on_progress=on_result,
+            journal=journal,
+            writer=writer,
+        )
+        self._ignored = {os.path.abspath(path) for path in ignore}
+        if isinstance(output, (str, Path)):
+            self._ignored.add(os.path.abspath(output))
+        self._clock = clock
+        self._stop = threading.Event()
+        # Last observed signature of each file and when it was first observed
+        self._observed: Dict[str, Tuple[Signature, float]] = {}
+        # Signature of each file when it was last handed out for processing
+        self._dispatched: Dict[str, Signature] = {}
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        """Progress counters of the underlying batch runner."""
+        return self.runner.metrics
+
+    def stop(self) -> None:
+        """Ask :meth:`run` to finish the files in flight and return."""
+        self._stop.set()
+
+    def poll(self) -> List[Tuple[str, Signature]]:
+        """Scan the directory once and return files that are ready to process.
+
+        A file is returned once per version: when it first settles and again
+        after every change.
+        """
+        now = self._clock()
+        ready = []
+        current = self._scan()
+        for path, signature in current.items():
+            observed = self._observed.get(path)
+            if observed is None or observed[0] != signature:
+                self._observed[path] = (signature, now)
+                continue
+            if now - observed[1] >= self.settle_time and self._dispatched.get(path) != signature:
+                self._dispatched[path] = signature
+                ready.append((path, signature))
+
+        # Forget files that were removed
+        for path in set(self._observed) - set(current):
+            del self._observed[path]
+            self._dispatched.pop(path, None)
+        return ready
+
+    def run(self) -> None:
+        """Watch the directory and process files until :meth:`stop` is called.
+
+        Files in flight when the watcher is stopped are finished first.
+        """
+        runner = self.runner
+        journal = self.journal
+        runner._start()
+        queue: Deque[Tuple[str, Signature]] = collections.deque()
+        pending: Dict[Future[BatchResult], Tuple[FileInput, Optional[str]]] = {}
+        logger.info(f"Watching {self.directory}")
+
+        with runner._create_executor() as executor:
+            try:
+                while not self._stop.is_set():
+                    # Backpressure: only look for new work while there is capacity
+                    if len(queue) + len(pending) < runner.max_pending:
+                        queue.extend(self.poll())
+                    while queue and len(pending) < runner.max_pending:
+                        path, signature = queue.popleft()
+                        key = self._journal_key(path, signature)
+                        if (
+                            key is not None
+                            and self.journal is not None
+                            and self.journal.is_done(key)
+                        ):
+                            continue
+                        pending[runner._submit(executor, path, key)] = (path, key)
+
+                    if pending:
+                        for _ in runner._collect(pending, timeout=self.poll_interval):
+                            pass
+                    else:
+                        self._stop.wait(self.poll_interval)
+
+                while pending:
+                    for _ in runner._collect(pending):
+                        pass
+            finally:
+                self._stop.clear()
+                if journal is not None:
+                    journal.commit()
+
+    def _journal_key(self, path: str, signature: Signature) -> Optional[str]:
+        """Journal key identifying one version of a file."""
+        if self.journal is None:
+            return None
+        size, mtime_ns = signature
+        return f"{input_key(path)}|{size}:{mtime_ns}"
+
+    def _scan(self) -> Dict[str, Signature]:
+        """Return the signature of every matching file in the directory."""
+        found: Dict[str, Signature] = {}
+        stack = [self.directory]
+        while stack:
+            directory = stack.pop()
+            try:
+                entries = list(os.scandir(directory))
+            except OSError as e:
+                logger.warning(f"Cannot scan {directory}: {e}")
+                continue
+            for entry in entries:
+                if entry.name.startswith("."):
+                    continue
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if self.recursive and entry.path not in self._ignored:
+                            stack.append(entry.path)
+                    elif entry.is_file() and fnmatch.fnmatch(entry.name, self.pattern):
+                        stat = entry.stat()
+                        found[entry.path] = (stat.st_size, stat.st_mtime_ns)
+                except OSError:
+                    # The file disappeared while scanning
+                    continue
+        return found
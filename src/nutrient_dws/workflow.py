@@ -0,0 +1,461 @@
+"""Multi-stage workflows that chain Build API requests."""
+
+import contextlib
+import contextvars
+import io
+import logging
+import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, BinaryIO, Dict, List, Optional, Sequence, Union, cast
+
+from nutrient_dws.builder import BuildAPIWrapper, Pipeline
+from nutrient_dws.deadline import Deadline, DeadlineLike, current_deadline, earliest
+from nutrient_dws.exceptions import APIError, DeadlineExceededError, NutrientTimeoutError
+from nutrient_dws.file_handler import FileInput, save_stream_output
+from nutrient_dws.transport import RETRY_STATUS_CODES
+
+logger = logging.getLogger(__name__)
+
+# Outputs up to this size stay in memory; larger ones spill to a temporary file
+DEFAULT_SPOOL_SIZE = 8 * 1024 * 1024
+
+
+class _SpoolReader(io.RawIOBase):
+    """Reader with its own position over a spool shared by several consumers."""
+
+    def __init__(self, spool: Any, lock: threading.Lock, name: str) -> None:
+        super().__init__()
+        self._spool = spool
+        self._lock = lock
+        self._position = 0
+        self.name = name
+
+    def readable(self) -> bool:
+        """Spool readers are readable."""
+        return True
+
+    def seekable(self) -> bool:
+        """Spool readers are seekable."""
+        return True
+
+    def read(self, size: Optional[int] = -1) -> bytes:
+        """Read up to ``size`` bytes from the current position."""
+        with self._lock:
+            self._spool.seek(self._position)
+            data: bytes = self._spool.read(-1 if size is None else size)
+        self._position += len(data)
+        return data
+
+    def readinto(self, buffer: Any) -> int:
+        """Read into a pre-allocated buffer."""
+        data = self.read(len(buffer))
+        buffer[: len(data)] = data
+        return len(data)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        """Move the position of this reader only."""
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            with self._lock:
+                offset += self._spool.seek(0, io.SEEK_END)
+        self._position = max(offset, 0)
+        return self._position
+
+    def tell(self) -> int:
+        """Current position of this reader."""
+        return self._position
+
+
+class _Stage:
+    """Definition and output of one workflow stage."""
+
+    def __init__(
+        self,
+        name: str,
+        pipeline: Pipeline,
+        input_file: Optional[FileInput],
+        after: List[str],
+        output_path: Optional[str],
+    ) -> None:
+        self.name = name
+        self.pipeline = pipeline
+        self.input_file = input_file
+        self.after = after
+        self.output_path = output_path
+        self.spool: Optional[Any] = None
+        self.lock = threading.Lock()
+
+
+class StageResult:
+    """Outcome of one workflow stage.
+
+    Attributes:
+        name: Name of the stage.
+        status: ``"succeeded"``, ``"failed"``, or ``"skipped"`` when a stage
+            it depends on did not succeed.
+        error: The exception raised by the last attempt, or None.
+        attempts: Number of requests sent for the stage in the last run.
+        duration: Time spent on the stage in seconds, including retries.
+        size: Size of the output in bytes, if the stage succeeded.
+        output_path: Where the output was saved, if the stage has one.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        status: str,
+        error: Optional[BaseException] = None,
+        attempts: int = 0,
+        duration: float = 0.0,
+        size: Optional[int] = None,
+        output_path: Optional[str] = None,
+    ) -> None:
+        self.name = name
+        self.status = status
+        self.error = error
+        self.attempts = attempts
+        self.duration = duration
+        self.size = size
+        self.output_path = output_path
+
+    @property
+    def ok(self) -> bool:
+        """Whether the stage succeeded."""
+        return self.status == "succeeded"
+
+    def __repr__(self) -> str:
+        """Representation with the stage and outcome."""
+        outcome = self.status if self.error is None else f"{self.status}, error={self.error!r}"
+        return f"StageResult(name={self.name!r}, {outcome})"
+
+
+class Workflow:
+    """A graph of Build API requests where each stage consumes earlier outputs.
+
+    Every stage is one ``/build`` request. Its input is either a file or the
+    outputs of earlier stages, which are combined as parts of the request in
+    the given order. Response bodies are streamed into a spool that stays in
+    memory up to ``spool_size`` bytes and spills to a temporary file beyond
+    that, and are uploaded from there by the stages that depend on them, so
+    intermediates never need to be held in memory as ``bytes``.
+
+    Stages whose inputs are ready run concurrently. A stage that fails with a
+    transient error (a timeout, a connection error or a retryable status) is
+    retried on its own; completed stages are never repeated, so calling
+    :meth:`run` again after a failure only runs the stages that did not
+    succeed.
+
+    Args:
+        client: NutrientClient used for all requests.
+        max_workers: Maximum number of stages running at the same time.
+        spool_size: Bytes of each stage output kept in memory before it
+            spills to disk.
+        retries: Number of times a failed stage is retried.
+        backoff: Delay before the first retry in seconds, doubled for each
+            further retry.
+        keep_intermediates: Keep the outputs of stages that other stages
+            depend on after those stages succeeded, so they can be read with
+            :meth:`open`. By default they are released as soon as possible.
+
+    Example:
+        >>> with Workflow(client) as workflow:
+        ...     workflow.add_stage("ocr", Pipeline().add_step("ocr-pdf"), input_file="scan.pdf")
+        ...     workflow.add_stage(
+        ...         "redacted", Pipeline().add_step("apply-redactions"), after="ocr",
+        ...         output_path="redacted.pdf",
+        ...     )
+        ...     workflow.add_stage(
+        ...         "draft", Pipeline().add_step("watermark-pdf", {"text": "DRAFT"}),
+        ...         after="ocr", output_path="draft.pdf",
+        ...     )
+        ...     results = workflow.run()
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        max_workers: int = 4,
+        spool_size: int = DEFAULT_SPOOL_SIZE,
+        retries: int = 2,
+        backoff: float = 1.0,
+        keep_intermediates: bool = False,
+    ) -> None:
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        if retries < 0:
+            raise ValueError("retries must not be negative")
+
+        self._client = client
+        self.max_workers = max_workers
+        self.spool_size = spool_size
+        self.retries = retries
+        self.backoff = backoff
+        self.keep_intermediates = keep_intermediates
+        self._stages: Dict[str, _Stage] = {}
+        self._results: Dict[str, StageResult] = {}
+
+    def add_stage(
+        self,
+        name: str,
+        pipeline: Optional[Pipeline] = None,
+        input_file: Optional[FileInput] = None,
+        after: Union[str, Sequence[str], None] = None,
+        output_path: Optional[str] = None,
+    ) -> "Workflow":
+        """Add a stage.
+
+        Args:
+            name: Unique name of the stage.
+            pipeline: Steps and output options of the stage. Without one the
+                inputs are only converted or, for several inputs, merged.
+            input_file: Input of a first stage.
+            after: Name of the stage, or names of the stages, whose outputs
+                are the input of this stage. They must have been added before.
+            output_path: Optional path where the output of this stage is saved.
+
+        Returns:
+            Self for method chaining.
+
+        Raises:
+            ValueError: If the name is taken, a stage in ``after`` does not
+                exist, or not exactly one of ``input_file`` and ``after`` is set.
+        """
+        if name in self._stages:
+            raise ValueError(f"Stage {name!r} already exists")
+        upstream = [after] if isinstance(after, str) else list(after or [])
+        if (input_file is None) == (not upstream):
+            raise ValueError("A stage needs either an input_file or stages to run after")
+        for dependency in upstream:
+            if dependency not in self._stages:
+                raise ValueError(f"Unknown stage {dependency!r}; add it before {name!r}")
+
+        self._stages[name] = _Stage(name, pipeline or Pipeline(), input_file, upstream, output_path)
+        return self
+
+    @property
+    def results(self) -> Dict[str, StageResult]:
+        """Results of the stages run so far, in the order the stages were added."""
+        return {name: self._results[name] for name in self._stages if name in self._results}
+
+    def run(self, deadline: DeadlineLike = None) -> Dict[str, StageResult]:
+        """Run every stage that has not succeeded yet.
+
+        Args:
+            deadline: Optional time budget in seconds, or a ``Deadline``, for
+                the whole run including retries.
+
+        Returns:
+            The result of every stage, in the order the stages were added.
+        """
+        run_deadline = earliest(Deadline.coerce(deadline), current_deadline())
+        waiting = [stage for stage in self._stages.values() if not self._succeeded(stage.name)]
+        for stage in waiting:
+            self._results.pop(stage.name, None)
+
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="nutrient-workflow"
+        ) as executor:
+            running: Dict[Future[StageResult], _Stage] = {}
+            while waiting or running:
+                for stage in list(waiting):
+                    if any(
+                        name in self._results and not self._succeeded(name) for name in stage.after
+                    ):
+                        waiting.remove(stage)
+                        self._results[stage.name] = StageResult(
+                            stage.name, "skipped", output_path=stage.output_path
+                        )
+                    elif all(self._succeeded(name) for name in stage.after):
+                        waiting.remove(stage)
+                        # Worker threads do not inherit the scopes active in this thread
+                        context = contextvars.copy_context()
+                        future = executor.submit(context.run, self._run_stage, stage, run_deadline)
+                        running[future] = stage
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage = running.pop(future)
+                    self._results[stage.name] = future.result()
+                    self._release_inputs(stage)
+        return self.results
+
+    def open(self, name: str) -> BinaryIO:
+        """Return a reader over the output of a succeeded stage.
+
+        Several readers can be open at once, each with its own position.
+
+        Raises:
+            KeyError: If there is no stage with that name.
+            ValueError: If the stage has not succeeded or its output was released.
+        """
+        stage = self._stages[name]
+        if not self._succeeded(name) or stage.spool is None:
+            raise ValueError(f"No output available for stage {name!r}")
+        return io.BufferedReader(_SpoolReader(stage.spool, stage.lock, name))
+
+    def read(self, name: str) -> bytes:
+        """Return the output of a succeeded stage as bytes.
+
+        Raises:
+            KeyError: If there is no stage with that name.
+            ValueError: If the stage has not succeeded or its output was released.
+        """
+        with self.open(name) as reader:
+            return reader.read()
+
+    def close(self) -> None:
+        """Release the outputs of all stages."""
+        for stage in self._stages.values():
+            self._discard(stage)
+
+    def __enter__(self) -> "Workflow":
+        """Context manager entry."""
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        """Context manager exit; releases all outputs."""
+        self.close()
+
+    def _succeeded(self, name: str) -> bool:
+        """Whether a stage has succeeded in this or an earlier run."""
+        result = self._results.get(name)
+        return result is not None and result.ok
+
+    def _run_stage(self, stage: _Stage, deadline: Optional[Deadline]) -> StageResult:
+        """Run one stage with retries and return its result."""
+        started = time.monotonic()
+        # The spool outlives this method; it is closed by _discard
+        spool = cast(
+            "BinaryIO",
+            tempfile.SpooledTemporaryFile(max_size=self.spool_size),  # noqa: SIM115
+        )
+        attempts = 0
+        while True:
+            attempts += 1
+            spool.seek(0)
+            spool.truncate()
+            try:
+                inputs = self._inputs(stage)
+                self._rewind(inputs)
+                self._builder(stage, inputs)._post(deadline=deadline, output=spool)
+                break
+            except Exception as e:
+                if attempts > self.retries or not self._is_transient(e):
+                    spool.close()
+                    return StageResult(
+                        stage.name,
+                        "failed",
+                        error=e,
+                        attempts=attempts,
+                        duration=time.monotonic() - started,
+                        output_path=stage.output_path,
+                    )
+                delay = self.backoff * 2 ** (attempts - 1)
+                if deadline is not None and deadline.remaining() <= delay:
+                    spool.close()
+                    return StageResult(
+                        stage.name,
+                        "failed",
+                        error=DeadlineExceededError(
+                            f"Deadline exceeded while waiting to retry stage {stage.name!r}"
+                        ),
+                        attempts=attempts,
+                        duration=time.monotonic() - started,
+                        output_path=stage.output_path,
+                    )
+                logger.debug(f"Retrying stage {stage.name!r} after {e!r}")
+                time.sleep(delay)
+
+        size = spool.tell()
+        if stage.output_path is not None:
+            spool.seek(0)
+            try:
+                save_stream_output(spool, stage.output_path, size)
+            except OSError as e:
+                spool.close()
+                return StageResult(
+                    stage.name,
+                    "failed",
+                    error=e,
+                    attempts=attempts,
+                    duration=time.monotonic() - started,
+                    output_path=stage.output_path,
+                )
+        stage.spool = spool
+        return StageResult(
+            stage.name,
+            "succeeded",
+            attempts=attempts,
+            duration=time.monotonic() - started,
+            size=size,
+            output_path=stage.output_path,
+        )
+
+    def _inputs(self, stage: _Stage) -> List[FileInput]:
+        """Inputs of a stage: its input file or readers over upstream outputs.
+
+        Raises:
+            ValueError: If the output of an upstream stage was released.
+        """
+        if stage.input_file is not None:
+            return [stage.input_file]
+        readers: List[FileInput] = []
+        for name in stage.after:
+            upstream = self._stages[name]
+            if upstream.spool is None:
+                raise ValueError(f"Output of stage {name!r} is no longer available")
+            readers.append(cast("BinaryIO", _SpoolReader(upstream.spool, upstream.lock, name)))
+        return readers
+
+    @staticmethod
+    def _rewind(inputs: List[FileInput]) -> None:
+        """Move file object inputs back to their start before an attempt."""
+        for item in inputs:
+            if hasattr(item, "seek"):
+                with contextlib.suppress(OSError, io.UnsupportedOperation):
+                    item.seek(0)
+
+    def _builder(self, stage: _Stage, inputs: List[FileInput]) -> BuildAPIWrapper:
+        """Create the Builder request of a stage."""
+        if len(inputs) == 1:
+            return stage.pipeline.build(self._client, inputs[0])
+        builder = BuildAPIWrapper(self._client)
+        for item in inputs:
+            builder.add_part(item)
+        for tool, options in stage.pipeline.steps:
+            builder.add_step(tool, options)
+        if stage.pipeline.output_options:
+            builder.set_output_options(**stage.pipeline.output_options)
+        return builder
+
+    @staticmethod
+    def _is_transient(error: Exception) -> bool:
+        """Whether a stage failing with ``error`` may succeed when retried."""
+        if isinstance(error, DeadlineExceededError):
+            return False
+        if isinstance(error, NutrientTimeoutError):
+            return True
+        if isinstance(error, APIError):
+            return error.status_code is None or error.status_code in RETRY_STATUS_CODES
+        return False
+
+    def _release_inputs(self, stage: _Stage) -> None:
+        """Release upstream outputs that no stage needs any more."""
+        if self.keep_intermediates or not stage.after:
+            return
+        for name in stage.after:
+            dependents = [s for s in self._stages.values() if name in s.after]
+            if all(self._succeeded(s.name) for s in dependents):
+                self._discard(self._stages[name])
+
+    @staticmethod
+    def _discard(stage: _Stage) -> None:
+        """Close the spool of a stage."""
+        with stage.lock:
+            if stage.spool is not None:
+                stage.spool.close()
+                stage.spool = None
@@ -0,0 +1,167 @@
+"""Background writing of output files."""
+
+import collections
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Deque, Dict, Optional
+
+from nutrient_dws import _fork
+from nutrient_dws.file_handler import save_file_output
+
+
+class BackgroundWriter:
+    """Bounded pool of threads that writes output files in the background.
+
+    Threads that receive API responses hand the output to the writer and move
+    on to the next request, so slow storage such as a network share does not
+    hold up connection slots. At most ``max_pending`` outputs, and at most
+    ``max_pending_bytes`` bytes, are queued or being written at a time;
+    :meth:`submit` blocks beyond that, which slows the producers down to the
+    speed of the storage instead of buffering outputs without limit.
+
+    Args:
+        max_workers: Number of writer threads.
+        max_pending: Maximum number of outputs queued or being written.
+            Defaults to twice the number of threads.
+        max_pending_bytes: Optional maximum size of the outputs queued or
+            being written. A single larger output is accepted when nothing
+            else is pending.
+        history_size: Number of write latency samples kept.
+
+    Example:
+        >>> with BackgroundWriter(max_workers=4) as writer:
+        ...     runner = BatchRunner(client, pipeline, output="out/", writer=writer)
+        ...     results = list(runner.run(inputs))
+        >>> writer.metrics["mean_write_seconds"]
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 2,
+        max_pending: Optional[int] = None,
+        max_pending_bytes: Optional[int] = None,
+        history_size: int = 1000,
+    ) -> None:
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        self.max_workers = max_workers
+        self.max_pending = max_pending or max_workers * 2
+        self.max_pending_bytes = max_pending_bytes
+        self._condition = threading.Condition()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+        self._pending_bytes = 0
+        self._max_depth = 0
+        self._writes = 0
+        self._failed = 0
+        self._bytes_written = 0
+        self._blocked_seconds = 0.0
+        self._total_write_seconds = 0.0
+        self._latencies: Deque[float] = collections.deque(maxlen=history_size)
+        _fork.register(self)
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        """Queue depth, throughput and write latency statistics."""
+        with self._condition:
+            latencies = sorted(self._latencies)
+            p95_index = min(len(latencies) - 1, int(len(latencies) * 0.95))
+            p95 = latencies[p95_index] if latencies else 0.0
+            finished = self._writes + self._failed
+            return {
+                "queue_depth": self._pending,
+                "queued_bytes": self._pending_bytes,
+                "max_queue_depth": self._max_depth,
+                "writes": self._writes,
+                "failed": self._failed,
+                "bytes_written": self._bytes_written,
+                "blocked_seconds": self._blocked_seconds,
+                "mean_write_seconds": self._total_write_seconds / finished if finished else 0.0,
+                "p95_write_seconds": p95,
+                "max_write_seconds": latencies[-1] if latencies else 0.0,
+            }
+
+    def submit(
+        self, content: bytes, output_path: str, fsync: Optional[bool] = None
+    ) -> "Future[float]":
+        """Queue ``content`` to be saved to ``output_path``.
+
+        Blocks while the writer is at capacity. The file is written
+        atomically with ``save_file_output``.
+
+        Args:
+            content: File bytes to save.
+            output_path: Path where to save the file.
+            fsync: Flush the file to stable storage, as for ``save_file_output``.
+
+        Returns:
+            Future resolving to the write time in seconds, or to the OSError
+            raised while writing.
+        """
+        started = time.monotonic()
+        with self._condition:
+            while not self._has_capacity(len(content)):
+                self._condition.wait()
+            self._blocked_seconds += time.monotonic() - started
+            self._pending += 1
+            self._pending_bytes += len(content)
+            self._max_depth = max(self._max_depth, self._pending)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="nutrient-writer"
+                )
+            executor = self._executor
+        return executor.submit(self._write, content, output_path, fsync)
+
+    def close(self, wait: bool = True) -> None:
+        """Stop the writer threads, by default after the queued outputs are written."""
+        with self._condition:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def _has_capacity(self, size: int) -> bool:
+        """Whether an output of ``size`` bytes may be queued; must be called with the lock held."""
+        if self._pending >= self.max_pending:
+            return False
+        if self.max_pending_bytes is None or self._pending == 0:
+            return True
+        return self._pending_bytes + size <= self.max_pending_bytes
+
+    def _write(self, content: bytes, output_path: str, fsync: Optional[bool]) -> float:
+        """Save one output and record its latency."""
+        started = time.monotonic()
+        ok = False
+        try:
+            save_file_output(content, output_path, fsync)
+            ok = True
+        finally:
+            elapsed = time.monotonic() - started
+            with self._condition:
+                self._pending -= 1
+                self._pending_bytes -= len(content)
+                if ok:
+                    self._writes += 1
+                    self._bytes_written += len(content)
+                else:
+                    self._failed += 1
+                self._total_write_seconds += elapsed
+                self._latencies.append(elapsed)
+                self._condition.notify_all()
+        return elapsed
+
+    def __enter__(self) -> "BackgroundWriter":
+        """Context manager entry."""
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        """Context manager exit; waits for queued outputs to be written."""
+        self.close()
+
+    def _after_fork(self) -> None:
+        """Start the child without the parent's threads and queue."""
+        self._condition = threading.Condition()
+        self._executor = None
+        self._pending = 0
+        self._pending_bytes = 0
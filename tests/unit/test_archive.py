@@ -0,0 +1,332 @@
+"""Unit tests for zip archive input sources."""
+
+import io
+import json
+import multiprocessing
+import os
+import pickle
+import threading
+import zipfile
+
+import pytest
+
+from nutrient_dws.archive import ZipSink, ZipSource, is_zip_archive, iter_zip_stream
+from nutrient_dws.batch import BatchRunner
+from nutrient_dws.builder import Pipeline
+from nutrient_dws.client import NutrientClient
+from nutrient_dws.file_handler import get_file_size, prepare_file_for_upload
+from nutrient_dws.transport import InMemoryResponse, InMemoryTransport
+
+MEMBERS = {
+    "a.pdf": b"first",
+    "docs/b.docx": b"second",
+    "docs/c.pdf": b"third" * 1000,
+    "__MACOSX/docs/._c.pdf": b"metadata",
+    "docs/.hidden.pdf": b"hidden",
+}
+
+
+def make_archive(target):
+    """Write an archive with ``MEMBERS`` and a directory entry to ``target``."""
+    with zipfile.ZipFile(target, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("docs/", b"")
+        for name, content in MEMBERS.items():
+            archive.writestr(name, content)
+    return target
+
+
+def upper_handler(request):
+    """Upper-case the uploaded file."""
+    _, content, _ = request["files"]["file"]
+    content = content if isinstance(content, bytes) else content.read()
+    return InMemoryResponse(200, content.upper())
+
+
+class TestZipSource:
+    """Test suite for ZipSource."""
+
+    def test_members_and_patterns(self, tmp_path):
+        """Test that regular files are listed and filtered by name or path pattern."""
+        path = make_archive(tmp_path / "in.zip")
+
+        with ZipSource(path) as source:
+            assert [member.member for member in source] == ["a.pdf", "docs/b.docx", "docs/c.pdf"]
+        with ZipSource(path, pattern="*.pdf") as source:
+            assert [member.member for member in source] == ["a.pdf", "docs/c.pdf"]
+        with ZipSource(path, pattern="docs/*") as source:
+            assert [member.member for member in source] == ["docs/b.docx", "docs/c.pdf"]
+
+    def test_member_reads_like_a_file(self, tmp_path):
+        """Test that members decompress on read and report their size cheaply."""
+        with ZipSource(make_archive(tmp_path / "in.zip"), pattern="c.pdf") as source:
+            [member] = source
+
+            assert get_file_size(member) == len(MEMBERS["docs/c.pdf"])
+            assert member.tell() == 0
+            assert member.read(5) == b"third"
+            member.seek(0)
+            assert member.read() == MEMBERS["docs/c.pdf"]
+
+            field, (filename, content, _) = prepare_file_for_upload(member)
+            assert (field, filename, content) == ("file", "c.pdf", member)
+
+    def test_stream_archive(self, tmp_path):
+        """Test that archives can be read from a seekable stream."""
+        buffer = io.BytesIO(make_archive(tmp_path / "in.zip").read_bytes())
+
+        with ZipSource(buffer, pattern="a.pdf") as source:
+            [member] = source
+            assert member.read() == b"first"
+            with pytest.raises(TypeError, match="stream"):
+                pickle.dumps(member)
+
+    def test_pickled_member_reopens_archive(self, tmp_path):
+        """Test that members of an archive given by path survive pickling."""
+        with ZipSource(make_archive(tmp_path / "in.zip"), pattern="b.docx") as source:
+            [member] = source
+            restored = pickle.loads(pickle.dumps(member))
+
+        assert restored.name == member.name
+        assert restored.read() == b"second"
+
+    def test_relative_path_is_sanitized(self, tmp_path):
+        """Test that member paths cannot escape an output directory."""
+        path = tmp_path / "evil.zip"
+        with zipfile.ZipFile(path, "w") as archive:
+            archive.writestr("../../outside/x.pdf", b"x")
+
+        with ZipSource(path) as source:
+            [member] = source
+            assert member.relative_path == "outside/x.pdf"
+
+    def test_is_zip_archive(self, tmp_path):
+        """Test that only .zip files count as archives, not Office documents."""
+        make_archive(tmp_path / "in.zip")
+        make_archive(tmp_path / "report.docx")
+
+        assert is_zip_archive(tmp_path / "in.zip")
+        assert not is_zip_archive(tmp_path / "report.docx")
+
+
+class Unseekable:
+    """Write-only stream, like a pipe or an HTTP response body."""
+
+    def __init__(self):
+        self.buffer = io.BytesIO()
+
+    def write(self, data):
+        """Append ``data``."""
+        return self.buffer.write(data)
+
+    def flush(self):
+        """Nothing to flush."""
+
+
+class TestZipSink:
+    """Test suite for ZipSink."""
+
+    def test_members_and_manifest(self, tmp_path):
+        """Test that members are sanitized, made unique and followed by the manifest."""
+        target = tmp_path / "out" / "results.zip"
+
+        with ZipSink(target) as sink:
+            assert sink.write("a.pdf", b"one") == "a.pdf"
+            assert sink.write("a.pdf", b"two") == "a-2.pdf"
+            assert sink.write("../../etc/b.pdf", b"three") == "etc/b.pdf"
+            sink.add_manifest_entry({"input": "a.docx", "ok": True})
+            assert not target.exists()
+
+        with zipfile.ZipFile(target) as archive:
+            assert archive.namelist() == ["a.pdf", "a-2.pdf", "etc/b.pdf", "manifest.json"]
+            assert archive.read("a-2.pdf") == b"two"
+            assert json.loads(archive.read("manifest.json")) == [{"input": "a.docx", "ok": True}]
+        assert os.listdir(target.parent) == ["results.zip"]
+
+    def test_unseekable_stream(self):
+        """Test that archives can be streamed into write-only targets."""
+        stream = Unseekable()
+
+        with ZipSink(stream, compression=zipfile.ZIP_DEFLATED, manifest_name=None) as sink:
+            sink.write("a.pdf", b"content" * 100)
+
+        with zipfile.ZipFile(io.BytesIO(stream.buffer.getvalue())) as archive:
+            assert archive.namelist() == ["a.pdf"]
+            assert archive.read("a.pdf") == b"content" * 100
+
+    def test_closed_sink_rejects_writes(self, tmp_path):
+        """Test that writing after close fails."""
+        sink = ZipSink(tmp_path / "results.zip")
+        sink.close()
+        sink.close()
+
+        with pytest.raises(ValueError, match="closed"):
+            sink.write("a.pdf", b"content")
+
+
+def chunked(data, size=7):
+    """Split ``data`` into chunks of ``size`` bytes."""
+    return [data[start : start + size] for start in range(0, len(data), size)]
+
+
+class TestIterZipStream:
+    """Test suite for decoding zip archives as they are received."""
+
+    def test_stored_and_deflated_members(self):
+        """Test that members are decoded from small chunks and directories are skipped."""
+        body = io.BytesIO()
+        with zipfile.ZipFile(body, "w") as archive:
+            archive.writestr("a.png", b"stored" * 50)
+            archive.writestr("pages/", b"")
+            archive.writestr("b.png", b"deflated" * 50, compress_type=zipfile.ZIP_DEFLATED)
+
+        members = list(iter_zip_stream(chunked(body.getvalue())))
+
+        assert members == [("a.png", b"stored" * 50), ("b.png", b"deflated" * 50)]
+
+    def test_data_descriptors(self):
+        """Test archives written to unseekable streams, which sizes follow the data in."""
+        stream = Unseekable()
+        with zipfile.ZipFile(stream, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            for name in ("a.png", "b.png"):
+                with archive.open(name, "w") as member:
+                    member.write(name.encode() * 100)
+
+        members = list(iter_zip_stream(chunked(stream.buffer.getvalue())))
+
+        assert members == [("a.png", b"a.png" * 100), ("b.png", b"b.png" * 100)]
+
+    def test_zip_sink_through_a_pipe(self):
+        """Test that stored members written by ZipSink into a pipe are decoded as they arrive."""
+        tricky = b"PK\x07\x08" + b"\x00" * 12 + b"not the end"
+        read_end, write_end = os.pipe()
+
+        def produce():
+            with os.fdopen(write_end, "wb") as pipe, ZipSink(pipe) as sink:
+                sink.write("a.pdf", b"first" * 1000)
+                sink.write("b.pdf", tricky)
+                sink.write("c.pdf", b"")
+
+        producer = threading.Thread(target=produce)
+        producer.start()
+        with os.fdopen(read_end, "rb") as pipe:
+            members = list(iter_zip_stream(iter(lambda: pipe.read(100), b"")))
+        producer.join()
+
+        assert [name for name, _ in members] == ["a.pdf", "b.pdf", "c.pdf", "manifest.json"]
+        assert members[0][1] == b"first" * 1000
+        assert members[1][1] == tricky
+        assert members[2][1] == b""
+
+    def test_members_are_yielded_before_the_archive_ends(self):
+        """Test that a member is yielded before the rest of the archive is received."""
+        body = io.BytesIO()
+        with zipfile.ZipFile(body, "w") as archive:
+            archive.writestr("a.png", b"first")
+            archive.writestr("b.png", b"second" * 1000)
+        data = body.getvalue()
+        received = []
+
+        def chunks():
+            for chunk in chunked(data, 16):
+                received.append(len(chunk))
+                yield chunk
+
+        assert next(iter_zip_stream(chunks())) == ("a.png", b"first")
+        assert sum(received) < len(data) / 2
+
+    def test_corrupt_archives(self):
+        """Test that truncated archives and bad checksums are reported."""
+        body = io.BytesIO()
+        with zipfile.ZipFile(body, "w") as archive:
+            archive.writestr("a.png", b"content")
+        data = body.getvalue()
+
+        with pytest.raises(zipfile.BadZipFile, match="ends unexpectedly"):
+            list(iter_zip_stream([data[:40]]))
+        with pytest.raises(zipfile.BadZipFile, match="CRC"):
+            list(iter_zip_stream([data.replace(b"content", b"CONTENT", 1)]))
+
+
+class TestBatchFromArchive:
+    """Test suite for processing archive members in batches."""
+
+    def test_threads_mirror_archive_tree(self, tmp_path):
+        """Test that outputs are named after the member paths."""
+        client = NutrientClient(api_key="key", transport=InMemoryTransport(upper_handler))
+        runner = BatchRunner(
+            client,
+            Pipeline().add_step("flatten-annotations"),
+            output=tmp_path / "out",
+            use_processes=False,
+        )
+
+        with ZipSource(make_archive(tmp_path / "in.zip")) as source:
+            results = list(runner.run(source))
+
+        assert all(result.ok for result in results)
+        assert (tmp_path / "out" / "a.pdf").read_bytes() == b"FIRST"
+        assert (tmp_path / "out" / "docs" / "b.pdf").read_bytes() == b"SECOND"
+
+    @pytest.mark.skipif(
+        "fork" not in multiprocessing.get_all_start_methods(), reason="requires fork start method"
+    )
+    def test_process_pool(self, tmp_path):
+        """Test that worker processes read members from the archive themselves."""
+        client = NutrientClient(api_key="key", transport=InMemoryTransport(upper_handler))
+        runner = BatchRunner(
+            client,
+            Pipeline().add_step("flatten-annotations"),
+            output=tmp_path / "out",
+            max_workers=2,
+            mp_context=multiprocessing.get_context("fork"),
+        )
+
+        with ZipSource(make_archive(tmp_path / "in.zip"), pattern="*.pdf") as source:
+            results = list(runner.run(source))
+
+        assert all(result.ok for result in results)
+        assert (tmp_path / "out" / "docs" / "c.pdf").read_bytes() == MEMBERS["docs/c.pdf"].upper()
+
+    def test_outputs_into_archive(self, tmp_path):
+        """Test that outputs stream into an archive with a manifest entry per input."""
+
+        def handler(request):
+            _, content, _ = request["files"]["file"]
+            content = content if isinstance(content, bytes) else content.read()
+            if content == b"bad":
+                return InMemoryResponse(500, b"error")
+            return InMemoryResponse(200, content.upper())
+
+        for name, content in [("a.docx", b"a"), ("bad.docx", b"bad"), ("copy.docx", b"a")]:
+            (tmp_path / name).write_bytes(content)
+        client = NutrientClient(api_key="key", transport=InMemoryTransport(handler))
+        target = io.BytesIO()
+
+        with ZipSink(target) as sink:
+            runner = BatchRunner(
+                client,
+                Pipeline().add_step("flatten-annotations"),
+                use_processes=False,
+                max_workers=1,
+                deduplicate=True,
+                archive=sink,
+            )
+            inputs = [str(tmp_path / name) for name in ["a.docx", "bad.docx", "copy.docx"]]
+            results = list(runner.run(inputs))
+
+        assert {result.input: result.ok for result in results} == dict(
+            zip(inputs, [True, False, True])
+        )
+        with zipfile.ZipFile(target) as archive:
+            assert archive.namelist() == ["a.pdf", "manifest.json"]
+            assert archive.read("a.pdf") == b"A"
+            manifest = json.loads(archive.read("manifest.json"))
+        entries = {entry["input"]: entry for entry in manifest}
+        assert [entries[name]["output"] for name in inputs] == ["a.pdf", None, "a.pdf"]
+        assert "500" in entries[inputs[1]]["error"]
+        assert entries[inputs[2]]["duplicate_of"] == inputs[0]
+
+    def test_archive_excludes_output_directory(self, tmp_path):
+        """Test that an archive cannot be combined with an output directory."""
+        with ZipSink(io.BytesIO()) as sink, pytest.raises(ValueError, match="either"):
+            BatchRunner(None, Pipeline(), output=tmp_path, archive=sink)
@@ -0,0 +1,289 @@
+"""Unit tests for pipelines and the batch runner."""
+
+import json
+import multiprocessing
+import time
+
+import pytest
+
+from nutrient_dws.batch import BatchRunner
+from nutrient_dws.builder import Pipeline
+from nutrient_dws.client import NutrientClient
+from nutrient_dws.deadline import deadline_scope
+from nutrient_dws.exceptions import APIError, DeadlineExceededError
+from nutrient_dws.prefetch import Prefetcher
+from nutrient_dws.priority import current_priority, priority_scope
+from nutrient_dws.transport import InMemoryResponse, InMemoryTransport
+from nutrient_dws.writer import BackgroundWriter
+
+
+def upper_handler(request):
+    """Upper-case the uploaded file, failing for inputs starting with 'bad'."""
+    _, content, _ = request["files"]["file"]
+    if content.startswith(b"bad"):
+        return InMemoryResponse(500, b"server error")
+    return InMemoryResponse(200, content.upper())
+
+
+def deadline_handler(request):
+    """Report the remaining time of the request deadline, sleeping for 'slow' inputs."""
+    _, content, _ = request["files"]["file"]
+    deadline = request["deadline"]
+    body = b"none" if deadline is None else b"%.3f" % deadline.remaining()
+    if content == b"slow":
+        time.sleep(0.3)
+    return InMemoryResponse(200, body)
+
+
+class TestPipeline:
+    """Test suite for Pipeline."""
+
+    def test_build_applies_steps_and_output(self):
+        """Test that a pipeline produces the same instructions as the Builder."""
+        pipeline = (
+            Pipeline()
+            .add_step("rotate-pages", {"degrees": 90})
+            .add_step("ocr-pdf", {"language": "en"})
+            .set_output_options(metadata={"title": "Doc"})
+        )
+        builder = pipeline.build(None, b"doc")
+
+        assert builder._build_instructions() == {
+            "parts": [{"file": "file"}],
+            "actions": [{"type": "rotate", "rotateBy": 90}, {"type": "ocr", "language": "english"}],
+            "output": {"metadata": {"title": "Doc"}},
+        }
+
+    def test_dict_round_trip(self):
+        """Test that pipelines survive JSON serialization."""
+        pipeline = Pipeline([("watermark-pdf", {"text": "DRAFT"})], {"optimize": True})
+        restored = Pipeline.from_dict(json.loads(json.dumps(pipeline.to_dict())))
+        assert restored == pipeline
+
+    def test_from_dict_requires_tool(self):
+        """Test that a step without a tool is rejected."""
+        with pytest.raises(ValueError):
+            Pipeline.from_dict({"steps": [{"options": {}}]})
+
+    def test_builder_to_pipeline(self):
+        """Test that a Builder workflow converts to an equivalent pipeline."""
+        builder = (
+            NutrientClient(api_key="key")
+            .build("doc.pdf")
+            .add_step("rotate-pages", {"degrees": 180})
+            .set_output_options(optimize=True)
+        )
+        pipeline = builder.to_pipeline()
+
+        assert pipeline.steps == [("rotate-pages", {"degrees": 180})]
+        assert pipeline.output_options == {"optimize": True}
+
+
+class TestBatchRunnerThreads:
+    """Test suite for BatchRunner with a thread pool."""
+
+    def setup_method(self):
+        """Set up a client backed by an in-memory transport."""
+        self.transport = InMemoryTransport(upper_handler)
+        self.client = NutrientClient(api_key="key", transport=self.transport)
+        self.pipeline = Pipeline().add_step("flatten-annotations")
+
+    def test_results_and_errors_stream_back(self):
+        """Test that every input yields a result and errors are captured."""
+        runner = BatchRunner(self.client, self.pipeline, max_workers=2, use_processes=False)
+
+        results = list(runner.run([b"a", b"bad", b"c"]))
+
+        assert sorted(r.content for r in results if r.ok) == [b"A", b"C"]
+        failed = [r for r in results if not r.ok]
+        assert len(failed) == 1
+        assert isinstance(failed[0].error, APIError)
+        assert runner.metrics["succeeded"] == 2
+        assert runner.metrics["failed"] == 1
+        assert runner.metrics["bytes_in"] == 5
+
+    def test_outputs_written_to_directory(self, tmp_path):
+        """Test that outputs are named after path inputs."""
+        source = tmp_path / "in"
+        source.mkdir()
+        (source / "one.docx").write_bytes(b"one")
+        runner = BatchRunner(
+            self.client, self.pipeline, output=tmp_path / "out", use_processes=False
+        )
+
+        [result] = runner.run([str(source / "one.docx")])
+
+        assert result.ok
+        assert result.content is None
+        assert (tmp_path / "out" / "one.pdf").read_bytes() == b"ONE"
+
+    def test_output_directory_requires_paths(self, tmp_path):
+        """Test that byte inputs need a callable output."""
+        runner = BatchRunner(self.client, self.pipeline, output=tmp_path, use_processes=False)
+        [result] = runner.run([b"data"])
+        assert isinstance(result.error, ValueError)
+        assert self.transport.requests == []
+
+    def test_progress_callback(self):
+        """Test that progress is reported after each input."""
+        seen = []
+        runner = BatchRunner(
+            self.client,
+            self.pipeline,
+            use_processes=False,
+            on_progress=lambda metrics, result: seen.append(metrics["completed"]),
+        )
+        list(runner.run([b"a", b"b", b"c"]))
+        assert seen == [1, 2, 3]
+
+    def test_inputs_consumed_lazily(self):
+        """Test that no more than max_pending inputs are in flight."""
+        consumed = []
+
+        def inputs():
+            for index in range(10):
+                consumed.append(index)
+                yield b"x"
+
+        runner = BatchRunner(
+            self.client, self.pipeline, max_workers=1, max_pending=2, use_processes=False
+        )
+        results = runner.run(inputs())
+        next(results)
+        assert len(consumed) <= 3
+        assert len(list(results)) == 9
+
+    def test_background_writer(self, tmp_path):
+        """Test that outputs are written by the writer before inputs are reported."""
+        with BackgroundWriter(max_workers=2) as writer:
+            runner = BatchRunner(
+                self.client,
+                self.pipeline,
+                output=lambda item: str(tmp_path / f"{item.decode()}.pdf"),
+                use_processes=False,
+                deduplicate=True,
+                writer=writer,
+            )
+
+            results = {r.input: r for r in runner.run([b"a", b"b", b"a", b"bad"])}
+
+        assert (tmp_path / "a.pdf").read_bytes() == b"A"
+        assert (tmp_path / "b.pdf").read_bytes() == b"B"
+        assert results[b"b"].content is None
+        assert results[b"b"].write_time is not None
+        assert not results[b"bad"].ok
+        assert runner.metrics["write_queue_depth"] == 0
+        assert writer.metrics["writes"] == 2
+
+    def test_background_write_failure(self, tmp_path):
+        """Test that an input whose output cannot be written is reported as failed."""
+        (tmp_path / "file").write_bytes(b"")
+        with BackgroundWriter() as writer:
+            runner = BatchRunner(
+                self.client,
+                self.pipeline,
+                output=lambda item: str(tmp_path / "file" / "out.pdf"),
+                use_processes=False,
+                writer=writer,
+            )
+
+            [result] = runner.run([b"a"])
+
+        assert isinstance(result.error, OSError)
+        assert runner.metrics["failed"] == 1
+
+    def test_prefetched_inputs(self, tmp_path):
+        """Test that prefetched inputs upload their content under the original name."""
+        uploads = []
+
+        def handler(request):
+            name, content, _ = request["files"]["file"]
+            content = content if isinstance(content, bytes) else content.read()
+            uploads.append(name)
+            return InMemoryResponse(200, content.upper())
+
+        client = NutrientClient(api_key="key", transport=InMemoryTransport(handler))
+        (tmp_path / "one.docx").write_bytes(b"one")
+        runner = BatchRunner(
+            client,
+            self.pipeline,
+            output=tmp_path / "out",
+            use_processes=False,
+            prefetcher=Prefetcher(max_workers=2),
+        )
+
+        [result] = runner.run([str(tmp_path / "one.docx")])
+
+        assert result.input == str(tmp_path / "one.docx")
+        assert result.read_time is not None
+        assert uploads == ["one.docx"]
+        assert (tmp_path / "out" / "one.pdf").read_bytes() == b"ONE"
+        assert runner.metrics["read_stall_seconds"] >= 0
+
+    def test_scopes_apply_to_workers(self):
+        """Test that the deadline and priority of the calling thread reach the workers."""
+        lanes = []
+
+        def handler(request):
+            lanes.append(current_priority())
+            return deadline_handler(request)
+
+        client = NutrientClient(api_key="key", transport=InMemoryTransport(handler))
+        runner = BatchRunner(client, self.pipeline, max_workers=1, use_processes=False)
+
+        with deadline_scope(0.2), priority_scope("batch"):
+            results = {result.input: result for result in runner.run([b"slow", b"late"])}
+
+        assert 0 < float(results[b"slow"].content) <= 0.2
+        assert isinstance(results[b"late"].error, DeadlineExceededError)
+        assert lanes == ["batch"]
+
+    def test_run_deadline(self):
+        """Test that a deadline passed to run bounds the whole batch."""
+        client = NutrientClient(api_key="key", transport=InMemoryTransport(deadline_handler))
+        runner = BatchRunner(client, self.pipeline, max_workers=1, use_processes=False)
+
+        results = list(runner.run([b"a"], deadline=5))
+        assert 4 < float(results[0].content) <= 5
+
+        results = list(runner.run([b"a"]))
+        assert results[0].content == b"none"
+
+
+@pytest.mark.skipif(
+    "fork" not in multiprocessing.get_all_start_methods(), reason="requires fork start method"
+)
+class TestBatchRunnerProcesses:
+    """Test suite for BatchRunner with worker processes."""
+
+    def test_process_pool(self, tmp_path):
+        """Test that worker processes process inputs and write outputs."""
+        client = NutrientClient(api_key="key", transport=InMemoryTransport(upper_handler))
+        runner = BatchRunner(
+            client,
+            Pipeline().add_step("flatten-annotations"),
+            output=lambda item: str(tmp_path / f"{item.decode()}.pdf"),
+            max_workers=2,
+            mp_context=multiprocessing.get_context("fork"),
+        )
+
+        results = list(runner.run([b"a", b"b", b"bad"]))
+
+        assert runner.metrics["completed"] == 3
+        assert (tmp_path / "a.pdf").read_bytes() == b"A"
+        assert {r.worker for r in results}.isdisjoint({multiprocessing.current_process().pid})
+        assert [r.ok for r in results].count(False) == 1
+
+    def test_deadline_reaches_worker_processes(self):
+        """Test that the batch deadline is passed to worker processes."""
+        client = NutrientClient(api_key="key", transport=InMemoryTransport(deadline_handler))
+        runner = BatchRunner(
+            client,
+            Pipeline().add_step("flatten-annotations"),
+            max_workers=1,
+            mp_context=multiprocessing.get_context("fork"),
+        )
+
+        [result] = runner.run([b"a"], deadline=5)
+
+        assert 0 < float(result.content) <= 5
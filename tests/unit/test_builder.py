@@ -310,6 +310,88 @@ class TestBuilderFileHandling:
         assert "file" in builder._files
         assert builder._files["file"] == content
 
+    def test_repeated_file_parts_upload_once(self):
+        """Test that a file added several times is uploaded once."""
+        builder = BuildAPIWrapper(None, "cover.pdf")
+        builder._add_file_part("body.pdf", "file1")
+        builder._add_file_part("./cover.pdf", "file2")
+        builder._add_file_part(b"appendix", "file3")
+        builder._add_file_part(b"appendix", "file4")
+
+        assert list(builder._files) == ["file", "file1", "file3"]
+        assert builder._parts == [
+            {"file": "file"},
+            {"file": "file1"},
+            {"file": "file"},
+            {"file": "file3"},
+            {"file": "file3"},
+        ]
+
+
+class TestBuilderParts:
+    """Test suite for multi-part documents."""
+
+    def test_assemble_document_from_parts(self):
+        """Test that parts carry their own page ranges, options and actions."""
+        builder = (
+            BuildAPIWrapper(None)
+            .add_part(html=b"<h1>Report</h1>", assets=["assets/logo.png"])
+            .add_part(
+                "scan.pdf",
+                pages=(0, 9),
+                password="secret",
+                steps=[("ocr-pdf", {"language": "en"})],
+            )
+            .add_part(new_pages=1, layout={"size": "A4"})
+            .add_part("appendix.docx", content_type="application/msword", pages={"start": -2})
+            .add_step("watermark-pdf", {"text": "DRAFT"})
+        )
+
+        instructions = builder._build_instructions()
+
+        assert instructions["parts"] == [
+            {"html": "part0", "assets": ["logo.png"]},
+            {
+                "file": "part1",
+                "pages": {"start": 0, "end": 9},
+                "password": "secret",
+                "actions": [{"type": "ocr", "language": "english"}],
+            },
+            {"page": "new", "pageCount": 1, "layout": {"size": "A4"}},
+            {"file": "part3", "pages": {"start": -2}, "content_type": "application/msword"},
+        ]
+        assert list(builder._files) == ["part0", "logo.png", "part1", "part3"]
+        assert builder._action_types() == ["ocr", "watermark"]
+        assert builder._tool_name() == "ocr-pdf+watermark-pdf"
+
+    def test_input_file_is_first_part(self):
+        """Test that parts follow the input file and reuse its upload."""
+        builder = BuildAPIWrapper(None, "doc.pdf").add_part("doc.pdf", pages=(0, 0))
+
+        assert builder._parts == [
+            {"file": "file"},
+            {"file": "file", "pages": {"start": 0, "end": 0}},
+        ]
+        assert list(builder._files) == ["file"]
+
+    def test_part_requires_one_source(self):
+        """Test that a part must have exactly one source."""
+        builder = BuildAPIWrapper(None)
+
+        with pytest.raises(ValueError):
+            builder.add_part()
+        with pytest.raises(ValueError):
+            builder.add_part("doc.pdf", new_pages=2)
+        with pytest.raises(ValueError):
+            builder.add_part("doc.pdf", assets=["style.css"])
+
+    def test_conflicting_asset_names(self):
+        """Test that two different assets cannot share a file name."""
+        builder = BuildAPIWrapper(None).add_part(html=b"<p/>", assets=["a/logo.png"])
+
+        with pytest.raises(ValueError):
+            builder.add_part(html=b"<p/>", assets=["b/logo.png"])
+
 
 class TestBuilderExecute:
     """Test suite for BuildAPIWrapper execute method."""
@@ -393,6 +475,19 @@ class TestBuilderExecute:
         with pytest.raises(APIError):
             self.builder.execute()
 
+    @patch("nutrient_dws.builder.prepare_file_for_upload")
+    @patch("nutrient_dws.builder.save_file_output")
+    def test_execute_streams_to_writable_output(self, mock_save, mock_prepare):
+        """Test that a writable output is passed to the HTTP client to stream into."""
+        mock_prepare.return_value = ("file", ("test.pdf", b"content", "application/pdf"))
+        self.mock_client._http_client.post.return_value = b""
+        output = io.BytesIO()
+
+        assert self.builder.execute(output) is None
+
+        assert self.mock_client._http_client.post.call_args[1]["output"] is output
+        mock_save.assert_not_called()
+
 
 class TestBuilderEdgeCases:
     """Test edge cases and boundary conditions."""
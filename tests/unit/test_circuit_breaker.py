@@ -0,0 +1,237 @@
+"""Unit tests for the circuit breaker."""
+
+import pytest
+
+from nutrient_dws.circuit_breaker import CircuitBreaker, CircuitState
+from nutrient_dws.exceptions import (
+    APIError,
+    CircuitOpenError,
+    DeadlineExceededError,
+    NutrientTimeoutError,
+    ValidationError,
+)
+from nutrient_dws.http_client import HTTPClient
+from nutrient_dws.transport import InMemoryResponse, InMemoryTransport
+
+
+class FakeClock:
+    """Manually advanced clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_breaker(clock, **kwargs):
+    """Create a breaker with a small window and a fake clock."""
+    options = {"failure_rate_threshold": 0.5, "minimum_calls": 4, "window_size": 4}
+    options.update(kwargs)
+    return CircuitBreaker(recovery_timeout=10, clock=clock, **options)
+
+
+class TestCircuitBreakerStates:
+    """Test suite for circuit breaker state transitions."""
+
+    def test_starts_closed(self):
+        """Test that a new breaker admits requests."""
+        breaker = make_breaker(FakeClock())
+        assert breaker.state == CircuitState.CLOSED
+        breaker.before_call()
+
+    def test_opens_when_failure_rate_reached(self):
+        """Test that the circuit opens at the failure rate threshold."""
+        breaker = make_breaker(FakeClock())
+        for _ in range(2):
+            breaker.record_success()
+        breaker.record_failure()
+        assert breaker.state == CircuitState.CLOSED
+
+        breaker.record_failure()
+
+        assert breaker.state == CircuitState.OPEN
+        with pytest.raises(CircuitOpenError) as exc_info:
+            breaker.before_call()
+        assert exc_info.value.retry_after == 10
+
+    def test_needs_minimum_calls(self):
+        """Test that the rate is not evaluated below minimum_calls."""
+        breaker = make_breaker(FakeClock())
+        for _ in range(3):
+            breaker.record_failure()
+        assert breaker.state == CircuitState.CLOSED
+
+    def test_half_open_probe_closes_on_success(self):
+        """Test that a successful probe closes the circuit."""
+        clock = FakeClock()
+        breaker = make_breaker(clock)
+        for _ in range(4):
+            breaker.record_failure()
+
+        clock.now = 10
+        assert breaker.state == CircuitState.HALF_OPEN
+        breaker.before_call()
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()  # only one probe allowed
+
+        breaker.record_success()
+        assert breaker.state == CircuitState.CLOSED
+
+    def test_half_open_probe_reopens_on_failure(self):
+        """Test that a failed probe reopens the circuit."""
+        clock = FakeClock()
+        breaker = make_breaker(clock)
+        for _ in range(4):
+            breaker.record_failure()
+
+        clock.now = 10
+        breaker.before_call()
+        breaker.record_failure()
+
+        assert breaker.state == CircuitState.OPEN
+        assert breaker.metrics["opened"] == 2
+
+    def test_released_probe_can_be_retaken(self):
+        """Test that a probe given back without an outcome frees its slot."""
+        clock = FakeClock()
+        breaker = make_breaker(clock)
+        for _ in range(4):
+            breaker.record_failure()
+
+        clock.now = 10
+        breaker.before_call()
+        breaker.release_call()
+
+        breaker.before_call()
+        assert breaker.state == CircuitState.HALF_OPEN
+
+    def test_state_change_callbacks(self):
+        """Test that callbacks observe every transition."""
+        changes = []
+        clock = FakeClock()
+        breaker = make_breaker(clock, on_state_change=lambda old, new: changes.append((old, new)))
+        for _ in range(4):
+            breaker.record_failure()
+        clock.now = 10
+        breaker.before_call()
+        breaker.record_success()
+
+        assert changes == [
+            (CircuitState.CLOSED, CircuitState.OPEN),
+            (CircuitState.OPEN, CircuitState.HALF_OPEN),
+            (CircuitState.HALF_OPEN, CircuitState.CLOSED),
+        ]
+
+    def test_reset(self):
+        """Test that reset closes the circuit and clears the window."""
+        breaker = make_breaker(FakeClock())
+        for _ in range(4):
+            breaker.record_failure()
+        breaker.reset()
+        assert breaker.state == CircuitState.CLOSED
+        assert breaker.metrics["window_calls"] == 0
+
+    def test_invalid_threshold(self):
+        """Test that an invalid threshold is rejected."""
+        with pytest.raises(ValueError):
+            CircuitBreaker(failure_rate_threshold=0)
+
+
+class TestCircuitBreakerClassification:
+    """Test suite for failure classification."""
+
+    @pytest.mark.parametrize(
+        "error, expected",
+        [
+            (NutrientTimeoutError("timeout"), True),
+            (DeadlineExceededError("deadline"), False),
+            (APIError("connection"), True),
+            (APIError("server", status_code=503), True),
+            (APIError("throttled", status_code=429), True),
+            (APIError("bad request", status_code=400), False),
+            (ValidationError("invalid"), False),
+        ],
+    )
+    def test_is_failure(self, error, expected):
+        """Test which errors count as service failures."""
+        assert CircuitBreaker.is_failure(error) is expected
+
+
+class TestHTTPClientIntegration:
+    """Test suite for the circuit breaker inside HTTPClient."""
+
+    def test_fails_fast_after_outage(self):
+        """Test that requests are rejected without I/O once open."""
+        transport = InMemoryTransport(lambda request: InMemoryResponse(503, b"down"))
+        breaker = make_breaker(FakeClock())
+        client = HTTPClient(api_key="test-key", transport=transport, circuit_breaker=breaker)
+
+        for _ in range(4):
+            with pytest.raises(APIError):
+                client.post("/build")
+
+        with pytest.raises(CircuitOpenError):
+            client.post("/build")
+
+        assert len(transport.requests) == 4
+        assert breaker.metrics["rejected"] == 1
+
+    def test_client_errors_do_not_open_circuit(self):
+        """Test that 4xx responses keep the circuit closed."""
+        transport = InMemoryTransport(lambda request: InMemoryResponse(400, b"bad"))
+        breaker = make_breaker(FakeClock())
+        client = HTTPClient(api_key="test-key", transport=transport, circuit_breaker=breaker)
+
+        for _ in range(5):
+            with pytest.raises(APIError):
+                client.post("/build")
+
+        assert breaker.state == CircuitState.CLOSED
+
+    def test_deadline_expiries_do_not_open_circuit(self):
+        """Test that callers running out of time leave the circuit closed for everyone."""
+
+        def handler(request):
+            if request["deadline"] is not None:
+                raise DeadlineExceededError("Deadline exceeded before request could complete")
+            return InMemoryResponse(200, b"ok")
+
+        breaker = make_breaker(FakeClock(), minimum_calls=2)
+        client = HTTPClient(
+            api_key="test-key", transport=InMemoryTransport(handler), circuit_breaker=breaker
+        )
+
+        for _ in range(4):
+            with pytest.raises(DeadlineExceededError):
+                client.post("/build", deadline=5)
+
+        assert breaker.state == CircuitState.CLOSED
+        assert breaker.metrics["window_calls"] == 0
+        assert client.post("/build") == b"ok"
+
+    def test_interrupted_probe_is_released(self):
+        """Test that a probe interrupted by KeyboardInterrupt does not block later probes."""
+        outcomes = [InMemoryResponse(503, b"down")] * 4 + [KeyboardInterrupt()]
+
+        def handler(request):
+            outcome = outcomes.pop(0) if outcomes else InMemoryResponse(200, b"ok")
+            if isinstance(outcome, BaseException):
+                raise outcome
+            return outcome
+
+        clock = FakeClock()
+        breaker = make_breaker(clock)
+        client = HTTPClient(
+            api_key="test-key", transport=InMemoryTransport(handler), circuit_breaker=breaker
+        )
+        for _ in range(4):
+            with pytest.raises(APIError):
+                client.post("/build")
+
+        clock.now = 10
+        with pytest.raises(KeyboardInterrupt):
+            client.post("/build")
+
+        assert client.post("/build") == b"ok"
+        assert breaker.state == CircuitState.CLOSED
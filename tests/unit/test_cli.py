@@ -0,0 +1,367 @@
+"""Unit tests for the nutrient-dws command-line interface."""
+
+import io
+import json
+import time
+import zipfile
+from unittest.mock import patch
+
+import pytest
+
+from nutrient_dws import cli
+from nutrient_dws.batch import BatchRunner
+from nutrient_dws.builder import Pipeline
+from nutrient_dws.client import NutrientClient
+from nutrient_dws.transport import InMemoryResponse, InMemoryTransport
+
+
+def echo_handler(request):
+    """Echo the instructions for single inputs and count parts for merges."""
+    instructions = json.loads(request["data"]["instructions"])
+    if len(instructions["parts"]) > 1:
+        return InMemoryResponse(200, f"merged {len(instructions['parts'])}".encode())
+    _, content, _ = request["files"]["file"]
+    content = content if isinstance(content, bytes) else content.read()
+    if content.startswith(b"bad"):
+        return InMemoryResponse(500, b"error")
+    return InMemoryResponse(200, json.dumps(instructions["actions"]).encode())
+
+
+class TestCLI:
+    """Test suite for the CLI commands."""
+
+    @pytest.fixture(autouse=True)
+    def client(self):
+        """Route CLI clients to an in-memory transport."""
+        self.transport = InMemoryTransport(echo_handler)
+
+        def create_client(api_key=None, timeout=300):
+            return NutrientClient(api_key="key", timeout=timeout, transport=self.transport)
+
+        with patch.object(cli, "NutrientClient", create_client):
+            yield
+
+    def run(self, capsys, *argv):
+        """Run the CLI and return its exit code and JSON summary."""
+        code = cli.main(list(argv))
+        out = capsys.readouterr().out
+        return code, json.loads(out) if out else None
+
+    def test_ocr_directory_mirrors_tree(self, tmp_path, capsys):
+        """Test that directory inputs are processed recursively into a mirrored tree."""
+        (tmp_path / "in" / "sub").mkdir(parents=True)
+        (tmp_path / "in" / "a.pdf").write_bytes(b"a")
+        (tmp_path / "in" / "sub" / "b.pdf").write_bytes(b"b")
+        out = tmp_path / "out"
+
+        code, summary = self.run(
+            capsys, "ocr", str(tmp_path / "in"), "-o", str(out), "--threads", "--language", "deu"
+        )
+
+        assert code == 0
+        assert summary["succeeded"] == 2
+        assert set(summary["latency_seconds"]) == {"p50", "p90", "p99", "max"}
+        assert json.loads((out / "sub" / "b.pdf").read_bytes()) == [
+            {"type": "ocr", "language": "deu"}
+        ]
+        assert (out / "a.pdf").exists()
+
+    def test_name_template_and_glob(self, tmp_path, capsys):
+        """Test glob inputs and the output naming template."""
+        (tmp_path / "x.docx").write_bytes(b"x")
+        (tmp_path / "y.txt").write_bytes(b"y")
+        out = tmp_path / "out"
+
+        code, _ = self.run(
+            capsys,
+            "rotate",
+            "--degrees",
+            "90",
+            str(tmp_path / "*.docx"),
+            "-o",
+            str(out),
+            "--threads",
+            "--name-template",
+            "{stem}-{tool}.pdf",
+        )
+
+        assert code == 0
+        assert [path.name for path in out.iterdir()] == ["x-rotate-pages.pdf"]
+
+    def test_pipeline_file(self, tmp_path, capsys):
+        """Test that `run` applies a JSON pipeline."""
+        pipeline = (
+            Pipeline().add_step("flatten-annotations").add_step("rotate-pages", {"degrees": 180})
+        )
+        (tmp_path / "pipeline.json").write_text(json.dumps(pipeline.to_dict()))
+        (tmp_path / "doc.pdf").write_bytes(b"doc")
+
+        code, _ = self.run(
+            capsys,
+            "run",
+            "--pipeline",
+            str(tmp_path / "pipeline.json"),
+            str(tmp_path / "doc.pdf"),
+            "-o",
+            str(tmp_path / "out"),
+            "--threads",
+        )
+
+        assert code == 0
+        actions = json.loads((tmp_path / "out" / "doc.pdf").read_bytes())
+        assert [action["type"] for action in actions] == ["flatten", "rotate"]
+
+    def test_yaml_pipeline(self, tmp_path):
+        """Test that YAML pipelines are loaded when PyYAML is available."""
+        pytest.importorskip("yaml")
+        (tmp_path / "pipeline.yaml").write_text(
+            "steps:\n  - tool: ocr-pdf\n    options: {language: english}\n"
+        )
+        pipeline = cli.load_pipeline(str(tmp_path / "pipeline.yaml"))
+        assert pipeline.steps == [("ocr-pdf", {"language": "english"})]
+
+    def test_failures_set_exit_code(self, tmp_path, capsys):
+        """Test that failed inputs are summarized and return exit code 1."""
+        (tmp_path / "good.pdf").write_bytes(b"good")
+        (tmp_path / "bad.pdf").write_bytes(b"bad")
+
+        code, summary = self.run(
+            capsys,
+            "flatten",
+            str(tmp_path / "good.pdf"),
+            str(tmp_path / "bad.pdf"),
+            "-o",
+            str(tmp_path / "out"),
+            "--threads",
+        )
+
+        assert code == 1
+        assert summary["failed"] == 1
+        assert summary["failures"][0]["input"].endswith("bad.pdf")
+
+    def test_reported_failures_are_capped(self, tmp_path, capsys):
+        """Test that only the first failures are listed while all are counted."""
+        for name in ("bad1", "bad2", "good"):
+            (tmp_path / f"{name}.pdf").write_bytes(name.encode())
+
+        with patch.object(cli, "MAX_REPORTED_FAILURES", 1):
+            code, summary = self.run(
+                capsys, "flatten", str(tmp_path), "-o", str(tmp_path / "out"), "--threads"
+            )
+
+        assert code == 1
+        assert summary["processed"] == 3
+        assert summary["failed"] == 2
+        assert len(summary["failures"]) == 1
+
+    def test_resume_with_journal(self, tmp_path, capsys):
+        """Test that a re-run with the same journal skips completed inputs."""
+        (tmp_path / "a.pdf").write_bytes(b"a")
+        argv = [
+            "flatten",
+            str(tmp_path / "a.pdf"),
+            "-o",
+            str(tmp_path / "out"),
+            "--threads",
+            "--journal",
+            str(tmp_path / "journal.db"),
+        ]
+
+        self.run(capsys, *argv)
+        code, summary = self.run(capsys, *argv)
+
+        assert code == 0
+        assert summary["skipped"] == 1
+        assert len(self.transport.requests) == 1
+
+    def test_fsync_outputs(self, tmp_path, capsys):
+        """Test that --fsync flushes every output to disk."""
+        (tmp_path / "a.pdf").write_bytes(b"a")
+        (tmp_path / "b.pdf").write_bytes(b"b")
+
+        with patch("os.fsync") as mock_fsync:
+            code, summary = self.run(
+                capsys,
+                "flatten",
+                str(tmp_path / "a.pdf"),
+                str(tmp_path / "b.pdf"),
+                "-o",
+                str(tmp_path / "out"),
+                "--threads",
+                "--fsync",
+            )
+
+        assert code == 0
+        assert summary["succeeded"] == 2
+        assert mock_fsync.call_count >= 2
+
+    def test_background_reads_and_writes(self, tmp_path, capsys):
+        """Test that --prefetch and --write-workers report read and write times."""
+        (tmp_path / "a.pdf").write_bytes(b"a")
+
+        code, summary = self.run(
+            capsys,
+            "flatten",
+            str(tmp_path / "a.pdf"),
+            "-o",
+            str(tmp_path / "out"),
+            "--threads",
+            "--write-workers",
+            "2",
+            "--prefetch",
+            "2",
+        )
+
+        assert code == 0
+        assert set(summary["write_seconds"]) == {"mean", "max"}
+        assert set(summary["read_seconds"]) == {"mean", "max", "stalled"}
+        assert (tmp_path / "out" / "a.pdf").exists()
+
+    def test_zip_archive_input(self, tmp_path, capsys):
+        """Test that zip archives are expanded into their matching members."""
+        with zipfile.ZipFile(tmp_path / "in.zip", "w") as archive:
+            archive.writestr("sub/a.pdf", b"a")
+            archive.writestr("notes.txt", b"n")
+
+        code, summary = self.run(
+            capsys,
+            "flatten",
+            str(tmp_path / "in.zip"),
+            "-o",
+            str(tmp_path / "out"),
+            "--pattern",
+            "*.pdf",
+        )
+
+        assert code == 0
+        assert summary["succeeded"] == 1
+        assert (tmp_path / "out" / "sub" / "a.pdf").exists()
+
+    def test_zip_archive_output(self, tmp_path, capsys):
+        """Test that a .zip output collects the outputs and a manifest."""
+        (tmp_path / "in").mkdir()
+        (tmp_path / "in" / "a.pdf").write_bytes(b"a")
+        (tmp_path / "in" / "bad.pdf").write_bytes(b"bad")
+
+        code, summary = self.run(
+            capsys, "flatten", str(tmp_path / "in"), "-o", str(tmp_path / "out.zip"), "--threads"
+        )
+
+        assert code == 1
+        assert summary["failed"] == 1
+        with zipfile.ZipFile(tmp_path / "out.zip") as archive:
+            assert archive.namelist() == ["a.pdf", "manifest.json"]
+            assert len(json.loads(archive.read("manifest.json"))) == 2
+
+    def test_zip_archive_to_stdout(self, tmp_path, capsysbinary):
+        """Test that -o - streams the archive to stdout and the summary to stderr."""
+        (tmp_path / "a.pdf").write_bytes(b"a")
+
+        code = cli.main(["flatten", str(tmp_path / "a.pdf"), "-o", "-", "--threads"])
+
+        captured = capsysbinary.readouterr()
+        assert code == 0
+        with zipfile.ZipFile(io.BytesIO(captured.out)) as archive:
+            assert archive.namelist() == ["a.pdf", "manifest.json"]
+        assert json.loads(captured.err)["succeeded"] == 1
+
+    def test_merge(self, tmp_path, capsys):
+        """Test that merge sends all inputs in one request."""
+        for name in ("a.pdf", "b.pdf"):
+            (tmp_path / name).write_bytes(name.encode())
+
+        code, summary = self.run(
+            capsys,
+            "merge",
+            str(tmp_path / "a.pdf"),
+            str(tmp_path / "b.pdf"),
+            "-o",
+            str(tmp_path / "merged.pdf"),
+        )
+
+        assert code == 0
+        assert summary["processed"] == 2
+        assert (tmp_path / "merged.pdf").read_bytes() == b"merged 2"
+
+    def test_merge_to_stdout(self, tmp_path, capsysbinary):
+        """Test that merge with output - streams the PDF to stdout and the summary to stderr."""
+        for name in ("a.pdf", "b.pdf"):
+            (tmp_path / name).write_bytes(name.encode())
+
+        code = cli.main(["merge", str(tmp_path / "a.pdf"), str(tmp_path / "b.pdf"), "-o", "-"])
+        captured = capsysbinary.readouterr()
+
+        assert code == 0
+        assert captured.out == b"merged 2"
+        assert json.loads(captured.err)["processed"] == 2
+
+    def test_archive_closed_when_setup_fails(self, tmp_path, capsys):
+        """Test that the output archive is closed if the runner cannot be created."""
+        (tmp_path / "a.pdf").write_bytes(b"a")
+
+        code = cli.main(
+            [
+                "flatten",
+                str(tmp_path / "a.pdf"),
+                "-o",
+                str(tmp_path / "out.zip"),
+                "--threads",
+                "--rate-limit",
+                "0",
+            ]
+        )
+
+        assert code == 2
+        assert "rate_limit must be positive" in capsys.readouterr().err
+        assert zipfile.is_zipfile(tmp_path / "out.zip")
+
+    def test_invalid_pipeline_file(self, tmp_path, capsys):
+        """Test that an unreadable pipeline file is a usage error."""
+        (tmp_path / "pipeline.json").write_text("[1, 2]")
+        (tmp_path / "doc.pdf").write_bytes(b"doc")
+        code = cli.main(
+            [
+                "run",
+                "--pipeline",
+                str(tmp_path / "pipeline.json"),
+                str(tmp_path / "doc.pdf"),
+                "-o",
+                str(tmp_path),
+            ]
+        )
+        assert code == 2
+        assert "must contain a mapping" in capsys.readouterr().err
+
+
+class TestHelpers:
+    """Test suite for CLI helpers."""
+
+    def test_percentile(self):
+        """Test nearest-rank percentiles."""
+        values = [float(value) for value in range(1, 101)]
+        assert cli.percentile(values, 50) == 50.0
+        assert cli.percentile(values, 99) == 99.0
+        assert cli.percentile([], 50) == 0.0
+
+    def test_expand_inputs_walks_directories_lazily(self, tmp_path):
+        """Test that directories are walked in sorted order as the inputs are consumed."""
+        for name in ("b/x.pdf", "a.pdf", "b.pdf", "b/sub/y.pdf", "c/z.txt"):
+            (tmp_path / name).parent.mkdir(parents=True, exist_ok=True)
+            (tmp_path / name).write_bytes(b"doc")
+
+        inputs = cli.expand_inputs([str(tmp_path)], "*.pdf")
+        assert next(inputs) == str(tmp_path / "a.pdf")
+        # Directories not reached yet are listed when the walk gets there
+        (tmp_path / "c" / "late.pdf").write_bytes(b"doc")
+
+        assert list(inputs) == [
+            str(tmp_path / name) for name in ("b/sub/y.pdf", "b/x.pdf", "b.pdf", "c/late.pdf")
+        ]
+
+    def test_rate_limit_spaces_requests(self):
+        """Test that the batch rate limit spaces out request starts."""
+        client = NutrientClient(api_key="key", transport=InMemoryTransport(echo_handler))
+        runner = BatchRunner(client, Pipeline(), max_workers=4, use_processes=False, rate_limit=50)
+        started = time.monotonic()
+        list(runner.run([b"a", b"b", b"c", b"d", b"e"]))
+        assert time.monotonic() - started >= 4 / 50 * 0.9
@@ -0,0 +1,262 @@
+"""Unit tests for request coalescing and batch deduplication."""
+
+import io
+import threading
+import time
+
+import pytest
+
+from nutrient_dws.batch import BatchRunner
+from nutrient_dws.builder import Pipeline
+from nutrient_dws.client import NutrientClient
+from nutrient_dws.coalescing import SingleFlight, content_digest, request_key
+from nutrient_dws.deadline import Deadline
+from nutrient_dws.exceptions import APIError, DeadlineExceededError
+from nutrient_dws.http_client import capture_responses
+from nutrient_dws.transport import InMemoryResponse, InMemoryTransport
+
+
+def wait_for(condition, timeout=5.0):
+    """Poll until ``condition()`` is true."""
+    give_up = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < give_up, "condition not reached"
+        time.sleep(0.005)
+
+
+class Unseekable:
+    """Readable stream that cannot be rewound."""
+
+    def read(self, size=-1):
+        return b""
+
+
+class TestDigests:
+    """Test suite for content digests and request keys."""
+
+    def test_content_digest_of_inputs(self, tmp_path):
+        """Test that paths, bytes and file objects with equal content match."""
+        path = tmp_path / "doc.pdf"
+        path.write_bytes(b"content")
+        stream = io.BytesIO(b"content")
+
+        assert content_digest(str(path)) == content_digest(b"content")
+        assert content_digest(stream) == content_digest(b"content")
+        assert stream.tell() == 0
+
+    def test_content_digest_of_unseekable_stream(self):
+        """Test that streams which cannot be rewound are not hashed."""
+        assert content_digest(Unseekable()) is None
+
+    def test_request_key(self):
+        """Test that keys depend on file contents and instructions."""
+        files = {"file": ("document", b"content", "application/octet-stream")}
+        key = request_key("/build", files, {"instructions": "{}"})
+
+        assert key == request_key("/build", dict(files), {"instructions": "{}"})
+        assert key != request_key("/build", files, {"instructions": '{"a": 1}'})
+        assert key != request_key(
+            "/build", {"file": ("document", b"other", "application/octet-stream")}, {}
+        )
+        assert request_key("/build", {"file": ("document", Unseekable(), "")}, {}) is None
+
+
+class TestSingleFlight:
+    """Test suite for SingleFlight."""
+
+    def test_concurrent_calls_share_result(self):
+        """Test that a call arriving while an identical one runs shares its result."""
+        flight = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def slow():
+            calls.append(1)
+            release.wait(5)
+            return "result"
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(flight.do("key", slow)))
+        leader.start()
+        wait_for(lambda: flight.metrics["in_flight"] == 1)
+        follower = threading.Thread(target=lambda: results.append(flight.do("key", slow)))
+        follower.start()
+        wait_for(lambda: flight.metrics["shared"] == 1)
+        release.set()
+        leader.join(5)
+        follower.join(5)
+
+        assert len(calls) == 1
+        assert sorted(results) == [("result", False), ("result", True)]
+        assert flight.metrics == {"executed": 1, "shared": 1, "in_flight": 0}
+
+    def test_sequential_calls_run_again(self):
+        """Test that nothing is cached after a call finishes."""
+        flight = SingleFlight()
+
+        assert flight.do("key", lambda: 1) == (1, False)
+        assert flight.do("key", lambda: 2) == (2, False)
+
+    def test_exception_is_shared(self):
+        """Test that waiting callers receive the leader's exception."""
+        flight = SingleFlight()
+        release = threading.Event()
+        errors = []
+
+        def failing():
+            release.wait(5)
+            raise APIError("boom")
+
+        def call():
+            try:
+                flight.do("key", failing)
+            except APIError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=call) for _ in range(2)]
+        threads[0].start()
+        wait_for(lambda: flight.metrics["in_flight"] == 1)
+        threads[1].start()
+        wait_for(lambda: flight.metrics["shared"] == 1)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        assert len(errors) == 2
+
+    def test_deadline_while_waiting(self):
+        """Test that a waiting caller gives up at its deadline."""
+        flight = SingleFlight()
+        release = threading.Event()
+        leader = threading.Thread(target=flight.do, args=("key", lambda: release.wait(5)))
+        leader.start()
+        wait_for(lambda: flight.metrics["in_flight"] == 1)
+
+        with pytest.raises(DeadlineExceededError):
+            flight.do("key", lambda: None, Deadline(0.05))
+        release.set()
+        leader.join(5)
+
+
+class TestClientSingleFlight:
+    """Test suite for coalescing identical client calls."""
+
+    def test_identical_executes_send_one_request(self):
+        """Test that concurrent identical workflows share one API request."""
+        release = threading.Event()
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            release.wait(5)
+            return InMemoryResponse(200, b"%PDF", headers={"x-pspdfkit-request-cost": "1"})
+
+        flight = SingleFlight()
+        client = NutrientClient(
+            api_key="key", transport=InMemoryTransport(handler), single_flight=flight
+        )
+        results = []
+        responses = []
+
+        def convert():
+            with capture_responses() as captured:
+                results.append(client.build(b"same").add_step("flatten-annotations").execute())
+            responses.append(len(captured))
+
+        threads = [threading.Thread(target=convert) for _ in range(2)]
+        threads[0].start()
+        wait_for(lambda: flight.metrics["in_flight"] == 1)
+        threads[1].start()
+        wait_for(lambda: flight.metrics["shared"] == 1)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        assert len(requests) == 1
+        assert results == [b"%PDF", b"%PDF"]
+        assert sorted(responses) == [0, 1]
+
+
+class TestBatchDeduplication:
+    """Test suite for BatchRunner deduplication."""
+
+    def test_duplicates_processed_once(self, tmp_path):
+        """Test that duplicate inputs are fanned out from one request."""
+        uploads = []
+
+        def handler(request):
+            _, content, _ = request["files"]["file"]
+            uploads.append(content)
+            return InMemoryResponse(200, content.upper())
+
+        inputs = []
+        for name, content in [("a", b"same"), ("b", b"other"), ("c", b"same")]:
+            path = tmp_path / f"{name}.docx"
+            path.write_bytes(content)
+            inputs.append(str(path))
+        client = NutrientClient(api_key="key", transport=InMemoryTransport(handler))
+        runner = BatchRunner(
+            client,
+            Pipeline().add_step("flatten-annotations"),
+            output=str(tmp_path / "out"),
+            max_workers=1,
+            use_processes=False,
+            deduplicate=True,
+        )
+
+        results = {result.input: result for result in runner.run(inputs)}
+
+        assert sorted(uploads) == [b"other", b"same"]
+        assert (tmp_path / "out" / "c.pdf").read_bytes() == b"SAME"
+        assert results[inputs[2]].duplicate_of == inputs[0]
+        assert runner.metrics["deduplicated"] == 1
+        assert runner.metrics["succeeded"] == 3
+
+    def test_failed_leader_fails_duplicates(self):
+        """Test that duplicates share the error of the input they duplicate."""
+        client = NutrientClient(
+            api_key="key",
+            transport=InMemoryTransport(lambda request: InMemoryResponse(500, b"error")),
+        )
+        runner = BatchRunner(
+            client,
+            Pipeline().add_step("flatten-annotations"),
+            max_workers=1,
+            use_processes=False,
+            deduplicate=True,
+        )
+
+        results = list(runner.run([b"same", b"same"]))
+
+        assert [result.ok for result in results] == [False, False]
+        assert runner.metrics["deduplicated"] == 1
+
+    def test_returned_outputs_released_after_last_duplicate(self):
+        """Test that an output held for duplicates is released once the last one is served."""
+        client = NutrientClient(
+            api_key="key",
+            transport=InMemoryTransport(
+                lambda request: InMemoryResponse(200, request["files"]["file"][1].upper())
+            ),
+        )
+        runner = BatchRunner(
+            client,
+            Pipeline().add_step("flatten-annotations"),
+            max_workers=1,
+            max_pending=1,
+            use_processes=False,
+            deduplicate=True,
+        )
+        leaders = []
+
+        results = []
+        for result in runner.run([b"same", b"other", b"same", b"last"]):
+            results.append(result)
+            leaders.append(set(runner._leaders))
+
+        assert [result.content for result in results] == [b"SAME", b"OTHER", b"SAME", b"LAST"]
+        assert results[2].duplicate_of == b"same"
+        # "other" has no duplicates, so its output is gone before the next input arrives
+        assert content_digest(b"other") not in leaders[2]
+        assert content_digest(b"same") in leaders[2]
+        assert runner._leaders == {}
@@ -0,0 +1,150 @@
+"""Unit tests for timeouts and deadline propagation."""
+
+from unittest.mock import Mock
+
+import pytest
+
+from nutrient_dws.client import NutrientClient
+from nutrient_dws.deadline import Deadline, current_deadline, deadline_scope
+from nutrient_dws.exceptions import DeadlineExceededError, NutrientTimeoutError
+from nutrient_dws.http_client import HTTPClient
+from nutrient_dws.transport import (
+    InMemoryResponse,
+    InMemoryTransport,
+    _DeadlineRetry,
+    _request_deadline,
+)
+
+
+class FakeClock:
+    """Manually advanced clock."""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestDeadline:
+    """Test suite for the Deadline value object."""
+
+    def test_remaining_and_expiry(self):
+        """Test remaining time and expiry with a fake clock."""
+        clock = FakeClock()
+        deadline = Deadline(5, clock=clock)
+        assert deadline.remaining() == 5
+        clock.now += 6
+        assert deadline.remaining() == 0
+        assert deadline.expired
+        with pytest.raises(DeadlineExceededError):
+            deadline.check()
+
+    def test_coerce(self):
+        """Test conversion from seconds and passthrough of deadlines."""
+        deadline = Deadline(1)
+        assert Deadline.coerce(None) is None
+        assert Deadline.coerce(deadline) is deadline
+        assert isinstance(Deadline.coerce(3), Deadline)
+
+    def test_deadline_exceeded_is_timeout(self):
+        """Test that callers catching timeouts also catch deadline errors."""
+        assert issubclass(DeadlineExceededError, NutrientTimeoutError)
+
+    def test_scope_only_shortens(self):
+        """Test that nested scopes keep the earlier deadline."""
+        with deadline_scope(10) as outer:
+            with deadline_scope(60) as inner:
+                assert inner is outer
+            with deadline_scope(1) as inner:
+                assert inner is not outer
+                assert current_deadline() is inner
+            assert current_deadline() is outer
+        assert current_deadline() is None
+
+
+class TestHTTPClientTimeouts:
+    """Test suite for connect/read timeouts and deadlines in HTTPClient."""
+
+    def setup_method(self):
+        """Set up an HTTP client backed by an in-memory transport."""
+        self.transport = InMemoryTransport(lambda request: InMemoryResponse(200, b"ok"))
+        self.client = HTTPClient(api_key="key", timeout=300, transport=self.transport)
+
+    def test_connect_and_read_timeouts(self):
+        """Test that connect and read timeouts are sent separately."""
+        self.client.post("/build")
+        assert self.transport.requests[0]["timeout"] == (10.0, 300.0)
+
+    def test_custom_connect_timeout(self):
+        """Test that the connect timeout is configurable."""
+        client = HTTPClient(api_key="key", connect_timeout=2, transport=self.transport)
+        client.post("/build")
+        assert self.transport.requests[0]["timeout"] == (2.0, 300.0)
+
+    def test_deadline_caps_timeouts(self):
+        """Test that per-attempt timeouts never exceed the time left."""
+        self.client.post("/build", deadline=5)
+        connect, read = self.transport.requests[0]["timeout"]
+        assert 0 < connect <= 5
+        assert 0 < read <= 5
+        assert isinstance(self.transport.requests[0]["deadline"], Deadline)
+
+    def test_expired_deadline_fails_without_request(self):
+        """Test that late work is dropped before any I/O."""
+        with pytest.raises(DeadlineExceededError):
+            self.client.post("/build", deadline=0)
+        assert self.transport.requests == []
+
+    def test_total_timeout_applies_deadline(self):
+        """Test that total_timeout becomes the default call deadline."""
+        client = HTTPClient(api_key="key", total_timeout=30, transport=self.transport)
+        client.post("/build")
+        assert self.transport.requests[0]["deadline"].remaining() <= 30
+
+    def test_scope_deadline_applies(self):
+        """Test that deadline_scope reaches calls made inside it."""
+        with deadline_scope(7):
+            self.client.post("/build")
+        assert self.transport.requests[0]["deadline"].remaining() <= 7
+
+
+class TestDeadlineRetry:
+    """Test suite for the deadline-aware urllib3 retry policy."""
+
+    def test_retry_skipped_when_backoff_exceeds_deadline(self):
+        """Test that retries are abandoned instead of sleeping past the deadline."""
+        retry = _DeadlineRetry(total=3, backoff_factor=10)
+        retry.get_backoff_time = Mock(return_value=10.0)
+        token = _request_deadline.set(Deadline(1))
+        try:
+            with pytest.raises(DeadlineExceededError):
+                retry.sleep()
+        finally:
+            _request_deadline.reset(token)
+
+    def test_retry_sleeps_without_deadline(self):
+        """Test that the policy behaves like urllib3 without a deadline."""
+        retry = _DeadlineRetry(total=3, backoff_factor=0)
+        retry.sleep()
+
+
+class TestClientDeadline:
+    """Test suite for deadlines on the public client API."""
+
+    def setup_method(self):
+        """Set up a client backed by an in-memory transport."""
+        self.transport = InMemoryTransport(lambda request: InMemoryResponse(200, b"ok"))
+        self.client = NutrientClient(api_key="key", transport=self.transport)
+
+    def test_builder_execute_deadline(self):
+        """Test that execute() forwards its deadline."""
+        self.client.build(b"doc").add_step("flatten-annotations").execute(deadline=3)
+        assert self.transport.requests[0]["deadline"].remaining() <= 3
+
+    def test_direct_api_honors_client_deadline(self):
+        """Test that Direct API calls inside client.deadline() are bounded."""
+        with self.client.deadline(4):
+            self.client.rotate_pages(b"doc", degrees=90)
+            self.client.merge_pdfs([b"a", b"b"])
+        assert all(request["deadline"].remaining() <= 4 for request in self.transport.requests)
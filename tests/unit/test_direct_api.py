@@ -265,6 +265,26 @@ class TestDirectAPIMethods:
         assert json_data["parts"][2] == {"file": "file2"}
         assert json_data["actions"] == []
 
+    @patch("nutrient_dws.file_handler.prepare_file_for_upload")
+    def test_merge_pdfs_uploads_repeated_files_once(self, mock_prepare):
+        """Test that merge_pdfs uploads a repeated file once and reuses its part."""
+        mock_prepare.side_effect = [
+            ("file0", ("cover.pdf", b"cover", "application/pdf")),
+            ("file1", ("body.pdf", b"body", "application/pdf")),
+        ]
+        self.client._http_client.post = Mock(return_value=self.mock_response)  # type: ignore
+
+        self.client.merge_pdfs(["cover.pdf", "body.pdf", "cover.pdf"])
+
+        assert mock_prepare.call_count == 2
+        call_args = self.client._http_client.post.call_args
+        assert list(call_args[1]["files"]) == ["file0", "file1"]
+        assert call_args[1]["json_data"]["parts"] == [
+            {"file": "file0"},
+            {"file": "file1"},
+            {"file": "file0"},
+        ]
+
 
 class TestDirectAPIFileTypes:
     """Test Direct API methods with different file input types."""
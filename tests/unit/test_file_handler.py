@@ -11,9 +11,13 @@ import pytest
 
 from nutrient_dws.file_handler import (
     DEFAULT_CHUNK_SIZE,
+    copy_file_output,
+    fsync_outputs,
     get_file_size,
+    is_writable,
     prepare_file_for_upload,
     prepare_file_input,
+    save_chunked_output,
     save_file_output,
     stream_file_content,
 )
@@ -283,6 +287,101 @@ class TestSaveFileOutput:
             saved_content = Path(output_path).read_bytes()
             assert saved_content == new_content
 
+    def test_save_file_output_leaves_no_temporary_files(self):
+        """Test that the atomic write renames its temporary file into place."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            save_file_output(b"content", os.path.join(temp_dir, "output.pdf"))
+            assert os.listdir(temp_dir) == ["output.pdf"]
+
+    def test_copy_file_output(self):
+        """Test that an output is copied into place, creating directories."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            source = os.path.join(temp_dir, "source.pdf")
+            save_file_output(b"content", source)
+            copy_file_output(source, os.path.join(temp_dir, "copies", "copy.pdf"))
+
+            assert Path(temp_dir, "copies", "copy.pdf").read_bytes() == b"content"
+            assert os.listdir(os.path.join(temp_dir, "copies")) == ["copy.pdf"]
+
+    def test_save_file_output_to_writable(self):
+        """Test that a writable object receives the content and stays open."""
+        output = io.BytesIO()
+
+        save_file_output(b"content", output)
+
+        assert output.getvalue() == b"content"
+        assert not output.closed
+        assert is_writable(output)
+        assert not is_writable("output.pdf")
+        assert not is_writable(Path("output.pdf"))
+
+    def test_fsync_flushes_file_and_directory(self, tmp_path):
+        """Test that fsync is requested for the data and the directory entry."""
+        with patch("os.fsync") as mock_fsync:
+            save_file_output(b"content", str(tmp_path / "plain.pdf"))
+            assert mock_fsync.call_count == 0
+
+            with fsync_outputs():
+                save_file_output(b"content", str(tmp_path / "synced.pdf"))
+            expected = 2 if hasattr(os, "O_DIRECTORY") else 1
+            assert mock_fsync.call_count == expected
+
+            save_chunked_output([b"a", b"b"], str(tmp_path / "chunked.pdf"), fsync=True)
+            assert mock_fsync.call_count == 2 * expected
+
+        assert (tmp_path / "synced.pdf").read_bytes() == b"content"
+
+    def test_preallocated_file_is_truncated_to_content(self, tmp_path):
+        """Test that space reserved for a larger expected size is released."""
+        output = tmp_path / "output.pdf"
+
+        written = save_chunked_output([b"abc", b"de"], str(output), size=1024)
+
+        assert written == 5
+        assert output.read_bytes() == b"abcde"
+
+    @pytest.mark.skipif(not hasattr(os, "posix_fallocate"), reason="needs posix_fallocate")
+    def test_preallocation_uses_expected_size(self, tmp_path):
+        """Test that the file is preallocated with the expected size."""
+        with patch("os.posix_fallocate") as mock_fallocate:
+            save_chunked_output([b"abcde"], str(tmp_path / "output.pdf"), size=5)
+
+        assert mock_fallocate.call_args[0][1:] == (0, 5)
+
+    def test_failed_stream_leaves_previous_output(self, tmp_path):
+        """Test that an interrupted write keeps the old file and no temporary file."""
+        output = tmp_path / "output.pdf"
+        output.write_bytes(b"previous")
+
+        def chunks():
+            yield b"partial"
+            raise OSError("connection lost")
+
+        with pytest.raises(OSError, match="connection lost"):
+            save_chunked_output(chunks(), str(output), size=100)
+
+        assert output.read_bytes() == b"previous"
+        assert os.listdir(tmp_path) == ["output.pdf"]
+
+    def test_overlapping_writes_use_separate_temporary_files(self, tmp_path):
+        """Test that overlapping writes to one path do not share a temporary file."""
+        output = str(tmp_path / "output.pdf")
+        temporary = []
+
+        def inner():
+            temporary.extend(name for name in os.listdir(tmp_path) if name.endswith(".tmp"))
+            yield b"inner"
+
+        def outer():
+            save_chunked_output(inner(), output)
+            yield b"outer"
+
+        save_chunked_output(outer(), output)
+
+        assert len(temporary) == 2
+        assert Path(output).read_bytes() == b"outer"
+        assert os.listdir(tmp_path) == ["output.pdf"]
+
     @patch("pathlib.Path.mkdir")
     @patch("pathlib.Path.write_bytes")
     def test_save_file_output_propagates_os_error(self, mock_write, mock_mkdir):
@@ -0,0 +1,193 @@
+"""Unit tests for hedged requests."""
+
+import threading
+import time
+
+import pytest
+
+from nutrient_dws.builder import BuildAPIWrapper
+from nutrient_dws.client import NutrientClient
+from nutrient_dws.hedging import HedgingPolicy
+from nutrient_dws.http_client import HTTPClient, capture_responses
+from nutrient_dws.transport import InMemoryResponse, InMemoryTransport
+
+
+def warmed_policy(**kwargs):
+    """Create a policy whose history puts the hedge delay at 10ms."""
+    options = {"tools": ["convert-to-pdf"], "min_samples": 5, "budget": 1.0}
+    options.update(kwargs)
+    policy = HedgingPolicy(**options)
+    for _ in range(5):
+        policy.record_latency("convert-to-pdf", 0.01)
+    return policy
+
+
+class TestHedgingPolicy:
+    """Test suite for HedgingPolicy bookkeeping."""
+
+    def test_no_delay_without_history(self):
+        """Test that hedging waits for enough latency samples."""
+        policy = HedgingPolicy(tools=["convert-to-pdf"], min_samples=3)
+        policy.record_latency("convert-to-pdf", 1.0)
+        assert policy.hedge_delay("convert-to-pdf") is None
+
+    def test_delay_is_percentile(self):
+        """Test that the hedge delay follows the configured percentile."""
+        policy = HedgingPolicy(tools=["x"], percentile=90, min_samples=10)
+        for latency in range(1, 11):
+            policy.record_latency("x", float(latency))
+        assert policy.hedge_delay("x") == 10.0
+
+    def test_budget_caps_hedges(self):
+        """Test that hedges are limited to the budget ratio."""
+        policy = HedgingPolicy(tools=["x"], budget=0.1)
+        for _ in range(10):
+            policy.record_request()
+        assert policy.try_acquire_hedge()
+        assert not policy.try_acquire_hedge()
+
+    def test_applies_only_to_listed_tools(self):
+        """Test that hedging is opt-in per tool."""
+        policy = HedgingPolicy(tools=["convert-to-pdf"])
+        assert policy.applies_to("convert-to-pdf")
+        assert not policy.applies_to("ocr-pdf")
+        assert not policy.applies_to(None)
+
+    def test_invalid_percentile(self):
+        """Test that an invalid percentile is rejected."""
+        with pytest.raises(ValueError):
+            HedgingPolicy(tools=[], percentile=100)
+
+
+class TestHedgedRequests:
+    """Test suite for hedging inside HTTPClient."""
+
+    def test_slow_request_is_hedged(self):
+        """Test that a second request wins when the first one stalls."""
+        release = threading.Event()
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            if len(calls) == 1:
+                release.wait(2)
+                return InMemoryResponse(200, b"slow")
+            return InMemoryResponse(200, b"fast")
+
+        policy = warmed_policy()
+        client = HTTPClient(api_key="key", transport=InMemoryTransport(handler), hedging=policy)
+        try:
+            files = {"file": ("doc.docx", b"content", "application/octet-stream")}
+            result = client.post("/build", files=files, tool="convert-to-pdf")
+        finally:
+            release.set()
+            client.close()
+
+        assert result == b"fast"
+        assert len(calls) == 2
+        assert policy.metrics["hedges"] == 1
+        assert policy.metrics["hedge_wins"] == 1
+
+    def test_both_attempts_are_recorded(self):
+        """Test that the credits of the abandoned attempt are recorded once it completes."""
+        release = threading.Event()
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            headers = {"X-Request-Id": f"req-{len(calls)}", "x-pspdfkit-request-cost": "1"}
+            if len(calls) == 1:
+                release.wait(2)
+            return InMemoryResponse(200, b"pdf", headers=headers)
+
+        client = HTTPClient(
+            api_key="key", transport=InMemoryTransport(handler), hedging=warmed_policy()
+        )
+        try:
+            with capture_responses() as responses:
+                client.post("/build", tool="convert-to-pdf")
+                release.set()
+                for _ in range(200):
+                    if len(responses) == 2:
+                        break
+                    time.sleep(0.01)
+        finally:
+            release.set()
+            client.close()
+
+        assert sum(info.credits_used for info in responses) == 2.0
+        assert [(info.request_id, info.discarded) for info in responses] == [
+            ("req-2", False),
+            ("req-1", True),
+        ]
+
+    def test_fast_request_is_not_hedged(self):
+        """Test that requests finishing within the delay are sent once."""
+        transport = InMemoryTransport(lambda request: InMemoryResponse(200, b"ok"))
+        policy = warmed_policy(min_samples=5)
+        for _ in range(5):
+            policy.record_latency("convert-to-pdf", 5.0)
+        client = HTTPClient(api_key="key", transport=transport, hedging=policy)
+
+        assert client.post("/build", tool="convert-to-pdf") == b"ok"
+        assert len(transport.requests) == 1
+        assert policy.metrics["hedges"] == 0
+
+    def test_streamed_uploads_are_not_hedged(self):
+        """Test that file handles, which cannot be replayed, disable hedging."""
+
+        def handler(request):
+            time.sleep(0.05)
+            return InMemoryResponse(200, b"ok")
+
+        transport = InMemoryTransport(handler)
+        policy = warmed_policy()
+        client = HTTPClient(api_key="key", transport=transport, hedging=policy)
+
+        with open(__file__, "rb") as handle:
+            files = {"file": ("doc.pdf", handle, "application/octet-stream")}
+            client.post("/build", files=files, tool="convert-to-pdf")
+
+        assert len(transport.requests) == 1
+        assert policy.metrics["requests"] == 0
+
+    def test_hedge_error_falls_back_to_primary(self):
+        """Test that a failed hedge does not fail the call."""
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            if len(calls) == 1:
+                time.sleep(0.1)
+                return InMemoryResponse(200, b"primary")
+            return InMemoryResponse(503, b"down")
+
+        client = HTTPClient(
+            api_key="key", transport=InMemoryTransport(handler), hedging=warmed_policy()
+        )
+
+        assert client.post("/build", tool="convert-to-pdf") == b"primary"
+
+
+class TestBuilderToolName:
+    """Test suite for the tool name used by client policies."""
+
+    def test_tool_name_for_conversion(self):
+        """Test that a workflow without steps is a conversion."""
+        assert BuildAPIWrapper(None, b"doc")._tool_name() == "convert-to-pdf"
+
+    def test_tool_name_for_steps(self):
+        """Test that step names are joined in order."""
+        builder = BuildAPIWrapper(None, b"doc")
+        builder.add_step("rotate-pages", {"degrees": 90}).add_step("flatten-annotations")
+        assert builder._tool_name() == "rotate-pages+flatten-annotations"
+
+    def test_direct_api_passes_tool_name(self):
+        """Test that Direct API calls identify their tool to the HTTP client."""
+        transport = InMemoryTransport(lambda request: InMemoryResponse(200, b"ok"))
+        policy = HedgingPolicy(tools=["rotate-pages"])
+        client = NutrientClient(api_key="key", transport=transport, hedging=policy)
+
+        client.rotate_pages(b"doc", degrees=90)
+
+        assert policy.metrics["requests"] == 1
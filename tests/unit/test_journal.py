@@ -0,0 +1,148 @@
+"""Unit tests for the batch checkpoint journal."""
+
+import pytest
+
+from nutrient_dws.batch import BatchRunner
+from nutrient_dws.builder import Pipeline
+from nutrient_dws.client import NutrientClient
+from nutrient_dws.http_client import HTTPClient, capture_responses
+from nutrient_dws.journal import BatchJournal, ItemState, input_key
+from nutrient_dws.transport import InMemoryResponse, InMemoryTransport
+
+
+def billed_handler(request):
+    """Return the upload with request ID and cost headers, failing 'bad' inputs."""
+    _, content, _ = request["files"]["file"]
+    if content.startswith(b"bad"):
+        return InMemoryResponse(500, b"error", {"X-Request-Id": "req-bad"})
+    headers = {
+        "X-Request-Id": f"req-{content.decode()}",
+        "x-pspdfkit-request-cost": "2",
+        "x-pspdfkit-remaining-credits": "98",
+    }
+    return InMemoryResponse(200, content.upper(), headers)
+
+
+class TestCaptureResponses:
+    """Test suite for response metadata capture."""
+
+    def test_captures_request_id_and_credits(self):
+        """Test that request ID and credit headers are collected."""
+        client = HTTPClient(api_key="key", transport=InMemoryTransport(billed_handler))
+        files = {"file": ("doc", b"a", "application/octet-stream")}
+
+        with capture_responses() as responses:
+            client.post("/build", files=files)
+
+        assert len(responses) == 1
+        assert responses[0].request_id == "req-a"
+        assert responses[0].credits_used == 2.0
+        assert responses[0].credits_remaining == 98.0
+
+    def test_nothing_captured_outside_block(self):
+        """Test that responses are only recorded inside the block."""
+        client = HTTPClient(api_key="key", transport=InMemoryTransport(billed_handler))
+        files = {"file": ("doc", b"a", "application/octet-stream")}
+        client.post("/build", files=files)
+        with capture_responses() as responses:
+            pass
+        assert responses == []
+
+
+class TestBatchJournal:
+    """Test suite for BatchJournal."""
+
+    def test_state_transitions(self, tmp_path):
+        """Test that items move through in-flight to done or failed."""
+        with BatchJournal(tmp_path / "journal.db", job_id="job") as journal:
+            journal.mark_in_flight("a")
+            assert journal.state("a") == ItemState.IN_FLIGHT
+            journal.mark_done("a", output_path="a.pdf", request_id="r1", credits=1.5)
+            journal.mark_in_flight("b")
+            journal.mark_failed("b", "boom")
+
+            assert journal.is_done("a")
+            assert journal.summary() == {"in_flight": 0, "done": 1, "failed": 1, "credits": 1.5}
+            [failed] = journal.items(ItemState.FAILED)
+            assert failed["error"] == "boom"
+            assert failed["attempts"] == 1
+
+    def test_credits_accumulate_across_attempts(self, tmp_path):
+        """Test that credits charged by a failed attempt are kept when a retry succeeds."""
+        with BatchJournal(tmp_path / "journal.db", job_id="job") as journal:
+            journal.mark_in_flight("a")
+            journal.mark_failed("a", "boom", credits=1.5)
+            journal.mark_in_flight("a")
+            journal.mark_done("a", credits=2)
+            journal.mark_in_flight("b")
+            journal.mark_failed("b", "boom")
+
+            [done] = journal.items(ItemState.DONE)
+            [failed] = journal.items(ItemState.FAILED)
+            assert done["credits"] == 3.5
+            assert done["attempts"] == 2
+            assert failed["credits"] is None
+            assert journal.summary()["credits"] == 3.5
+
+    def test_state_survives_reopen(self, tmp_path):
+        """Test that committed state is durable across instances."""
+        path = tmp_path / "journal.db"
+        with BatchJournal(path, job_id="job", commit_interval=3600) as journal:
+            journal.mark_done("a")
+        with BatchJournal(path, job_id="job") as journal:
+            assert journal.is_done("a")
+        with BatchJournal(path, job_id="other") as journal:
+            assert journal.state("a") is None
+
+    def test_items_are_paged(self, tmp_path):
+        """Test that iteration covers more items than one page."""
+        with BatchJournal(tmp_path / "journal.db", job_id="job") as journal:
+            for index in range(2500):
+                journal.mark_done(f"item-{index:05d}")
+            assert sum(1 for _ in journal.items()) == 2500
+
+    def test_pipeline_mismatch_is_rejected(self, tmp_path):
+        """Test that a job cannot be resumed with a different pipeline."""
+        with BatchJournal(tmp_path / "journal.db", job_id="job") as journal:
+            journal.bind_pipeline('{"steps": []}')
+            journal.bind_pipeline('{"steps": []}')
+            with pytest.raises(ValueError):
+                journal.bind_pipeline('{"steps": [{"tool": "ocr-pdf"}]}')
+
+    def test_input_keys(self, tmp_path):
+        """Test that keys are stable for paths and content."""
+        assert input_key(b"abc") == input_key(b"abc")
+        assert input_key(b"abc") != input_key(b"abd")
+        assert input_key(str(tmp_path / "a.pdf")) == input_key(tmp_path / "a.pdf")
+
+
+class TestResumableBatch:
+    """Test suite for BatchRunner with a journal."""
+
+    def setup_method(self):
+        """Set up a client backed by an in-memory transport."""
+        self.transport = InMemoryTransport(billed_handler)
+        self.client = NutrientClient(api_key="key", transport=self.transport)
+        self.pipeline = Pipeline().add_step("flatten-annotations")
+
+    def test_rerun_skips_completed_items(self, tmp_path):
+        """Test that a resumed job only retries failed items."""
+        path = tmp_path / "journal.db"
+        with BatchJournal(path, job_id="job") as journal:
+            runner = BatchRunner(self.client, self.pipeline, use_processes=False, journal=journal)
+            results = list(runner.run([b"a", b"b", b"bad"]))
+            assert {r.request_id for r in results} == {"req-a", "req-b", "req-bad"}
+            assert runner.metrics["credits"] == 4.0
+
+        self.transport.requests.clear()
+        with BatchJournal(path, job_id="job") as journal:
+            runner = BatchRunner(self.client, self.pipeline, use_processes=False, journal=journal)
+            results = list(runner.run([b"a", b"b", b"bad"]))
+
+            assert len(results) == 1
+            assert len(self.transport.requests) == 1
+            assert runner.metrics["skipped"] == 2
+            assert journal.summary()["failed"] == 1
+            [failed] = journal.items(ItemState.FAILED)
+            assert failed["attempts"] == 2
+            assert failed["request_id"] == "req-bad"
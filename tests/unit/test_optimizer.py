@@ -0,0 +1,197 @@
+"""Unit tests for the Build API action optimizer."""
+
+import json
+
+from nutrient_dws.builder import BuildAPIWrapper
+from nutrient_dws.client import NutrientClient
+from nutrient_dws.optimizer import optimize_actions, optimize_instructions
+from nutrient_dws.transport import InMemoryResponse, InMemoryTransport
+
+
+class TestOptimizeActions:
+    """Test suite for the optimizer rewrites."""
+
+    def test_folds_consecutive_rotations(self):
+        """Test that rotations of the same pages are folded modulo 360."""
+        actions = [
+            {"type": "rotate", "rotateBy": 90},
+            {"type": "rotate", "rotateBy": 180},
+            {"type": "rotate", "rotateBy": 90, "pageIndexes": [0]},
+        ]
+
+        optimized, changes = optimize_actions(actions)
+
+        assert optimized == [
+            {"type": "rotate", "rotateBy": 270},
+            {"type": "rotate", "rotateBy": 90, "pageIndexes": [0]},
+        ]
+        assert len(changes) == 1
+        assert actions[0] == {"type": "rotate", "rotateBy": 90}
+
+    def test_rotations_cancelling_out_are_removed(self):
+        """Test that rotations adding up to a full turn disappear."""
+        optimized, changes = optimize_actions(
+            [{"type": "rotate", "rotateBy": 270}, {"type": "rotate", "rotateBy": 90}]
+        )
+
+        assert optimized == []
+        assert len(changes) == 2
+
+    def test_drops_noops(self):
+        """Test that zero rotations and empty redactions are removed."""
+        optimized, _ = optimize_actions(
+            [
+                {"type": "rotate", "rotateBy": 0},
+                {"type": "createRedactions", "strategy": "text", "strategyOptions": {"text": ""}},
+                {"type": "createRedactions", "strategy": "regex", "strategyOptions": {}},
+                {
+                    "type": "createRedactions",
+                    "strategy": "preset",
+                    "strategyOptions": {"preset": "email"},
+                },
+            ]
+        )
+
+        assert optimized == [
+            {
+                "type": "createRedactions",
+                "strategy": "preset",
+                "strategyOptions": {"preset": "email"},
+            }
+        ]
+
+    def test_drops_repeated_idempotent_actions(self):
+        """Test that directly repeated idempotent actions are removed."""
+        optimized, _ = optimize_actions(
+            [
+                {"type": "ocr", "language": "english"},
+                {"type": "ocr", "language": "english"},
+                {"type": "ocr", "language": "deu"},
+                {"type": "watermark", "text": "A"},
+                {"type": "watermark", "text": "A"},
+            ]
+        )
+
+        assert optimized == [
+            {"type": "ocr", "language": "english"},
+            {"type": "ocr", "language": "deu"},
+            {"type": "watermark", "text": "A"},
+            {"type": "watermark", "text": "A"},
+        ]
+
+    def test_keeps_flatten_before_annotation_imports(self):
+        """Test that a flatten before an annotation import and a flatten is kept."""
+        for import_type in ("applyInstantJson", "applyXfdf"):
+            actions = [
+                {"type": "flatten"},
+                {"type": import_type, "file": "annotations"},
+                {"type": "flatten"},
+            ]
+
+            assert optimize_actions(actions) == (actions, [])
+
+    def test_keeps_flatten_before_other_actions(self):
+        """Test that a flatten followed by a content change is kept."""
+        actions = [{"type": "flatten"}, {"type": "ocr", "language": "english"}, {"type": "flatten"}]
+
+        assert optimize_actions(actions) == (actions, [])
+
+
+class TestOptimizationReport:
+    """Test suite for optimization reports."""
+
+    def test_instructions_with_parts(self):
+        """Test that per-part actions are optimized as well."""
+        instructions = {
+            "parts": [{"file": "file", "actions": [{"type": "rotate", "rotateBy": 360}]}],
+            "actions": [{"type": "flatten"}, {"type": "flatten"}],
+        }
+
+        report = optimize_instructions(instructions)
+
+        assert report.optimized == {"parts": [{"file": "file"}], "actions": [{"type": "flatten"}]}
+        assert report.removed_actions == 2
+        assert report.changes[0].startswith("Part 0: ")
+        assert instructions["actions"] == [{"type": "flatten"}, {"type": "flatten"}]
+
+    def test_estimate_savings(self):
+        """Test that savings compare the /analyze_build cost of both versions."""
+        analyzed = []
+
+        def handler(request):
+            instructions = json.loads(request["data"]["instructions"])
+            analyzed.append(instructions)
+            return InMemoryResponse(
+                200, json.dumps({"cost": len(instructions["actions"])}).encode()
+            )
+
+        client = NutrientClient(api_key="key", transport=InMemoryTransport(handler))
+        report = (
+            client.build(b"doc")
+            .add_step("flatten-annotations")
+            .add_step("flatten-annotations")
+            .optimize(dry_run=True)
+        )
+
+        assert report.estimate_savings(client) == 1
+        assert (report.cost_before, report.cost_after) == (2, 1)
+        assert len(analyzed) == 2
+
+
+class TestBuilderOptimize:
+    """Test suite for optimizing Builder workflows."""
+
+    def test_dry_run_leaves_builder_unchanged(self):
+        """Test that a dry run only reports the changes."""
+        builder = (
+            BuildAPIWrapper(None, "doc.pdf")
+            .add_step("rotate-pages", {"degrees": 90})
+            .add_step("rotate-pages", {"degrees": 90})
+        )
+
+        report = builder.optimize(dry_run=True)
+
+        assert report.changes == ["Folded rotations by 90 and 90 degrees into 180"]
+        assert len(builder._actions) == 2
+
+    def test_execute_with_optimize(self):
+        """Test that execute(optimize=True) sends the optimized actions."""
+        sent = []
+
+        def handler(request):
+            sent.append(json.loads(request["data"]["instructions"]))
+            return InMemoryResponse(200, b"%PDF")
+
+        client = NutrientClient(api_key="key", transport=InMemoryTransport(handler))
+        client.build(b"doc").add_step("rotate-pages", {"degrees": 90}).add_step(
+            "rotate-pages", {"degrees": 270}
+        ).add_step("ocr-pdf").execute(optimize=True)
+
+        assert sent[0]["actions"] == [{"type": "ocr"}]
+
+    def test_pipeline_after_optimize(self):
+        """Test that the steps of an optimized Builder match its optimized actions."""
+        builder = (
+            BuildAPIWrapper(None, "doc.pdf")
+            .add_step("rotate-pages", {"degrees": 90, "page_indexes": [0]})
+            .add_step("rotate-pages", {"degrees": 270, "page_indexes": [0]})
+            .add_step("watermark-pdf", {"image_url": "https://example.com/logo.png"})
+            .add_step("rotate-pages", {"degrees": 90})
+            .add_step("rotate-pages", {"degrees": 90})
+            .add_step("flatten-annotations")
+            .add_step("flatten-annotations")
+        )
+
+        builder.optimize()
+        pipeline = builder.to_pipeline()
+
+        assert pipeline.steps == [
+            (
+                "watermark-pdf",
+                {"width": 200, "height": 100, "image_url": "https://example.com/logo.png"},
+            ),
+            ("rotate-pages", {"degrees": 180}),
+            ("flatten-annotations", {}),
+        ]
+        assert builder._tools == ["watermark-pdf", "rotate-pages", "flatten-annotations"]
+        assert pipeline.build(None, "doc.pdf")._actions == builder._actions
@@ -0,0 +1,149 @@
+"""Unit tests for pickling, fork safety and process pools."""
+
+import multiprocessing
+import os
+import pickle
+
+import pytest
+
+from nutrient_dws import _fork
+from nutrient_dws.circuit_breaker import CircuitBreaker
+from nutrient_dws.client import NutrientClient
+from nutrient_dws.hedging import HedgingPolicy
+from nutrient_dws.parallel import process_map, worker_client
+from nutrient_dws.timeouts import TimeoutEstimator
+from nutrient_dws.transport import InMemoryResponse, InMemoryTransport, RequestsTransport
+
+
+def echo_handler(request):
+    """Return the uploaded file content in upper case."""
+    _, content, _ = request["files"]["file"]
+    return InMemoryResponse(200, content.upper())
+
+
+def rotate(client, content):
+    """Rotate a document with the worker's client and report the worker PID."""
+    return client.rotate_pages(content, degrees=90), os.getpid()
+
+
+def fail(client, content):
+    """Raise inside a worker."""
+    raise ValueError(f"bad input: {content!r}")
+
+
+class TestPickling:
+    """Test suite for pickling clients as configuration."""
+
+    def test_client_pickles_without_session(self):
+        """Test that a used client pickles and gets a fresh session."""
+        client = NutrientClient(api_key="key", timeout=60)
+        session = client._http_client._session
+
+        clone = pickle.loads(pickle.dumps(client))
+
+        assert clone._http_client._timeout == 60
+        assert clone._http_client._session is not session
+        assert clone._http_client._session.headers["Authorization"] == "Bearer key"
+
+    def test_session_is_created_lazily(self):
+        """Test that no session exists until the transport is used."""
+        transport = RequestsTransport(headers={"X-Test": "1"})
+        assert transport._session is None
+        assert transport.session.headers["X-Test"] == "1"
+
+    def test_policies_keep_state_across_pickle(self):
+        """Test that policies pickle their learned state with a new lock."""
+        breaker = CircuitBreaker()
+        breaker.record_failure()
+        policy = HedgingPolicy(tools=["ocr-pdf"])
+        policy.record_request()
+        estimator = TimeoutEstimator()
+        estimator.record("ocr-pdf", 1024, ["ocr"], 10.0)
+        client = NutrientClient(
+            api_key="key",
+            transport=InMemoryTransport(echo_handler),
+            circuit_breaker=breaker,
+            hedging=policy,
+            timeout_estimator=estimator,
+        )
+
+        clone = pickle.loads(pickle.dumps(client))._http_client
+
+        assert clone._circuit_breaker.metrics["failures"] == 1
+        assert clone._hedging.metrics["requests"] == 1
+        assert clone._timeout_estimator.metrics["ocr-pdf"]["samples"] == 1
+        assert clone._circuit_breaker._lock is not breaker._lock
+
+    def test_builder_pickles(self):
+        """Test that a Builder pipeline pickles with its client."""
+        client = NutrientClient(api_key="key", transport=InMemoryTransport(echo_handler))
+        builder = client.build(b"doc").add_step("rotate-pages", {"degrees": 90})
+
+        clone = pickle.loads(pickle.dumps(builder))
+
+        assert clone._actions == builder._actions
+        assert clone.execute() == b"DOC"
+
+
+class TestForkSafety:
+    """Test suite for resetting connections after fork."""
+
+    def test_after_fork_drops_inherited_session(self):
+        """Test that the child-side fork hook discards the parent's session."""
+        client = NutrientClient(api_key="key")
+        session = client._http_client._session
+
+        _fork._after_fork_in_child()
+
+        assert client._http_client._session is not session
+
+    @pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+    def test_forked_child_uses_new_session(self):
+        """Test that a real forked child does not reuse the parent's session."""
+        client = NutrientClient(api_key="key")
+        # Keep the parent's session alive so its id cannot be reused in the child
+        parent_session = client._http_client._session
+        reader, writer = os.pipe()
+
+        pid = os.fork()
+        if pid == 0:  # pragma: no cover - runs in the child
+            fresh = client._http_client._session is not parent_session
+            os.write(writer, b"1" if fresh else b"0")
+            os._exit(0)
+
+        os.close(writer)
+        os.waitpid(pid, 0)
+        assert os.read(reader, 1) == b"1"
+        os.close(reader)
+
+
+@pytest.mark.skipif(
+    "fork" not in multiprocessing.get_all_start_methods(), reason="requires fork start method"
+)
+class TestProcessMap:
+    """Test suite for process_map."""
+
+    def setup_method(self):
+        """Set up a client with an in-memory transport."""
+        self.client = NutrientClient(api_key="key", transport=InMemoryTransport(echo_handler))
+        self.context = multiprocessing.get_context("fork")
+
+    def test_results_in_order(self):
+        """Test that results are returned in input order from worker processes."""
+        items = [b"a", b"b", b"c", b"d"]
+        results = list(
+            process_map(self.client, rotate, items, max_workers=2, mp_context=self.context)
+        )
+
+        assert [content for content, _ in results] == [b"A", b"B", b"C", b"D"]
+        assert all(pid != os.getpid() for _, pid in results)
+
+    def test_worker_errors_propagate(self):
+        """Test that an exception in a worker reaches the caller."""
+        with pytest.raises(ValueError, match="bad input"):
+            list(process_map(self.client, fail, [b"x"], max_workers=1, mp_context=self.context))
+
+    def test_worker_client_outside_pool(self):
+        """Test that worker_client() fails outside a worker."""
+        with pytest.raises(RuntimeError):
+            worker_client()
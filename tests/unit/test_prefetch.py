@@ -0,0 +1,67 @@
+"""Unit tests for input prefetching."""
+
+from nutrient_dws.prefetch import Prefetcher
+
+
+def write_files(tmp_path, count, content=b"abcdef"):
+    """Create ``count`` input files and return their paths."""
+    paths = []
+    for index in range(count):
+        path = tmp_path / f"{index}.pdf"
+        path.write_bytes(content)
+        paths.append(str(path))
+    return paths
+
+
+class TestPrefetcher:
+    """Test suite for Prefetcher."""
+
+    def test_reads_paths_in_order(self, tmp_path):
+        """Test that paths are read ahead and other inputs are passed through."""
+        paths = write_files(tmp_path, 2)
+        inputs = [paths[0], b"bytes", str(tmp_path / "missing.pdf"), paths[1]]
+
+        prefetched = list(Prefetcher(max_workers=2).prefetch(inputs))
+
+        assert [entry.input for entry in prefetched] == inputs
+        assert prefetched[0].content.read() == b"abcdef"
+        assert prefetched[0].content.name == "0.pdf"
+        assert prefetched[0].read_time >= 0
+        assert prefetched[1].content is None
+        assert prefetched[1].upload == b"bytes"
+        assert prefetched[2].content is None
+
+    def test_byte_budget(self, tmp_path):
+        """Test that files beyond the budget wait and larger files pass through."""
+        paths = write_files(tmp_path, 4)
+        large = tmp_path / "large.pdf"
+        large.write_bytes(b"x" * 100)
+        prefetcher = Prefetcher(max_workers=2, max_bytes=10, lookahead=8)
+
+        entries = list(prefetcher.prefetch([*paths, str(large)]))
+
+        assert all(entry.content is not None for entry in entries[:4])
+        assert entries[4].content is None
+        metrics = prefetcher.metrics
+        assert metrics["max_buffered_bytes"] == 6
+        assert metrics["buffered_bytes"] == 0
+        assert metrics["reads"] == 4
+        assert metrics["passed_through"] == 1
+
+    def test_lookahead_bounds_consumption(self, tmp_path):
+        """Test that inputs are consumed at most lookahead ahead and released on early exit."""
+        paths = write_files(tmp_path, 10)
+        consumed = []
+
+        def inputs():
+            for path in paths:
+                consumed.append(path)
+                yield path
+
+        prefetcher = Prefetcher(max_workers=1, lookahead=2)
+        entries = prefetcher.prefetch(inputs())
+        next(entries)
+
+        assert len(consumed) <= 3
+        entries.close()
+        assert prefetcher.metrics["buffered_bytes"] == 0
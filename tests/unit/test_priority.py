@@ -0,0 +1,199 @@
+"""Unit tests for priority lanes."""
+
+import pickle
+import threading
+import time
+
+import pytest
+
+from nutrient_dws.client import NutrientClient
+from nutrient_dws.deadline import Deadline
+from nutrient_dws.exceptions import DeadlineExceededError
+from nutrient_dws.priority import Priority, PriorityScheduler, current_priority, priority_scope
+from nutrient_dws.transport import InMemoryResponse, InMemoryTransport
+
+
+def wait_for(condition, timeout=5.0):
+    """Poll until ``condition()`` is true."""
+    give_up = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < give_up, "condition not reached"
+        time.sleep(0.005)
+
+
+def start_waiter(scheduler, lane, admitted):
+    """Acquire a slot in a thread, record the lane and release it."""
+
+    def run():
+        scheduler.acquire(lane)
+        admitted.append(lane)
+        scheduler.release(lane)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+class TestPriorityScheduler:
+    """Test suite for lane admission."""
+
+    def test_acquire_and_release(self):
+        """Test that slots are counted per lane."""
+        scheduler = PriorityScheduler(max_concurrency=2, reserved={})
+
+        with scheduler.slot(Priority.BULK):
+            assert scheduler.metrics["bulk"]["in_flight"] == 1
+
+        metrics = scheduler.metrics["bulk"]
+        assert metrics["in_flight"] == 0
+        assert metrics["admitted"] == 1
+
+    def test_default_lane(self):
+        """Test that requests without a priority use the default lane."""
+        scheduler = PriorityScheduler(max_concurrency=1, reserved={})
+
+        assert scheduler.acquire() == Priority.NORMAL
+        scheduler.release(Priority.NORMAL)
+
+    def test_higher_lane_admitted_first(self):
+        """Test that a freed slot goes to the highest waiting lane."""
+        scheduler = PriorityScheduler(max_concurrency=1, reserved={})
+        admitted = []
+        lane = scheduler.acquire(Priority.NORMAL)
+
+        bulk = start_waiter(scheduler, Priority.BULK, admitted)
+        wait_for(lambda: scheduler.metrics["bulk"]["waiting"] == 1)
+        interactive = start_waiter(scheduler, Priority.INTERACTIVE, admitted)
+        wait_for(lambda: scheduler.metrics["interactive"]["waiting"] == 1)
+
+        scheduler.release(lane)
+        bulk.join(5)
+        interactive.join(5)
+
+        assert admitted == [Priority.INTERACTIVE, Priority.BULK]
+        assert scheduler.metrics["bulk"]["max_wait"] > 0
+
+    def test_reserved_slots_guarantee_progress(self):
+        """Test that a lane with reserved slots is not blocked by other lanes."""
+        scheduler = PriorityScheduler(max_concurrency=2, reserved={Priority.BULK: 1})
+        scheduler.acquire(Priority.INTERACTIVE)
+        admitted = []
+
+        interactive = start_waiter(scheduler, Priority.INTERACTIVE, admitted)
+        wait_for(lambda: scheduler.metrics["interactive"]["waiting"] == 1)
+        with scheduler.slot(Priority.BULK):
+            assert scheduler.metrics["bulk"]["in_flight"] == 1
+
+        assert admitted == []
+        scheduler.release(Priority.INTERACTIVE)
+        interactive.join(5)
+        assert admitted == [Priority.INTERACTIVE]
+
+    def test_reserved_slots_are_not_shared(self):
+        """Test that other lanes cannot use a lane's reserved slots."""
+        scheduler = PriorityScheduler(max_concurrency=2, reserved={Priority.INTERACTIVE: 1})
+        scheduler.acquire(Priority.BULK)
+
+        with pytest.raises(DeadlineExceededError):
+            scheduler.acquire(Priority.BULK, Deadline(0.05))
+        assert scheduler.metrics["bulk"]["rejected"] == 1
+
+    def test_deadline_while_queued(self):
+        """Test that a queued request fails when its deadline passes."""
+        scheduler = PriorityScheduler(max_concurrency=1, reserved={})
+        scheduler.acquire(Priority.NORMAL)
+
+        with pytest.raises(DeadlineExceededError):
+            scheduler.acquire(Priority.INTERACTIVE, Deadline(0.05))
+        assert scheduler.metrics["interactive"]["waiting"] == 0
+
+    def test_invalid_configuration(self):
+        """Test that invalid lane configurations are rejected."""
+        with pytest.raises(ValueError):
+            PriorityScheduler(reserved={"urgent": 1})
+        with pytest.raises(ValueError):
+            PriorityScheduler(max_concurrency=2, reserved={Priority.INTERACTIVE: 3})
+        with pytest.raises(ValueError):
+            PriorityScheduler(default_lane="urgent")
+        with pytest.raises(ValueError):
+            PriorityScheduler().acquire("urgent")
+
+    def test_pickle_keeps_configuration(self):
+        """Test that a scheduler pickles as configuration with empty lanes."""
+        scheduler = PriorityScheduler(max_concurrency=4, reserved={Priority.BULK: 2})
+        scheduler.acquire(Priority.BULK)
+
+        restored = pickle.loads(pickle.dumps(scheduler))
+
+        assert restored.max_concurrency == 4
+        assert restored.metrics["bulk"]["reserved"] == 2
+        assert restored.metrics["bulk"]["in_flight"] == 0
+
+    def test_after_fork_resets_lanes(self):
+        """Test that a forked child starts with empty lanes."""
+        scheduler = PriorityScheduler(max_concurrency=1, reserved={})
+        scheduler.acquire(Priority.NORMAL)
+
+        scheduler._after_fork()
+
+        assert scheduler.acquire(Priority.NORMAL) == Priority.NORMAL
+
+
+class TestClientPriority:
+    """Test suite for choosing lanes through the client."""
+
+    def setup_method(self):
+        """Create a client with a scheduler and an in-memory transport."""
+        self.scheduler = PriorityScheduler(max_concurrency=2, reserved={})
+        self.client = NutrientClient(
+            api_key="key",
+            transport=InMemoryTransport(lambda request: InMemoryResponse(200, b"%PDF")),
+            scheduler=self.scheduler,
+        )
+
+    def test_execute_priority(self):
+        """Test that execute() sends the request in the given lane."""
+        self.client.build(b"data").add_step("flatten-annotations").execute(priority="interactive")
+
+        assert self.scheduler.metrics["interactive"]["admitted"] == 1
+        assert self.scheduler.metrics["normal"]["admitted"] == 0
+
+    def test_direct_api_priority_scope(self):
+        """Test that Direct API calls use the lane of client.priority()."""
+        with self.client.priority(Priority.BULK):
+            assert current_priority() == Priority.BULK
+            self.client.flatten_annotations(b"data")
+
+        assert current_priority() is None
+        assert self.scheduler.metrics["bulk"]["admitted"] == 1
+
+    def test_explicit_priority_overrides_scope(self):
+        """Test that an explicit priority wins over the surrounding scope."""
+        with priority_scope(Priority.BULK):
+            self.client.build(b"data").add_step("ocr-pdf").execute(priority="interactive")
+
+        assert self.scheduler.metrics["interactive"]["admitted"] == 1
+        assert self.scheduler.metrics["bulk"]["admitted"] == 0
+
+    def test_streamed_results_hold_their_slot(self):
+        """Test that a lazy result keeps its slot until its body is read or it is closed."""
+        scheduler = PriorityScheduler(max_concurrency=1, reserved={})
+        client = NutrientClient(
+            api_key="key",
+            transport=InMemoryTransport(lambda request: InMemoryResponse(200, b"%PDF")),
+            scheduler=scheduler,
+        )
+
+        first = client.build(b"a").execute(lazy=True)
+        with pytest.raises(DeadlineExceededError):
+            client.build(b"b").execute(lazy=True, deadline=0.1)
+        assert first.read() == b"%PDF"
+
+        second = client.build(b"c").execute(lazy=True)
+        with pytest.raises(DeadlineExceededError):
+            client.build(b"d").execute(deadline=0.1)
+        second.close()
+        second.close()
+
+        assert client.build(b"e").execute() == b"%PDF"
+        assert scheduler.metrics["normal"]["in_flight"] == 0
@@ -0,0 +1,197 @@
+"""Unit tests for rendering pages as images."""
+
+import io
+import json
+import threading
+import zipfile
+
+import pytest
+
+from nutrient_dws.client import NutrientClient
+from nutrient_dws.deadline import deadline_scope
+from nutrient_dws.http_client import capture_responses
+from nutrient_dws.priority import current_priority, priority_scope
+from nutrient_dws.rendering import ImageOutput, render_pages
+from nutrient_dws.transport import InMemoryResponse, InMemoryTransport
+
+
+def page_image(index):
+    """Fake image content of page ``index``."""
+    return f"image-{index}".encode()
+
+
+def render_handler(page_count, gate=None):
+    """Handler rendering the requested pages of a document with ``page_count`` pages."""
+
+    def handler(request):
+        output = json.loads(request["data"]["instructions"])["output"]
+        pages = output.get("pages", {"start": 0, "end": -1})
+        start, end = pages["start"], pages["end"]
+        start, end = (
+            start + page_count if start < 0 else start,
+            end + page_count if end < 0 else end,
+        )
+        if gate is not None and start > 0:
+            assert gate.wait(5)
+        if start == end:
+            return InMemoryResponse(200, page_image(start), {"Content-Type": "application/png"})
+        body = io.BytesIO()
+        with zipfile.ZipFile(body, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            for index in range(start, end + 1):
+                archive.writestr(f"{index}.png", page_image(index))
+        return InMemoryResponse(200, body.getvalue(), {"Content-Type": "application/zip"})
+
+    return handler
+
+
+def make_client(handler):
+    """Client whose requests are answered by ``handler``."""
+    transport = InMemoryTransport(handler)
+    return NutrientClient(api_key="key", transport=transport), transport
+
+
+def requested_pages(transport):
+    """Page ranges of the recorded requests, in request order."""
+    ranges = []
+    for request in transport.requests:
+        pages = json.loads(request["data"]["instructions"])["output"]["pages"]
+        ranges.append((pages["start"], pages["end"]))
+    return ranges
+
+
+class TestImageOutput:
+    """Test suite for ImageOutput."""
+
+    def test_to_dict(self):
+        """Test that options are converted to the Build API format."""
+        assert ImageOutput().to_dict() == {"type": "image", "format": "png", "dpi": 150}
+        assert ImageOutput("webp", width=200, pages=(0, 9)).to_dict() == {
+            "type": "image",
+            "format": "webp",
+            "width": 200,
+            "pages": {"start": 0, "end": 9},
+        }
+        assert ImageOutput("jpg", height=100).content_type == "image/jpeg"
+
+    def test_validation(self):
+        """Test that unsupported formats and sizes are rejected."""
+        with pytest.raises(ValueError, match="Unsupported image format"):
+            ImageOutput("gif")
+        with pytest.raises(ValueError, match="width must be positive"):
+            ImageOutput(width=0)
+
+    def test_builder_output_options(self):
+        """Test that the options can be used as Builder output options."""
+        client, _ = make_client(render_handler(1))
+        builder = client.build(b"doc").set_output_options(**ImageOutput(dpi=72).to_dict())
+
+        assert builder._build_instructions()["output"] == {
+            "type": "image",
+            "format": "png",
+            "dpi": 72,
+        }
+
+
+class TestRenderPages:
+    """Test suite for render_pages."""
+
+    def test_shards_yield_pages_in_order(self):
+        """Test that the range is split into shards whose pages are yielded in order."""
+        client, transport = make_client(render_handler(20))
+
+        pages = list(client.render_pages(b"doc", page_count=20, pages_per_request=8))
+
+        assert [page.index for page in pages] == list(range(20))
+        assert [page.content for page in pages] == [page_image(i) for i in range(20)]
+        assert pages[0].name == "0.png"
+        assert pages[0].content_type == "image/png"
+        assert sorted(requested_pages(transport)) == [(0, 7), (8, 15), (16, 19)]
+
+    def test_range_from_end_and_single_page_shard(self):
+        """Test that negative ranges are resolved and single images are returned as pages."""
+        client, transport = make_client(render_handler(10))
+        image = ImageOutput(pages=(-3, -1))
+
+        pages = list(render_pages(client, b"doc", image, page_count=10, pages_per_request=2))
+
+        assert [(page.index, page.name) for page in pages] == [
+            (7, "7.png"),
+            (8, "8.png"),
+            (9, None),
+        ]
+        assert pages[2].content == page_image(9)
+        assert sorted(requested_pages(transport)) == [(7, 8), (9, 9)]
+
+    def test_unknown_page_count_uses_one_request(self):
+        """Test that an open-ended range without a page count is rendered in one request."""
+        client, transport = make_client(render_handler(5))
+
+        pages = list(render_pages(client, b"doc", pages_per_request=2))
+
+        assert [page.index for page in pages] == [0, 1, 2, 3, 4]
+        assert len(transport.requests) == 1
+
+    def test_first_page_does_not_wait_for_later_shards(self):
+        """Test that the first page is available while later shards are still rendering."""
+        gate = threading.Event()
+        client, _ = make_client(render_handler(300, gate))
+
+        pages = render_pages(client, b"doc", page_count=300, pages_per_request=10, max_workers=3)
+        first = next(pages)
+        gate.set()
+
+        assert first.index == 0
+        assert sum(1 for _ in pages) == 299
+
+    def test_stopping_early_skips_remaining_shards(self):
+        """Test that shards beyond those in flight are not requested after the consumer stops."""
+        client, transport = make_client(render_handler(100))
+
+        pages = render_pages(client, b"doc", page_count=100, pages_per_request=5, max_workers=2)
+        assert next(pages).index == 0
+        pages.close()
+
+        assert len(transport.requests) <= 2
+
+    def test_file_object_is_read_once(self):
+        """Test that a file object input is uploaded by every shard."""
+        uploads = []
+        handler = render_handler(4)
+
+        def recording_handler(request):
+            _, content, _ = request["files"]["file"]
+            uploads.append(content if isinstance(content, bytes) else content.read())
+            return handler(request)
+
+        client, _ = make_client(recording_handler)
+
+        pages = list(render_pages(client, io.BytesIO(b"doc"), page_count=4, pages_per_request=2))
+
+        assert len(pages) == 4
+        assert uploads == [b"doc", b"doc"]
+
+    def test_scopes_apply_to_shards(self):
+        """Test that the deadline, priority and response capture of the caller reach shards."""
+        seen = []
+        handler = render_handler(6)
+
+        def recording_handler(request):
+            seen.append((request["deadline"], current_priority()))
+            return handler(request)
+
+        client, _ = make_client(recording_handler)
+
+        with deadline_scope(30), priority_scope("bulk"), capture_responses() as responses:
+            pages = list(render_pages(client, b"doc", page_count=6, pages_per_request=2))
+
+        assert len(pages) == 6
+        assert len(seen) == 3
+        assert all(deadline is not None and lane == "bulk" for deadline, lane in seen)
+        assert len(responses) == 3
+
+    def test_invalid_shard_size(self):
+        """Test that shards need at least one page."""
+        client, _ = make_client(render_handler(1))
+
+        with pytest.raises(ValueError, match="at least 1"):
+            next(render_pages(client, b"doc", pages_per_request=0))
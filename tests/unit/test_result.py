@@ -0,0 +1,105 @@
+"""Unit tests for lazy results."""
+
+import io
+import json
+
+import pytest
+
+from nutrient_dws.client import NutrientClient
+from nutrient_dws.http_client import capture_responses
+from nutrient_dws.result import Result
+from nutrient_dws.transport import InMemoryResponse, InMemoryTransport
+
+HEADERS = {
+    "Content-Type": "application/pdf; charset=binary",
+    "Content-Length": "8",
+    "X-Request-Id": "req-1",
+    "x-pspdfkit-request-cost": "2",
+}
+
+
+def make_client(body=b"%PDF-1.7", headers=None):
+    """Client whose requests return ``body``."""
+    transport = InMemoryTransport(
+        lambda request: InMemoryResponse(200, body, headers=HEADERS if headers is None else headers)
+    )
+    return NutrientClient(api_key="key", transport=transport)
+
+
+class TestResult:
+    """Test suite for Result."""
+
+    def test_metadata(self):
+        """Test that response metadata is available without reading the body."""
+        result = make_client().build(b"doc").execute(lazy=True)
+
+        assert isinstance(result, Result)
+        assert result.status_code == 200
+        assert result.request_id == "req-1"
+        assert result.credits_used == 2.0
+        assert result.content_type == "application/pdf"
+        assert result.content_length == 8
+        assert result.elapsed >= 0
+        assert result.download_time is None
+
+    def test_read_is_repeatable(self):
+        """Test that read() caches the body and stream() can follow it."""
+        result = make_client().build(b"doc").execute(lazy=True)
+
+        assert result.read() == b"%PDF-1.7"
+        assert result.read() == b"%PDF-1.7"
+        assert b"".join(result.stream(3)) == b"%PDF-1.7"
+        assert result.download_time is not None
+
+    def test_stream_consumes_body_once(self):
+        """Test that a streamed body cannot be consumed a second time."""
+        result = make_client().build(b"doc").execute(lazy=True)
+
+        assert list(result.stream(4)) == [b"%PDF", b"-1.7"]
+        with pytest.raises(RuntimeError, match="already been consumed"):
+            result.read()
+
+    def test_save_and_save_to(self, tmp_path):
+        """Test that the body can be streamed into a path or a file object."""
+        client = make_client()
+        path = tmp_path / "out" / "result.pdf"
+        output = io.BytesIO()
+
+        assert client.build(b"doc").execute(lazy=True).save(str(path)) == 8
+        assert client.build(b"doc").execute(lazy=True).save_to(output) == 8
+        assert path.read_bytes() == output.getvalue() == b"%PDF-1.7"
+
+    def test_json(self):
+        """Test that JSON bodies can be parsed."""
+        client = make_client(json.dumps({"cost": 3}).encode(), headers={})
+        result = client._http_client.post_result("/analyze_build", json_data={})
+
+        assert result.json() == {"cost": 3}
+        assert result.content_type is None
+
+    def test_response_is_recorded(self):
+        """Test that capture_responses records lazy results like other calls."""
+        with capture_responses() as responses:
+            make_client().build(b"doc").execute(lazy=True).close()
+
+        assert [info.request_id for info in responses] == ["req-1"]
+
+
+class TestExecuteLazy:
+    """Test suite for choosing between bytes and results."""
+
+    def test_bytes_by_default(self):
+        """Test that the Builder and Direct API return bytes unless asked for a result."""
+        client = make_client()
+
+        assert client.build(b"doc").execute() == b"%PDF-1.7"
+        assert client.build(b"doc").execute(lazy=False) == b"%PDF-1.7"
+        assert client.flatten_annotations(b"doc") == b"%PDF-1.7"
+        assert client.merge_pdfs([b"a", b"b"]) == b"%PDF-1.7"
+
+    def test_output_path_is_unaffected(self, tmp_path):
+        """Test that calls with an output path still save the body and return None."""
+        path = tmp_path / "out.pdf"
+
+        assert make_client().build(b"doc").execute(str(path), lazy=True) is None
+        assert path.read_bytes() == b"%PDF-1.7"
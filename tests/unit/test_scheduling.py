@@ -0,0 +1,139 @@
+"""Unit tests for cost-aware batch scheduling."""
+
+import pytest
+
+from nutrient_dws.batch import BatchRunner
+from nutrient_dws.builder import Pipeline
+from nutrient_dws.client import NutrientClient
+from nutrient_dws.scheduling import BatchScheduler, CostModel, SchedulingPolicy
+from nutrient_dws.transport import InMemoryResponse, InMemoryTransport
+
+
+def sized(*sizes):
+    """In-memory inputs of the given sizes, each starting with its index."""
+    return [bytes([index]) * size for index, size in enumerate(sizes)]
+
+
+class TestCostModel:
+    """Test suite for cost estimates."""
+
+    def test_size_and_tool_weights(self):
+        """Test that cost grows with size and tool weights."""
+        model = CostModel(tool_weights={"ocr-pdf": 5.0})
+
+        assert model.estimate(b"x" * 100) == 100
+        assert model.estimate(b"x" * 100, ["ocr-pdf", "rotate-pages"]) == 600
+
+    def test_page_counter(self):
+        """Test that pages add to the cost when a page counter is given."""
+        model = CostModel(page_counter=lambda item: 3, bytes_per_page=10)
+
+        assert model.estimate(b"x" * 100) == 130
+
+    def test_unknown_size(self, tmp_path):
+        """Test that inputs of unknown size use the default size."""
+        model = CostModel(default_size=42)
+
+        assert model.estimate(str(tmp_path / "missing.pdf")) == 42
+
+
+class TestBatchScheduler:
+    """Test suite for scheduling policies."""
+
+    def test_shortest_first(self):
+        """Test that the cheapest inputs are released first."""
+        scheduler = BatchScheduler(SchedulingPolicy.SHORTEST_FIRST, aging_half_life=None)
+        inputs = sized(500, 2, 90, 7)
+
+        assert list(scheduler.order(inputs)) == [inputs[1], inputs[3], inputs[2], inputs[0]]
+
+    def test_largest_first(self):
+        """Test that the most expensive inputs are released first."""
+        scheduler = BatchScheduler(SchedulingPolicy.LARGEST_FIRST, aging_half_life=None)
+        inputs = sized(500, 2, 90, 7)
+
+        assert list(scheduler.order(inputs)) == [inputs[0], inputs[2], inputs[3], inputs[1]]
+
+    def test_fifo(self):
+        """Test that FIFO keeps the input order."""
+        inputs = sized(500, 2, 90)
+
+        assert list(BatchScheduler(SchedulingPolicy.FIFO).order(inputs)) == inputs
+
+    def test_window_limits_read_ahead(self):
+        """Test that only ``window`` inputs are considered at a time."""
+        scheduler = BatchScheduler(window=2, aging_half_life=None)
+        inputs = sized(500, 90, 2, 7)
+
+        assert list(scheduler.order(inputs)) == [inputs[1], inputs[2], inputs[3], inputs[0]]
+
+    def test_aging_prevents_starvation(self):
+        """Test that a large input is released while small inputs keep arriving."""
+        scheduler = BatchScheduler(window=2, aging_half_life=2)
+        large = b"L" * 1024
+        small = [b"s" * 2] * 50
+
+        released = list(scheduler.order([large, *small]))
+
+        assert released.index(large) < 25
+
+    def test_fair_share_alternates_tenants(self):
+        """Test that a tenant with many inputs does not block other tenants."""
+        tenants = {}
+        inputs = []
+        for index in range(6):
+            item = b"a%d" % index
+            tenants[item] = "bulk"
+            inputs.append(item)
+        for index in range(2):
+            item = b"b%d" % index
+            tenants[item] = "small"
+            inputs.append(item)
+        scheduler = BatchScheduler(SchedulingPolicy.FAIR_SHARE, tenant=tenants.__getitem__)
+
+        released = [tenants[item] for item in scheduler.order(inputs)]
+
+        assert released[:4] == ["bulk", "small", "bulk", "small"]
+
+    def test_invalid_configuration(self):
+        """Test that invalid scheduler options are rejected."""
+        with pytest.raises(ValueError):
+            BatchScheduler("random")
+        with pytest.raises(ValueError):
+            BatchScheduler(SchedulingPolicy.FAIR_SHARE)
+        with pytest.raises(ValueError):
+            BatchScheduler(window=0)
+
+    def test_pop_empty(self):
+        """Test that popping from an empty scheduler raises IndexError."""
+        with pytest.raises(IndexError):
+            BatchScheduler().pop()
+
+
+class TestBatchRunnerScheduling:
+    """Test suite for BatchRunner with a scheduler."""
+
+    def test_runner_submits_in_scheduled_order(self):
+        """Test that a single worker processes inputs shortest first."""
+        seen = []
+
+        def handler(request):
+            _, content, _ = request["files"]["file"]
+            seen.append(len(content))
+            return InMemoryResponse(200, content)
+
+        client = NutrientClient(api_key="key", transport=InMemoryTransport(handler))
+        runner = BatchRunner(
+            client,
+            Pipeline().add_step("flatten-annotations"),
+            max_workers=1,
+            use_processes=False,
+            scheduler=BatchScheduler(aging_half_life=None),
+        )
+
+        results = list(runner.run(sized(300, 1, 20)))
+
+        assert seen == [1, 20, 300]
+        assert all(result.ok for result in results)
+        assert runner.max_pending == 1
+        assert runner.metrics["mean_completion"] > 0
@@ -0,0 +1,124 @@
+"""Unit tests for size-aware automatic timeouts."""
+
+import pytest
+
+from nutrient_dws.client import NutrientClient
+from nutrient_dws.exceptions import NutrientTimeoutError
+from nutrient_dws.http_client import HTTPClient
+from nutrient_dws.timeouts import TimeoutEstimator
+from nutrient_dws.transport import InMemoryResponse, InMemoryTransport
+
+MB = 1024 * 1024
+
+
+class TestTimeoutEstimator:
+    """Test suite for TimeoutEstimator."""
+
+    def test_small_job_gets_short_timeout(self):
+        """Test that a tiny watermark job fails fast."""
+        estimator = TimeoutEstimator()
+        timeout = estimator.estimate("watermark-pdf", 20 * 1024, ["watermark"])
+        assert timeout == pytest.approx(15.0, abs=0.5)
+
+    def test_large_ocr_job_gets_long_timeout(self):
+        """Test that a large OCR job is not killed early."""
+        estimator = TimeoutEstimator()
+        timeout = estimator.estimate("ocr-pdf", 100 * MB, ["ocr"])
+        assert timeout > 1800
+
+    def test_timeout_is_clamped(self):
+        """Test that timeouts stay within the configured bounds."""
+        estimator = TimeoutEstimator(min_timeout=5, max_timeout=60)
+        assert estimator.estimate("ocr-pdf", 1000 * MB, ["ocr"]) == 60
+        assert estimator.estimate("rotate-pages", 0, ["rotate"]) >= 5
+
+    def test_unknown_size_is_not_cut_short(self):
+        """Test that unknown input sizes get the default or maximum timeout without history."""
+        estimator = TimeoutEstimator(base_latency=10, safety_factor=2, min_timeout=1)
+        assert estimator.estimate("convert-to-pdf", None) == 3600
+        assert estimator.estimate("convert-to-pdf", None, default=300) == 300
+
+    def test_unknown_size_uses_history(self):
+        """Test that unknown input sizes scale the fixed overhead once the tool has history."""
+        estimator = TimeoutEstimator(base_latency=10, safety_factor=2, min_timeout=1, min_samples=1)
+        estimator.record("convert-to-pdf", None, [], 30)
+        assert estimator.estimate("convert-to-pdf", None, default=300) == 60
+
+    def test_learns_slow_tools(self):
+        """Test that observed slowness scales the estimate for that tool only."""
+        estimator = TimeoutEstimator(min_samples=3, min_timeout=1)
+        before = estimator.estimate("convert-to-pdf", 10 * MB)
+        modelled = estimator.expected_duration(10 * MB)
+        for _ in range(3):
+            estimator.record("convert-to-pdf", 10 * MB, [], modelled * 4)
+
+        assert estimator.estimate("convert-to-pdf", 10 * MB) == pytest.approx(before * 4)
+        assert estimator.estimate("rotate-pages", 10 * MB) == pytest.approx(before)
+        assert estimator.metrics["convert-to-pdf"]["samples"] == 3
+
+    def test_custom_action_costs(self):
+        """Test that action costs can be overridden."""
+        estimator = TimeoutEstimator(action_costs={"ocr": 100.0})
+        assert estimator.expected_duration(MB, ["ocr"]) == pytest.approx(5 + 101)
+
+
+class TestAutomaticTimeouts:
+    """Test suite for automatic timeouts in the HTTP client."""
+
+    def setup_method(self):
+        """Set up a client with an estimator and in-memory transport."""
+        self.transport = InMemoryTransport(lambda request: InMemoryResponse(200, b"ok"))
+        self.estimator = TimeoutEstimator(min_timeout=1)
+        self.client = NutrientClient(
+            api_key="key", transport=self.transport, timeout_estimator=self.estimator
+        )
+
+    def test_builder_uses_size_and_actions(self):
+        """Test that the builder reports size and actions for estimation."""
+        content = b"x" * MB
+        self.client.build(content).add_step("ocr-pdf").execute()
+
+        _, read = self.transport.requests[0]["timeout"]
+        assert read == pytest.approx(self.estimator.estimate("ocr-pdf", MB, ["ocr"]), rel=0.5)
+        assert self.estimator.metrics["ocr-pdf"]["samples"] == 1
+
+    def test_caller_override_wins(self):
+        """Test that an explicit timeout overrides the derived one."""
+        self.client.build(b"doc").add_step("ocr-pdf").execute(timeout=42)
+        assert self.transport.requests[0]["timeout"] == (10.0, 42.0)
+        assert "ocr-pdf" not in self.estimator.metrics
+
+    def test_timeout_raises_future_estimates(self):
+        """Test that a timed-out request lengthens the next estimate."""
+
+        def handler(request):
+            raise NutrientTimeoutError("timed out")
+
+        estimator = TimeoutEstimator(min_samples=1, min_timeout=1)
+        client = HTTPClient(
+            api_key="key", transport=InMemoryTransport(handler), timeout_estimator=estimator
+        )
+        before = estimator.estimate("ocr-pdf", MB, ["ocr"])
+
+        with pytest.raises(NutrientTimeoutError):
+            client.post("/build", tool="ocr-pdf", input_size=MB, action_types=["ocr"])
+
+        assert estimator.estimate("ocr-pdf", MB, ["ocr"]) > before
+
+    def test_unknown_size_uses_client_timeout(self):
+        """Test that a request of unknown size gets the client's timeout, not the minimum."""
+        transport = InMemoryTransport(lambda request: InMemoryResponse(200, b"ok"))
+        client = HTTPClient(
+            api_key="key", timeout=300, transport=transport, timeout_estimator=self.estimator
+        )
+
+        client.post("/build", tool="ocr-pdf")
+
+        assert transport.requests[0]["timeout"] == (10.0, 300.0)
+
+    def test_without_estimator_uses_fixed_timeout(self):
+        """Test that the static timeout is used when no estimator is set."""
+        transport = InMemoryTransport(lambda request: InMemoryResponse(200, b"ok"))
+        client = NutrientClient(api_key="key", timeout=120, transport=transport)
+        client.build(b"doc").add_step("ocr-pdf").execute()
+        assert transport.requests[0]["timeout"] == (10.0, 120.0)
@@ -0,0 +1,231 @@
+"""Unit tests for transport backends."""
+
+import io
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import Mock, patch
+
+import pytest
+import requests
+
+from nutrient_dws.client import NutrientClient
+from nutrient_dws.deadline import Deadline
+from nutrient_dws.exceptions import (
+    APIError,
+    DeadlineExceededError,
+    NutrientTimeoutError,
+    ValidationError,
+)
+from nutrient_dws.http_client import HTTPClient
+from nutrient_dws.transport import (
+    HTTP2Transport,
+    InMemoryResponse,
+    InMemoryTransport,
+    RequestsTransport,
+)
+
+
+class TestRequestsTransport:
+    """Test suite for the default requests transport."""
+
+    def test_session_has_default_headers(self):
+        """Test that headers passed at construction are set on the session."""
+        transport = RequestsTransport(headers={"X-Test": "1"})
+        assert transport.session.headers["X-Test"] == "1"
+
+    def test_pool_size_is_configurable(self):
+        """Test that the connection pool size is applied to the adapter."""
+        transport = RequestsTransport(pool_maxsize=32)
+        adapter = transport.session.get_adapter("https://api.pspdfkit.com")
+        assert adapter._pool_maxsize == 32
+
+    @patch("requests.Session.request")
+    def test_timeout_is_translated(self, mock_request):
+        """Test that requests timeouts become NutrientTimeoutError."""
+        mock_request.side_effect = requests.Timeout("slow")
+        transport = RequestsTransport()
+
+        with pytest.raises(NutrientTimeoutError, match="after 5 seconds"):
+            transport.send("POST", "https://example.com", timeout=5)
+
+    @patch("requests.Session.request")
+    def test_connection_error_is_translated(self, mock_request):
+        """Test that connection errors become APIError without status code."""
+        mock_request.side_effect = requests.ConnectionError("refused")
+        transport = RequestsTransport()
+
+        with pytest.raises(APIError) as exc_info:
+            transport.send("POST", "https://example.com")
+
+        assert exc_info.value.status_code is None
+
+    @patch("requests.Session.request")
+    def test_stream_flag_is_forwarded(self, mock_request):
+        """Test that streaming requests are not read eagerly."""
+        mock_request.return_value = Mock(status_code=200, headers={})
+        transport = RequestsTransport()
+
+        transport.send("POST", "https://example.com", stream=True)
+
+        assert mock_request.call_args[1]["stream"] is True
+
+    def test_retry_timeout_is_capped_by_deadline(self):
+        """Test that a retry of a slow 503 response times out at the deadline."""
+
+        class SlowUnavailable(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers["Content-Length"]))
+                time.sleep(1)
+                self.send_response(503)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), SlowUnavailable)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_address[1]}/build"
+        transport = RequestsTransport()
+        started = time.monotonic()
+        try:
+            with pytest.raises(DeadlineExceededError):
+                transport.send("POST", url, data={"a": "1"}, timeout=10, deadline=Deadline(1.5))
+        finally:
+            transport.close()
+            server.shutdown()
+            server.server_close()
+
+        assert time.monotonic() - started < 1.9
+
+
+class TestInMemoryTransport:
+    """Test suite for the in-memory transport."""
+
+    def test_client_uses_injected_transport(self):
+        """Test that HTTPClient sends requests through the injected transport."""
+        transport = InMemoryTransport(lambda request: InMemoryResponse(200, b"%PDF-1.7"))
+        client = HTTPClient(api_key="test-key", transport=transport)
+
+        result = client.post("/build", json_data={"parts": []})
+
+        assert result == b"%PDF-1.7"
+        assert len(transport.requests) == 1
+        request = transport.requests[0]
+        assert request["url"] == "https://api.pspdfkit.com/build"
+        assert request["headers"]["Authorization"] == "Bearer test-key"
+        assert json.loads(request["data"]["instructions"]) == {"parts": []}
+
+    def test_error_status_is_mapped(self):
+        """Test that error responses are mapped to exceptions."""
+        body = json.dumps({"message": "Invalid instructions"}).encode()
+        transport = InMemoryTransport(lambda request: InMemoryResponse(422, body))
+        client = HTTPClient(api_key="test-key", transport=transport)
+
+        with pytest.raises(ValidationError, match="Invalid instructions"):
+            client.post("/build")
+
+    def test_request_id_is_reported(self):
+        """Test that the request ID header is attached to API errors."""
+        transport = InMemoryTransport(
+            lambda request: InMemoryResponse(500, b"boom", {"x-request-id": "abc"})
+        )
+        client = HTTPClient(api_key="test-key", transport=transport)
+
+        with pytest.raises(APIError) as exc_info:
+            client.post("/build")
+
+        assert exc_info.value.request_id == "abc"
+
+    def test_close_closes_transport(self):
+        """Test that closing the client closes the transport."""
+        transport = InMemoryTransport()
+        with NutrientClient(api_key="test-key", transport=transport) as client:
+            client.convert_to_pdf(b"content")
+
+        assert transport.closed
+        assert len(transport.requests) == 1
+
+    def test_session_unavailable_with_custom_transport(self):
+        """Test that _session is only exposed for the requests transport."""
+        client = HTTPClient(api_key="test-key", transport=InMemoryTransport())
+        assert not hasattr(client, "_session")
+
+    def test_streamed_body_is_chunked(self):
+        """Test that response bodies can be iterated in chunks."""
+        transport = InMemoryTransport(lambda request: InMemoryResponse(200, b"abcdef"))
+        response = transport.send("POST", "https://example.com", stream=True)
+        assert list(response.iter_bytes(4)) == [b"abcd", b"ef"]
+
+    def test_body_streamed_to_output(self):
+        """Test that post(output=...) writes the body to the stream instead of returning it."""
+        transport = InMemoryTransport(lambda request: InMemoryResponse(200, b"%PDF-1.7"))
+        client = HTTPClient(api_key="test-key", transport=transport)
+        output = io.BytesIO()
+
+        assert client.post("/build", output=output) == b""
+        assert output.getvalue() == b"%PDF-1.7"
+
+    def test_read_error_while_streaming(self):
+        """Test that connection errors while reading the body are mapped to APIError."""
+        raw = Mock(status_code=200, headers={})
+        raw.iter_content.side_effect = requests.exceptions.ChunkedEncodingError("reset")
+        transport = InMemoryTransport(lambda request: raw)
+        client = HTTPClient(api_key="test-key", transport=transport)
+
+        with pytest.raises(APIError, match="while reading the response"):
+            client.post("/build", output=io.BytesIO())
+
+
+class TestHTTP2Transport:
+    """Test suite for the HTTP/2 transport."""
+
+    def test_missing_dependency_raises_import_error(self):
+        """Test that a helpful error is raised without httpx installed."""
+        missing = patch("importlib.import_module", side_effect=ImportError("no httpx"))
+        with missing, pytest.raises(ImportError, match=r"nutrient-dws\[http2\]"):
+            HTTP2Transport()
+
+    def test_client_is_configured_for_http2(self):
+        """Test that the httpx connection pool uses HTTP/2 and the connection limit."""
+        pytest.importorskip("httpx")
+        pytest.importorskip("h2")
+        transport = HTTP2Transport(headers={"X-Test": "1"}, max_connections=2)
+
+        pool = transport.client._transport._pool
+        assert pool._max_connections == 2
+        assert pool._max_keepalive_connections == 2
+        assert pool._http2 is True
+        assert transport.client.headers["X-Test"] == "1"
+        transport.close()
+
+    def test_send_retries_statuses_within_deadline(self):
+        """Test that retryable statuses are retried and that retries stop at the deadline."""
+        httpx = pytest.importorskip("httpx")
+        pytest.importorskip("h2")
+        statuses = [503, 200]
+        bodies = []
+
+        def handler(request):
+            bodies.append(request.read())
+            status = statuses.pop(0) if statuses else 503
+            return httpx.Response(status, content=b"ok", headers={"Retry-After": "0"})
+
+        transport = HTTP2Transport()
+        transport._client = httpx.Client(transport=httpx.MockTransport(handler))
+        files = {"file": ("doc.pdf", io.BytesIO(b"%PDF"), "application/pdf")}
+
+        response = transport.send("POST", "https://example.test/build", files=files, timeout=5)
+
+        assert response.status_code == 200
+        assert len(bodies) == 2
+        assert bodies[0] == bodies[1]
+        assert b"%PDF" in bodies[1]
+
+        throttled = httpx.Response(503, headers={"Retry-After": "30"})
+        transport._client = httpx.Client(transport=httpx.MockTransport(lambda request: throttled))
+        with pytest.raises(DeadlineExceededError):
+            transport.send("POST", "https://example.test/build", deadline=Deadline(1))
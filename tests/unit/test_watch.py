@@ -0,0 +1,145 @@
+"""Unit tests for the watch-folder processor."""
+
+import os
+import threading
+import time
+
+from nutrient_dws.builder import Pipeline
+from nutrient_dws.client import NutrientClient
+from nutrient_dws.journal import BatchJournal
+from nutrient_dws.transport import InMemoryResponse, InMemoryTransport
+from nutrient_dws.watch import FolderWatcher
+
+
+class FakeClock:
+    """Manually advanced clock."""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def upper_handler(request):
+    """Upper-case the uploaded file."""
+    _, content, _ = request["files"]["file"]
+    return InMemoryResponse(200, content.upper())
+
+
+def wait_for(condition, timeout=5.0):
+    """Poll ``condition`` until it is true or the timeout expires."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class TestPoll:
+    """Test suite for change detection and debouncing."""
+
+    def setup_method(self):
+        """Set up a watcher with a fake clock."""
+        self.clock = FakeClock()
+        self.client = NutrientClient(api_key="key", transport=InMemoryTransport(upper_handler))
+
+    def watcher(self, directory, **kwargs):
+        """Create a watcher for ``directory``."""
+        return FolderWatcher(
+            self.client,
+            Pipeline(),
+            directory,
+            output=directory / "out",
+            settle_time=2,
+            clock=self.clock,
+            **kwargs,
+        )
+
+    def test_file_ready_after_settling(self, tmp_path):
+        """Test that files are returned only after they stop changing."""
+        watcher = self.watcher(tmp_path)
+        path = tmp_path / "scan.pdf"
+        path.write_bytes(b"part")
+
+        assert watcher.poll() == []
+        self.clock.now += 1
+        path.write_bytes(b"partial write")
+        assert watcher.poll() == []
+        self.clock.now += 1
+        assert watcher.poll() == []
+        self.clock.now += 2
+        [(ready, _)] = watcher.poll()
+        assert ready == str(path)
+        assert watcher.poll() == []
+
+    def test_changed_file_is_returned_again(self, tmp_path):
+        """Test that a new version of a processed file is picked up."""
+        watcher = self.watcher(tmp_path)
+        path = tmp_path / "scan.pdf"
+        path.write_bytes(b"v1")
+        watcher.poll()
+        self.clock.now += 3
+        assert len(watcher.poll()) == 1
+
+        path.write_bytes(b"version 2")
+        watcher.poll()
+        self.clock.now += 3
+        assert len(watcher.poll()) == 1
+
+    def test_ignores_hidden_output_and_pattern(self, tmp_path):
+        """Test that hidden files, the output directory and other types are skipped."""
+        watcher = self.watcher(tmp_path, pattern="*.pdf")
+        (tmp_path / "out").mkdir()
+        (tmp_path / "out" / "done.pdf").write_bytes(b"x")
+        (tmp_path / ".partial.pdf").write_bytes(b"x")
+        (tmp_path / "notes.txt").write_bytes(b"x")
+        (tmp_path / "sub").mkdir()
+        (tmp_path / "sub" / "deep.pdf").write_bytes(b"x")
+
+        watcher.poll()
+        self.clock.now += 3
+        assert [os.path.basename(path) for path, _ in watcher.poll()] == ["deep.pdf"]
+
+
+class TestRun:
+    """Test suite for the watch loop."""
+
+    def test_processes_files_and_survives_restart(self, tmp_path):
+        """Test that files are processed once, including across restarts."""
+        inbox = tmp_path / "inbox"
+        inbox.mkdir()
+        (inbox / "a.pdf").write_bytes(b"a")
+        transport = InMemoryTransport(upper_handler)
+        client = NutrientClient(api_key="key", transport=transport)
+        journal_path = tmp_path / "journal.db"
+
+        def run_until_idle():
+            with BatchJournal(journal_path, job_id="watch") as journal:
+                watcher = FolderWatcher(
+                    client,
+                    Pipeline(),
+                    inbox,
+                    output=tmp_path / "out",
+                    settle_time=0.02,
+                    poll_interval=0.01,
+                    journal=journal,
+                )
+                thread = threading.Thread(target=watcher.run)
+                thread.start()
+                try:
+                    wait_for(lambda: (tmp_path / "out" / "a.pdf").exists())
+                    time.sleep(0.1)
+                finally:
+                    watcher.stop()
+                    thread.join(5)
+                return watcher
+
+        first = run_until_idle()
+        second = run_until_idle()
+
+        assert (tmp_path / "out" / "a.pdf").read_bytes() == b"A"
+        assert first.metrics["succeeded"] == 1
+        assert second.metrics["submitted"] == 0
+        assert len(transport.requests) == 1
@@ -0,0 +1,175 @@
+"""Unit tests for multi-stage workflows."""
+
+import json
+import threading
+
+import pytest
+
+from nutrient_dws.builder import Pipeline
+from nutrient_dws.client import NutrientClient
+from nutrient_dws.http_client import capture_responses
+from nutrient_dws.priority import current_priority, priority_scope
+from nutrient_dws.transport import InMemoryResponse, InMemoryTransport
+from nutrient_dws.workflow import Workflow
+
+
+def tagging_handler(request):
+    """Concatenate the uploads and append the watermark text of the request."""
+    instructions = json.loads(request["data"]["instructions"])
+    body = b""
+    for _, content, _ in request["files"].values():
+        body += content if isinstance(content, bytes) else content.read()
+    for action in instructions["actions"]:
+        body += b"+" + action["text"].encode()
+    return InMemoryResponse(200, body)
+
+
+def watermark(text):
+    """Pipeline adding a text watermark, which the tagging handler appends to the body."""
+    return Pipeline().add_step("watermark-pdf", {"text": text, "width": 100, "height": 100})
+
+
+def make_client(handler=tagging_handler):
+    """Client sending requests to ``handler``."""
+    return NutrientClient(api_key="key", transport=InMemoryTransport(handler))
+
+
+class TestWorkflowDefinition:
+    """Test suite for defining stages."""
+
+    def test_stage_needs_exactly_one_input(self):
+        """Test that a stage needs either an input file or upstream stages."""
+        workflow = Workflow(make_client()).add_stage("a", input_file=b"doc")
+
+        with pytest.raises(ValueError, match="either"):
+            workflow.add_stage("b")
+        with pytest.raises(ValueError, match="either"):
+            workflow.add_stage("b", input_file=b"doc", after="a")
+
+    def test_unknown_or_duplicate_stage(self):
+        """Test that stages must be unique and depend on existing stages."""
+        workflow = Workflow(make_client()).add_stage("a", input_file=b"doc")
+
+        with pytest.raises(ValueError, match="already exists"):
+            workflow.add_stage("a", input_file=b"doc")
+        with pytest.raises(ValueError, match="Unknown stage"):
+            workflow.add_stage("b", after="missing")
+
+
+class TestWorkflowRun:
+    """Test suite for running workflows."""
+
+    def test_chained_stages(self, tmp_path):
+        """Test that each stage uploads the output of the stage before it."""
+        output = tmp_path / "out" / "final.pdf"
+        workflow = (
+            Workflow(make_client(), spool_size=4)
+            .add_stage("first", watermark("A"), input_file=b"doc")
+            .add_stage("second", watermark("B"), after="first")
+            .add_stage("third", watermark("C"), after="second", output_path=str(output))
+        )
+
+        results = workflow.run()
+
+        assert [result.status for result in results.values()] == ["succeeded"] * 3
+        assert output.read_bytes() == b"doc+A+B+C"
+        assert workflow.read("third") == b"doc+A+B+C"
+        assert results["third"].size == len(b"doc+A+B+C")
+        with pytest.raises(ValueError, match="No output"):
+            workflow.open("first")
+        workflow.close()
+
+    def test_keep_intermediates(self):
+        """Test that intermediate outputs can be kept for reading."""
+        with Workflow(make_client(), keep_intermediates=True) as workflow:
+            workflow.add_stage("first", watermark("A"), input_file=b"doc")
+            workflow.add_stage("second", watermark("B"), after="first")
+            workflow.run()
+
+            assert workflow.read("first") == b"doc+A"
+
+    def test_branches_run_concurrently_and_merge(self):
+        """Test that independent branches overlap and a later stage merges them."""
+        barrier = threading.Barrier(2, timeout=5)
+
+        def handler(request):
+            instructions = json.loads(request["data"]["instructions"])
+            if len(instructions["parts"]) == 1 and instructions["actions"]:
+                barrier.wait()
+            return tagging_handler(request)
+
+        with Workflow(make_client(handler), max_workers=2) as workflow:
+            workflow.add_stage("source", input_file=b"doc")
+            workflow.add_stage("left", watermark("L"), after="source")
+            workflow.add_stage("right", watermark("R"), after="source")
+            workflow.add_stage("merged", after=["left", "right"])
+            results = workflow.run()
+
+            assert all(result.ok for result in results.values())
+            assert workflow.read("merged") == b"doc+Ldoc+R"
+
+    def test_scopes_apply_to_stages(self):
+        """Test that the caller's priority and response capture reach every stage."""
+        lanes = []
+
+        def handler(request):
+            lanes.append(current_priority())
+            return tagging_handler(request)
+
+        with Workflow(make_client(handler)) as workflow:
+            workflow.add_stage("first", watermark("A"), input_file=b"doc")
+            workflow.add_stage("second", watermark("B"), after="first")
+            with priority_scope("bulk"), capture_responses() as responses:
+                results = workflow.run()
+
+        assert all(result.ok for result in results.values())
+        assert lanes == ["bulk", "bulk"]
+        assert len(responses) == 2
+
+    def test_transient_failure_is_retried(self):
+        """Test that a stage failing with a retryable status is retried on its own."""
+        calls = []
+
+        def handler(request):
+            text = json.loads(request["data"]["instructions"])["actions"][0]["text"]
+            calls.append(text)
+            if text == "B" and calls.count("B") == 1:
+                return InMemoryResponse(503, b"busy")
+            return tagging_handler(request)
+
+        with Workflow(make_client(handler), backoff=0) as workflow:
+            workflow.add_stage("first", watermark("A"), input_file=b"doc")
+            workflow.add_stage("second", watermark("B"), after="first")
+            results = workflow.run()
+
+            assert results["second"].attempts == 2
+            assert calls == ["A", "B", "B"]
+            assert workflow.read("second") == b"doc+A+B"
+
+    def test_failed_stage_skips_dependents_and_resumes(self):
+        """Test that a rerun only repeats the stages that did not succeed."""
+        calls = []
+        broken = [True]
+
+        def handler(request):
+            text = json.loads(request["data"]["instructions"])["actions"][0]["text"]
+            calls.append(text)
+            if text == "B" and broken[0]:
+                return InMemoryResponse(400, b"bad request")
+            return tagging_handler(request)
+
+        with Workflow(make_client(handler), backoff=0) as workflow:
+            workflow.add_stage("first", watermark("A"), input_file=b"doc")
+            workflow.add_stage("second", watermark("B"), after="first")
+            workflow.add_stage("third", watermark("C"), after="second")
+            results = workflow.run()
+
+            assert [r.status for r in results.values()] == ["succeeded", "failed", "skipped"]
+            assert results["second"].attempts == 1
+
+            broken[0] = False
+            results = workflow.run()
+
+            assert all(result.ok for result in results.values())
+            assert calls == ["A", "B", "B", "C"]
+            assert workflow.read("third") == b"doc+A+B+C"
@@ -0,0 +1,79 @@
+"""Unit tests for the background writer."""
+
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from nutrient_dws.writer import BackgroundWriter
+
+
+class TestBackgroundWriter:
+    """Test suite for BackgroundWriter."""
+
+    def test_writes_outputs(self, tmp_path):
+        """Test that outputs are saved and counted."""
+        with BackgroundWriter(max_workers=2) as writer:
+            futures = [
+                writer.submit(b"content", str(tmp_path / "out" / f"{index}.pdf"))
+                for index in range(3)
+            ]
+            assert all(future.result() >= 0 for future in futures)
+
+        metrics = writer.metrics
+        assert (tmp_path / "out" / "2.pdf").read_bytes() == b"content"
+        assert metrics["writes"] == 3
+        assert metrics["bytes_written"] == 21
+        assert metrics["queue_depth"] == 0
+        assert metrics["max_queue_depth"] >= 1
+
+    def test_submit_blocks_when_full(self, tmp_path):
+        """Test that a full queue blocks submitters until a write finishes."""
+        release = threading.Event()
+        submitted = threading.Event()
+
+        def slow_save(content, output_path, fsync=None):
+            release.wait(5)
+
+        with patch("nutrient_dws.writer.save_file_output", slow_save):
+            writer = BackgroundWriter(max_workers=1, max_pending=2)
+            writer.submit(b"a", str(tmp_path / "a.pdf"))
+            writer.submit(b"b", str(tmp_path / "b.pdf"))
+
+            def submit_third():
+                writer.submit(b"c", str(tmp_path / "c.pdf"))
+                submitted.set()
+
+            thread = threading.Thread(target=submit_third)
+            thread.start()
+
+            assert not submitted.wait(0.1)
+            assert writer.metrics["queue_depth"] == 2
+            release.set()
+            assert submitted.wait(5)
+            thread.join()
+            writer.close()
+
+        assert writer.metrics["writes"] == 3
+        assert writer.metrics["blocked_seconds"] > 0
+
+    def test_byte_budget(self):
+        """Test that the byte budget limits the queue, except for a lone large output."""
+        writer = BackgroundWriter(max_workers=1, max_pending=10, max_pending_bytes=10)
+
+        assert writer._has_capacity(100)
+        writer._pending, writer._pending_bytes = 1, 6
+        assert writer._has_capacity(4)
+        assert not writer._has_capacity(5)
+
+    def test_failed_write(self, tmp_path):
+        """Test that write errors are returned through the future and counted."""
+        (tmp_path / "file").write_bytes(b"")
+
+        with BackgroundWriter() as writer:
+            future = writer.submit(b"content", str(tmp_path / "file" / "out.pdf"))
+            with pytest.raises(OSError):
+                future.result()
+
+        assert writer.metrics["failed"] == 1
+        assert writer.metrics["queue_depth"] == 0